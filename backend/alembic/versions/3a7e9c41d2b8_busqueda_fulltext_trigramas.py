@@ -0,0 +1,68 @@
+"""busqueda full-text (es_unaccent) + trigramas en producto_resumen
+
+Revision ID: 3a7e9c41d2b8
+Revises: dc626e612160
+Create Date: 2026-10-17 11:40:07.532918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '3a7e9c41d2b8'
+down_revision: Union[str, None] = 'dc626e612160'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+
+    # Configuración española que además ignora acentos ("camión" = "camion")
+    op.execute("CREATE TEXT SEARCH CONFIGURATION es_unaccent ( COPY = spanish )")
+    op.execute(
+        """
+        ALTER TEXT SEARCH CONFIGURATION es_unaccent
+            ALTER MAPPING FOR hword, hword_part, word
+            WITH unaccent, spanish_stem
+        """
+    )
+
+    op.add_column('producto_resumen', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+    op.add_column('producto_resumen', sa.Column('texto_busqueda', sa.Text(), server_default='', nullable=False))
+
+    # Backfill (misma lógica que services/busqueda_service.py)
+    op.execute(
+        """
+        UPDATE producto_resumen SET
+            search_vector =
+                setweight(to_tsvector('es_unaccent', nombre), 'A')
+                || setweight(
+                    to_tsvector(
+                        'es_unaccent',
+                        concat(array_to_string(marcas, ' '), ' ', array_to_string(categorias, ' '))
+                    ),
+                    'B'
+                ),
+            texto_busqueda = unaccent(lower(concat(
+                nombre, ' ', concat(array_to_string(marcas, ' '), ' ', array_to_string(skus, ' '))
+            )))
+        """
+    )
+
+    op.create_index('ix_producto_resumen_search_vector', 'producto_resumen', ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index('ix_producto_resumen_texto_busqueda_trgm', 'producto_resumen', ['texto_busqueda'], unique=False, postgresql_using='gin', postgresql_ops={'texto_busqueda': 'gin_trgm_ops'})
+    op.create_index('ix_variante_sku_trgm', 'variante', ['sku'], unique=False, postgresql_using='gin', postgresql_ops={'sku': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_variante_sku_trgm', table_name='variante')
+    op.drop_index('ix_producto_resumen_texto_busqueda_trgm', table_name='producto_resumen')
+    op.drop_index('ix_producto_resumen_search_vector', table_name='producto_resumen')
+    op.drop_column('producto_resumen', 'texto_busqueda')
+    op.drop_column('producto_resumen', 'search_vector')
+    op.execute("DROP TEXT SEARCH CONFIGURATION IF EXISTS es_unaccent")
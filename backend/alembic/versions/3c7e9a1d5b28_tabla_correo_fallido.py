@@ -0,0 +1,42 @@
+"""tabla correo_fallido (cola de correos muertos)
+
+Revision ID: 3c7e9a1d5b28
+Revises: a6b3d9e0f412
+Create Date: 2026-10-17 19:05:12.384620
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c7e9a1d5b28'
+down_revision: Union[str, None] = 'a6b3d9e0f412'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'correo_fallido',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('tipo', sa.String(length=50), nullable=False),
+        sa.Column('destinatario', sa.String(length=255), nullable=False),
+        sa.Column('asunto', sa.String(length=255), nullable=False),
+        sa.Column('html', sa.Text(), nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('intentos', sa.Integer(), nullable=False),
+        sa.Column('creado_en', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('reenviado_en', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_correo_fallido_tipo'), 'correo_fallido', ['tipo'], unique=False)
+    op.create_index(op.f('ix_correo_fallido_creado_en'), 'correo_fallido', ['creado_en'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_correo_fallido_creado_en'), table_name='correo_fallido')
+    op.drop_index(op.f('ix_correo_fallido_tipo'), table_name='correo_fallido')
+    op.drop_table('correo_fallido')
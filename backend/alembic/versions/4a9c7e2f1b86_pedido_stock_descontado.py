@@ -0,0 +1,41 @@
+"""pedido.stock_descontado (inventario descontado o solo reservado)
+
+Revision ID: 4a9c7e2f1b86
+Revises: d3a8f6c21e95
+Create Date: 2026-10-18 10:12:47.550318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4a9c7e2f1b86'
+down_revision: Union[str, None] = 'd3a8f6c21e95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'pedido',
+        sa.Column('stock_descontado', sa.Boolean(), server_default='true', nullable=False),
+    )
+    # Pedidos SINPE con reservas que nunca se consumieron: su inventario
+    # sigue (o quedó) solo reservado
+    op.execute(
+        """
+        UPDATE pedido p SET stock_descontado = false
+        WHERE EXISTS (SELECT 1 FROM reserva_stock r WHERE r.pedido_id = p.id)
+          AND NOT EXISTS (
+              SELECT 1 FROM reserva_stock r
+              WHERE r.pedido_id = p.id AND r.estado = 'CONSUMIDA'
+          )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('pedido', 'stock_descontado')
@@ -0,0 +1,64 @@
+"""totales acumulados por tipo de movimiento en caja_turno
+
+Revision ID: 5d3c1e8f9a20
+Revises: e2a9b7c35d10
+Create Date: 2026-10-17 17:05:18.331720
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d3c1e8f9a20'
+down_revision: Union[str, None] = 'e2a9b7c35d10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+COLUMNAS = (
+    ('total_ventas_efectivo', 'VENTA_EFECTIVO'),
+    ('total_ingresos_efectivo', 'INGRESO_EFECTIVO'),
+    ('total_devoluciones_efectivo', 'DEVOLUCION_EFECTIVO'),
+    ('total_retiros_efectivo', 'RETIRO_EFECTIVO'),
+)
+
+
+def upgrade() -> None:
+    for columna, _ in COLUMNAS:
+        op.add_column(
+            'caja_turno',
+            sa.Column(columna, sa.Numeric(12, 2), server_default='0', nullable=False),
+        )
+    op.add_column(
+        'caja_turno',
+        sa.Column('cantidad_movimientos', sa.Integer(), server_default='0', nullable=False),
+    )
+
+    # Backfill desde los movimientos existentes
+    sumas = ",\n".join(
+        f"COALESCE(SUM(monto) FILTER (WHERE tipo = '{tipo}'), 0) AS {columna}"
+        for columna, tipo in COLUMNAS
+    )
+    asignaciones = ", ".join(f"{columna} = m.{columna}" for columna, _ in COLUMNAS)
+    op.execute(
+        f"""
+        UPDATE caja_turno AS c
+        SET {asignaciones}, cantidad_movimientos = m.cantidad
+        FROM (
+            SELECT caja_turno_id, COUNT(*) AS cantidad,
+            {sumas}
+            FROM caja_movimiento
+            GROUP BY caja_turno_id
+        ) AS m
+        WHERE m.caja_turno_id = c.id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('caja_turno', 'cantidad_movimientos')
+    for columna, _ in reversed(COLUMNAS):
+        op.drop_column('caja_turno', columna)
@@ -0,0 +1,34 @@
+"""indices keyset (clave de orden + producto_id) en producto_resumen
+
+Revision ID: 7b1f0d52c9a4
+Revises: 3a7e9c41d2b8
+Create Date: 2026-10-17 13:05:52.204117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b1f0d52c9a4'
+down_revision: Union[str, None] = '3a7e9c41d2b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_index('ix_producto_resumen_nombre', table_name='producto_resumen')
+    op.drop_index('ix_producto_resumen_precio_minimo', table_name='producto_resumen')
+    op.create_index('ix_producto_resumen_keyset_created_at', 'producto_resumen', ['created_at', 'producto_id'], unique=False)
+    op.create_index('ix_producto_resumen_keyset_precio', 'producto_resumen', ['precio_minimo', 'producto_id'], unique=False)
+    op.create_index('ix_producto_resumen_keyset_nombre', 'producto_resumen', ['nombre', 'producto_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_producto_resumen_keyset_nombre', table_name='producto_resumen')
+    op.drop_index('ix_producto_resumen_keyset_precio', table_name='producto_resumen')
+    op.drop_index('ix_producto_resumen_keyset_created_at', table_name='producto_resumen')
+    op.create_index('ix_producto_resumen_precio_minimo', 'producto_resumen', ['precio_minimo'], unique=False)
+    op.create_index('ix_producto_resumen_nombre', 'producto_resumen', ['nombre'], unique=False)
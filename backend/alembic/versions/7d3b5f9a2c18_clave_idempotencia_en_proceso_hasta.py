@@ -0,0 +1,35 @@
+"""clave_idempotencia.en_proceso_hasta (plazo de las claves EN_PROCESO)
+
+Revision ID: 7d3b5f9a2c18
+Revises: 4a9c7e2f1b86
+Create Date: 2026-10-18 10:58:31.204716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d3b5f9a2c18'
+down_revision: Union[str, None] = '4a9c7e2f1b86'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'clave_idempotencia',
+        sa.Column('en_proceso_hasta', sa.DateTime(timezone=True), nullable=True),
+    )
+    # Las EN_PROCESO que ya existían quedan con el plazo vencido: la
+    # siguiente purga las borra
+    op.execute(
+        "UPDATE clave_idempotencia SET en_proceso_hasta = creado_en "
+        "WHERE estado = 'EN_PROCESO'"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('clave_idempotencia', 'en_proceso_hasta')
@@ -0,0 +1,28 @@
+"""indices keyset (fecha_creacion, id) en venta_pos
+
+Revision ID: 8f4e2b6d7c51
+Revises: 5d3c1e8f9a20
+Create Date: 2026-10-17 17:48:02.116093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f4e2b6d7c51'
+down_revision: Union[str, None] = '5d3c1e8f9a20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_venta_pos_keyset', 'venta_pos', ['fecha_creacion', 'id'], unique=False)
+    op.create_index('ix_venta_pos_vendedor_keyset', 'venta_pos', ['vendedor_id', 'fecha_creacion', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_venta_pos_vendedor_keyset', table_name='venta_pos')
+    op.drop_index('ix_venta_pos_keyset', table_name='venta_pos')
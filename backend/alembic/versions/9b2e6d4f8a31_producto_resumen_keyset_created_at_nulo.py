@@ -0,0 +1,33 @@
+"""keyset de created_at en producto_resumen con NULL como la fecha más antigua
+
+Revision ID: 9b2e6d4f8a31
+Revises: 7d3b5f9a2c18
+Create Date: 2026-10-18 11:36:05.817942
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b2e6d4f8a31'
+down_revision: Union[str, None] = '7d3b5f9a2c18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_index('ix_producto_resumen_keyset_created_at', table_name='producto_resumen')
+    op.create_index(
+        'ix_producto_resumen_keyset_created_at',
+        'producto_resumen',
+        [sa.text("coalesce(created_at, TIMESTAMPTZ '1970-01-01 00:00:00+00')"), 'producto_id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_producto_resumen_keyset_created_at', table_name='producto_resumen')
+    op.create_index('ix_producto_resumen_keyset_created_at', 'producto_resumen', ['created_at', 'producto_id'], unique=False)
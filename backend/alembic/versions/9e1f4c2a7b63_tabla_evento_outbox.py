@@ -0,0 +1,49 @@
+"""tabla evento_outbox (outbox transaccional)
+
+Revision ID: 9e1f4c2a7b63
+Revises: 3c7e9a1d5b28
+Create Date: 2026-10-17 19:48:26.730158
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e1f4c2a7b63'
+down_revision: Union[str, None] = '3c7e9a1d5b28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'evento_outbox',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('tipo', sa.String(length=50), nullable=False),
+        sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('estado', sa.String(length=20), nullable=False),
+        sa.Column('intentos', sa.Integer(), nullable=False),
+        sa.Column('ultimo_error', sa.Text(), nullable=True),
+        sa.Column('creado_en', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('disponible_en', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('procesado_en', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_evento_outbox_pendientes',
+        'evento_outbox',
+        ['disponible_en', 'id'],
+        unique=False,
+        postgresql_where=sa.text("estado = 'PENDIENTE'"),
+    )
+    op.create_index(op.f('ix_evento_outbox_procesado_en'), 'evento_outbox', ['procesado_en'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_evento_outbox_procesado_en'), table_name='evento_outbox')
+    op.drop_index('ix_evento_outbox_pendientes', table_name='evento_outbox')
+    op.drop_table('evento_outbox')
@@ -0,0 +1,66 @@
+"""indices de busqueda de clientes POS (prefijo y trigramas)
+
+Revision ID: a6b3d9e0f412
+Revises: 8f4e2b6d7c51
+Create Date: 2026-10-17 18:32:40.551207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6b3d9e0f412'
+down_revision: Union[str, None] = '8f4e2b6d7c51'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    # unaccent() es STABLE y no se puede indexar: wrapper IMMUTABLE con
+    # el diccionario fijo
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION inmutable_unaccent(text)
+        RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+        """
+    )
+    op.execute(
+        """
+        CREATE INDEX ix_usuario_correo_prefijo
+        ON usuario (lower(correo) text_pattern_ops)
+        WHERE rol = 'CLIENTE'
+        """
+    )
+    op.execute(
+        """
+        CREATE INDEX ix_usuario_nombre_prefijo
+        ON usuario (lower(inmutable_unaccent(nombre)) text_pattern_ops)
+        WHERE rol = 'CLIENTE'
+        """
+    )
+    op.execute(
+        """
+        CREATE INDEX ix_usuario_texto_cliente_trgm
+        ON usuario USING gin (
+            lower(inmutable_unaccent(
+                nombre || ' ' || correo || ' '
+                || coalesce(regexp_replace(telefono, '\\D', '', 'g'), '')
+            )) gin_trgm_ops
+        )
+        WHERE rol = 'CLIENTE'
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_usuario_texto_cliente_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_usuario_nombre_prefijo")
+    op.execute("DROP INDEX IF EXISTS ix_usuario_correo_prefijo")
+    op.execute("DROP FUNCTION IF EXISTS inmutable_unaccent(text)")
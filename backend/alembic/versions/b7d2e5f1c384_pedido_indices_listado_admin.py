@@ -0,0 +1,42 @@
+"""indices del listado admin de pedidos (keyset, filtros, prefijo)
+
+Revision ID: b7d2e5f1c384
+Revises: 9e1f4c2a7b63
+Create Date: 2026-10-17 21:14:26.408713
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d2e5f1c384'
+down_revision: Union[str, None] = '9e1f4c2a7b63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_pedido_keyset', 'pedido', ['fecha_creacion', 'id'], unique=False)
+    op.create_index('ix_pedido_estado_keyset', 'pedido', ['estado', 'fecha_creacion', 'id'], unique=False)
+    op.create_index('ix_pedido_sucursal_keyset', 'pedido', ['sucursal_id', 'fecha_creacion', 'id'], unique=False)
+    op.create_index('ix_pedido_cliente_keyset', 'pedido', ['cliente_id', 'fecha_creacion', 'id'], unique=False)
+    op.create_index(
+        'ix_pedido_numero_prefijo',
+        'pedido',
+        ['numero_pedido'],
+        unique=False,
+        postgresql_ops={'numero_pedido': 'varchar_pattern_ops'},
+    )
+    op.create_index('ix_pago_metodo_pedido', 'pago', ['metodo', 'pedido_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_pago_metodo_pedido', table_name='pago')
+    op.drop_index('ix_pedido_numero_prefijo', table_name='pedido')
+    op.drop_index('ix_pedido_cliente_keyset', table_name='pedido')
+    op.drop_index('ix_pedido_sucursal_keyset', table_name='pedido')
+    op.drop_index('ix_pedido_estado_keyset', table_name='pedido')
+    op.drop_index('ix_pedido_keyset', table_name='pedido')
@@ -0,0 +1,28 @@
+"""clave_idempotencia en venta_pos (sincronización POS por lotes)
+
+Revision ID: c4d82a6e1f37
+Revises: 7b1f0d52c9a4
+Create Date: 2026-10-17 15:42:10.518304
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d82a6e1f37'
+down_revision: Union[str, None] = '7b1f0d52c9a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('venta_pos', sa.Column('clave_idempotencia', sa.String(length=64), nullable=True))
+    op.create_unique_constraint('venta_pos_clave_idempotencia_key', 'venta_pos', ['clave_idempotencia'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('venta_pos_clave_idempotencia_key', 'venta_pos', type_='unique')
+    op.drop_column('venta_pos', 'clave_idempotencia')
@@ -0,0 +1,64 @@
+"""tabla reserva_stock (reservas de stock con vencimiento)
+
+Revision ID: d3a8f6c21e95
+Revises: b7d2e5f1c384
+Create Date: 2026-10-17 22:41:09.183527
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a8f6c21e95'
+down_revision: Union[str, None] = 'b7d2e5f1c384'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'reserva_stock',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('variante_id', sa.Integer(), nullable=False),
+        sa.Column('sucursal_id', sa.Integer(), nullable=False),
+        sa.Column('cantidad', sa.Integer(), nullable=False),
+        sa.Column('carrito_id', sa.Integer(), nullable=True),
+        sa.Column('pedido_id', sa.Integer(), nullable=True),
+        sa.Column('estado', sa.String(length=20), nullable=False),
+        sa.Column('expira_en', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('creado_en', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('actualizado_en', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['carrito_id'], ['carrito.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['pedido_id'], ['pedido.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['sucursal_id'], ['sucursal.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['variante_id'], ['variante.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_reserva_stock_carrito_id'), 'reserva_stock', ['carrito_id'], unique=False)
+    op.create_index(op.f('ix_reserva_stock_pedido_id'), 'reserva_stock', ['pedido_id'], unique=False)
+    op.create_index(
+        'ix_reserva_stock_activas',
+        'reserva_stock',
+        ['sucursal_id', 'variante_id'],
+        unique=False,
+        postgresql_where=sa.text("estado = 'ACTIVA'"),
+        postgresql_include=['cantidad', 'expira_en'],
+    )
+    op.create_index(
+        'ix_reserva_stock_vencimiento',
+        'reserva_stock',
+        ['expira_en'],
+        unique=False,
+        postgresql_where=sa.text("estado = 'ACTIVA'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reserva_stock_vencimiento', table_name='reserva_stock')
+    op.drop_index('ix_reserva_stock_activas', table_name='reserva_stock')
+    op.drop_index(op.f('ix_reserva_stock_pedido_id'), table_name='reserva_stock')
+    op.drop_index(op.f('ix_reserva_stock_carrito_id'), table_name='reserva_stock')
+    op.drop_table('reserva_stock')
@@ -0,0 +1,123 @@
+"""add producto_resumen (modelo de lectura del catálogo)
+
+Revision ID: dc626e612160
+Revises: 6e3b0cc04f19
+Create Date: 2026-10-17 09:12:41.118203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'dc626e612160'
+down_revision: Union[str, None] = '6e3b0cc04f19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'producto_resumen',
+        sa.Column('producto_id', sa.Integer(), nullable=False),
+        sa.Column('nombre', sa.String(length=200), nullable=False),
+        sa.Column('activo', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('precio_minimo', sa.Numeric(10, 2), nullable=True),
+        sa.Column('tiene_stock', sa.Boolean(), nullable=False),
+        sa.Column('imagen_principal', sa.String(length=500), nullable=True),
+        sa.Column('imagenes', postgresql.ARRAY(sa.String(length=500)), nullable=False),
+        sa.Column('marca', sa.String(length=100), nullable=True),
+        sa.Column('marcas', postgresql.ARRAY(sa.String(length=100)), nullable=False),
+        sa.Column('colores', postgresql.ARRAY(sa.String(length=100)), nullable=False),
+        sa.Column('tallas', postgresql.ARRAY(sa.String(length=50)), nullable=False),
+        sa.Column('skus', postgresql.ARRAY(sa.String(length=100)), nullable=False),
+        sa.Column('categoria_ids', postgresql.ARRAY(sa.Integer()), nullable=False),
+        sa.Column('categorias', postgresql.ARRAY(sa.String(length=200)), nullable=False),
+        sa.Column('categoria_slugs', postgresql.ARRAY(sa.String(length=255)), nullable=False),
+        sa.Column('actualizado_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['producto_id'], ['producto.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('producto_id'),
+    )
+    op.create_index('ix_producto_resumen_activo_created_at', 'producto_resumen', ['activo', 'created_at'], unique=False)
+    op.create_index('ix_producto_resumen_precio_minimo', 'producto_resumen', ['precio_minimo'], unique=False)
+    op.create_index('ix_producto_resumen_nombre', 'producto_resumen', ['nombre'], unique=False)
+    op.create_index('ix_producto_resumen_categoria_slugs', 'producto_resumen', ['categoria_slugs'], unique=False, postgresql_using='gin')
+
+    # Backfill inicial (misma lógica que services/producto_resumen.py)
+    op.execute(
+        """
+        INSERT INTO producto_resumen (
+            producto_id, nombre, activo, created_at, precio_minimo, tiene_stock,
+            imagen_principal, imagenes, marca, marcas, colores, tallas, skus,
+            categoria_ids, categorias, categoria_slugs
+        )
+        SELECT
+            p.id,
+            p.nombre,
+            coalesce(p.activo, true),
+            p.created_at,
+            v.precio_minimo,
+            s.producto_id IS NOT NULL,
+            i.imagenes[1],
+            coalesce(i.imagenes, '{}'),
+            m.marca,
+            coalesce(v.marcas, '{}'),
+            coalesce(v.colores, '{}'),
+            coalesce(v.tallas, '{}'),
+            coalesce(v.skus, '{}'),
+            coalesce(c.categoria_ids, '{}'),
+            coalesce(c.categorias, '{}'),
+            coalesce(c.categoria_slugs, '{}')
+        FROM producto p
+        LEFT JOIN (
+            SELECT
+                producto_id,
+                min(precio_actual) FILTER (WHERE activo IS true) AS precio_minimo,
+                array_agg(DISTINCT marca ORDER BY marca) FILTER (WHERE activo IS true AND marca IS NOT NULL) AS marcas,
+                array_agg(DISTINCT color ORDER BY color) FILTER (WHERE activo IS true AND color IS NOT NULL) AS colores,
+                array_agg(DISTINCT talla ORDER BY talla) FILTER (WHERE activo IS true AND talla IS NOT NULL) AS tallas,
+                array_agg(sku ORDER BY sku) AS skus
+            FROM variante
+            GROUP BY producto_id
+        ) v ON v.producto_id = p.id
+        LEFT JOIN (
+            SELECT DISTINCT ON (producto_id) producto_id, marca
+            FROM variante
+            WHERE activo IS true AND marca IS NOT NULL
+            ORDER BY producto_id, precio_actual ASC, id ASC
+        ) m ON m.producto_id = p.id
+        LEFT JOIN (
+            SELECT DISTINCT variante.producto_id
+            FROM variante
+            JOIN inventario ON inventario.variante_id = variante.id
+            WHERE variante.activo IS true AND inventario.cantidad > 0
+        ) s ON s.producto_id = p.id
+        LEFT JOIN (
+            SELECT producto_id, array_agg(url ORDER BY orden ASC, id ASC) AS imagenes
+            FROM media
+            GROUP BY producto_id
+        ) i ON i.producto_id = p.id
+        LEFT JOIN (
+            SELECT
+                pc.producto_id,
+                array_agg(c.id ORDER BY c.id) AS categoria_ids,
+                array_agg(c.nombre ORDER BY c.id) AS categorias,
+                array_agg(c.slug ORDER BY c.id) FILTER (WHERE c.slug IS NOT NULL) AS categoria_slugs
+            FROM producto_categoria pc
+            JOIN categoria c ON c.id = pc.categoria_id
+            GROUP BY pc.producto_id
+        ) c ON c.producto_id = p.id
+        ORDER BY p.id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_producto_resumen_categoria_slugs', table_name='producto_resumen')
+    op.drop_index('ix_producto_resumen_nombre', table_name='producto_resumen')
+    op.drop_index('ix_producto_resumen_precio_minimo', table_name='producto_resumen')
+    op.drop_index('ix_producto_resumen_activo_created_at', table_name='producto_resumen')
+    op.drop_table('producto_resumen')
@@ -0,0 +1,44 @@
+"""tabla clave_idempotencia (header Idempotency-Key)
+
+Revision ID: e2a9b7c35d10
+Revises: c4d82a6e1f37
+Create Date: 2026-10-17 16:20:37.904512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a9b7c35d10'
+down_revision: Union[str, None] = 'c4d82a6e1f37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'clave_idempotencia',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('usuario_id', sa.Integer(), nullable=False),
+        sa.Column('ruta', sa.String(length=100), nullable=False),
+        sa.Column('clave', sa.String(length=255), nullable=False),
+        sa.Column('huella', sa.String(length=64), nullable=False),
+        sa.Column('estado', sa.String(length=20), nullable=False),
+        sa.Column('estado_http', sa.Integer(), nullable=True),
+        sa.Column('respuesta', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('creado_en', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('expira_en', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['usuario_id'], ['usuario.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('usuario_id', 'ruta', 'clave', name='uq_clave_idempotencia'),
+    )
+    op.create_index(op.f('ix_clave_idempotencia_expira_en'), 'clave_idempotencia', ['expira_en'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_clave_idempotencia_expira_en'), table_name='clave_idempotencia')
+    op.drop_table('clave_idempotencia')
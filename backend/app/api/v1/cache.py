@@ -0,0 +1,47 @@
+# backend/app/api/v1/cache.py
+
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query
+from pydantic import BaseModel
+
+from app.core.cache import (
+    desactivar_en_caliente,
+    estado_cache,
+    invalidar_tags,
+    invalidar_todo,
+)
+from app.core.security import get_current_admin_user
+
+router = APIRouter()
+
+
+class InvalidarCacheIn(BaseModel):
+    # None / vacío = borrar todo
+    tags: Optional[List[str]] = None
+
+
+@router.get("/estado", dependencies=[Depends(get_current_admin_user)])
+def obtener_estado_cache():
+    """
+    Estado de la caché de respuestas públicas:
+    kill switch y métricas hit/miss por endpoint.
+    """
+    return estado_cache()
+
+
+@router.put("/activo", dependencies=[Depends(get_current_admin_user)])
+def cambiar_cache_activo(activo: bool = Query(..., description="false = kill switch")):
+    """Activa / desactiva la caché en caliente (sin redeploy)."""
+    desactivar_en_caliente(not activo)
+    return estado_cache()
+
+
+@router.post("/invalidar", dependencies=[Depends(get_current_admin_user)])
+def invalidar_cache(data: InvalidarCacheIn):
+    """Borra respuestas cacheadas por tags (p.ej. "catalogo", "producto:10") o todas."""
+    if data.tags:
+        borradas = invalidar_tags(*data.tags)
+    else:
+        borradas = invalidar_todo()
+    return {"claves_borradas": borradas}
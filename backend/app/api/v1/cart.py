@@ -3,8 +3,8 @@ from decimal import Decimal
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func
+from sqlalchemy.orm import Session
+from sqlalchemy import select
 
 from app.db import get_db
 from app.core.security import get_current_user
@@ -12,7 +12,6 @@ from app.models.usuario import Usuario
 from app.models.carrito import Carrito, CarritoItem
 from app.models.variante import Variante
 from app.models.producto import Producto
-from app.models.inventario import Inventario
 from app.models.media import Media
 from app.schemas.cart import (
     CartItemFromApi,
@@ -21,21 +20,15 @@ from app.schemas.cart import (
     CartItemUpdate,
 )
 from app.schemas.programa_puntos import LimiteRedencionOut
+from app.services.carrito_service import carrito_abierto, id_carrito_abierto
+from app.services.inventario import stock_total_por_variante, sumar_stock_por_variante
 from app.services.programa_puntos_service import calcular_limite_redencion
 
 router = APIRouter(prefix="/cart", tags=["Carrito"])
 
 
 def _get_or_create_open_cart(db: Session, user: Usuario) -> Carrito:
-    carrito = (
-        db.query(Carrito)
-        .filter(
-            Carrito.usuario_id == user.id,
-            Carrito.estado == "ABIERTO",
-        )
-        .options(joinedload(Carrito.items).joinedload(CarritoItem.variante))
-        .first()
-    )
+    carrito = carrito_abierto(db, user.id)
 
     if carrito:
         return carrito
@@ -47,56 +40,75 @@ def _get_or_create_open_cart(db: Session, user: Usuario) -> Carrito:
     return carrito
 
 
-def _build_cart_item_from_model(db: Session, item: CarritoItem) -> CartItemFromApi:
-    variante: Variante = item.variante
-    producto: Producto = variante.producto
-
-    # imagen principal (primer Media por orden, tipo IMAGEN)
-    principal: Optional[Media] = None
-    if producto.media:
-        principal = sorted(producto.media, key=lambda m: m.orden)[0]
-
-    imagen_url = principal.url if principal else None
-
-    precio_unitario = Decimal(item.precio_unitario)
-    subtotal = precio_unitario * item.cantidad
-
-    stock_total = (
-        db.query(func.sum(Inventario.cantidad))
-        .filter(Inventario.variante_id == variante.id)
-        .scalar()
-    )
-    stock_disponible = int(stock_total or 0)
-
-    return CartItemFromApi(
-        variante_id=variante.id,
-        producto_id=producto.id,
-        nombre_producto=producto.nombre,
-        marca=variante.marca,
-        sku=variante.sku,
-        color=variante.color,
-        talla=variante.talla,
-        cantidad=item.cantidad,
-        precio_unitario=precio_unitario,
-        subtotal=subtotal,
-        imagen_url=imagen_url,
-        stock_disponible=stock_disponible,
+def _lineas_carrito(db: Session, carrito_id: int):
+    """
+    Ítems del carrito con su variante, producto e imagen principal (primer
+    Media por orden) en UNA query, sin cargar toda la media del producto.
+    """
+    imagen_principal = (
+        select(Media.url)
+        .where(Media.producto_id == Producto.id)
+        .order_by(Media.orden.asc(), Media.id.asc())
+        .limit(1)
+        .scalar_subquery()
     )
+    return db.execute(
+        select(
+            CarritoItem.variante_id,
+            CarritoItem.cantidad,
+            CarritoItem.precio_unitario,
+            Variante.marca,
+            Variante.sku,
+            Variante.color,
+            Variante.talla,
+            Producto.id.label("producto_id"),
+            Producto.nombre,
+            imagen_principal.label("imagen_url"),
+        )
+        .join(Variante, Variante.id == CarritoItem.variante_id)
+        .join(Producto, Producto.id == Variante.producto_id)
+        .where(CarritoItem.carrito_id == carrito_id)
+        .order_by(CarritoItem.id)
+    ).all()
 
 
-def _build_cart_response(db: Session, carrito: Optional[Carrito]) -> CartResponse:
-    if not carrito or not carrito.items:
+def _build_cart_response(db: Session, carrito_id: Optional[int]) -> CartResponse:
+    """
+    Carrito completo en un número FIJO de queries: las líneas (una) y el
+    stock total de sus variantes (una agrupada, o ninguna si está en
+    caché), sin importar cuántos ítems tenga.
+    """
+    lineas = _lineas_carrito(db, carrito_id) if carrito_id is not None else []
+    if not lineas:
         return CartResponse(items=[], total_items=0, total=Decimal("0"))
 
+    stock = stock_total_por_variante(db, [linea.variante_id for linea in lineas])
+
     items: List[CartItemFromApi] = []
     total = Decimal("0")
     total_items = 0
 
-    for item in carrito.items:
-        api_item = _build_cart_item_from_model(db, item)
-        items.append(api_item)
-        total += api_item.subtotal
-        total_items += api_item.cantidad
+    for linea in lineas:
+        precio_unitario = Decimal(linea.precio_unitario)
+        subtotal = precio_unitario * linea.cantidad
+        items.append(
+            CartItemFromApi(
+                variante_id=linea.variante_id,
+                producto_id=linea.producto_id,
+                nombre_producto=linea.nombre,
+                marca=linea.marca,
+                sku=linea.sku,
+                color=linea.color,
+                talla=linea.talla,
+                cantidad=linea.cantidad,
+                precio_unitario=precio_unitario,
+                subtotal=subtotal,
+                imagen_url=linea.imagen_url,
+                stock_disponible=stock[linea.variante_id],
+            )
+        )
+        total += subtotal
+        total_items += linea.cantidad
 
     return CartResponse(items=items, total_items=total_items, total=total)
 
@@ -113,22 +125,7 @@ def get_cart(
     """
     Devuelve el carrito ABIERTO del usuario actual.
     """
-    carrito = (
-        db.query(Carrito)
-        .filter(
-            Carrito.usuario_id == current_user.id,
-            Carrito.estado == "ABIERTO",
-        )
-        .options(
-            joinedload(Carrito.items)
-            .joinedload(CarritoItem.variante)
-            .joinedload(Variante.producto)
-            .joinedload(Producto.media)
-        )
-        .first()
-    )
-
-    return _build_cart_response(db, carrito)
+    return _build_cart_response(db, id_carrito_abierto(db, current_user.id))
 
 
 # =========================
@@ -144,14 +141,7 @@ def add_cart_item(
     """
     Agrega una variante al carrito (o incrementa cantidad si ya existe).
     """
-    variante = (
-        db.query(Variante)
-        .options(
-            joinedload(Variante.producto).joinedload(Producto.media)
-        )
-        .filter(Variante.id == payload.variante_id)
-        .first()
-    )
+    variante = db.get(Variante, payload.variante_id)
     if not variante:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -164,12 +154,8 @@ def add_cart_item(
             detail="Esta variante no está activa.",
         )
 
-    stock_total_q = (
-        db.query(func.sum(Inventario.cantidad))
-        .filter(Inventario.variante_id == variante.id)
-        .scalar()
-    )
-    stock_total = int(stock_total_q or 0)
+    # Tope con el stock real (sin caché): la cifra cacheada es solo para mostrar
+    stock_total = sumar_stock_por_variante(db, [variante.id])[variante.id]
 
     if stock_total <= 0:
         raise HTTPException(
@@ -210,28 +196,15 @@ def add_cart_item(
         item = CarritoItem(
             carrito_id=carrito.id,
             variante_id=variante.id,
-            cantidad=payload.cantidad,
+            cantidad=cantidad,
             precio_unitario=precio_unitario,
         )
         db.add(item)
 
+    carrito_id = carrito.id
     db.commit()
 
-    # recargar carrito con relaciones
-    db.refresh(carrito)
-    carrito = (
-        db.query(Carrito)
-        .filter(Carrito.id == carrito.id)
-        .options(
-            joinedload(Carrito.items)
-            .joinedload(CarritoItem.variante)
-            .joinedload(Variante.producto)
-            .joinedload(Producto.media)
-        )
-        .first()
-    )
-
-    return _build_cart_response(db, carrito)
+    return _build_cart_response(db, carrito_id)
 
 
 # =========================
@@ -249,15 +222,8 @@ def update_cart_item(
     Actualiza la cantidad de un item.
     Si cantidad <= 0, se elimina del carrito.
     """
-    carrito = (
-        db.query(Carrito)
-        .filter(
-            Carrito.usuario_id == current_user.id,
-            Carrito.estado == "ABIERTO",
-        )
-        .first()
-    )
-    if not carrito:
+    carrito_id = id_carrito_abierto(db, current_user.id)
+    if carrito_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No tienes carrito abierto.",
@@ -266,7 +232,7 @@ def update_cart_item(
     item = (
         db.query(CarritoItem)
         .filter(
-            CarritoItem.carrito_id == carrito.id,
+            CarritoItem.carrito_id == carrito_id,
             CarritoItem.variante_id == variante_id,
         )
         .first()
@@ -278,12 +244,7 @@ def update_cart_item(
             detail="El producto no está en tu carrito.",
         )
 
-    stock_total_q = (
-        db.query(func.sum(Inventario.cantidad))
-        .filter(Inventario.variante_id == variante_id)
-        .scalar()
-    )
-    stock_total = int(stock_total_q or 0)
+    stock_total = sumar_stock_por_variante(db, [variante_id])[variante_id]
 
     if payload.cantidad <= 0:
         db.delete(item)
@@ -302,19 +263,7 @@ def update_cart_item(
 
     db.commit()
 
-    carrito = (
-        db.query(Carrito)
-        .filter(Carrito.id == carrito.id)
-        .options(
-            joinedload(Carrito.items)
-            .joinedload(CarritoItem.variante)
-            .joinedload(Variante.producto)
-            .joinedload(Producto.media)
-        )
-        .first()
-    )
-
-    return _build_cart_response(db, carrito)
+    return _build_cart_response(db, carrito_id)
 
 
 # =========================
@@ -330,22 +279,15 @@ def delete_cart_item(
     """
     Elimina un item puntual del carrito.
     """
-    carrito = (
-        db.query(Carrito)
-        .filter(
-            Carrito.usuario_id == current_user.id,
-            Carrito.estado == "ABIERTO",
-        )
-        .first()
-    )
-    if not carrito:
+    carrito_id = id_carrito_abierto(db, current_user.id)
+    if carrito_id is None:
         # devolver carrito vacío
         return _build_cart_response(db, None)
 
     item = (
         db.query(CarritoItem)
         .filter(
-            CarritoItem.carrito_id == carrito.id,
+            CarritoItem.carrito_id == carrito_id,
             CarritoItem.variante_id == variante_id,
         )
         .first()
@@ -355,19 +297,7 @@ def delete_cart_item(
         db.delete(item)
         db.commit()
 
-    carrito = (
-        db.query(Carrito)
-        .filter(Carrito.id == carrito.id)
-        .options(
-            joinedload(Carrito.items)
-            .joinedload(CarritoItem.variante)
-            .joinedload(Variante.producto)
-            .joinedload(Producto.media)
-        )
-        .first()
-    )
-
-    return _build_cart_response(db, carrito)
+    return _build_cart_response(db, carrito_id)
 
 
 # =========================
@@ -382,21 +312,15 @@ def clear_cart(
     """
     Vacía por completo el carrito ABIERTO del usuario.
     """
-    carrito = (
-        db.query(Carrito)
-        .filter(
-            Carrito.usuario_id == current_user.id,
-            Carrito.estado == "ABIERTO",
-        )
-        .first()
-    )
+    carrito_id = id_carrito_abierto(db, current_user.id)
 
-    if not carrito:
+    if carrito_id is None:
         return _build_cart_response(db, None)
 
-    # Borramos todos los items
-    for item in list(carrito.items):
-        db.delete(item)
+    # Borramos todos los items (un solo DELETE)
+    db.query(CarritoItem).filter(CarritoItem.carrito_id == carrito_id).delete(
+        synchronize_session=False
+    )
 
     db.commit()
 
@@ -415,24 +339,9 @@ def get_cart_points_limit(
     NO descuenta puntos todavía; solo informa el límite.
     """
 
-    # 1️⃣ Obtener el carrito ABIERTO igual que en get_cart
-    carrito = (
-        db.query(Carrito)
-        .filter(
-            Carrito.usuario_id == current_user.id,
-            Carrito.estado == "ABIERTO",
-        )
-        .options(
-            joinedload(Carrito.items)
-            .joinedload(CarritoItem.variante)
-            .joinedload(Variante.producto)
-            .joinedload(Producto.media)
-        )
-        .first()
-    )
-
-    # Reutilizamos el helper para tener un CartResponse con total y items
-    cart_response = _build_cart_response(db, carrito)
+    # 1️⃣ Obtener el carrito ABIERTO igual que en get_cart y reutilizar el
+    #    helper para tener un CartResponse con total y items
+    cart_response = _build_cart_response(db, id_carrito_abierto(db, current_user.id))
 
     # Si el carrito está vacío, no tiene sentido usar puntos
     if not cart_response.items or cart_response.total <= 0:
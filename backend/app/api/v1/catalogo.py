@@ -1,21 +1,33 @@
 # backend/app/api/v1/catalogo.py
-from typing import List, Optional
+from typing import List, Literal, Optional
 from decimal import Decimal
 
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session, joinedload, aliased
-from sqlalchemy import func, and_, or_, distinct
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.orm import Session
+from sqlalchemy import func
 
 from app.db import get_db
-from app.models.producto import Producto
 from app.models.variante import Variante
 from app.models.categoria import Categoria
-from app.models.inventario import Inventario
-from app.models.media import Media
 from pydantic import BaseModel
 from datetime import datetime  # 👈 agrega esto arriba
 
-from app.models.producto_categoria import ProductoCategoria  # 👈 importa la tabla pivote
+from app.models.producto_resumen import ProductoResumen
+from app.services.catalogo_service import (
+    aplicar_filtros_catalogo,
+    ordenar_catalogo,
+    ordenar_catalogo_keyset,
+    clave_orden_catalogo,
+    aplicar_cursor_catalogo,
+    codificar_cursor,
+    decodificar_cursor,
+    contar_catalogo,
+    calcular_facetas,
+)
+from app.services.busqueda_service import preparar_busqueda
+from app.services.catalogo_snapshot import consultar_snapshot, snapshot_soporta
+from app.core.cache import respuesta_cacheada
+from app.core.config import settings
 
 
 router = APIRouter()
@@ -45,20 +57,28 @@ class ProductoCatalogo(BaseModel):
     marca: Optional[str] = None          # 👈 NUEVO
     imagenes: list[str] = []             # 👈 aquí irán TODAS las fotos
 
-    created_at: datetime
+    created_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
 
 
 
+# Modo de paginación de /catalogo (otro valor → 422)
+Paginacion = Literal["paginas", "cursor"]
+
+
 class CatalogoResponse(BaseModel):
     productos: List[ProductoCatalogo]
-    total: int
+    total: Optional[int]                 # None en modo cursor (sin conteo)
     pagina: int
-    total_paginas: int
+    total_paginas: Optional[int]
     por_pagina: int
 
+    # Modo cursor (scroll infinito)
+    next_cursor: Optional[str] = None    # None = no hay más resultados
+    total_estimado: bool = False         # True si `total` es una estimación
+
 
 # 🔹 Filtros disponibles
 class FiltrosDisponibles(BaseModel):
@@ -70,11 +90,198 @@ class FiltrosDisponibles(BaseModel):
     precio_maximo: Decimal
 
 
+def _producto_catalogo(resumen: ProductoResumen) -> ProductoCatalogo:
+    return ProductoCatalogo(
+        id=resumen.producto_id,
+        nombre=resumen.nombre,
+        precio_minimo=resumen.precio_minimo or Decimal(0),
+        imagen_principal=resumen.imagen_principal,
+        categorias=resumen.categorias or [],
+        tiene_stock=resumen.tiene_stock,
+        marca=resumen.marca,
+        imagenes=resumen.imagenes or [],
+        created_at=resumen.created_at,
+    )
+
+
+def _catalogo_por_cursor(
+    db: Session,
+    filtros: dict,
+    ordenar_por: str,
+    buscar: Optional[str],
+    cursor: Optional[str],
+    pagina: int,
+    por_pagina: int,
+) -> CatalogoResponse:
+    """
+    Paginación keyset: WHERE (clave, producto_id) > cursor ORDER BY ... LIMIT n+1.
+    Sin OFFSET ni COUNT completo.
+    """
+    datos_cursor = None
+    if cursor:
+        try:
+            datos_cursor = decodificar_cursor(cursor, ordenar_por, buscar)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    _, clave_orden, _ = clave_orden_catalogo(ordenar_por, buscar)
+
+    def _base(difusa: bool):
+        if difusa:
+            preparar_busqueda(db)
+        return aplicar_filtros_catalogo(
+            db.query(ProductoResumen), busqueda_difusa=difusa, **filtros
+        )
+
+    def _pagina(base):
+        query = ordenar_catalogo_keyset(
+            base.add_columns(clave_orden.label("clave_orden")), ordenar_por, buscar
+        )
+        if datos_cursor:
+            query = aplicar_cursor_catalogo(query, ordenar_por, buscar, datos_cursor)
+        # Una fila extra para saber si hay página siguiente
+        return query.limit(por_pagina + 1).all()
+
+    difusa = bool(datos_cursor and datos_cursor["difusa"])
+    base = _base(difusa)
+    filas = _pagina(base)
+
+    # Primera página de una búsqueda sin resultados exactos → tolerar typos
+    if buscar and not filas and not difusa and datos_cursor is None:
+        difusa = True
+        base = _base(difusa)
+        filas = _pagina(base)
+
+    hay_mas = len(filas) > por_pagina
+    filas = filas[:por_pagina]
+
+    next_cursor = None
+    if hay_mas:
+        ultima = filas[-1]
+        next_cursor = codificar_cursor(
+            ordenar_por, ultima.clave_orden, ultima[0].producto_id, difusa
+        )
+
+    total, total_estimado = contar_catalogo(db, base)
+
+    return CatalogoResponse(
+        productos=[_producto_catalogo(fila[0]) for fila in filas],
+        total=total,
+        pagina=pagina,
+        total_paginas=None if total is None else (total + por_pagina - 1) // por_pagina,
+        por_pagina=por_pagina,
+        next_cursor=next_cursor,
+        total_estimado=total_estimado,
+    )
+
+
+# 🔹 Facetas (conteos por valor según los filtros activos)
+class FacetaValor(BaseModel):
+    valor: str
+    cantidad: int
+
+
+class FacetaRangoPrecio(BaseModel):
+    desde: Decimal
+    hasta: Optional[Decimal] = None   # None = "en adelante"
+    cantidad: int
+
+
+class FacetasCatalogo(BaseModel):
+    total: int
+    categorias: List[FacetaValor]
+    marcas: List[FacetaValor]
+    colores: List[FacetaValor]
+    tallas: List[FacetaValor]
+    precios: List[FacetaRangoPrecio]
+
+
+def construir_catalogo(
+    db: Session,
+    filtros: dict,
+    ordenar_por: str,
+    pagina: int,
+    por_pagina: int,
+    paginacion: Paginacion = "paginas",
+    cursor: Optional[str] = None,
+) -> CatalogoResponse:
+    """Arma la respuesta de /catalogo (sin caché)."""
+    buscar = filtros.get("buscar")
+
+    if paginacion == "cursor" or cursor:
+        return _catalogo_por_cursor(
+            db, filtros, ordenar_por, buscar, cursor, pagina, por_pagina
+        )
+
+    # 1️⃣ Query base sobre el modelo de lectura (producto_resumen):
+    #    precio mínimo, stock, imagen, marca y categorías ya vienen calculados
+    query = aplicar_filtros_catalogo(db.query(ProductoResumen), **filtros)
+
+    # 2️⃣ Ordenamiento (con búsqueda: por relevancia)
+    query = ordenar_catalogo(query, ordenar_por, buscar)
+
+    # 3️⃣ Total de resultados
+    total = query.count()
+
+    # Búsqueda sin resultados exactos → reintentar tolerando errores de tipeo
+    if buscar and total == 0:
+        preparar_busqueda(db)
+        query = aplicar_filtros_catalogo(
+            db.query(ProductoResumen), busqueda_difusa=True, **filtros
+        )
+        query = ordenar_catalogo(query, ordenar_por, buscar)
+        total = query.count()
+
+    # 4️⃣ Paginación
+    offset = (pagina - 1) * por_pagina
+    resultados = query.offset(offset).limit(por_pagina).all()
+
+    # 5️⃣ Construir respuesta (sin queries extra por producto)
+    productos_catalogo = [_producto_catalogo(resumen) for resumen in resultados]
+
+    # 6️⃣ Calcular total de páginas
+    total_paginas = (total + por_pagina - 1) // por_pagina
+
+    return CatalogoResponse(
+        productos=productos_catalogo,
+        total=total,
+        pagina=pagina,
+        total_paginas=total_paginas,
+        por_pagina=por_pagina,
+    )
+
+
+def construir_catalogo_snapshot(
+    filtros: dict,
+    ordenar_por: str,
+    pagina: int,
+    por_pagina: int,
+) -> CatalogoResponse:
+    """Arma la respuesta de /catalogo desde el snapshot en memoria (sin BD)."""
+    filas, total = consultar_snapshot(filtros, ordenar_por, pagina, por_pagina)
+    return CatalogoResponse(
+        productos=[_producto_catalogo(fila) for fila in filas],
+        total=total,
+        pagina=pagina,
+        total_paginas=(total + por_pagina - 1) // por_pagina,
+        por_pagina=por_pagina,
+    )
+
+
 @router.get("/catalogo", response_model=CatalogoResponse)
 def obtener_catalogo(
+    request: Request,
     # Paginación
     pagina: int = Query(1, ge=1, description="Número de página"),
     por_pagina: int = Query(12, ge=1, le=100, description="Productos por página"),
+    paginacion: Paginacion = Query(
+        "paginas",
+        description="paginas (pagina + total exacto) | cursor (next_cursor, costo constante)"
+    ),
+    cursor: Optional[str] = Query(
+        None,
+        description="next_cursor de la respuesta anterior (activa el modo cursor)"
+    ),
     
     # Filtros
     categoria: Optional[str] = Query(
@@ -105,11 +312,11 @@ def obtener_catalogo(
     # Ordenamiento
     ordenar_por: str = Query(
         "destacados",
-        description="Opciones: destacados, precio_asc, precio_desc, nombre_asc"
+        description="Opciones: destacados, relevancia, precio_asc, precio_desc, nombre_asc"
     ),
     
     # Búsqueda
-    buscar: Optional[str] = Query(None, description="Búsqueda por nombre o SKU"),
+    buscar: Optional[str] = Query(None, description="Búsqueda por nombre, SKU, marca o categoría (tolera acentos y errores de tipeo)"),
     
     db: Session = Depends(get_db),
 ):
@@ -122,238 +329,124 @@ def obtener_catalogo(
     ✅ Actualiza sin recargar (esto lo hace el frontend)
     ✅ Solo productos activos y disponibles
     ✅ Ordenamiento dinámico
+
+    Modo cursor (`paginacion=cursor` o `cursor=...`): paginación keyset,
+    cada página cuesta lo mismo que la primera; sin conteo (`total` es None
+    salvo con CATALOGO_CURSOR_TOTAL, y entonces puede ser estimado).
+
+    Con CATALOGO_MOTOR="snapshot" los filtros/orden se resuelven en memoria
+    (services/catalogo_snapshot.py); búsqueda y cursor siguen por SQL.
     """
     
-    # 1️⃣ Crear subconsulta para precio mínimo por producto (siempre necesaria)
-    subq_precio = (
-        db.query(
-            Variante.producto_id,
-            func.min(Variante.precio_actual).label('precio_min')
-        )
-        .filter(Variante.activo.is_(True))
-        .group_by(Variante.producto_id)
-        .subquery()
-    )
-    
-    # 2️⃣ Query base: productos activos con precio
-    query = (
-        db.query(Producto, subq_precio.c.precio_min)
-        .join(subq_precio, Producto.id == subq_precio.c.producto_id)
-        .filter(Producto.activo.is_(True))
+    filtros = dict(
+        categoria=categoria,
+        categoria_slug=categoria_slug,
+        principal_slug=principal_slug,
+        secundaria_slug=secundaria_slug,
+        marca=marca,
+        color=color,
+        talla=talla,
+        precio_min=precio_min,
+        precio_max=precio_max,
+        solo_disponibles=solo_disponibles,
+        buscar=buscar,
     )
-    
-        # 3️⃣ Filtro por disponibilidad (stock > 0)
-    if solo_disponibles:
-        subq_stock = (
-            db.query(distinct(Variante.producto_id))
-            .join(Inventario, Inventario.variante_id == Variante.id)
-            .filter(
-                Variante.activo.is_(True),
-                Inventario.cantidad > 0
-            )
-            .subquery()
-        )
-        query = query.filter(Producto.id.in_(subq_stock))
-
-
-    if principal_slug and secundaria_slug:
-        # Queremos productos que tengan ambas categorías: la principal y la secundaria
-        pc_principal = aliased(ProductoCategoria)
-        pc_secundaria = aliased(ProductoCategoria)
-
-        # Obtenemos los IDs de esas categorías por slug
-        principal_id_subq = (
-            db.query(Categoria.id)
-            .filter(Categoria.slug == principal_slug)
-            .scalar_subquery()
-        )
-        secundaria_id_subq = (
-            db.query(Categoria.id)
-            .filter(Categoria.slug == secundaria_slug)
-            .scalar_subquery()
-        )
-
-        query = (
-            query
-            .join(pc_principal, pc_principal.producto_id == Producto.id)
-            .join(pc_secundaria, pc_secundaria.producto_id == Producto.id)
-            .filter(
-                pc_principal.categoria_id == principal_id_subq,
-                pc_secundaria.categoria_id == secundaria_id_subq,
-            )
-        )
-
-    elif categoria_slug:
-        # Filtro por un solo slug (para /categorias/ropa-deportiva)
-        query = (
-            query
-            .join(Producto.categorias)
-            .filter(Categoria.slug == categoria_slug)
-        )
-
-    elif categoria:
-        # Filtro antiguo por nombre
-        query = (
-            query
-            .join(Producto.categorias)
-            .filter(Categoria.nombre.ilike(f"%{categoria}%"))
-        )
 
+    if settings.CATALOGO_MOTOR == "snapshot" and snapshot_soporta(
+        filtros, paginacion, cursor
+    ):
+        return construir_catalogo_snapshot(filtros, ordenar_por, pagina, por_pagina)
+
+    params = {
+        **filtros,
+        "pagina": pagina,
+        "por_pagina": por_pagina,
+        "paginacion": paginacion,
+        "cursor": cursor,
+        "ordenar_por": ordenar_por,
+    }
+
+    return respuesta_cacheada(
+        "catalogo",
+        params,
+        CatalogoResponse,
+        lambda: construir_catalogo(
+            db, filtros, ordenar_por, pagina, por_pagina, paginacion, cursor
+        ),
+        tags=lambda r: [
+            "catalogo",
+            *(["disponibilidad"] if solo_disponibles else []),
+            *(f"producto:{p.id}" for p in r.productos),
+        ],
+        request=request,
+    )
 
-    
-    # 5️⃣ Filtro por marca (necesitamos join con variante)
-    if marca:
-        subq_marca = (
-            db.query(distinct(Variante.producto_id))
-            .filter(
-                Variante.activo.is_(True),
-                Variante.marca.ilike(f"%{marca}%")
-            )
-            .subquery()
-        )
-        query = query.filter(Producto.id.in_(subq_marca))
-    
-    # 6️⃣ Filtro por color
-    if color:
-        subq_color = (
-            db.query(distinct(Variante.producto_id))
-            .filter(
-                Variante.activo.is_(True),
-                Variante.color.ilike(f"%{color}%")
-            )
-            .subquery()
-        )
-        query = query.filter(Producto.id.in_(subq_color))
-    
-    # 7️⃣ Filtro por talla
-    if talla:
-        subq_talla = (
-            db.query(distinct(Variante.producto_id))
-            .filter(
-                Variante.activo.is_(True),
-                Variante.talla.ilike(f"%{talla}%")
-            )
-            .subquery()
-        )
-        query = query.filter(Producto.id.in_(subq_talla))
-    
-    # 8️⃣ Filtro por rango de precio (usando la subconsulta de precio)
-    if precio_min is not None:
-        query = query.filter(subq_precio.c.precio_min >= precio_min)
-    
-    if precio_max is not None:
-        query = query.filter(subq_precio.c.precio_min <= precio_max)
-    
-    # 9️⃣ Búsqueda por texto
-    if buscar:
-        # Subconsulta para búsqueda por SKU
-        subq_buscar_sku = (
-            db.query(distinct(Variante.producto_id))
-            .filter(Variante.sku.ilike(f"%{buscar}%"))
-            .subquery()
-        )
-        
-        query = query.filter(
-            or_(
-                Producto.nombre.ilike(f"%{buscar}%"),
-                Producto.id.in_(subq_buscar_sku)
-            )
-        )
-    
-    # 🔟 Ordenamiento (ahora funciona porque precio_min está en el SELECT)
-    if ordenar_por == "precio_asc":
-        query = query.order_by(subq_precio.c.precio_min.asc())
-    elif ordenar_por == "precio_desc":
-        query = query.order_by(subq_precio.c.precio_min.desc())
-    elif ordenar_por == "nombre_asc":
-        query = query.order_by(Producto.nombre.asc())
-    else:  # destacados (por defecto: más recientes)
-        query = query.order_by(Producto.created_at.desc())
-    
-    # 1️⃣1️⃣ Total de resultados
-    total = query.count()
-    
-    # 1️⃣2️⃣ Paginación
-    offset = (pagina - 1) * por_pagina
-    resultados = query.offset(offset).limit(por_pagina).all()
-    
-    # 1️⃣3️⃣ Construir respuesta con datos enriquecidos
-    productos_catalogo: list[ProductoCatalogo] = []
-
-    for producto, precio_minimo in resultados:
-        # 🔹 Todas las imágenes del producto, ordenadas
-        medias = (
-            db.query(Media.url)
-            .filter(Media.producto_id == producto.id)
-            .order_by(Media.orden.asc(), Media.id.asc())
-            .all()
-        )
-        imagenes_urls = [m[0] for m in medias]  # m es una tupla (url,)
-
-        # Imagen principal = la primera, si existe
-        imagen_principal_url = imagenes_urls[0] if imagenes_urls else None
-
-        # 🔹 Categorías
-        categorias_nombres = [cat.nombre for cat in producto.categorias]
-
-        # 🔹 Verificar stock
-        tiene_stock = (
-            db.query(Inventario.cantidad)
-            .join(Variante, Variante.id == Inventario.variante_id)
-            .filter(
-                Variante.producto_id == producto.id,
-                Variante.activo.is_(True),
-                Inventario.cantidad > 0,
-            )
-            .first() is not None
-        )
 
-        # 🔹 Marca (opcional)
-        marca_row = (
-            db.query(Variante.marca)
-            .filter(
-                Variante.producto_id == producto.id,
-                Variante.activo.is_(True),
-                Variante.marca.isnot(None),
-            )
-            .order_by(Variante.precio_actual.asc())
-            .first()
-        )
-        marca = marca_row[0] if marca_row else None
-
-        productos_catalogo.append(
-            ProductoCatalogo(
-                id=producto.id,
-                nombre=producto.nombre,
-                precio_minimo=precio_minimo or Decimal(0),
-                imagen_principal=imagen_principal_url,
-                categorias=categorias_nombres,
-                tiene_stock=tiene_stock,
-                marca=marca,
-                imagenes=imagenes_urls,
-                created_at=producto.created_at,
-            )
-        )
+@router.get("/catalogo/facetas", response_model=FacetasCatalogo)
+def obtener_facetas_catalogo(
+    request: Request,
+    categoria: Optional[str] = Query(None, description="Nombre de categoría"),
+    categoria_slug: Optional[str] = Query(None, description="Slug de categoría"),
+    principal_slug: Optional[str] = Query(None, description="Slug de categoría principal"),
+    secundaria_slug: Optional[str] = Query(None, description="Slug de categoría secundaria"),
+    marca: Optional[str] = Query(None, description="Marca del producto"),
+    color: Optional[str] = Query(None, description="Color disponible"),
+    talla: Optional[str] = Query(None, description="Talla disponible"),
+    precio_min: Optional[Decimal] = Query(None, ge=0, description="Precio mínimo"),
+    precio_max: Optional[Decimal] = Query(None, ge=0, description="Precio máximo"),
+    solo_disponibles: bool = Query(True, description="Solo productos con stock"),
+    buscar: Optional[str] = Query(None, description="Búsqueda (igual que /catalogo)"),
+    db: Session = Depends(get_db),
+):
+    """
+    Conteos por categoría, marca, color, talla y rango de precio con los
+    mismos filtros de /catalogo, en una sola query agrupada.
 
-    # 1️⃣4️⃣ Calcular total de páginas
-    total_paginas = (total + por_pagina - 1) // por_pagina
+    Cada faceta se cuenta ignorando su propio filtro: con marca=Nike
+    se siguen viendo "Adidas (12)", "Puma (8)", etc.
+    """
+    filtros = dict(
+        categoria=categoria,
+        categoria_slug=categoria_slug,
+        principal_slug=principal_slug,
+        secundaria_slug=secundaria_slug,
+        marca=marca,
+        color=color,
+        talla=talla,
+        precio_min=precio_min,
+        precio_max=precio_max,
+        solo_disponibles=solo_disponibles,
+        buscar=buscar,
+    )
 
-    return CatalogoResponse(
-        productos=productos_catalogo,
-        total=total,
-        pagina=pagina,
-        total_paginas=total_paginas,
-        por_pagina=por_pagina,
+    # Cacheado por firma de filtros
+    return respuesta_cacheada(
+        "catalogo_facetas",
+        filtros,
+        FacetasCatalogo,
+        lambda: calcular_facetas(db, **filtros),
+        tags=["catalogo", "disponibilidad"] if solo_disponibles else ["catalogo"],
+        request=request,
     )
 
 
 @router.get("/catalogo/filtros", response_model=FiltrosDisponibles)
-def obtener_filtros_disponibles(db: Session = Depends(get_db)):
+def obtener_filtros_disponibles(request: Request, db: Session = Depends(get_db)):
     """
     Devuelve los valores disponibles para cada filtro.
     Útil para poblar los selectores del frontend.
     """
-    
+    return respuesta_cacheada(
+        "catalogo_filtros",
+        {},
+        FiltrosDisponibles,
+        lambda: _calcular_filtros_disponibles(db),
+        tags=["catalogo", "categorias"],
+        request=request,
+    )
+
+
+def _calcular_filtros_disponibles(db: Session) -> FiltrosDisponibles:
     # Categorías activas
     categorias = (
         db.query(Categoria.nombre)
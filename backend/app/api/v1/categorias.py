@@ -1,8 +1,11 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from sqlalchemy import select, func, distinct, and_
+from sqlalchemy.orm import Session, joinedload, aliased
 from app.models.producto_categoria import ProductoCategoria 
+from app.models.producto import Producto
+from app.models.categoria_relacion import categoria_categoria
 from app.db import get_db
 from app.models.categoria import Categoria
 from app.schemas.categoria import (
@@ -13,6 +16,8 @@ from app.schemas.categoria import (
 )
 
 from app.core.security import get_current_admin_user
+from app.services.producto_resumen import refrescar_resumen_por_categoria
+from app.core.cache import invalidar_al_confirmar, respuesta_cacheada
 from app.models.usuario import Usuario
 
 import re
@@ -104,6 +109,7 @@ def crear_categoria(
     )
 
     db.add(categoria)
+    invalidar_al_confirmar(db, "categorias")
     db.commit()
     db.refresh(categoria)
 
@@ -118,6 +124,7 @@ def crear_categoria(
             .all()
         )
         categoria.principales = principales
+        invalidar_al_confirmar(db, "categorias")
         db.commit()
         db.refresh(categoria)
 
@@ -125,95 +132,147 @@ def crear_categoria(
 
 
 @router.get("/menu", response_model=list[CategoriaMenuRead])
-def get_categorias_menu(db: Session = Depends(get_db)):
-    from sqlalchemy.orm import aliased
-    from app.models.categoria import Categoria
-    from app.models.producto import Producto
-    from app.models.producto_categoria import ProductoCategoria
-
-    # alias para la tabla de relación many-to-many
-    pc_principal = aliased(ProductoCategoria)
-    pc_secundaria = aliased(ProductoCategoria)
-
-    # Categorías principales activas
-    principales = (
-        db.query(Categoria)
-        .filter(Categoria.activo.is_(True), Categoria.principal.is_(True))
-        .all()
+def get_categorias_menu(request: Request, db: Session = Depends(get_db)):
+    return respuesta_cacheada(
+        "categorias_menu",
+        {},
+        list[CategoriaMenuRead],
+        lambda: _calcular_categorias_menu(db),
+        tags=["categorias"],
+        request=request,
     )
 
-    resultado: list[CategoriaMenuRead] = []
 
-    for cat in principales:
-        # 1) Productos que tienen asignada directamente esta categoría principal
-        productos_count = (
-            db.query(Producto.id)
-            .join(ProductoCategoria, ProductoCategoria.producto_id == Producto.id)
-            .filter(
-                Producto.activo.is_(True),
-                ProductoCategoria.categoria_id == cat.id,
-            )
-            .distinct()
-            .count()
-        )
-
-        # 2) Secundarias de esta principal, pero contando SOLO productos que tengan
-        #    la combinación (principal, secundaria) al mismo tiempo.
-        secundarias_result: list[CategoriaMenuRead] = []
-        for sub in cat.secundarias:  # relación .secundarias del modelo Categoria
-            if not sub.activo or not sub.secundaria:
-                continue
-
-            sub_productos_count = (
-                db.query(Producto.id)
-                # producto_categoria para principal
-                .join(pc_principal, pc_principal.producto_id == Producto.id)
-                # producto_categoria para secundaria
-                .join(pc_secundaria, pc_secundaria.producto_id == Producto.id)
-                .filter(
-                    Producto.activo.is_(True),
-                    pc_principal.categoria_id == cat.id,  # principal actual
-                    pc_secundaria.categoria_id == sub.id, # secundaria actual
-                )
-                .distinct()
-                .count()
-            )
+def _calcular_categorias_menu(db: Session) -> list[CategoriaMenuRead]:
+    """
+    Árbol del menú (principales → secundarias) con sus conteos de
+    productos activos en UNA sola query agregada:
 
-            if sub_productos_count > 0:
-                secundarias_result.append(
-                    CategoriaMenuRead(
-                        id=sub.id,
-                        slug=sub.slug,
-                        nombre=sub.nombre,
-                        principal=sub.principal,
-                        secundaria=sub.secundaria,
-                        productos_count=sub_productos_count,
-                        secundarias=[],
-                    )
-                )
+    - principal: productos con esa categoría asignada directamente.
+    - secundaria: productos que tienen la combinación (principal,
+      secundaria) al mismo tiempo.
 
+    Se omiten las secundarias sin productos y las principales sin
+    productos directos ni secundarias con productos.
+    """
+    # (producto, categoría) de productos activos
+    asignadas = (
+        select(ProductoCategoria.producto_id, ProductoCategoria.categoria_id)
+        .join(Producto, Producto.id == ProductoCategoria.producto_id)
+        .where(Producto.activo.is_(True))
+        .cte("asignadas")
+    )
 
-        # 3) Si la principal no tiene productos directos NI secundarias con productos (para ella),
-        #    no la mandamos al frontend.
-        if productos_count == 0 and not secundarias_result:
-            continue
-
-        resultado.append(
-            CategoriaMenuRead(
-                id=cat.id,
-                slug=cat.slug,
-                nombre=cat.nombre,
-                principal=cat.principal,
-                secundaria=cat.secundaria,
-                productos_count=productos_count,
-                secundarias=secundarias_result,
-            )
+    conteo_principal = (
+        select(
+            asignadas.c.categoria_id,
+            func.count(distinct(asignadas.c.producto_id)).label("n"),
         )
+        .group_by(asignadas.c.categoria_id)
+        .cte("conteo_principal")
+    )
 
+    con_principal = asignadas.alias("con_principal")
+    con_secundaria = asignadas.alias("con_secundaria")
+    conteo_par = (
+        select(
+            categoria_categoria.c.categoria_principal_id,
+            categoria_categoria.c.categoria_secundaria_id,
+            func.count(distinct(con_principal.c.producto_id)).label("n"),
+        )
+        .join(
+            con_principal,
+            con_principal.c.categoria_id == categoria_categoria.c.categoria_principal_id,
+        )
+        .join(
+            con_secundaria,
+            and_(
+                con_secundaria.c.producto_id == con_principal.c.producto_id,
+                con_secundaria.c.categoria_id == categoria_categoria.c.categoria_secundaria_id,
+            ),
+        )
+        .group_by(
+            categoria_categoria.c.categoria_principal_id,
+            categoria_categoria.c.categoria_secundaria_id,
+        )
+        .cte("conteo_par")
+    )
 
+    principal = aliased(Categoria, name="principal")
+    secundaria = aliased(Categoria, name="secundaria")
+
+    # secundarias activas con productos, por principal
+    secundarias_con_productos = (
+        select(
+            conteo_par.c.categoria_principal_id,
+            secundaria.id,
+            secundaria.slug,
+            secundaria.nombre,
+            secundaria.principal,
+            secundaria.secundaria,
+            conteo_par.c.n,
+        )
+        .join(secundaria, secundaria.id == conteo_par.c.categoria_secundaria_id)
+        .where(secundaria.activo.is_(True), secundaria.secundaria.is_(True))
+        .subquery("sec")
+    )
 
-    return resultado
+    filas = db.execute(
+        select(
+            principal.id,
+            principal.slug,
+            principal.nombre,
+            principal.principal,
+            principal.secundaria,
+            func.coalesce(conteo_principal.c.n, 0).label("productos_count"),
+            secundarias_con_productos.c.id.label("sec_id"),
+            secundarias_con_productos.c.slug.label("sec_slug"),
+            secundarias_con_productos.c.nombre.label("sec_nombre"),
+            secundarias_con_productos.c.principal.label("sec_principal"),
+            secundarias_con_productos.c.secundaria.label("sec_secundaria"),
+            secundarias_con_productos.c.n.label("sec_productos_count"),
+        )
+        .outerjoin(conteo_principal, conteo_principal.c.categoria_id == principal.id)
+        .outerjoin(
+            secundarias_con_productos,
+            secundarias_con_productos.c.categoria_principal_id == principal.id,
+        )
+        .where(principal.activo.is_(True), principal.principal.is_(True))
+        .order_by(principal.id, secundarias_con_productos.c.id)
+    ).all()
+
+    # Armar el árbol (las filas vienen agrupadas por principal)
+    menu: dict[int, CategoriaMenuRead] = {}
+    for fila in filas:
+        nodo = menu.get(fila.id)
+        if nodo is None:
+            nodo = menu[fila.id] = CategoriaMenuRead(
+                id=fila.id,
+                slug=fila.slug,
+                nombre=fila.nombre,
+                principal=fila.principal,
+                secundaria=fila.secundaria,
+                productos_count=fila.productos_count,
+                secundarias=[],
+            )
+        if fila.sec_id is not None:
+            nodo.secundarias.append(
+                CategoriaMenuRead(
+                    id=fila.sec_id,
+                    slug=fila.sec_slug,
+                    nombre=fila.sec_nombre,
+                    principal=fila.sec_principal,
+                    secundaria=fila.sec_secundaria,
+                    productos_count=fila.sec_productos_count,
+                    secundarias=[],
+                )
+            )
 
+    return [
+        nodo
+        for nodo in menu.values()
+        if nodo.productos_count > 0 or nodo.secundarias
+    ]
 
 
 @router.get("/{categoria_id}", response_model=CategoriaRead)
@@ -271,6 +330,8 @@ def actualizar_categoria(
             )
         categoria.nombre = data.nombre
         categoria.slug = generar_slug_unico(db, data.nombre, categoria_id=categoria_id)
+        # Nombre y slug están copiados en producto_resumen
+        refrescar_resumen_por_categoria(db, categoria_id)
 
     if data.descripcion is not None:
         categoria.descripcion = data.descripcion
@@ -308,6 +369,8 @@ def actualizar_categoria(
             # Si ya no es secundaria, limpiamos sus principales
             categoria.principales = []
 
+    # Menú de categorías y /catalogo/filtros
+    invalidar_al_confirmar(db, "categorias", "catalogo")
     db.commit()
     db.refresh(categoria)
     return categoria
@@ -327,6 +390,7 @@ def desactivar_categoria(
         )
 
     categoria.activo = False
+    invalidar_al_confirmar(db, "categorias", "catalogo")
     db.commit()
     db.refresh(categoria)
     return categoria
@@ -346,6 +410,7 @@ def activar_categoria(
         )
 
     categoria.activo = True
+    invalidar_al_confirmar(db, "categorias", "catalogo")
     db.commit()
     db.refresh(categoria)
     return categoria
@@ -6,6 +6,7 @@ from fastapi import (
     status,
     UploadFile,
     File,
+    Request,
 )
 from sqlalchemy.orm import Session
 
@@ -18,6 +19,7 @@ from app.schemas.home_hero import (
 from app.services import home_hero
 from app.core.security import get_current_admin_user
 from app.core.storage import save_local_file
+from app.core.cache import invalidar_al_confirmar, respuesta_cacheada
 
 from app.models.home_hero import HomeHeroConfig  # solo para type hints
 
@@ -59,13 +61,29 @@ def _ensure_config(db: Session) -> HomeHeroConfig:
 # 🔓 Público: lo usa la página principal
 @router.get("/public", response_model=HomeHeroPublic)
 def get_home_hero_public(
+    request: Request,
     db: Session = Depends(get_db),
 ):
-    config = home_hero.get_singleton_config(db)
-    if config is None:
-        # si no hay nada, devolvemos todo null
-        return HomeHeroPublic(video_url=None, banner1_url=None, banner2_url=None)
-    return config
+    def _calcular():
+        config = home_hero.get_singleton_config(db)
+        if config is None:
+            # si no hay nada, devolvemos todo null
+            return HomeHeroPublic(video_url=None, banner1_url=None, banner2_url=None)
+        return config
+
+    # Last-Modified: la fila de configuración determina toda la respuesta
+    def _ultima_modificacion(config):
+        return getattr(config, "updated_at", None) or getattr(config, "created_at", None)
+
+    return respuesta_cacheada(
+        "home_hero",
+        {},
+        HomeHeroPublic,
+        _calcular,
+        tags=["home_hero"],
+        request=request,
+        ultima_modificacion=_ultima_modificacion,
+    )
 
 
 # 🔒 Admin: ver config con metadata
@@ -135,6 +153,7 @@ async def upload_home_hero_video(
 
     config.video_url = url_publica
     db.add(config)
+    invalidar_al_confirmar(db, "home_hero")
     db.commit()
     db.refresh(config)
 
@@ -170,6 +189,7 @@ async def upload_home_hero_banner1(
 
     config.banner1_url = url_publica
     db.add(config)
+    invalidar_al_confirmar(db, "home_hero")
     db.commit()
     db.refresh(config)
 
@@ -205,6 +225,7 @@ async def upload_home_hero_banner2(
 
     config.banner2_url = url_publica
     db.add(config)
+    invalidar_al_confirmar(db, "home_hero")
     db.commit()
     db.refresh(config)
 
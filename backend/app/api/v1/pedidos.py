@@ -1,9 +1,9 @@
 # backend/app/api/v1/pedidos.py
 from typing import List, Optional
-from datetime import datetime, timedelta
+from datetime import datetime
 
-from fastapi import APIRouter, Depends, Request, HTTPException, Query, UploadFile, File, Form
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, Request, HTTPException, Query, UploadFile, File, Form, Header
+from sqlalchemy.orm import Session
 # arriba con los imports
 import os
 import uuid
@@ -17,8 +17,13 @@ from app.models.usuario import Usuario
 from app.models.pedido import Pedido
 from app.schemas.pedido import (
     PedidoCreateFromCart,
+    ReservaCarritoCreate,
+    ReservaCarritoOut,
     PedidoRead,
     PedidoHistorialOut,
+    PedidoDetalleOut,
+    PedidosAdminOut,
+    PedidosAdminConteosOut,
     PedidoEstadoUpdate,
     PedidoEstadoResponse,
     CancelarPedidoRequest,
@@ -30,12 +35,20 @@ from app.models.rma import RMAEstado
 from app.services.pedido_service import (
     crear_pedido_desde_carrito,
     actualizar_estado_pedido,
+    reservar_stock_carrito,
+)
+from app.services.pedido_detalle import detalle_pedido
+from app.services.pedidos_admin import (
+    condiciones_pedidos_admin,
+    conteos_por_estado,
+    pagina_pedidos_admin,
 )
 from app.services.cancelar_pedido_service import (
     verificar_puede_cancelar_pedido,
     cancelar_pedido,
 )
 from app.models.sinpe import Sinpe
+from app.services.idempotencia import ejecutar_idempotente, huella_peticion
 
 router = APIRouter()
 
@@ -56,54 +69,92 @@ def get_client_ip(request: Request) -> str:
         return forwarded.split(",")[0].strip()
     return request.client.host if request.client else "unknown"
 
-@router.get("/admin", response_model=List[PedidoHistorialOut])
+@router.get("/admin", response_model=PedidosAdminOut)
 def listar_pedidos_admin(
     estado: Optional[str] = Query(None, description="Estado del pedido"),
+    cursor: Optional[str] = Query(None, description="next_cursor de la página anterior"),
+    limite: int = Query(50, ge=1, le=200),
+    sucursal_id: Optional[int] = Query(None),
+    cliente_id: Optional[int] = Query(None),
+    desde: Optional[datetime] = Query(None, description="fecha_creacion >= desde"),
+    hasta: Optional[datetime] = Query(None, description="fecha_creacion < hasta"),
+    metodo_pago: Optional[str] = Query(None, description="Pedidos con algún pago de este método"),
+    numero: Optional[str] = Query(None, description="Prefijo del número de pedido"),
+    incluir_conteos: bool = Query(True, description="False en las páginas siguientes"),
     db: Session = Depends(get_db),
     admin: Usuario = Depends(require_admin),
 ):
     """
     Lista pedidos para el panel admin.
-    - Puede filtrar por estado (PAGADO, EN_PREPARACION, ENVIADO, ENTREGADO, CANCELADO)
-    - Si `estado` es None -> trae todos.
+    - Puede filtrar por estado (PAGADO, EN_PREPARACION, ENVIADO, ENTREGADO, CANCELADO),
+      sucursal, cliente, rango de fechas, método de pago y prefijo del número.
+    - Paginación keyset sobre (fecha_creacion, id): cada página cuesta lo
+      mismo sin importar qué tan atrás esté.
+    - `conteos`: pedidos por estado con los demás filtros (insignias de las
+      pestañas), en una sola query agrupada.
     """
-    query = (
-        db.query(Pedido)
-        .options(joinedload(Pedido.sucursal))  # 👈 para traer también la sucursal
-        .order_by(Pedido.fecha_creacion.desc())
+    condiciones = condiciones_pedidos_admin(
+        sucursal_id=sucursal_id,
+        cliente_id=cliente_id,
+        desde=desde,
+        hasta=hasta,
+        metodo_pago=metodo_pago,
+        numero=numero,
     )
+    condiciones_pagina = condiciones + ([Pedido.estado == estado] if estado else [])
+
+    try:
+        filas, next_cursor = pagina_pedidos_admin(db, condiciones_pagina, cursor, limite)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    conteos = None
+    if incluir_conteos:
+        conteos = PedidosAdminConteosOut(**conteos_por_estado(db, condiciones))
+
+    return PedidosAdminOut(
+        pedidos=[PedidoHistorialOut.model_validate(fila) for fila in filas],
+        next_cursor=next_cursor,
+        conteos=conteos,
+    )
+
+@router.post("/checkout/reservar", response_model=ReservaCarritoOut)
+def reservar_checkout(
+    data: ReservaCarritoCreate,
+    current_user: Usuario = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Inicio del checkout: aparta el stock del carrito (en las sucursales
+    que atenderían el pedido) por RESERVA_CARRITO_MINUTOS. Llamarlo de
+    nuevo reemplaza la reserva (p. ej. al cambiar de dirección).
+    """
+    return reservar_stock_carrito(db, current_user.id, data.direccion_envio_id)
 
-    if estado:
-        query = query.filter(Pedido.estado == estado)
-
-    pedidos = query.all()
-
-    # 👇 Construimos la respuesta incluyendo sucursal_nombre
-    return [
-        PedidoHistorialOut(
-            id=p.id,
-            total=p.total,
-            estado=p.estado,
-            fecha_creacion=p.fecha_creacion,
-            sucursal_id=p.sucursal_id,
-            sucursal_nombre=p.sucursal.nombre if p.sucursal else None,
-            cancelado=p.cancelado,
-            numero_pedido=p.numero_pedido,
-        )
-        for p in pedidos
-    ]
 
 @router.post("/checkout", response_model=PedidoRead)
 def crear_pedido_checkout(
     data: PedidoCreateFromCart,
     current_user: Usuario = Depends(get_current_user),
     db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
 ):
     """
     Crea un Pedido a partir del carrito actual del usuario y
     registra un Pago simulado automáticamente aprobado.
+
+    Con header Idempotency-Key, un reintento devuelve el mismo pedido
+    sin crear otro ni volver a descontar stock.
     """
-    return crear_pedido_desde_carrito(db, current_user.id, data)
+    return ejecutar_idempotente(
+        idempotency_key,
+        usuario_id=current_user.id,
+        ruta="pedidos/checkout",
+        huella=huella_peticion(data),
+        modelo=PedidoRead,
+        ejecutar=lambda: crear_pedido_desde_carrito(db, current_user.id, data),
+        db=db,
+    )
 
 @router.post("/checkout-sinpe", response_model=PedidoRead)
 def checkout_sinpe(
@@ -113,6 +164,7 @@ def checkout_sinpe(
     comprobante: UploadFile = File(...),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
 ):
     # 1) Validar tipo de archivo
     if comprobante.content_type not in ("image/png", "image/jpeg", "image/webp"):
@@ -121,6 +173,41 @@ def checkout_sinpe(
             detail="El comprobante debe ser una imagen (png, jpg o webp)",
         )
 
+    # Huella: campos del formulario + contenido del comprobante
+    huella = None
+    if idempotency_key:
+        contenido = comprobante.file.read()
+        comprobante.file.seek(0)
+        huella = huella_peticion(
+            {
+                "direccion_envio_id": direccion_envio_id,
+                "metodo_envio": metodo_envio,
+                "puntos_a_usar": puntos_a_usar,
+                "comprobante": huella_peticion(contenido),
+            }
+        )
+
+    return ejecutar_idempotente(
+        idempotency_key,
+        usuario_id=current_user.id,
+        ruta="pedidos/checkout-sinpe",
+        huella=huella,
+        modelo=PedidoRead,
+        ejecutar=lambda: _checkout_sinpe(
+            db, current_user, direccion_envio_id, metodo_envio, puntos_a_usar, comprobante
+        ),
+        db=db,
+    )
+
+
+def _checkout_sinpe(
+    db: Session,
+    current_user: Usuario,
+    direccion_envio_id: int,
+    metodo_envio: str,
+    puntos_a_usar: int,
+    comprobante: UploadFile,
+):
     # 2) Crear pedido (estado VERIFICAR_PAGO)
     pedido = crear_pedido_desde_carrito(
         db,
@@ -203,7 +290,7 @@ def cambiar_estado_pedido(
     )
 
 
-@router.get("/{pedido_id}", response_model=dict)
+@router.get("/{pedido_id}", response_model=PedidoDetalleOut)
 def obtener_detalle_pedido(
     pedido_id: int,
     db: Session = Depends(get_db),
@@ -211,140 +298,16 @@ def obtener_detalle_pedido(
 ):
     """
     Obtener detalles completos de un pedido específico
+    (número fijo de queries: ver services/pedido_detalle.py).
     """
-    query = db.query(Pedido).filter(Pedido.id == pedido_id)
-
+    cliente_id = None
     if current_user.rol not in ["ADMIN", "VENDEDOR"]:
-        query = query.filter(Pedido.cliente_id == current_user.id)
+        cliente_id = current_user.id
 
-    pedido = query.first()
-
-    if not pedido:
+    detalle = detalle_pedido(db, pedido_id, cliente_id=cliente_id)
+    if detalle is None:
         raise HTTPException(status_code=404, detail="Pedido no encontrado")
-
-    rmas_data = []
-    tiene_rma_activo = False
-    estados_activos = ["solicitado", "en_revision", "aprobado"]
-
-    if pedido.rmas:
-        for rma in pedido.rmas:
-            # Determinamos si hay alguno activo para bloquear el botón
-            if rma.estado in estados_activos:
-                tiene_rma_activo = True
-
-            # 🔧 CORRECCIÓN: Agregamos la solicitud SIEMPRE, sin importar el estado
-            rmas_data.append({
-                "id": rma.id,
-                "tipo": rma.tipo,
-                "estado": rma.estado,
-                "motivo": rma.motivo,
-                "respuesta_admin": rma.respuesta_admin,
-                "fecha": rma.created_at.isoformat()
-            })
-    
-    # Productos del pedido (usando PedidoItem y relaciones)
-    productos = []
-    for item in pedido.items:
-        imagen_url = ""
-        if item.producto and hasattr(item.producto, "media"):
-            medias = item.producto.media
-            if medias and len(medias) > 0:
-                imagen_url = getattr(medias[0], "url", "")
-
-        productos.append(
-            {
-                "id": item.id,
-                "nombre": item.producto.nombre if item.producto else "Producto eliminado",
-                "imagen_url": imagen_url,
-                "precio_unitario": float(item.precio_unitario),
-                "cantidad": item.cantidad,
-                "subtotal": float(item.subtotal),
-                "impuesto": float(getattr(item, "impuesto", 0) or 0),
-            }
-        )
-
-        # Calcular impuesto total del pedido (suma de los ítems)
-    impuesto_total = sum(
-        float(getattr(it, "impuesto", 0) or 0) for it in pedido.items
-    )
-
-
-    # Datos de dirección de envío
-    direccion_data = {}
-    if pedido.direccion_envio:
-        if getattr(pedido.direccion_envio, "nombre", None):
-            nombre_envio = pedido.direccion_envio.nombre
-        elif pedido.cliente and getattr(pedido.cliente, "nombre", None):
-            nombre_envio = pedido.cliente.nombre
-        else:
-            nombre_envio = ""
-        direccion_data = {
-            "provincia": pedido.direccion_envio.provincia,
-            "canton": pedido.direccion_envio.canton,
-            "distrito": pedido.direccion_envio.distrito,
-            "detalle": pedido.direccion_envio.detalle,
-            "pais": pedido.direccion_envio.pais or "Costa Rica",
-            "codigo_postal": pedido.direccion_envio.codigo_postal or "",
-            "telefono": pedido.direccion_envio.telefono or "",
-            "nombre": nombre_envio,
-            "referencia": pedido.direccion_envio.referencia or "",
-        }
-
-    # Verificar si puede cancelar (ejemplo: solo ciertos estados / tiempo)
-    puede_cancelar = False
-    fecha_limite = None
-
-    if pedido.estado in ["PENDIENTE", "CONFIRMADO"]:
-        fecha_limite = pedido.fecha_creacion + timedelta(hours=24)
-        puede_cancelar = datetime.now() < fecha_limite
-
-
-    # --- Pago / método ---
-    pago_metodo = None
-    pago_estado = None
-    pago_referencia = None
-
-    if pedido.pagos and len(pedido.pagos) > 0:
-        pago_metodo = getattr(pedido.pagos[0], "metodo", None)
-        pago_estado = getattr(pedido.pagos[0], "estado", None)
-        pago_referencia = getattr(pedido.pagos[0], "referencia", None)
-
-    # --- SINPE (si aplica) ---
-    sinpe_data = None
-    if pago_metodo == "SINPE":
-        sinpe = db.query(Sinpe).filter(Sinpe.pedido_id == pedido.id).first()
-        if sinpe:
-            sinpe_data = {
-                "imagen_url": sinpe.imagen_url,
-                "numero_destino": sinpe.numero_destino,
-                "referencia": sinpe.referencia,
-                "fecha_creacion": sinpe.fecha_creacion.isoformat() if sinpe.fecha_creacion else None,
-            }
-
-
-    return {
-        "id": pedido.id,
-        "numero_pedido": pedido.numero_pedido,
-        "fecha": pedido.fecha_creacion.isoformat(),
-        "estado": pedido.estado,
-        "subtotal": float(pedido.subtotal),
-        "costo_envio": float(pedido.costo_envio or 0),
-        "descuento_puntos": float(pedido.descuento_puntos or 0),
-        "total": float(pedido.total),
-        "puntos_ganados": pedido.puntos_ganados or 0,
-        "metodo_envio": pedido.metodo_envio or "Envío Estándar",
-        "direccion_envio": direccion_data,
-        "productos": productos,
-        "impuesto_total": impuesto_total,
-        "puede_cancelar": puede_cancelar,
-        "fecha_limite_cancelacion": fecha_limite.isoformat() if fecha_limite else None,
-        "tiene_rma_activo": tiene_rma_activo,
-        "solicitudes_rma": rmas_data,
-        "pago_metodo": pago_metodo,
-        "pago_estado": pago_estado,
-        "pago_referencia": pago_referencia,
-        "sinpe": sinpe_data,
-    }
+    return detalle
 
 
 # ============================
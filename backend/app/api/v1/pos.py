@@ -1,26 +1,28 @@
+from collections import defaultdict
 from datetime import datetime, timezone
 from typing import Optional, List
 from decimal import Decimal
 import time
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Header
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session, joinedload, selectinload
 
 from app.db import get_db
 from app.core.security import get_current_user
+from app.core.config import settings
+from app.core.cache import invalidar_al_confirmar, respuesta_cacheada
 from app.models.usuario import Usuario
 from app.models.sucursal import Sucursal
 from app.models.usuario_sucursal import UsuarioSucursal
 from app.models.caja_turno import CajaTurno
-from app.models.caja_movimientos import CajaMovimiento
 from app.models.venta_pos import VentaPOS
 from app.models.venta_pos_item import VentaPOSItem
 from app.models.pago_pos import PagoPOS
 from app.models.inventario import Inventario
 from app.models.variante import Variante
 from app.models.producto import Producto
-from app.models.media import Media  # 👈 agregar
-from app.models.programa_puntos import SaldoPuntosUsuario
 
 
 from app.schemas.pos import (
@@ -28,12 +30,19 @@ from app.schemas.pos import (
     CajaTurnoOut,
     CajaCerrarRequest,
     CajaCerrarResponse,
+    CajaReporteXOut,
+    CajaReporteZOut,
     POSVentaCreate,
     POSVentaOut,
+    POSVentaLoteCreate,
+    POSVentaLoteOut,
+    POSVentaLoteResultado,
     POSConfigOut,
     SucursalPOSOut,
     POSVentaItemOut,
     POSVentaListItemOut,
+    POSVentasHistorialOut,
+    POSVentasResumenOut,
     POSVentaDetailOut,
     POSPagoPOSOut,
     POSProductoOut,
@@ -54,11 +63,32 @@ from app.services.programa_puntos_service import (
 from app.services.usuario_service import create_cliente_pos
 from app.services.audit_service import registrar_auditoria
 from app.core.request_utils import get_client_ip
-from app.services.comisiones_service import (
-    obtener_configuracion_activa as obtener_configuracion_comision_activa,
+from app.services.outbox import VENTA_POS_COMPLETADA, registrar_evento
+from app.services.producto_resumen import refrescar_resumen_por_variantes
+from app.models.producto_resumen import ProductoResumen
+from app.services.pos_escaneo import escanear_codigo
+from app.services.idempotencia import ejecutar_idempotente, huella_peticion
+from app.services.clientes_pos import (
+    MIN_CARACTERES as MIN_CARACTERES_BUSQUEDA,
+    buscar_clientes,
+    normalizar_termino,
+)
+from app.services.historial_pos import (
+    condiciones_historial,
+    pagina_historial,
+    resumen_historial,
+)
+from app.services.caja_service import registrar_movimiento_caja, reporte_x, reporte_z
+from app.services.inventario import (
+    bloquear_inventario_sucursal,
+    descontar_inventario_sucursal,
+)
+from app.services.busqueda_service import (
+    condicion_busqueda,
+    preparar_busqueda,
+    rango_busqueda,
+    rango_sku,
 )
-from app.models.comision_vendedor import ComisionVendedor
-from app.services.comisiones_service import crear_comision_pos_si_aplica
 
 
 router = APIRouter()
@@ -87,6 +117,8 @@ def crear_cliente_pos_endpoint(
 
     ip_address = get_client_ip(request)
 
+    # El nuevo cliente puede aparecer en cualquier búsqueda cacheada
+    invalidar_al_confirmar(db, "clientes")
     usuario = create_cliente_pos(db, payload)
 
     # Auditoría
@@ -109,13 +141,19 @@ def crear_cliente_pos_endpoint(
     status_code=status.HTTP_200_OK,
 )
 def buscar_clientes_pos(
-    correo: str,
+    request: Request,
+    q: Optional[str] = Query(None, max_length=100, description="Correo, nombre o teléfono"),
+    correo: Optional[str] = Query(None, max_length=100, description="Alias de q (compatibilidad)"),
+    limite: int = Query(10, ge=1, le=25),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user),
 ):
     """
-    Busca clientes por correo (ILIKE %correo%).
-    Devuelve id, nombre, correo, telefono y puntos actuales.
+    Typeahead de clientes por prefijo de correo/nombre y, desde 3
+    caracteres, por coincidencia parcial (trigramas) en nombre, correo
+    y teléfono. Cada cliente trae puntos, última compra y gasto total.
+    Con menos de MIN_CARACTERES devuelve [] sin consultar.
+    Resultado cacheado por término normalizado (POS_CLIENTES_CACHE_TTL).
     Solo VENDEDOR o ADMIN.
     """
     if current_user.rol not in ("VENDEDOR", "ADMIN"):
@@ -124,36 +162,20 @@ def buscar_clientes_pos(
             detail="No tienes permisos para buscar clientes.",
         )
 
-    query = (
-        db.query(Usuario, SaldoPuntosUsuario)
-        .outerjoin(SaldoPuntosUsuario, SaldoPuntosUsuario.usuario_id == Usuario.id)
-        .filter(
-            Usuario.rol == "CLIENTE",
-            Usuario.activo == True,
-            Usuario.correo.ilike(f"%{correo}%"),
-        )
-        .order_by(Usuario.correo.asc())
-        .limit(10)
+    termino = normalizar_termino(q if q is not None else (correo or ""))
+    if len(termino) < MIN_CARACTERES_BUSQUEDA:
+        return []
+
+    return respuesta_cacheada(
+        "pos_clientes",
+        {"q": termino, "limite": limite},
+        list[POSClienteSearchItem],
+        lambda: buscar_clientes(db, termino, limite=limite),
+        tags=lambda clientes: ["clientes", *(f"cliente:{c.id}" for c in clientes)],
+        ttl=settings.POS_CLIENTES_CACHE_TTL,
+        request=request,
     )
 
-    resultados: list[POSClienteSearchItem] = []
-
-    for usuario, saldo in query.all():
-        puntos = saldo.saldo if saldo is not None else 0
-
-        resultados.append(
-            POSClienteSearchItem(
-                id=usuario.id,
-                nombre=usuario.nombre,
-                correo=usuario.correo,
-                telefono=usuario.telefono,
-                puntos_actuales=puntos,
-            )
-        )
-
-
-    return resultados
-
 
 # ===== Helpers / permisos =====
 
@@ -168,18 +190,38 @@ def require_vendedor_o_admin(
     return current_user
 
 
+def verificar_puede_vender(db: Session, usuario: Usuario, sucursal_id: int) -> None:
+    """403 si el vendedor no puede vender en la sucursal (ADMIN siempre puede)."""
+    if usuario.rol == "ADMIN":
+        return
+    asignacion = (
+        db.query(UsuarioSucursal)
+        .filter(
+            UsuarioSucursal.usuario_id == usuario.id,
+            UsuarioSucursal.sucursal_id == sucursal_id,
+            UsuarioSucursal.puede_vender.is_(True),
+        )
+        .first()
+    )
+    if not asignacion:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permisos para vender en esta sucursal.",
+        )
+
+
 def get_caja_abierta(
     db: Session,
     usuario_id: int,
+    bloquear: bool = False,
 ) -> Optional[CajaTurno]:
-    return (
-        db.query(CajaTurno)
-        .filter(
-            CajaTurno.usuario_id == usuario_id,
-            CajaTurno.estado == "ABIERTA",
-        )
-        .one_or_none()
+    query = db.query(CajaTurno).filter(
+        CajaTurno.usuario_id == usuario_id,
+        CajaTurno.estado == "ABIERTA",
     )
+    if bloquear:
+        query = query.with_for_update()
+    return query.one_or_none()
 
 
 # ===== Config inicial POS =====
@@ -275,30 +317,20 @@ def cerrar_caja(
 ):
     """
     Cierra la caja ABIERTA del vendedor, calculando:
-    - monto_teorico_cierre
+    - monto_teorico_cierre (de los totales acumulados, sin leer movimientos)
     - diferencia (real - teórico)
+    Devuelve también el reporte Z (desglose por método de pago).
     """
-    caja = get_caja_abierta(db, current_user.id)
+    # Bloqueada: una venta en efectivo concurrente espera al cierre y
+    # después falla con 409 (registrar_movimiento_caja exige ABIERTA)
+    caja = get_caja_abierta(db, current_user.id, bloquear=True)
     if caja is None:
         raise HTTPException(
             status_code=400,
             detail="No tienes caja abierta para cerrar.",
         )
 
-    # Obtenemos todos los movimientos de esa caja
-    movimientos = (
-        db.query(CajaMovimiento)
-        .filter(CajaMovimiento.caja_turno_id == caja.id)
-        .all()
-    )
-
-    efectivo_teorico = caja.monto_apertura
-
-    for mov in movimientos:
-        if mov.tipo in ("VENTA_EFECTIVO", "INGRESO_EFECTIVO"):
-            efectivo_teorico += mov.monto
-        elif mov.tipo in ("DEVOLUCION_EFECTIVO", "RETIRO_EFECTIVO"):
-            efectivo_teorico -= mov.monto
+    efectivo_teorico = caja.efectivo_teorico
 
     caja.monto_teorico_cierre = efectivo_teorico
     caja.monto_real_cierre = data.monto_real_cierre
@@ -311,7 +343,51 @@ def cerrar_caja(
     db.commit()
     db.refresh(caja)
 
-    return CajaCerrarResponse.model_validate(caja)
+    respuesta = CajaCerrarResponse.model_validate(caja)
+    respuesta.reporte_z = CajaReporteZOut(**reporte_z(db, caja))
+    return respuesta
+
+
+@router.get("/caja/reporte-x", response_model=CajaReporteXOut)
+def obtener_reporte_x(
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_vendedor_o_admin),
+):
+    """
+    Reporte X de la caja ABIERTA del vendedor: totales por tipo de
+    movimiento y efectivo teórico en este momento (una sola fila).
+    """
+    caja = get_caja_abierta(db, current_user.id)
+    if caja is None:
+        raise HTTPException(
+            status_code=400,
+            detail="No tienes caja abierta.",
+        )
+    return CajaReporteXOut(**reporte_x(caja))
+
+
+@router.get("/caja/{caja_id}/reporte-z", response_model=CajaReporteZOut)
+def obtener_reporte_z(
+    caja_id: int,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_vendedor_o_admin),
+):
+    """
+    Reporte Z de una caja CERRADA (propia, o cualquiera si es ADMIN):
+    arqueo del cierre + pagos POS del turno por método de pago.
+    """
+    caja = db.get(CajaTurno, caja_id)
+    if caja is None or (current_user.rol != "ADMIN" and caja.usuario_id != current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Caja no encontrada.",
+        )
+    if caja.estado != "CERRADA":
+        raise HTTPException(
+            status_code=400,
+            detail="El reporte Z solo está disponible para cajas cerradas (usa el reporte X).",
+        )
+    return CajaReporteZOut(**reporte_z(db, caja))
 
 
 
@@ -319,12 +395,47 @@ def cerrar_caja(
 # PRODUCTOS PARA EL POS
 # ============================
 
+def _buscar_inventario_pos(q, search: str, limit: int, difusa: bool = False):
+    """
+    Búsqueda del POS: full-text + trigramas sobre producto_resumen y SKU
+    parcial (índice de trigramas). SKU exacto primero, luego relevancia.
+    """
+    return (
+        q.outerjoin(ProductoResumen, ProductoResumen.producto_id == Producto.id)
+        .filter(
+            condicion_busqueda(
+                ProductoResumen.search_vector,
+                ProductoResumen.texto_busqueda,
+                search,
+                difusa=difusa,
+            )
+            | (Variante.sku.ilike(f"%{search}%"))
+        )
+        .order_by(
+            (
+                rango_sku(Variante.sku, search)
+                + func.coalesce(
+                    rango_busqueda(
+                        ProductoResumen.search_vector,
+                        ProductoResumen.texto_busqueda,
+                        search,
+                    ),
+                    0,
+                )
+            ).desc(),
+            Producto.nombre.asc(),
+        )
+        .limit(limit)
+        .all()
+    )
+
+
 @router.get("/productos", response_model=List[POSProductoOut])
 def listar_productos_pos(
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(require_vendedor_o_admin),
     sucursal_id: int = Query(..., description="Sucursal desde la que se vende"),
-    search: Optional[str] = Query(None, description="Buscar por nombre o SKU"),
+    search: Optional[str] = Query(None, description="Buscar por nombre o SKU (tolera acentos y typos)"),
     limit: int = Query(50, ge=1, le=200),
 ):
     """
@@ -334,21 +445,7 @@ def listar_productos_pos(
     """
 
     # Validar que el vendedor puede vender en esa sucursal (salvo ADMIN)
-    if current_user.rol != "ADMIN":
-        asignacion = (
-            db.query(UsuarioSucursal)
-            .filter(
-                UsuarioSucursal.usuario_id == current_user.id,
-                UsuarioSucursal.sucursal_id == sucursal_id,
-                UsuarioSucursal.puede_vender.is_(True),
-            )
-            .first()
-        )
-        if not asignacion:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="No tienes permisos para vender en esta sucursal.",
-            )
+    verificar_puede_vender(db, current_user, sucursal_id)
 
     q = (
         db.query(Inventario)
@@ -359,19 +456,28 @@ def listar_productos_pos(
         .options(
             joinedload(Inventario.variante).joinedload(Variante.producto),
         )
-        .order_by(Producto.nombre.asc())
     )
 
     if search:
-        like = f"%{search}%"
-        q = q.filter(
-            (Producto.nombre.ilike(like))
-            | (Variante.sku.ilike(like))
+        inventarios = _buscar_inventario_pos(q, search, limit)
+        # Sin coincidencias exactas → reintentar tolerando errores de tipeo
+        if not inventarios:
+            preparar_busqueda(db)
+            inventarios = _buscar_inventario_pos(q, search, limit, difusa=True)
+    else:
+        # 👈 sin búsqueda: todo el stock de la sucursal por nombre
+        inventarios = q.order_by(Producto.nombre.asc()).limit(limit).all()
+
+    # ✅ IMAGEN: primera media de cada producto, en una sola query
+    producto_ids = {inv.variante.producto_id for inv in inventarios}
+    imagenes = {}
+    if producto_ids:
+        imagenes = dict(
+            db.query(ProductoResumen.producto_id, ProductoResumen.imagen_principal)
+            .filter(ProductoResumen.producto_id.in_(producto_ids))
+            .all()
         )
 
-    # 👈 SIEMPRE se ejecuta, haya o no search
-    inventarios = q.limit(limit).all()
-
     resultado: List[POSProductoOut] = []
 
     for inv in inventarios:
@@ -383,14 +489,7 @@ def listar_productos_pos(
         if precio is None:
             precio = Decimal("0")
 
-        # ✅ IMAGEN: primera media del producto
-        medias = (
-            db.query(Media.url)
-            .filter(Media.producto_id == producto.id)
-            .order_by(Media.orden.asc(), Media.id.asc())
-            .all()
-        )
-        imagen_url = medias[0][0] if medias else None
+        imagen_url = imagenes.get(producto.id)
 
         resultado.append(
             POSProductoOut(
@@ -410,18 +509,52 @@ def listar_productos_pos(
     return resultado
 
 
+@router.get("/escanear", response_model=POSProductoOut)
+def escanear_producto_pos(
+    sucursal_id: int = Query(..., description="Sucursal desde la que se vende"),
+    codigo: str = Query(..., min_length=1, max_length=100, description="Código de barras o SKU exacto"),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_vendedor_o_admin),
+):
+    """
+    Lector de código de barras de la caja: código de barras o SKU exacto
+    → variante, precio, stock en la sucursal e imagen (una sola query o
+    el índice en memoria de la sucursal, ver services/pos_escaneo.py).
+    """
+    verificar_puede_vender(db, current_user, sucursal_id)
+
+    fila = escanear_codigo(db, sucursal_id, codigo)
+    if fila is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No hay ninguna variante activa con el código '{codigo.strip()}'.",
+        )
+
+    return POSProductoOut(
+        variante_id=fila.variante_id,
+        producto_id=fila.producto_id,
+        nombre=fila.nombre,
+        precio=fila.precio if fila.precio is not None else Decimal("0"),
+        sku=fila.sku,
+        sucursal_id=sucursal_id,
+        stock=fila.stock,
+        imagen_url=fila.imagen_url,
+        color=fila.color,
+        talla=fila.talla,
+    )
 
 
 # ===== POS - Crear pedido (lo hacemos luego) =====
 
-@router.post("/ventas", response_model=POSVentaOut)
-def crear_venta_pos(
+def _registrar_venta_pos(
+    db: Session,
     data: POSVentaCreate,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(require_vendedor_o_admin),
-):
+    current_user: Usuario,
+    clave_idempotencia: Optional[str] = None,
+) -> VentaPOS:
     """
-    Crea una venta POS:
+    Registra una venta POS en la transacción actual (solo flush; el
+    llamador refresca producto_resumen y hace commit):
     - Valida sucursal del vendedor
     - Verifica caja abierta si hay pagos en EFECTIVO
     - Cliente opcional (registrado o mostrador)
@@ -430,6 +563,8 @@ def crear_venta_pos(
     - Crea VentaPOS + VentaPOSItem + PagoPOS
     - Actualiza inventario por sucursal
     - Registra movimientos de caja para pagos en EFECTIVO
+    - Registra el evento VENTA_POS_COMPLETADA (comisión, vía outbox)
+    Cualquier validación fallida lanza HTTPException.
     """
 
     # 1) Debe tener items
@@ -440,21 +575,7 @@ def crear_venta_pos(
         )
 
     # 2) Validar que el vendedor puede vender en esa sucursal (salvo ADMIN)
-    if current_user.rol != "ADMIN":
-        asignacion = (
-            db.query(UsuarioSucursal)
-            .filter(
-                UsuarioSucursal.usuario_id == current_user.id,
-                UsuarioSucursal.sucursal_id == data.sucursal_id,
-                UsuarioSucursal.puede_vender.is_(True),
-            )
-            .first()
-        )
-        if not asignacion:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="No tienes permisos para vender en esta sucursal.",
-            )
+    verificar_puede_vender(db, current_user, data.sucursal_id)
 
     # 3) Validar caja abierta si hay pagos en EFECTIVO
     hay_efectivo = any(p.metodo == "EFECTIVO" for p in data.pagos)
@@ -505,16 +626,28 @@ def crear_venta_pos(
             )
 
     # 5) Calcular subtotal y validar inventario
-    subtotal = Decimal("0.00")
-    items_info = []
-
+    #    Variantes en una query; el inventario de la sucursal se bloquea en
+    #    una sola sentencia y en orden de variante_id (sin deadlocks entre cajas)
+    cantidades: dict[int, int] = defaultdict(int)  # variante_id → unidades
     for item_in in data.items:
-        variante = (
+        cantidades[item_in.variante_id] += item_in.cantidad
+
+    variantes = {
+        variante.id: variante
+        for variante in (
             db.query(Variante)
             .options(joinedload(Variante.producto))
-            .filter(Variante.id == item_in.variante_id)
-            .first()
+            .filter(Variante.id.in_(cantidades))
+            .all()
         )
+    }
+    stock = bloquear_inventario_sucursal(db, data.sucursal_id, cantidades)
+
+    subtotal = Decimal("0.00")
+    items_info = []
+
+    for item_in in data.items:
+        variante = variantes.get(item_in.variante_id)
         if not variante:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -532,36 +665,27 @@ def crear_venta_pos(
                 ),
             )
 
-        inv = (
-            db.query(Inventario)
-            .filter(
-                Inventario.sucursal_id == data.sucursal_id,
-                Inventario.variante_id == item_in.variante_id,
-            )
-            .with_for_update()
-            .one_or_none()
-        )
-
-        disponible = int(inv.cantidad) if inv else 0
-        if disponible < item_in.cantidad:
+        # Se compara el total pedido de la variante (puede venir en varias líneas)
+        disponible = stock.get(item_in.variante_id, 0)
+        solicitado = cantidades[item_in.variante_id]
+        if disponible < solicitado:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=(
                     f"Stock insuficiente. "
                     f"Producto: '{producto.nombre}' | SKU: {variante.sku} | "
                     f"Variante: {item_in.variante_id} | "
-                    f"Disponible: {disponible} | Solicitado: {item_in.cantidad} | "
+                    f"Disponible: {disponible} | Solicitado: {solicitado} | "
                     f"Sucursal: {data.sucursal_id}"
                 ),
             )
 
-
         subtotal_item = item_in.precio_unitario * item_in.cantidad
         subtotal += subtotal_item
         items_info.append((item_in, subtotal_item, producto))
 
     # 6) Programa de puntos: solo si hay cliente
-    config_puntos = obtener_config_activa(db)
+    config_puntos = obtener_config_activa(db, commit=False)
     descuento_puntos = Decimal("0")
     puntos_redimidos = 0
 
@@ -582,6 +706,7 @@ def crear_venta_pos(
             db,
             usuario_id=cliente_id,
             total_compra_colones=subtotal,
+            commit=False,
         )
 
         if not limite["puede_usar_puntos"]:
@@ -611,6 +736,7 @@ def crear_venta_pos(
                 puntos=puntos_redimidos,
                 descripcion=f"Redención de puntos en venta POS de ₡{int(subtotal)}",
                 order_id=None,
+                commit=False,
             )
 
         # Base imponible = subtotal - descuento
@@ -645,14 +771,16 @@ def crear_venta_pos(
         total=total,
         puntos_ganados=0,
         estado="PAGADO",
+        clave_idempotencia=clave_idempotencia,
     )
     db.add(venta)
     db.flush()  # para tener venta.id
-    crear_comision_pos_si_aplica(db, venta)
+    # Comisión fuera de la petición: la calcula el despachador del outbox
+    registrar_evento(db, VENTA_POS_COMPLETADA, {"venta_id": venta.id})
 
-    # 9) Crear ítems y rebajar inventario
-    for item_in, subtotal_item, producto in items_info:
-        item = VentaPOSItem(
+    # 9) Crear ítems y rebajar inventario (un solo UPDATE sobre filas ya bloqueadas)
+    db.add_all(
+        VentaPOSItem(
             venta_pos_id=venta.id,
             variante_id=item_in.variante_id,
             producto_id=item_in.producto_id,
@@ -660,27 +788,9 @@ def crear_venta_pos(
             precio_unitario=item_in.precio_unitario,
             subtotal=subtotal_item,
         )
-        db.add(item)
-
-        inv = (
-            db.query(Inventario)
-            .filter(
-                Inventario.sucursal_id == data.sucursal_id,
-                Inventario.variante_id == item_in.variante_id,
-            )
-            .with_for_update()
-            .first()
-        )
-        if not inv or inv.cantidad < item_in.cantidad:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=(
-                    f"No hay stock suficiente de '{producto.nombre}' "
-                    f"al confirmar la venta."
-                ),
-            )
-        inv.cantidad -= item_in.cantidad
-        db.add(inv)
+        for item_in, subtotal_item, _ in items_info
+    )
+    descontar_inventario_sucursal(db, data.sucursal_id, cantidades)
 
     # 10) Crear pagos POS y movimientos de caja
     for pago_in in data.pagos:
@@ -692,77 +802,43 @@ def crear_venta_pos(
             estado="APROBADO",
         )
         db.add(pago_pos)
-        db.flush()
 
         if pago_in.metodo == "EFECTIVO" and caja:
-            mov = CajaMovimiento(
-                caja_turno_id=caja.id,
-                sucursal_id=data.sucursal_id,
-                venta_pos_id=venta.id,  # asumiendo que ya agregaste esta FK
-                pedido_id=None,
-                pago_id=None,  # PagoPOS no se enlaza aquí
+            # Suma también al total acumulado de la caja (mismo commit)
+            registrar_movimiento_caja(
+                db,
+                caja,
                 tipo="VENTA_EFECTIVO",
                 monto=pago_in.monto,
+                sucursal_id=data.sucursal_id,
+                venta_pos_id=venta.id,
                 descripcion=f"Venta POS #{venta.id}",
             )
-            db.add(mov)
-
-    db.commit()
 
     # 11) Puntos ganados por la compra (solo si hay cliente)
-    puntos_ganados = 0
+    if cliente_id is not None:
+        # Cambia su resumen (última compra, gasto) en el typeahead
+        invalidar_al_confirmar(db, f"cliente:{cliente_id}")
     if cliente_id is not None and config_puntos.activo:
-        puntos_ganados = registrar_puntos_por_compra(
+        venta.puntos_ganados = registrar_puntos_por_compra(
             db,
             usuario_id=cliente_id,
             total_compra_colones=total,
             order_id=None,
+            commit=False,
         )
-        venta = db.query(VentaPOS).filter(VentaPOS.id == venta.id).one()
-        venta.puntos_ganados = puntos_ganados
-        db.add(venta)
-        db.commit()
-        db.refresh(venta)
-    else:
-        venta = db.query(VentaPOS).filter(VentaPOS.id == venta.id).one()
 
-        # 11.5) ✅ Crear comisión automáticamente (si hay config activa)
-        config_comision_pos = obtener_configuracion_comision_activa(db, "POS")
+    return venta
 
-        if config_comision_pos:
-            # Evitar duplicados si por algún motivo se reintenta el request
-            existe = (
-                db.query(ComisionVendedor)
-                .filter(ComisionVendedor.venta_pos_id == venta.id)
-                .first()
-            )
 
-            if not existe:
-                # Si tienes monto_minimo y no lo cumple, no se crea
-                if (config_comision_pos.monto_minimo is None) or (venta.total >= config_comision_pos.monto_minimo):
-                    monto_comision = (venta.total * config_comision_pos.porcentaje) / Decimal("100")
-
-                    comision = ComisionVendedor(
-                        vendedor_id=venta.vendedor_id,
-                        venta_pos_id=venta.id,
-                        monto_venta=venta.total,
-                        porcentaje_aplicado=config_comision_pos.porcentaje,
-                        monto_comision=monto_comision,
-                        tipo_venta="POS",
-                        estado="PENDIENTE",
-                        fecha_venta=venta.fecha_creacion,
-                    )
-                    db.add(comision)
-                    db.commit()
-
-
-    # 12) Construir respuesta con items
+def _venta_pos_out(db: Session, venta_id: int) -> POSVentaOut:
+    """Respuesta de una venta POS con sus ítems."""
     venta_db = (
         db.query(VentaPOS)
         .options(
             joinedload(VentaPOS.items).joinedload(VentaPOSItem.producto),
         )
-        .filter(VentaPOS.id == venta.id)
+        .filter(VentaPOS.id == venta_id)
         .one()
     )
 
@@ -796,6 +872,147 @@ def crear_venta_pos(
     )
 
 
+@router.post("/ventas", response_model=POSVentaOut)
+def crear_venta_pos(
+    data: POSVentaCreate,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_vendedor_o_admin),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
+):
+    """
+    Crea una venta POS (ver _registrar_venta_pos).
+    Todo en una sola transacción (un único commit).
+
+    Con header Idempotency-Key, un reintento devuelve la misma venta sin
+    volver a bloquear ni descontar inventario.
+    """
+
+    def _crear() -> POSVentaOut:
+        venta = _registrar_venta_pos(db, data, current_user)
+
+        # Stock rebajado → refrescar resumen de catálogo (tiene_stock)
+        refrescar_resumen_por_variantes(db, list({item.variante_id for item in data.items}))
+
+        # Un único commit: venta, ítems, inventario, pagos, caja, puntos y evento outbox
+        db.commit()
+
+        return _venta_pos_out(db, venta.id)
+
+    return ejecutar_idempotente(
+        idempotency_key,
+        usuario_id=current_user.id,
+        ruta="pos/ventas",
+        huella=huella_peticion(data),
+        modelo=POSVentaOut,
+        ejecutar=_crear,
+        db=db,
+    )
+
+
+# ============================
+# VENTAS POS – SINCRONIZACIÓN POR LOTES (modo offline)
+# ============================
+
+@router.post("/ventas/lote", response_model=POSVentaLoteOut)
+def sincronizar_ventas_pos(
+    data: POSVentaLoteCreate,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_vendedor_o_admin),
+):
+    """
+    Recibe la cola de ventas que una caja acumuló sin conexión.
+
+    - Cada venta trae una clave_idempotencia generada por la caja: si ya
+      se registró (en este u otro envío), se responde DUPLICADA con su
+      venta_id y no se toca el inventario. Reenviar el lote es seguro.
+    - Todo el lote va en UNA transacción; cada venta en un SAVEPOINT, así
+      que una venta rechazada (stock insuficiente, pagos que no cuadran…)
+      se informa en su línea sin afectar a las demás.
+    - El inventario de todo el lote se bloquea al inicio, ordenado por
+      (sucursal_id, variante_id): dos lotes concurrentes no se cruzan.
+    """
+    claves = [venta.clave_idempotencia for venta in data.ventas]
+    existentes = dict(
+        db.query(VentaPOS.clave_idempotencia, VentaPOS.id)
+        .filter(VentaPOS.clave_idempotencia.in_(claves))
+        .all()
+    )
+
+    por_sucursal: dict[int, set] = defaultdict(set)
+    for venta_in in data.ventas:
+        if venta_in.clave_idempotencia not in existentes:
+            por_sucursal[venta_in.sucursal_id].update(i.variante_id for i in venta_in.items)
+    for sucursal_id in sorted(por_sucursal):
+        bloquear_inventario_sucursal(db, sucursal_id, por_sucursal[sucursal_id])
+
+    resultados: List[POSVentaLoteResultado] = []
+    vendidas: set = set()
+
+    for venta_in in data.ventas:
+        clave = venta_in.clave_idempotencia
+
+        if clave in existentes:
+            resultados.append(
+                POSVentaLoteResultado(
+                    clave_idempotencia=clave,
+                    estado="DUPLICADA",
+                    venta_id=existentes[clave],
+                )
+            )
+            continue
+
+        savepoint = db.begin_nested()
+        try:
+            venta = _registrar_venta_pos(db, venta_in, current_user, clave_idempotencia=clave)
+            savepoint.commit()
+        except HTTPException as e:
+            savepoint.rollback()
+            resultados.append(
+                POSVentaLoteResultado(clave_idempotencia=clave, estado="RECHAZADA", error=str(e.detail))
+            )
+            continue
+        except ValueError as e:  # programa de puntos
+            savepoint.rollback()
+            resultados.append(
+                POSVentaLoteResultado(clave_idempotencia=clave, estado="RECHAZADA", error=str(e))
+            )
+            continue
+        except IntegrityError:
+            # Otra petición registró la misma clave mientras tanto
+            savepoint.rollback()
+            venta_id = (
+                db.query(VentaPOS.id).filter(VentaPOS.clave_idempotencia == clave).scalar()
+            )
+            existentes[clave] = venta_id
+            resultados.append(
+                POSVentaLoteResultado(clave_idempotencia=clave, estado="DUPLICADA", venta_id=venta_id)
+            )
+            continue
+
+        existentes[clave] = venta.id
+        vendidas.update(item.variante_id for item in venta_in.items)
+        resultados.append(
+            POSVentaLoteResultado(
+                clave_idempotencia=clave,
+                estado="CREADA",
+                venta_id=venta.id,
+                total=venta.total,
+                puntos_ganados=venta.puntos_ganados or 0,
+            )
+        )
+
+    if vendidas:
+        refrescar_resumen_por_variantes(db, list(vendidas))
+    db.commit()
+
+    return POSVentaLoteOut(
+        resultados=resultados,
+        creadas=sum(1 for r in resultados if r.estado == "CREADA"),
+        duplicadas=sum(1 for r in resultados if r.estado == "DUPLICADA"),
+        rechazadas=sum(1 for r in resultados if r.estado == "RECHAZADA"),
+    )
+
+
 # ============================
 # VENTAS POS – LISTADO DEL VENDEDOR
 # ============================
@@ -824,7 +1041,7 @@ def listar_mis_ventas_pos(
             selectinload(VentaPOS.sucursal),
             selectinload(VentaPOS.pagos),
         )
-        .order_by(VentaPOS.fecha_creacion.desc())
+        .order_by(VentaPOS.fecha_creacion.desc(), VentaPOS.id.desc())
     )
 
     if current_user.rol != "ADMIN":
@@ -858,6 +1075,68 @@ def listar_mis_ventas_pos(
     return resultado
 
 
+@router.get("/ventas/historial", response_model=POSVentasHistorialOut)
+def historial_ventas_pos(
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_vendedor_o_admin),
+    cursor: Optional[str] = Query(None, description="next_cursor de la página anterior"),
+    limite: int = Query(50, ge=1, le=200),
+    sucursal_id: Optional[int] = Query(None),
+    vendedor_id: Optional[int] = Query(None, description="Solo ADMIN"),
+    desde: Optional[datetime] = Query(None, description="fecha_creacion >= desde"),
+    hasta: Optional[datetime] = Query(None, description="fecha_creacion < hasta"),
+    estado: Optional[str] = Query(None),
+    metodo_pago: Optional[str] = Query(None, description="Ventas con algún pago de este método"),
+    incluir_resumen: bool = Query(True, description="False en las páginas siguientes"),
+):
+    """
+    Historial de ventas POS (las del vendedor; todas o por vendedor si es ADMIN).
+
+    - Paginación keyset sobre (fecha_creacion, id): cada página cuesta lo
+      mismo sin importar qué tan atrás esté.
+    - `resumen`: cantidad, total, impuesto y montos por método de pago de
+      TODO el conjunto filtrado, calculados en una sola query (la caja ya
+      no necesita recorrer páginas para mostrar los totales del día).
+    """
+    if current_user.rol != "ADMIN":
+        vendedor_id = current_user.id
+
+    condiciones = condiciones_historial(
+        vendedor_id=vendedor_id,
+        sucursal_id=sucursal_id,
+        desde=desde,
+        hasta=hasta,
+        estado=estado,
+        metodo_pago=metodo_pago,
+    )
+
+    try:
+        filas, next_cursor = pagina_historial(db, condiciones, cursor, limite)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    ventas = [
+        POSVentaListItemOut(
+            id=fila.id,
+            sucursal_id=fila.sucursal_id,
+            sucursal_nombre=fila.sucursal_nombre or "Sin sucursal",
+            impuesto=fila.impuesto or Decimal("0.00"),
+            total=fila.total,
+            estado=fila.estado,
+            fecha_creacion=fila.fecha_creacion,
+            metodo_principal=fila.metodo_principal or "SIN_PAGO",
+            nombre_cliente_ticket=fila.nombre_cliente,
+        )
+        for fila in filas
+    ]
+
+    resumen = None
+    if incluir_resumen:
+        resumen = POSVentasResumenOut(**resumen_historial(db, condiciones))
+
+    return POSVentasHistorialOut(ventas=ventas, next_cursor=next_cursor, resumen=resumen)
+
+
 # ============================
 # VENTAS POS – DETALLE
 # ============================
@@ -15,6 +15,8 @@ from app.schemas.producto import (
     ProductoRead,
 )
 from app.schemas.media import MediaCreate, MediaRead, MediaReorderRequest
+from app.services.producto_resumen import refrescar_resumen_productos
+from app.core.cache import invalidar_al_confirmar
 
 from app.core.security import get_current_admin_user
 from app.models.usuario import Usuario
@@ -72,6 +74,10 @@ def crear_producto(
         producto.categorias = categorias
 
     db.add(producto)
+    db.flush()
+    refrescar_resumen_productos(db, [producto.id])
+    # El menú de categorías cuenta productos activos por categoría
+    invalidar_al_confirmar(db, "categorias")
     db.commit()
     db.refresh(producto)
     return producto
@@ -145,6 +151,9 @@ def actualizar_producto(
                 )
             producto.categorias = categorias
 
+    refrescar_resumen_productos(db, [producto.id])
+    # El menú de categorías cuenta productos activos por categoría
+    invalidar_al_confirmar(db, "categorias")
     db.commit()
     db.refresh(producto)
     return producto
@@ -164,6 +173,9 @@ def desactivar_producto(
         )
 
     producto.activo = False
+    refrescar_resumen_productos(db, [producto.id])
+    # El menú de categorías cuenta productos activos por categoría
+    invalidar_al_confirmar(db, "categorias")
     db.commit()
     db.refresh(producto)
     return producto
@@ -209,6 +221,7 @@ def agregar_media_producto(
         orden=data.orden or 0,
     )
     db.add(media)
+    refrescar_resumen_productos(db, [producto_id])
     db.commit()
     db.refresh(media)
     return media
@@ -267,6 +280,7 @@ async def upload_media_producto(
     )
 
     db.add(media)
+    refrescar_resumen_productos(db, [producto_id])
     db.commit()
     db.refresh(media)
 
@@ -286,7 +300,9 @@ def eliminar_media(
             detail="Media no encontrada.",
         )
 
+    producto_id = media.producto_id
     db.delete(media)
+    refrescar_resumen_productos(db, [producto_id])
     db.commit()
     return
 
@@ -324,6 +340,7 @@ def reordenar_media_producto(
         if m.id in orden_map:
             m.orden = orden_map[m.id]
 
+    refrescar_resumen_productos(db, [producto_id])
     db.commit()
     db.refresh(producto)
 
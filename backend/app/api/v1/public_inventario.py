@@ -1,10 +1,11 @@
 # app/api/v1/public_inventario.py
 
 from typing import List
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request
 from sqlalchemy.orm import Session, joinedload
 
 from app.db import get_db
+from app.core.cache import respuesta_cacheada
 from app.models.inventario import Inventario
 from pydantic import BaseModel
 
@@ -23,6 +24,7 @@ router = APIRouter()
 
 @router.get("/public/inventario", response_model=List[InventarioPublicRead])
 def listar_inventario_publico(
+    request: Request,
     variante_id: int = Query(...),
     db: Session = Depends(get_db),
 ):
@@ -30,18 +32,31 @@ def listar_inventario_publico(
     Endpoint público para ver inventario por sucursal.
     Sin permisos de usuario.
     """
-    registros = (
-        db.query(Inventario)
-        .options(joinedload(Inventario.sucursal))
-        .filter(Inventario.variante_id == variante_id)
-        .all()
-    )
-
-    return [
-        InventarioPublicRead(
-            sucursal_id=inv.sucursal_id,
-            sucursal_nombre=inv.sucursal.nombre if inv.sucursal else "Sucursal",
-            cantidad=inv.cantidad,
+    def _calcular():
+        registros = (
+            db.query(Inventario)
+            .options(joinedload(Inventario.sucursal))
+            .filter(Inventario.variante_id == variante_id)
+            .all()
         )
-        for inv in registros
-    ]
+
+        return [
+            InventarioPublicRead(
+                sucursal_id=inv.sucursal_id,
+                sucursal_nombre=inv.sucursal.nombre if inv.sucursal else "Sucursal",
+                cantidad=inv.cantidad,
+            )
+            for inv in registros
+        ]
+
+    return respuesta_cacheada(
+        "public_inventario",
+        {"variante_id": variante_id},
+        List[InventarioPublicRead],
+        _calcular,
+        tags=lambda filas: [
+            f"variante:{variante_id}",
+            *(f"sucursal:{fila.sucursal_id}" for fila in filas),
+        ],
+        request=request,
+    )
@@ -14,6 +14,7 @@ from app.schemas.sucursal import (
 
 from app.core.security import get_current_admin_user
 from app.models.usuario import Usuario
+from app.core.cache import invalidar_al_confirmar
 
 router = APIRouter()
 
@@ -109,6 +110,8 @@ def actualizar_sucursal(
     if data.activo is not None:
         sucursal.activo = data.activo
 
+    # El nombre de la sucursal sale en /public/inventario
+    invalidar_al_confirmar(db, f"sucursal:{sucursal_id}")
     db.commit()
     db.refresh(sucursal)
     return sucursal
@@ -16,6 +16,7 @@ from app.schemas.variante import (
 )
 from app.schemas.historial_precio import HistorialPrecioRead
 from app.services.precio import cambiar_precio_variante
+from app.services.producto_resumen import refrescar_resumen_productos
 
 from app.core.security import get_current_admin_user
 from app.models.usuario import Usuario
@@ -101,6 +102,7 @@ def crear_variante(
     db.refresh(variante)
 
     # Crear registro inicial en historial de precios
+    # (también refresca el resumen de catálogo del producto)
     cambiar_precio_variante(db, variante.id, data.precio_actual)
 
     db.refresh(variante)
@@ -195,6 +197,7 @@ def actualizar_variante(
     else:
         if data.activo is not None:
             variante.activo = data.activo
+        refrescar_resumen_productos(db, [variante.producto_id])
         db.commit()
         db.refresh(variante)
 
@@ -220,6 +223,7 @@ def desactivar_variante(
         )
 
     variante.activo = False
+    refrescar_resumen_productos(db, [variante.producto_id])
     db.commit()
     db.refresh(variante)
     return variante
@@ -0,0 +1,529 @@
+# app/core/cache.py
+"""
+Caché de respuestas en Redis para los endpoints públicos del storefront
+(/catalogo, /catalogo/filtros, /catalogo/facetas, /categorias/menu,
+/home-hero/public, /public/inventario).
+
+- Clave = namespace + hash de los parámetros normalizados.
+- Cada respuesta se etiqueta (tags) con "catalogo", "producto:<id>",
+  "categorias", "variante:<id>", "sucursal:<id>", ... Los movimientos de
+  stock no tocan "catalogo": invalidan "producto:<id>" / "variante:<id>"
+  y "disponibilidad" sólo si un producto se quedó sin stock o lo recuperó.
+- Los caminos de escritura llaman invalidar_al_confirmar(db, *tags):
+  las claves se borran DESPUÉS del commit de esa sesión y se incrementa
+  la versión de los tags generales (ver services/catalogo_snapshot.py).
+- Carrera lectura/escritura: cada invalidación toma un número de una
+  secuencia y lo deja como marca en sus tags. Quien calcula lee la
+  secuencia ANTES de ir a la base y sólo guarda (script Lua atómico) si
+  ninguno de sus tags se invalidó después: un valor calculado antes de
+  un commit no queda vivo todo el TTL.
+- Junto al cuerpo se guardan sus validadores HTTP (ETag fuerte y, si
+  aplica, Last-Modified) en `<clave>:meta`: un GET condicional que
+  coincide responde 304 sin leer ni serializar el cuerpo.
+- Métricas hit/miss/304 por namespace en un hash de Redis.
+- Kill switch: settings.CACHE_RESPUESTAS_ACTIVO (despliegue) o la clave
+  `cache:desactivado` (en caliente, desde /api/v1/cache/activo).
+- valores_cacheados(): un valor por id (p. ej. el stock total de cada
+  variante del carrito) con las mismas etiquetas e invalidación.
+- Si Redis no responde la API sigue funcionando sin caché.
+"""
+import hashlib
+import json
+import time
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+import redis
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.http_cache import (
+    es_condicional,
+    etag_fuerte,
+    fecha_http,
+    no_modificado,
+    respuesta_no_modificada,
+)
+from app.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+PREFIJO = "cache:v1"
+CLAVE_DESACTIVADO = "cache:desactivado"
+CLAVE_METRICAS = "cache:metricas"
+# Versión por tag general ("catalogo", "categorias", ...): se incrementa
+# en cada invalidación; la usan los snapshots en memoria de cada worker
+CLAVE_VERSIONES = "cache:versiones"
+
+# Secuencia de invalidaciones y marca "<tag> invalidado en N"
+CLAVE_SECUENCIA = "cache:secuencia"
+MARCA_TODO = "*"
+
+# Guarda los valores sólo si ningún tag tiene una marca posterior a la
+# secuencia leída antes de calcular.
+# KEYS: m claves de valor, t sets de tag, marcas a revisar
+# ARGV: secuencia, ttl, m, t, valores...
+_LUA_GUARDAR = """
+local secuencia, ttl = tonumber(ARGV[1]), ARGV[2]
+local m, t = tonumber(ARGV[3]), tonumber(ARGV[4])
+for i = m + t + 1, #KEYS do
+    local marca = redis.call('GET', KEYS[i])
+    if marca and tonumber(marca) > secuencia then
+        return 0
+    end
+end
+for i = 1, m do
+    redis.call('SET', KEYS[i], ARGV[4 + i], 'EX', ttl)
+end
+for i = m + 1, m + t do
+    for j = 1, m do
+        redis.call('SADD', KEYS[i], KEYS[j])
+    end
+    redis.call('EXPIRE', KEYS[i], ttl)
+end
+return 1
+"""
+
+# Nuevo número de secuencia y marca en cada tag, atómico (marcas crecientes)
+# KEYS: secuencia, marcas; ARGV: ttl de las marcas
+_LUA_MARCAR = """
+local secuencia = redis.call('INCR', KEYS[1])
+for i = 2, #KEYS do
+    redis.call('SET', KEYS[i], secuencia, 'EX', ARGV[1])
+end
+return secuencia
+"""
+
+# Tras un error de Redis no se vuelve a intentar durante estos segundos
+PAUSA_TRAS_ERROR_SEGUNDOS = 5
+
+_TAGS_PENDIENTES = "cache_tags_pendientes"
+
+_cliente: Optional[redis.Redis] = None
+_pausado_hasta = 0.0
+
+
+# =========================
+# Conexión
+# =========================
+
+def get_redis() -> Optional[redis.Redis]:
+    """Cliente Redis compartido, o None si está en pausa por errores."""
+    global _cliente
+    if time.monotonic() < _pausado_hasta:
+        return None
+    if _cliente is None:
+        _cliente = redis.Redis.from_url(
+            settings.REDIS_URL,
+            socket_timeout=0.25,
+            socket_connect_timeout=0.25,
+        )
+    return _cliente
+
+
+def _fallo_redis(error: Exception) -> None:
+    global _pausado_hasta
+    _pausado_hasta = time.monotonic() + PAUSA_TRAS_ERROR_SEGUNDOS
+    logger.warning(f"⚠️ Caché Redis no disponible: {error}")
+
+
+# =========================
+# Claves
+# =========================
+
+def _valor_normalizado(valor: Any) -> Any:
+    if isinstance(valor, str):
+        return valor.strip()
+    if isinstance(valor, Decimal):
+        return str(valor.normalize())
+    if isinstance(valor, (list, tuple, set)):
+        return sorted(str(v) for v in valor)
+    return valor
+
+
+def clave_cache(namespace: str, params: dict) -> str:
+    """
+    Clave estable para (namespace, params): sin valores vacíos, con las
+    claves ordenadas y los Decimal normalizados ("10.0" == "10").
+    """
+    normalizados = {
+        clave: _valor_normalizado(valor)
+        for clave, valor in sorted(params.items())
+        if valor is not None and valor != ""
+    }
+    crudo = json.dumps(normalizados, sort_keys=True, default=str, separators=(",", ":"))
+    resumen = hashlib.sha1(crudo.encode()).hexdigest()
+    return f"{PREFIJO}:{namespace}:{resumen}"
+
+
+def _clave_tag(tag: str) -> str:
+    return f"{PREFIJO}:tag:{tag}"
+
+
+def _clave_meta(clave: str) -> str:
+    return f"{clave}:meta"
+
+
+def _clave_marca(tag: str) -> str:
+    # Fuera de PREFIJO: invalidar_todo() no la borra al vaciar la caché
+    return f"cache:invalidado:{tag}"
+
+
+def _secuencia(crudo: Optional[bytes]) -> int:
+    return int(crudo or 0)
+
+
+def _guardar_si_vigente(
+    cliente,
+    secuencia: int,
+    valores: Dict[str, Any],
+    tags: Iterable[str],
+    ttl: int,
+) -> None:
+    """SET de `valores` etiquetados con `tags`, salvo que alguno se haya
+    invalidado después de `secuencia` (entonces no se guarda nada).
+    `cliente` puede ser un pipeline."""
+    tags = sorted(set(tags))
+    claves = list(valores)
+    cliente.register_script(_LUA_GUARDAR)(
+        keys=[
+            *claves,
+            *(_clave_tag(tag) for tag in tags),
+            *(_clave_marca(tag) for tag in [*tags, MARCA_TODO]),
+        ],
+        args=[secuencia, ttl, len(claves), len(tags), *valores.values()],
+    )
+
+
+def _marcar_invalidacion(cliente, tags: Iterable[str]) -> int:
+    return cliente.register_script(_LUA_MARCAR)(
+        keys=[CLAVE_SECUENCIA, *(_clave_marca(tag) for tag in tags)],
+        args=[settings.CACHE_RESPUESTAS_TTL],
+    )
+
+
+# =========================
+# Lectura / escritura
+# =========================
+
+def cache_activo() -> bool:
+    return settings.CACHE_RESPUESTAS_ACTIVO
+
+
+def _headers_respuesta(validadores: dict, estado_cache: str) -> dict:
+    headers = {"X-Cache": estado_cache, "ETag": validadores["etag"]}
+    if validadores.get("last_modified"):
+        headers["Last-Modified"] = validadores["last_modified"]
+    return headers
+
+
+def respuesta_cacheada(
+    namespace: str,
+    params: dict,
+    modelo: Any,
+    calcular: Callable[[], Any],
+    tags: Union[Iterable[str], Callable[[Any], Iterable[str]]],
+    ttl: Optional[int] = None,
+    request: Optional[Request] = None,
+    ultima_modificacion: Optional[Callable[[Any], Optional[datetime]]] = None,
+) -> Response:
+    """
+    Devuelve la respuesta JSON desde Redis o la calcula con `calcular()`,
+    la serializa con `modelo` (igual que el response_model de FastAPI)
+    y la guarda etiquetada con `tags` (lista o función del resultado).
+
+    Con `request` responde 304 si su If-None-Match / If-Modified-Since
+    coincide con los validadores guardados. `ultima_modificacion` recibe
+    el resultado de `calcular()` y devuelve su updated_at (Last-Modified).
+    """
+    cliente = get_redis() if cache_activo() else None
+    clave = clave_cache(namespace, params)
+    condicional = request is not None and es_condicional(request)
+
+    if cliente is not None:
+        try:
+            # Si el cliente trae validadores primero se comparan: el cuerpo
+            # sólo se lee de Redis cuando hay que enviarlo
+            claves = [CLAVE_DESACTIVADO, CLAVE_SECUENCIA, _clave_meta(clave)]
+            if not condicional:
+                claves.append(clave)
+            desactivado, secuencia, meta, *contenido = cliente.mget(claves)
+            secuencia = _secuencia(secuencia)
+
+            if desactivado:
+                cliente = None
+            elif meta is not None:
+                validadores = json.loads(meta)
+                if condicional and no_modificado(request, **validadores):
+                    cliente.hincrby(CLAVE_METRICAS, f"{namespace}:304", 1)
+                    return respuesta_no_modificada(
+                        _headers_respuesta(validadores, "HIT")
+                    )
+
+                contenido = contenido[0] if contenido else cliente.get(clave)
+                if contenido is not None:
+                    cliente.hincrby(CLAVE_METRICAS, f"{namespace}:hit", 1)
+                    return Response(
+                        content=contenido,
+                        media_type="application/json",
+                        headers=_headers_respuesta(validadores, "HIT"),
+                    )
+        except redis.RedisError as e:
+            _fallo_redis(e)
+            cliente = None
+
+    # Igual que FastAPI con response_model: validar y serializar
+    adaptador = TypeAdapter(modelo)
+    crudo = calcular()
+    resultado = adaptador.validate_python(crudo, from_attributes=True)
+    contenido = adaptador.dump_json(resultado, by_alias=True)
+
+    modificado = ultima_modificacion(crudo) if ultima_modificacion else None
+    validadores = {
+        "etag": etag_fuerte(contenido),
+        "last_modified": fecha_http(modificado) if modificado else None,
+    }
+
+    if cliente is not None:
+        etiquetas = tags(resultado) if callable(tags) else tags
+        ttl = ttl or settings.CACHE_RESPUESTAS_TTL
+        try:
+            _guardar_si_vigente(
+                cliente,
+                secuencia,
+                {clave: contenido, _clave_meta(clave): json.dumps(validadores)},
+                etiquetas,
+                ttl,
+            )
+            cliente.hincrby(CLAVE_METRICAS, f"{namespace}:miss", 1)
+        except redis.RedisError as e:
+            _fallo_redis(e)
+
+    headers = _headers_respuesta(validadores, "MISS" if cliente is not None else "BYPASS")
+    if condicional and no_modificado(request, **validadores):
+        return respuesta_no_modificada(headers)
+
+    return Response(
+        content=contenido,
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+# =========================
+# Valores por id
+# =========================
+
+def valores_cacheados(
+    namespace: str,
+    ids: Iterable[int],
+    calcular: Callable[[List[int]], Dict[int, Any]],
+    tag: Callable[[int], str],
+    ttl: Optional[int] = None,
+) -> Dict[int, Any]:
+    """
+    id → valor (JSON) leyendo todos los ids de Redis con un solo MGET.
+    Los que faltan se calculan JUNTOS con `calcular(faltantes)` (que debe
+    devolver un valor para cada uno) y se guardan etiquetados con
+    `tag(id)`: invalidar_al_confirmar(db, tag(id)) los borra.
+    Sin Redis, o con la caché desactivada, siempre se calcula.
+    """
+    ids = sorted(set(ids))
+    if not ids:
+        return {}
+
+    cliente = get_redis() if cache_activo() else None
+    claves = [f"{PREFIJO}:{namespace}:{i}" for i in ids]
+    valores: Dict[int, Any] = {}
+
+    if cliente is not None:
+        try:
+            desactivado, secuencia, *crudos = cliente.mget(
+                [CLAVE_DESACTIVADO, CLAVE_SECUENCIA, *claves]
+            )
+            secuencia = _secuencia(secuencia)
+            if desactivado:
+                cliente = None
+            else:
+                valores = {i: json.loads(c) for i, c in zip(ids, crudos) if c is not None}
+        except redis.RedisError as e:
+            _fallo_redis(e)
+            cliente = None
+
+    faltantes = [i for i in ids if i not in valores]
+    if not faltantes:
+        try:
+            cliente.hincrby(CLAVE_METRICAS, f"{namespace}:hit", 1)
+        except redis.RedisError as e:
+            _fallo_redis(e)
+        return valores
+
+    calculados = calcular(faltantes)
+    valores.update(calculados)
+
+    if cliente is not None:
+        ttl = ttl or settings.CACHE_RESPUESTAS_TTL
+        try:
+            pipe = cliente.pipeline(transaction=False)
+            for i in faltantes:
+                _guardar_si_vigente(
+                    pipe,
+                    secuencia,
+                    {f"{PREFIJO}:{namespace}:{i}": json.dumps(calculados[i], default=str)},
+                    [tag(i)],
+                    ttl,
+                )
+            pipe.hincrby(CLAVE_METRICAS, f"{namespace}:miss", 1)
+            pipe.execute()
+        except redis.RedisError as e:
+            _fallo_redis(e)
+
+    return valores
+
+
+# =========================
+# Invalidación
+# =========================
+
+def invalidar_tags(*tags: str) -> int:
+    """Borra todas las respuestas etiquetadas con alguno de `tags`."""
+    tags = [t for t in set(tags) if t]
+    cliente = get_redis()
+    if not tags or cliente is None:
+        return 0
+
+    try:
+        # La marca va ANTES de leer los sets: lo que se guarde después ya
+        # la ve, y lo guardado antes está en el set y se borra aquí
+        _marcar_invalidacion(cliente, tags)
+
+        pipe = cliente.pipeline(transaction=False)
+        for tag in tags:
+            pipe.smembers(_clave_tag(tag))
+        claves = set().union(*pipe.execute())
+        claves.update(_clave_tag(tag).encode() for tag in tags)
+
+        pipe = cliente.pipeline(transaction=False)
+        pipe.delete(*claves)
+        for tag in tags:
+            if ":" not in tag:  # no versionar "producto:<id>", "variante:<id>", ...
+                pipe.hincrby(CLAVE_VERSIONES, tag, 1)
+        return pipe.execute()[0]
+    except redis.RedisError as e:
+        _fallo_redis(e)
+        return 0
+
+
+def invalidar_todo() -> int:
+    """Borra todas las respuestas cacheadas (y sus tags)."""
+    cliente = get_redis()
+    if cliente is None:
+        return 0
+
+    borradas = 0
+    try:
+        _marcar_invalidacion(cliente, [MARCA_TODO])
+        lote = []
+        for clave in cliente.scan_iter(match=f"{PREFIJO}:*", count=500):
+            lote.append(clave)
+            if len(lote) >= 500:
+                borradas += cliente.delete(*lote)
+                lote = []
+        if lote:
+            borradas += cliente.delete(*lote)
+
+        for tag in cliente.hkeys(CLAVE_VERSIONES):
+            cliente.hincrby(CLAVE_VERSIONES, tag, 1)
+    except redis.RedisError as e:
+        _fallo_redis(e)
+    return borradas
+
+
+def version_tag(tag: str) -> Optional[int]:
+    """Versión actual de un tag general (None si Redis no responde)."""
+    cliente = get_redis()
+    if cliente is None:
+        return None
+    try:
+        return int(cliente.hget(CLAVE_VERSIONES, tag) or 0)
+    except redis.RedisError as e:
+        _fallo_redis(e)
+        return None
+
+
+def invalidar_al_confirmar(db: Session, *tags: str) -> None:
+    """
+    Marca tags para invalidar cuando la transacción de `db` haga commit.
+    Si hace rollback no se invalida nada.
+    """
+    db.info.setdefault(_TAGS_PENDIENTES, set()).update(tags)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_tags_pendientes(session: Session) -> None:
+    tags = session.info.pop(_TAGS_PENDIENTES, None)
+    if tags:
+        invalidar_tags(*tags)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_tags_pendientes(session: Session) -> None:
+    session.info.pop(_TAGS_PENDIENTES, None)
+
+
+# =========================
+# Kill switch y métricas
+# =========================
+
+def desactivar_en_caliente(desactivado: bool) -> None:
+    cliente = get_redis()
+    if cliente is None:
+        return
+    try:
+        if desactivado:
+            cliente.set(CLAVE_DESACTIVADO, "1")
+        else:
+            cliente.delete(CLAVE_DESACTIVADO)
+    except redis.RedisError as e:
+        _fallo_redis(e)
+
+
+def estado_cache() -> dict:
+    """Estado del kill switch y hit/miss por namespace."""
+    estado = {
+        "activo_config": cache_activo(),
+        "desactivado_en_caliente": False,
+        "redis_disponible": False,
+        "metricas": {},
+    }
+    cliente = get_redis()
+    if cliente is None:
+        return estado
+
+    try:
+        desactivado, crudas = cliente.get(CLAVE_DESACTIVADO), cliente.hgetall(CLAVE_METRICAS)
+    except redis.RedisError as e:
+        _fallo_redis(e)
+        return estado
+
+    estado["redis_disponible"] = True
+    estado["desactivado_en_caliente"] = bool(desactivado)
+
+    for campo, valor in crudas.items():
+        namespace, tipo = campo.decode().rsplit(":", 1)
+        metricas = estado["metricas"].setdefault(
+            namespace, {"hit": 0, "miss": 0, "304": 0}
+        )
+        metricas[tipo] = int(valor)
+
+    for metricas in estado["metricas"].values():
+        # Un 304 también se sirvió sin recalcular
+        aciertos = metricas["hit"] + metricas["304"]
+        total = aciertos + metricas["miss"]
+        metricas["ratio_hit"] = round(aciertos / total, 4) if total else 0.0
+
+    return estado
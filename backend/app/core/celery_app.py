@@ -10,11 +10,31 @@ celery_app = Celery(
     "tienda_worker",
     broker=settings.CELERY_BROKER_URL,
     backend=settings.CELERY_RESULT_BACKEND,
+    # Módulos de tareas (autodiscover solo busca app.tasks.tasks)
+    include=[
+        "app.tasks.idempotencia",
+        "app.tasks.email",
+        "app.tasks.outbox",
+        "app.tasks.reservas",
+        "app.tasks.user_cleanup",
+    ],
 )
 
 # Buscar tareas dentro del paquete app.tasks
 celery_app.autodiscover_tasks(["app.tasks"])
 
+# Correos: confirmar el mensaje solo al terminar (un worker caído no lo pierde)
+celery_app.conf.task_reject_on_worker_lost = True
+
+# Publicar desde la API no debe colgar la petición si Redis no responde:
+# un reintento corto y se falla (el worker tiene su propio ciclo de reconexión)
+celery_app.conf.broker_transport_options = {
+    "max_retries": 1,
+    "interval_start": 0,
+    "interval_step": 0.2,
+    "interval_max": 0.5,
+}
+
 # Zona horaria (puedes usar la tuya si quieres)
 celery_app.conf.timezone = "UTC"
 
@@ -24,4 +44,22 @@ celery_app.conf.beat_schedule = {
         "task": "app.tasks.user_cleanup.purge_soft_deleted_users",
         "schedule": crontab(hour=3, minute=0),  # todos los días a las 03:00 UTC
     },
+    "purgar-claves-idempotencia-cada-hora": {
+        "task": "app.tasks.idempotencia.purgar_claves_idempotencia",
+        "schedule": crontab(minute=15),  # cada hora, al minuto 15
+    },
+    # Barrido del outbox: eventos cuyo aviso se perdió o que esperan reintento
+    "despachar-outbox": {
+        "task": "app.tasks.outbox.despachar_outbox",
+        "schedule": 30.0,  # segundos
+    },
+    "purgar-outbox-diario": {
+        "task": "app.tasks.outbox.purgar_outbox",
+        "schedule": crontab(hour=3, minute=30),
+    },
+    # Reservas de stock vencidas → EXPIRADA (ya no cuentan desde expira_en)
+    "expirar-reservas-stock": {
+        "task": "app.tasks.reservas.expirar_reservas_stock",
+        "schedule": 60.0,  # segundos
+    },
 }
\ No newline at end of file
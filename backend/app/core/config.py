@@ -25,6 +25,12 @@ class Settings(BaseSettings):
     RESEND_API_KEY: str                      # obligatorio, viene del entorno
     EMAIL_FROM_NAME: str = "Innersport Tienda"
     EMAIL_FROM_ADDRESS: str = "onboarding@resend.dev"  # default ok
+    # Envío asíncrono (tarea Celery app.tasks.email.enviar_correo)
+    EMAIL_TRANSPORTE: str = "resend"  # "falso": en memoria, para pruebas/desarrollo
+    EMAIL_MAX_REINTENTOS: int = 5
+    EMAIL_REINTENTO_BASE_SEGUNDOS: int = 30
+    EMAIL_REINTENTO_MAX_SEGUNDOS: int = 3600
+    EMAIL_RATE_LIMIT: str = "10/s"  # por worker (límite de Resend)
     FRONTEND_BASE_URL: str = "http://localhost:3000"
     BACKEND_URL: str = os.getenv("BACKEND_URL", "http://localhost:8000")
 
@@ -42,6 +48,44 @@ class Settings(BaseSettings):
     CELERY_BROKER_URL: str = "redis://redis:6379/1"
     CELERY_RESULT_BACKEND: str = "redis://redis:6379/2"
 
+    # Caché de respuestas públicas en Redis (kill switch: False)
+    CACHE_RESPUESTAS_ACTIVO: bool = True
+    CACHE_RESPUESTAS_TTL: int = 300  # segundos
+
+    # Motor de /catalogo: "sql" (producto_resumen) o "snapshot" (en memoria)
+    CATALOGO_MOTOR: str = "sql"
+    CATALOGO_SNAPSHOT_VERIFICAR_SEGUNDOS: float = 1.0  # cada cuánto mirar la versión
+    CATALOGO_SNAPSHOT_MAX_SEGUNDOS: int = 300  # reconstruir aunque no haya versión nueva
+    # Depuración: total estimado (EXPLAIN por petición) en el modo cursor
+    CATALOGO_CURSOR_TOTAL: bool = False
+
+    # Escaneo POS: índice código → variante por sucursal en memoria
+    POS_INDICE_ESCANEO_ACTIVO: bool = False
+    POS_INDICE_ESCANEO_MAX_SEGUNDOS: int = 60
+    POS_CLIENTES_CACHE_TTL: int = 60  # typeahead de clientes (segundos)
+
+    # Asignación de stock de pedidos en línea a sucursales: "optima" o "greedy"
+    ASIGNACION_STOCK_ESTRATEGIA: str = "optima"
+
+    # Outbox de eventos de dominio (tasks/outbox.py)
+    OUTBOX_LOTE: int = 100
+    OUTBOX_LOTES_POR_EJECUCION: int = 20
+    OUTBOX_MAX_INTENTOS: int = 8
+    OUTBOX_REINTENTO_BASE_SEGUNDOS: int = 30
+    OUTBOX_REINTENTO_MAX_SEGUNDOS: int = 3600
+    OUTBOX_RETENCION_DIAS: int = 7
+    OUTBOX_DESPERTAR_AL_CONFIRMAR: bool = True  # encolar el despacho en cada commit con eventos
+
+    # Reservas de stock (services/reservas_stock.py)
+    RESERVA_CARRITO_MINUTOS: int = 15  # desde que empieza el checkout
+    RESERVA_SINPE_HORAS: int = 48  # pedido SINPE esperando verificación del pago
+
+    # Header Idempotency-Key (checkout y ventas POS): cuánto se guarda la respuesta
+    IDEMPOTENCIA_TTL_HORAS: int = 24
+    # Plazo de una clave EN_PROCESO: pasado, se da por caída la petición
+    # original y la clave se puede reclamar de nuevo
+    IDEMPOTENCIA_EN_PROCESO_SEGUNDOS: int = 120
+
     ACCOUNT_DELETION_GRACE_DAYS: int = int(os.getenv("ACCOUNT_DELETION_GRACE_DAYS", "7"))
 
     class Config:
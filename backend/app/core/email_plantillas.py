@@ -0,0 +1,249 @@
+# backend/app/core/email_plantillas.py
+"""
+Plantillas de correo compiladas una sola vez al importar el módulo.
+
+Cada plantilla usa marcadores ${nombre}; al compilar se parte en trozos
+literales y nombres, y renderizar es solo unir trozos. Los valores se
+escapan como HTML salvo que vengan envueltos en HtmlSeguro (fragmentos
+que arma el propio sistema).
+"""
+import re
+from html import escape
+from typing import Dict, List, Tuple
+
+from app.core.config import settings
+
+
+_MARCADOR = re.compile(r"\$\{(\w+)\}")
+
+
+class HtmlSeguro(str):
+    """Fragmento HTML ya armado por el sistema: no se escapa."""
+
+
+class Plantilla:
+    def __init__(self, texto: str, escapar: bool = True):
+        # Posiciones pares: texto literal; impares: nombre de la variable
+        self._trozos: List[str] = _MARCADOR.split(texto)
+        self.variables = frozenset(self._trozos[1::2])
+        self._escapar = escapar
+
+    def renderizar(self, **contexto) -> str:
+        partes = []
+        for i, trozo in enumerate(self._trozos):
+            if i % 2 == 0:
+                partes.append(trozo)
+                continue
+            valor = contexto[trozo]
+            if self._escapar and not isinstance(valor, HtmlSeguro):
+                valor = escape(str(valor))
+            partes.append(str(valor))
+        return "".join(partes)
+
+
+# =========================
+# Textos
+# =========================
+
+ESTADO_PEDIDO_TEXTOS = {
+    "VERIFICAR_PAGO": {
+        "titulo": "Estamos verificando tu pago SINPE",
+        "descripcion": "Recibimos tu comprobante y lo estamos validando. Te avisaremos cuando el pago sea confirmado.",
+        "mensaje_extra": "Si hay algún inconveniente con el comprobante, te contactaremos para corregirlo.",
+    },
+    "PAGADO": {
+        "titulo": "¡Hemos recibido tu pedido!",
+        "descripcion": "Tu pedido ha sido confirmado y estamos procesándolo para enviártelo lo antes posible.",
+        "mensaje_extra": "En cuanto esté listo para envío, te avisaremos por este mismo medio.",
+    },
+    "EN_PREPARACION": {
+        "titulo": "Estamos preparando tu pedido",
+        "descripcion": "Nuestro equipo está alistando tus productos con todo el cuidado que merecen.",
+        "mensaje_extra": "Te enviaremos otro correo cuando el pedido salga a camino.",
+    },
+    "ENVIADO": {
+        "titulo": "Tu pedido va en camino",
+        "descripcion": "Tu pedido ha sido enviado y llegará pronto a la dirección indicada.",
+        "mensaje_extra": "Si el transportista ofrece seguimiento, recibirás la información correspondiente.",
+    },
+    "ENTREGADO": {
+        "titulo": "Tu pedido ha sido entregado",
+        "descripcion": "Según nuestro sistema, tu pedido ya fue entregado.",
+        "mensaje_extra": "Esperamos que disfrutes tus productos. ¡Gracias por confiar en Innersport!",
+    },
+    "CANCELADO": {
+        "titulo": "Tu pedido ha sido cancelado",
+        "descripcion": "Tu pedido fue cancelado correctamente.",
+        "mensaje_extra": "Si no reconoces esta acción o tienes dudas, contáctanos para ayudarte.",
+    },
+}
+
+RMA_ESTADO_TEXTOS = {
+    "solicitado": "Recibida",
+    "en_revision": "En Revisión",
+    "aprobado": "Aprobada",
+    "rechazado": "Rechazada",
+    "completado": "Completada",
+}
+
+
+# =========================
+# Plantillas
+# =========================
+
+_VERIFICACION_HTML = """
+        <p>Gracias por registrarte en <strong>Innersport</strong>.</p>
+        <p>Haz clic en el siguiente enlace para verificar tu correo:</p>
+        <p><a href="${verify_url}">Verificar mi cuenta</a></p>
+        <p>Si no solicitaste este registro, ignora este mensaje.</p>
+"""
+
+_RESET_PASSWORD_HTML = """
+        <h2>Recuperación de Contraseña</h2>
+        <p>Recibimos una solicitud para restablecer la contraseña de tu cuenta en <strong>Innersport</strong>.</p>
+        <p>Haz clic en el siguiente enlace para crear una nueva contraseña:</p>
+        <p><a href="${reset_url}" style="display: inline-block; padding: 12px 24px; background-color: #a855f7; color: white; text-decoration: none; border-radius: 8px; font-weight: bold;">Restablecer Contraseña</a></p>
+        <p>Este enlace expirará en <strong>30 minutos</strong>.</p>
+        <hr>
+        <p style="color: #666; font-size: 12px;">
+            Si no solicitaste este cambio, ignora este mensaje y tu contraseña permanecerá sin cambios.
+            <br>
+            Por seguridad, te recomendamos cambiar tu contraseña si no reconoces esta solicitud.
+        </p>
+"""
+
+_PEDIDO_ESTADO_HTML = """
+    <div style="font-family: system-ui, -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif; background-color: #f3f4f6; padding: 24px;">
+      <div style="max-width: 600px; margin: 0 auto; background-color: #ffffff; border-radius: 16px; overflow: hidden; box-shadow: 0 10px 30px rgba(15,23,42,0.12);">
+
+        <!-- Header -->
+        <div style="background: linear-gradient(135deg, #111827, #4b5563); padding: 20px 24px; color: #f9fafb;">
+          <div style="font-size: 12px; text-transform: uppercase; letter-spacing: 0.08em; opacity: 0.8; margin-bottom: 4px;">
+            Actualización de pedido
+          </div>
+          <h1 style="margin: 0; font-size: 20px; font-weight: 600;">
+            ${titulo}
+          </h1>
+          <p style="margin: 6px 0 0; font-size: 13px; opacity: 0.9;">
+            Pedido #${pedido_id}
+          </p>
+        </div>
+
+        <!-- Contenido principal -->
+        <div style="padding: 24px 24px 12px 24px;">
+          <p style="margin: 0 0 12px; font-size: 14px; color: #111827;">
+            ${descripcion}
+          </p>
+          <p style="margin: 0 0 16px; font-size: 13px; color: #4b5563;">
+            ${mensaje_extra}
+          </p>
+
+          <p style="margin: 16px 0 0; font-size: 13px; color: #6b7280;">
+            Puedes ver el detalle completo de este pedido en tu cuenta de Innersport.
+          </p>
+
+          <a href="${pedido_url}"
+             style="display: inline-block; margin-top: 16px; padding: 10px 22px; background-color: #111827; color: #ffffff; text-decoration: none; border-radius: 9999px; font-size: 13px; font-weight: 500;">
+            Ver detalles del pedido
+          </a>
+        </div>
+
+        <!-- Footer -->
+        <div style="background-color: #f9fafb; padding: 14px 24px; text-align: center; font-size: 11px; color: #9ca3af;">
+          <p style="margin: 0 0 4px;">
+            Innersport · Este es un correo automático, por favor no lo respondas.
+          </p>
+          <p style="margin: 0;">
+            Si necesitas ayuda, contáctanos a través de nuestros canales oficiales.
+          </p>
+        </div>
+      </div>
+    </div>
+"""
+
+_RMA_MENSAJE_ADMIN_HTML = """
+    <div style="background-color: #f3f4f6; padding: 15px; border-left: 4px solid #a855f7; margin: 15px 0;">
+        <strong>Mensaje del equipo:</strong><br>
+        ${respuesta_admin}
+    </div>
+"""
+
+_RMA_ESTADO_HTML = """
+        <h2>Actualización de tu Devolución/Cambio</h2>
+        <p>Tu solicitud <strong>#${rma_id}</strong> ha cambiado de estado a: <strong>${estado_texto}</strong>.</p>
+
+        ${mensaje_admin_html}
+
+        <p>Puedes ver más detalles ingresando a tu cuenta.</p>
+        <hr>
+        <p style="font-size: 12px; color: #666;">Innersport Support Team</p>
+"""
+
+# tipo → (asunto, html); el asunto es texto plano (no se escapa)
+PLANTILLAS: Dict[str, Tuple[Plantilla, Plantilla]] = {
+    "verificacion": (
+        Plantilla("Verifica tu cuenta en Innersport", escapar=False),
+        Plantilla(_VERIFICACION_HTML),
+    ),
+    "reset_password": (
+        Plantilla("Recuperación de Contraseña - Innersport", escapar=False),
+        Plantilla(_RESET_PASSWORD_HTML),
+    ),
+    "pedido_estado": (
+        Plantilla("Innersport · Actualización de tu pedido #${pedido_id}", escapar=False),
+        Plantilla(_PEDIDO_ESTADO_HTML),
+    ),
+    "rma_estado": (
+        Plantilla("Actualización de Solicitud RMA #${rma_id} - Innersport", escapar=False),
+        Plantilla(_RMA_ESTADO_HTML),
+    ),
+}
+
+_RMA_MENSAJE_ADMIN = Plantilla(_RMA_MENSAJE_ADMIN_HTML)
+
+
+def renderizar_correo(tipo: str, **contexto) -> Tuple[str, str]:
+    """(asunto, html) del correo `tipo`."""
+    asunto, html = PLANTILLAS[tipo]
+    return asunto.renderizar(**contexto), html.renderizar(**contexto)
+
+
+# =========================
+# Contextos por tipo
+# =========================
+
+def contexto_verificacion(verification_token: str) -> dict:
+    return {"verify_url": f"{settings.FRONTEND_BASE_URL}/verify-email?token={verification_token}"}
+
+
+def contexto_reset_password(reset_token: str) -> dict:
+    return {"reset_url": f"{settings.FRONTEND_BASE_URL}/reset-password?token={reset_token}"}
+
+
+def contexto_pedido_estado(pedido_id: int, nuevo_estado: str) -> dict:
+    textos = ESTADO_PEDIDO_TEXTOS.get(
+        nuevo_estado,
+        {
+            "titulo": f"Actualización de tu pedido #{pedido_id}",
+            "descripcion": "Tu pedido ha cambiado de estado.",
+            "mensaje_extra": "",
+        },
+    )
+    return {
+        "pedido_id": pedido_id,
+        "pedido_url": f"{settings.FRONTEND_BASE_URL}/account/orders/{pedido_id}",
+        "titulo": textos["titulo"],
+        "descripcion": textos["descripcion"],
+        "mensaje_extra": textos.get("mensaje_extra", ""),
+    }
+
+
+def contexto_rma_estado(rma_id: int, estado: str, respuesta_admin: str = None) -> dict:
+    mensaje_admin_html = (
+        _RMA_MENSAJE_ADMIN.renderizar(respuesta_admin=respuesta_admin) if respuesta_admin else ""
+    )
+    return {
+        "rma_id": rma_id,
+        "estado_texto": RMA_ESTADO_TEXTOS.get(estado, estado).upper(),
+        "mensaje_admin_html": HtmlSeguro(mensaje_admin_html),
+    }
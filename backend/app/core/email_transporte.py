@@ -0,0 +1,88 @@
+# backend/app/core/email_transporte.py
+"""
+Transportes de correo (settings.EMAIL_TRANSPORTE):
+
+- "resend": API de Resend (producción).
+- "falso": guarda los correos en memoria (TransporteFalso.enviados),
+  para pruebas y desarrollo local sin llamar al proveedor.
+
+Los errores que no se arreglan reintentando (datos inválidos, API key)
+se lanzan como ErrorCorreoPermanente; el resto se reintenta.
+"""
+from typing import List
+
+import resend
+import resend.exceptions
+
+from app.core.config import settings
+
+resend.api_key = settings.RESEND_API_KEY
+
+
+class ErrorCorreoPermanente(Exception):
+    """El proveedor rechazó el correo: reintentar no sirve."""
+
+
+_ERRORES_PERMANENTES_RESEND = (
+    resend.exceptions.ValidationError,
+    resend.exceptions.MissingRequiredFieldsError,
+    resend.exceptions.MissingApiKeyError,
+    resend.exceptions.InvalidApiKeyError,
+)
+
+
+class TransporteResend:
+    def enviar(self, destinatario: str, asunto: str, html: str) -> str:
+        """Envía el correo y devuelve el id del proveedor."""
+        try:
+            response = resend.Emails.send({
+                "from": f"{settings.EMAIL_FROM_NAME} <{settings.EMAIL_FROM_ADDRESS}>",
+                "to": destinatario,
+                "subject": asunto,
+                "html": html,
+            })
+        except _ERRORES_PERMANENTES_RESEND as e:
+            raise ErrorCorreoPermanente(str(e)) from e
+
+        if not response or "id" not in response:
+            raise Exception("Respuesta inválida de Resend")
+        return response["id"]
+
+
+class TransporteFalso:
+    """
+    Transporte en memoria. `fallar(n)` hace que los próximos n envíos
+    fallen (con error transitorio o permanente) para probar reintentos
+    y la cola de correos muertos.
+    """
+
+    enviados: List[dict] = []
+    _fallos_pendientes: List[Exception] = []
+
+    def enviar(self, destinatario: str, asunto: str, html: str) -> str:
+        if TransporteFalso._fallos_pendientes:
+            raise TransporteFalso._fallos_pendientes.pop(0)
+        TransporteFalso.enviados.append(
+            {"destinatario": destinatario, "asunto": asunto, "html": html}
+        )
+        return f"falso-{len(TransporteFalso.enviados)}"
+
+    @classmethod
+    def fallar(cls, veces: int, permanente: bool = False) -> None:
+        error = ErrorCorreoPermanente if permanente else ConnectionError
+        cls._fallos_pendientes.extend(error("Fallo simulado") for _ in range(veces))
+
+    @classmethod
+    def limpiar(cls) -> None:
+        cls.enviados.clear()
+        cls._fallos_pendientes.clear()
+
+
+_TRANSPORTES = {
+    "resend": TransporteResend,
+    "falso": TransporteFalso,
+}
+
+
+def obtener_transporte():
+    return _TRANSPORTES[settings.EMAIL_TRANSPORTE]()
@@ -0,0 +1,173 @@
+# app/core/http_cache.py
+"""
+GET condicional (ETag / Last-Modified) para los endpoints de solo lectura.
+
+- ETag fuerte = sha256 del cuerpo exacto de la respuesta.
+- Last-Modified sólo donde una columna updated_at determina toda la
+  respuesta (p.ej. HomeHeroConfig); el resto se valida por contenido.
+- If-None-Match tiene prioridad sobre If-Modified-Since (RFC 9110).
+- Si el validador coincide se responde 304 sin cuerpo.
+- Con sesión (cookie access_token o Authorization) la respuesta va
+  `private`: bajo estos prefijos también hay GET de admin y ningún
+  caché compartido debe guardarlos.
+
+Las respuestas de core/cache.py ya traen su ETag (calculado una vez al
+serializar y guardado en Redis junto al cuerpo) y responden el 304 antes
+de leer el cuerpo; el middleware calcula el hash para las demás rutas.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response
+
+# Prefijos de rutas GET públicas / de solo lectura
+RUTAS_CONDICIONALES = (
+    "/api/v1/catalogo",
+    "/api/v1/categorias",
+    "/api/v1/productos",
+    "/api/v1/variantes",
+    "/api/v1/home-hero/public",
+    "/api/v1/public/inventario",
+)
+
+# El navegador guarda la respuesta pero revalida siempre con el ETag
+CACHE_CONTROL_POR_DEFECTO = "no-cache"
+CACHE_CONTROL_PRIVADO = "private, no-cache"
+
+# Headers que se repiten en el 304 (RFC 9110 §15.4.5)
+_HEADERS_304 = ("cache-control", "etag", "last-modified", "vary", "expires", "x-cache")
+
+
+# =========================
+# Validadores
+# =========================
+
+def etag_fuerte(contenido: bytes) -> str:
+    return '"' + hashlib.sha256(contenido).hexdigest()[:32] + '"'
+
+
+def fecha_http(fecha: datetime) -> str:
+    """datetime → 'Sat, 17 Oct 2026 10:00:00 GMT'."""
+    if fecha.tzinfo is None:
+        fecha = fecha.replace(tzinfo=timezone.utc)
+    return format_datetime(fecha.astimezone(timezone.utc), usegmt=True)
+
+
+def _parsear_fecha_http(valor: str) -> Optional[datetime]:
+    try:
+        fecha = parsedate_to_datetime(valor)
+    except (TypeError, ValueError):
+        return None
+    if fecha.tzinfo is None:
+        fecha = fecha.replace(tzinfo=timezone.utc)
+    return fecha
+
+
+def _coincide_etag(if_none_match: str, etag: str) -> bool:
+    """Comparación débil de If-None-Match: admite '*', listas y W/."""
+    if if_none_match.strip() == "*":
+        return True
+    propio = etag.removeprefix("W/")
+    return any(
+        candidato.strip().removeprefix("W/") == propio
+        for candidato in if_none_match.split(",")
+    )
+
+
+def es_condicional(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def no_modificado(
+    request: Request,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+) -> bool:
+    """¿La copia del cliente sigue vigente según sus headers condicionales?"""
+    if request.method not in ("GET", "HEAD"):
+        return False
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag is not None and _coincide_etag(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None and last_modified is not None:
+        desde = _parsear_fecha_http(if_modified_since)
+        modificado = _parsear_fecha_http(last_modified)
+        return desde is not None and modificado is not None and modificado <= desde
+
+    return False
+
+
+def respuesta_no_modificada(headers) -> Response:
+    """304 sin cuerpo que conserva los validadores y el Cache-Control."""
+    conservados = {
+        nombre.lower(): valor
+        for nombre, valor in headers.items()
+        if nombre.lower() in _HEADERS_304
+    }
+    conservados.setdefault("cache-control", CACHE_CONTROL_POR_DEFECTO)
+    return Response(status_code=304, headers=conservados)
+
+
+# =========================
+# Middleware
+# =========================
+
+def _ruta_condicional(path: str) -> bool:
+    return path.startswith(RUTAS_CONDICIONALES)
+
+
+def _autenticada(request: Request) -> bool:
+    return "access_token" in request.cookies or "authorization" in request.headers
+
+
+async def get_condicional(request: Request, call_next):
+    """
+    Agrega ETag fuerte (si la ruta no lo trae) y responde 304 cuando
+    If-None-Match / If-Modified-Since coinciden.
+    """
+    if request.method not in ("GET", "HEAD") or not _ruta_condicional(request.url.path):
+        return await call_next(request)
+
+    response = await call_next(request)
+    if response.status_code not in (200, 304):
+        return response
+
+    # También los 304 que ya respondió core/cache.py
+    if _autenticada(request):
+        response.headers["Cache-Control"] = CACHE_CONTROL_PRIVADO
+    if response.status_code != 200:
+        return response
+
+    if "cache-control" not in response.headers:
+        response.headers["Cache-Control"] = CACHE_CONTROL_POR_DEFECTO
+
+    etag = response.headers.get("etag")
+    if etag is not None:
+        if not no_modificado(request, etag, response.headers.get("last-modified")):
+            return response
+        async for _ in response.body_iterator:
+            pass
+        return respuesta_no_modificada(response.headers)
+
+    # Sin ETag propio: hash del cuerpo
+    cuerpo = b"".join([parte async for parte in response.body_iterator])
+    etag = etag_fuerte(cuerpo)
+
+    if no_modificado(request, etag, response.headers.get("last-modified")):
+        response.headers["etag"] = etag
+        return respuesta_no_modificada(response.headers)
+
+    nueva = Response(
+        content=cuerpo,
+        status_code=response.status_code,
+        background=response.background,
+    )
+    # headers.raw conserva los repetidos (varios Set-Cookie)
+    nueva.raw_headers = list(response.headers.raw)
+    nueva.headers["etag"] = etag
+    return nueva
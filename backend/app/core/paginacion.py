@@ -0,0 +1,27 @@
+# app/core/paginacion.py
+"""
+Cursor opaco para paginación keyset sobre (fecha_creacion, id), usado
+por el historial POS y el listado admin de pedidos.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+
+
+def codificar_cursor(fecha_creacion: datetime, fila_id: int) -> str:
+    """Cursor opaco (base64 url-safe de un JSON pequeño)."""
+    crudo = json.dumps(
+        {"f": fecha_creacion.isoformat(), "id": fila_id}, separators=(",", ":")
+    ).encode()
+    return base64.urlsafe_b64encode(crudo).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Lanza ValueError si el cursor es inválido."""
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        return datetime.fromisoformat(datos["f"]), int(datos["id"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Cursor inválido")
@@ -0,0 +1,39 @@
+# backend/app/core/query_counter.py
+
+from contextlib import contextmanager
+from typing import Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class ContadorQueries:
+    """Acumula las sentencias SQL ejecutadas mientras está activo."""
+
+    def __init__(self) -> None:
+        self.sentencias: list[str] = []
+
+    @property
+    def total(self) -> int:
+        return len(self.sentencias)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.sentencias.append(statement)
+
+
+@contextmanager
+def contar_queries(engine: Engine) -> Iterator[ContadorQueries]:
+    """
+    Cuenta las queries que se envían a la BD dentro del bloque `with`.
+
+    Uso:
+        with contar_queries(engine) as contador:
+            obtener_catalogo(...)
+        print(contador.total)
+    """
+    contador = ContadorQueries()
+    event.listen(engine, "before_cursor_execute", contador._on_execute)
+    try:
+        yield contador
+    finally:
+        event.remove(engine, "before_cursor_execute", contador._on_execute)
@@ -10,6 +10,7 @@ import os
 
 from app.core.config import settings
 from app.core.logging_config import setup_logging, get_logger
+from app.core.http_cache import get_condicional
 
 # Routers de autenticación y auditoría
 from app.api.v1.auth import router as auth_router
@@ -54,6 +55,9 @@ from app.api.v1.dashboard import router as dashboard_router
 from app.api.v1.comisiones import router as comisiones_router
 
 from app.api.v1.usuarios import router as usuarios_router
+
+# Caché de respuestas públicas (Redis)
+from app.api.v1.cache import router as cache_router
 from app.api.v1.usuario import router as usuario_router
 
 # Inicializar sistema de logging ANTES de crear la app
@@ -77,6 +81,10 @@ app.add_middleware(
 )
 
 
+# 🔹 GET condicional: ETag / Last-Modified → 304 sin cuerpo
+app.middleware("http")(get_condicional)
+
+
 # =========================
 # MIDDLEWARE DE LOGGING
 # =========================
@@ -213,6 +221,9 @@ app.include_router(rma_router, prefix="/api/v1/rma", tags=["RMA"])
 app.include_router(usuarios_router, prefix="/api/v1/usuarios", tags=["Gestión de Usuarios"])
 app.include_router(usuario_router, prefix="/api/v1/usuario", tags=["Usuario"])
 
+# Caché de respuestas públicas
+app.include_router(cache_router, prefix="/api/v1/cache", tags=["Caché"])
+
 # =========================
 # ENDPOINTS RAÍZ
 # =========================
@@ -6,6 +6,7 @@ from .auditoria import AuditoriaUsuario  # 🔧 AGREGAR ESTA LÍNEA
 from .categoria import Categoria
 from .producto import Producto
 from .producto_categoria import ProductoCategoria
+from .producto_resumen import ProductoResumen
 from .media import Media
 from .variante import Variante
 from .historial_precio import HistorialPrecio
@@ -39,6 +40,10 @@ from .comision_vendedor import ComisionVendedor
 from .configuracion_comision import ConfiguracionComision
 from .liquidacion_comision import LiquidacionComision
 from .sinpe import Sinpe
+from .clave_idempotencia import ClaveIdempotencia
+from .correo_fallido import CorreoFallido
+from .evento_outbox import EventoOutbox
+from .reserva_stock import ReservaStock
 
 __all__ = [
     "Usuario",
@@ -47,6 +52,7 @@ __all__ = [
     "Categoria",
     "Producto",
     "ProductoCategoria",
+    "ProductoResumen",
     "Media",
     "Variante",
     "HistorialPrecio",
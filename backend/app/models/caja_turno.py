@@ -41,6 +41,14 @@ class CajaTurno(Base):
         index=True,
     )
 
+    # Totales acumulados por tipo de movimiento (services/caja_service.py
+    # los suma al insertar cada CajaMovimiento, en el mismo UPDATE)
+    total_ventas_efectivo = Column(Numeric(12, 2), nullable=False, default=0, server_default="0")
+    total_ingresos_efectivo = Column(Numeric(12, 2), nullable=False, default=0, server_default="0")
+    total_devoluciones_efectivo = Column(Numeric(12, 2), nullable=False, default=0, server_default="0")
+    total_retiros_efectivo = Column(Numeric(12, 2), nullable=False, default=0, server_default="0")
+    cantidad_movimientos = Column(Integer, nullable=False, default=0, server_default="0")
+
     observaciones = Column(Text, nullable=True)
 
     fecha_apertura = Column(
@@ -57,3 +65,14 @@ class CajaTurno(Base):
         back_populates="caja_turno",
         cascade="all, delete-orphan",
     )
+
+    @property
+    def efectivo_teorico(self):
+        """Efectivo que debería haber en la caja según los totales acumulados."""
+        return (
+            self.monto_apertura
+            + self.total_ventas_efectivo
+            + self.total_ingresos_efectivo
+            - self.total_devoluciones_efectivo
+            - self.total_retiros_efectivo
+        )
@@ -0,0 +1,54 @@
+# app/models/clave_idempotencia.py
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    DateTime,
+    ForeignKey,
+    UniqueConstraint,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from app.db import Base
+
+
+class ClaveIdempotencia(Base):
+    """
+    Respuesta guardada de una petición de escritura con header
+    Idempotency-Key (checkout, checkout SINPE, venta POS).
+
+    Un reintento con la misma clave (mismo usuario y ruta) recibe la
+    respuesta guardada sin volver a ejecutar la operación. Las filas
+    vencen en `expira_en` (settings.IDEMPOTENCIA_TTL_HORAS).
+    """
+
+    __tablename__ = "clave_idempotencia"
+    __table_args__ = (
+        UniqueConstraint("usuario_id", "ruta", "clave", name="uq_clave_idempotencia"),
+    )
+
+    id = Column(Integer, primary_key=True)
+
+    usuario_id = Column(
+        Integer,
+        ForeignKey("usuario.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    ruta = Column(String(100), nullable=False)
+    clave = Column(String(255), nullable=False)
+
+    # sha256 del cuerpo: la misma clave con otra petición es un error
+    huella = Column(String(64), nullable=False)
+
+    # EN_PROCESO mientras corre la petición original; CONFIRMADA en el
+    # commit de la operación (misma transacción); COMPLETADA con respuesta
+    estado = Column(String(20), nullable=False, default="EN_PROCESO")
+    estado_http = Column(Integer, nullable=True)
+    respuesta = Column(JSONB, nullable=True)
+
+    # Plazo del EN_PROCESO (settings.IDEMPOTENCIA_EN_PROCESO_SEGUNDOS):
+    # vencido, la clave se puede reclamar de nuevo y la purga la borra
+    en_proceso_hasta = Column(DateTime(timezone=True), nullable=True)
+
+    creado_en = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    expira_en = Column(DateTime(timezone=True), nullable=False, index=True)
@@ -0,0 +1,29 @@
+# app/models/correo_fallido.py
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy.sql import func
+from app.db import Base
+
+
+class CorreoFallido(Base):
+    """
+    Cola de correos muertos: correos que la tarea enviar_correo no pudo
+    entregar (se agotaron los reintentos, error permanente del proveedor
+    o no se pudo encolar). Guarda el correo ya renderizado para poder
+    reenviarlo tal cual.
+    """
+
+    __tablename__ = "correo_fallido"
+
+    id = Column(Integer, primary_key=True)
+
+    # verificacion, reset_password, pedido_estado, rma_estado
+    tipo = Column(String(50), nullable=False, index=True)
+    destinatario = Column(String(255), nullable=False)
+    asunto = Column(String(255), nullable=False)
+    html = Column(Text, nullable=False)
+
+    error = Column(Text, nullable=True)
+    intentos = Column(Integer, nullable=False, default=0)
+
+    creado_en = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    reenviado_en = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,39 @@
+# app/models/evento_outbox.py
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from app.db import Base
+
+
+class EventoOutbox(Base):
+    """
+    Evento de dominio (pedido creado, cambio de estado, venta POS) escrito
+    en la MISMA transacción que el cambio de negocio. El despachador
+    (tasks/outbox.py) lo procesa después: entrega al menos una vez.
+    """
+
+    __tablename__ = "evento_outbox"
+    __table_args__ = (
+        # Solo los pendientes, en el orden en que se despachan
+        Index(
+            "ix_evento_outbox_pendientes",
+            "disponible_en",
+            "id",
+            postgresql_where=text("estado = 'PENDIENTE'"),
+        ),
+    )
+
+    id = Column(Integer, primary_key=True)
+
+    tipo = Column(String(50), nullable=False)
+    payload = Column(JSONB, nullable=False)
+
+    # PENDIENTE → PROCESADO, o FALLIDO al agotar OUTBOX_MAX_INTENTOS
+    estado = Column(String(20), nullable=False, default="PENDIENTE")
+    intentos = Column(Integer, nullable=False, default=0)
+    ultimo_error = Column(Text, nullable=True)
+
+    creado_en = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # Reintentos con backoff: no se despacha antes de esta fecha
+    disponible_en = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    procesado_en = Column(DateTime(timezone=True), nullable=True, index=True)
@@ -6,6 +6,7 @@ from sqlalchemy import (
     Numeric,
     String,
     DateTime,
+    Index,
     func,
 )
 from sqlalchemy.orm import relationship
@@ -15,6 +16,10 @@ from app.db import Base
 
 class Pago(Base):
     __tablename__ = "pago"
+    __table_args__ = (
+        # Filtro por método de pago del listado admin de pedidos
+        Index("ix_pago_metodo_pedido", "metodo", "pedido_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -8,6 +8,7 @@ from sqlalchemy import (
     DateTime,
     Boolean,
     Text,
+    Index,
     func,
 )
 from sqlalchemy.orm import relationship
@@ -17,6 +18,19 @@ from app.db import Base
 
 class Pedido(Base):
     __tablename__ = "pedido"
+    __table_args__ = (
+        # Paginación keyset del listado admin, sola o con su filtro
+        Index("ix_pedido_keyset", "fecha_creacion", "id"),
+        Index("ix_pedido_estado_keyset", "estado", "fecha_creacion", "id"),
+        Index("ix_pedido_sucursal_keyset", "sucursal_id", "fecha_creacion", "id"),
+        Index("ix_pedido_cliente_keyset", "cliente_id", "fecha_creacion", "id"),
+        # Búsqueda por prefijo del número (LIKE 'ORD-12%') con cualquier collation
+        Index(
+            "ix_pedido_numero_prefijo",
+            "numero_pedido",
+            postgresql_ops={"numero_pedido": "varchar_pattern_ops"},
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -70,6 +84,11 @@ class Pedido(Base):
     # PAGADO, EN_PREPARACION, ENVIADO, ENTREGADO, CANCELADO
     estado = Column(String(20), nullable=False, default="PAGADO")
 
+    # 📦 El inventario del pedido ya se descontó. Un pedido SINPE lo tiene
+    # solo reservado (False) hasta que se verifica el pago; al cancelarlo
+    # con reintegro vuelve a False
+    stock_descontado = Column(Boolean, nullable=False, default=True, server_default="true")
+
     # Campos de cancelación
     cancelado = Column(Boolean, nullable=False, default=False, index=True)
     motivo_cancelacion = Column(Text, nullable=True)
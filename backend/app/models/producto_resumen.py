@@ -0,0 +1,108 @@
+# app/models/producto_resumen.py
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Text,
+    Boolean,
+    DateTime,
+    Numeric,
+    ForeignKey,
+    Index,
+    literal_column,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR
+from sqlalchemy.sql import func
+from app.db import Base
+
+
+# created_at NULL ordena como la fecha más antigua en la paginación keyset
+# del catálogo (la misma expresión en el índice y en la consulta)
+CREATED_AT_NULO = literal_column("TIMESTAMPTZ '1970-01-01 00:00:00+00'")
+
+
+class ProductoResumen(Base):
+    """
+    Modelo de lectura del catálogo: una fila desnormalizada por producto.
+
+    Se mantiene desde los caminos de escritura (precio, inventario, variantes,
+    productos, media y categorías) con services/producto_resumen.py.
+    /catalogo lee SOLO de esta tabla.
+    """
+
+    __tablename__ = "producto_resumen"
+
+    producto_id = Column(
+        Integer,
+        ForeignKey("producto.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    nombre = Column(String(200), nullable=False)
+    activo = Column(Boolean, nullable=False, default=True)
+    created_at = Column(DateTime(timezone=True), nullable=True)  # del producto
+
+    # Precio mínimo entre variantes activas (NULL si no tiene variantes activas)
+    precio_minimo = Column(Numeric(10, 2), nullable=True)
+
+    # ¿Alguna variante activa tiene stock > 0 en alguna sucursal?
+    tiene_stock = Column(Boolean, nullable=False, default=False)
+
+    imagen_principal = Column(String(500), nullable=True)
+    imagenes = Column(ARRAY(String(500)), nullable=False, default=list)
+
+    # Marca de la variante activa más barata (la que se muestra)
+    marca = Column(String(100), nullable=True)
+
+    # Valores de variantes activas (para filtros)
+    marcas = Column(ARRAY(String(100)), nullable=False, default=list)
+    colores = Column(ARRAY(String(100)), nullable=False, default=list)
+    tallas = Column(ARRAY(String(50)), nullable=False, default=list)
+
+    # SKUs de todas las variantes (para búsqueda)
+    skus = Column(ARRAY(String(100)), nullable=False, default=list)
+
+    categoria_ids = Column(ARRAY(Integer), nullable=False, default=list)
+    categorias = Column(ARRAY(String(200)), nullable=False, default=list)
+    categoria_slugs = Column(ARRAY(String(255)), nullable=False, default=list)
+
+    # 🔎 Búsqueda (services/busqueda_service.py)
+    # tsvector 'es_unaccent': nombre (A) + marcas/categorías (B)
+    search_vector = Column(TSVECTOR, nullable=True)
+    # unaccent(lower(nombre + marcas + SKUs)) con índice de trigramas
+    texto_busqueda = Column(Text, nullable=False, default="", server_default="")
+
+    actualizado_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+    __table_args__ = (
+        Index("ix_producto_resumen_activo_created_at", "activo", "created_at"),
+        # Paginación keyset del catálogo: (clave de orden, producto_id)
+        Index(
+            "ix_producto_resumen_keyset_created_at",
+            func.coalesce(created_at, CREATED_AT_NULO),
+            "producto_id",
+        ),
+        Index("ix_producto_resumen_keyset_precio", "precio_minimo", "producto_id"),
+        Index("ix_producto_resumen_keyset_nombre", "nombre", "producto_id"),
+        Index(
+            "ix_producto_resumen_categoria_slugs",
+            "categoria_slugs",
+            postgresql_using="gin",
+        ),
+        Index(
+            "ix_producto_resumen_search_vector",
+            "search_vector",
+            postgresql_using="gin",
+        ),
+        Index(
+            "ix_producto_resumen_texto_busqueda_trgm",
+            "texto_busqueda",
+            postgresql_using="gin",
+            postgresql_ops={"texto_busqueda": "gin_trgm_ops"},
+        ),
+    )
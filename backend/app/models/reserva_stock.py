@@ -0,0 +1,48 @@
+# app/models/reserva_stock.py
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, text
+from sqlalchemy.sql import func
+from app.db import Base
+
+
+class ReservaStock(Base):
+    """
+    Unidades apartadas de una variante en una sucursal, con vencimiento.
+
+    Disponible para vender = inventario.cantidad − reservas ACTIVAS no
+    vencidas. La crea el inicio del checkout (dueño: carrito) y la hereda
+    el pedido SINPE mientras se verifica el pago (dueño: pedido).
+    """
+
+    __tablename__ = "reserva_stock"
+    __table_args__ = (
+        # Reservado por (sucursal, variante): solo las activas
+        Index(
+            "ix_reserva_stock_activas",
+            "sucursal_id",
+            "variante_id",
+            postgresql_where=text("estado = 'ACTIVA'"),
+            postgresql_include=["cantidad", "expira_en"],
+        ),
+        # Barrido de vencidas (tasks/reservas.py)
+        Index(
+            "ix_reserva_stock_vencimiento",
+            "expira_en",
+            postgresql_where=text("estado = 'ACTIVA'"),
+        ),
+    )
+
+    id = Column(Integer, primary_key=True)
+
+    variante_id = Column(Integer, ForeignKey("variante.id", ondelete="CASCADE"), nullable=False)
+    sucursal_id = Column(Integer, ForeignKey("sucursal.id", ondelete="CASCADE"), nullable=False)
+    cantidad = Column(Integer, nullable=False)
+
+    carrito_id = Column(Integer, ForeignKey("carrito.id", ondelete="SET NULL"), nullable=True, index=True)
+    pedido_id = Column(Integer, ForeignKey("pedido.id", ondelete="CASCADE"), nullable=True, index=True)
+
+    # ACTIVA → CONSUMIDA (se descontó el inventario) | LIBERADA | EXPIRADA
+    estado = Column(String(20), nullable=False, default="ACTIVA")
+    expira_en = Column(DateTime(timezone=True), nullable=False)
+
+    creado_en = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    actualizado_en = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -7,6 +7,7 @@ from sqlalchemy import (
     DateTime,
     Numeric,
     ForeignKey,
+    Index,
 )
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -45,4 +46,14 @@ class Variante(Base):
         back_populates="variante",
         cascade="all, delete-orphan",
         order_by="HistorialPrecio.vigente_desde.desc()",
-    )
\ No newline at end of file
+    )
+
+    __table_args__ = (
+        # Búsqueda parcial de SKU (ILIKE '%...%') en el POS
+        Index(
+            "ix_variante_sku_trgm",
+            "sku",
+            postgresql_using="gin",
+            postgresql_ops={"sku": "gin_trgm_ops"},
+        ),
+    )
@@ -8,6 +8,7 @@ from sqlalchemy import (
     DateTime,
     Boolean,
     Text,
+    Index,
     func,
 )
 from sqlalchemy.orm import relationship
@@ -17,6 +18,11 @@ from app.db import Base
 
 class VentaPOS(Base):
     __tablename__ = "venta_pos"
+    __table_args__ = (
+        # Paginación keyset del historial (ADMIN y por vendedor)
+        Index("ix_venta_pos_keyset", "fecha_creacion", "id"),
+        Index("ix_venta_pos_vendedor_keyset", "vendedor_id", "fecha_creacion", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -68,6 +74,10 @@ class VentaPOS(Base):
         index=True,
     )
 
+    # Clave generada por la caja para ventas sincronizadas por lote
+    # (reenviar el lote no duplica la venta)
+    clave_idempotencia = Column(String(64), nullable=True, unique=True)
+
     cancelado = Column(Boolean, nullable=False, default=False, index=True)
     motivo_cancelacion = Column(Text, nullable=True)
 
@@ -1,7 +1,7 @@
 # backend/app/schemas/pedido.py
 from decimal import Decimal
 from datetime import datetime
-from typing import List, Optional, Literal
+from typing import Dict, List, Optional, Literal
 
 from pydantic import BaseModel, ConfigDict, Field
 
@@ -72,6 +72,103 @@ class PedidoHistorialOut(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class PedidosAdminConteosOut(BaseModel):
+    """Conteos del conjunto filtrado, sin el filtro de estado (pestañas)."""
+    total: int
+    por_estado: Dict[str, int]
+
+
+class PedidosAdminOut(BaseModel):
+    pedidos: List[PedidoHistorialOut]
+    next_cursor: Optional[str] = None  # None = no hay más resultados
+    conteos: Optional[PedidosAdminConteosOut] = None
+
+
+# ============================
+# Reserva de stock (inicio del checkout)
+# ============================
+
+class ReservaCarritoCreate(BaseModel):
+    direccion_envio_id: int
+
+
+class ReservaItemOut(BaseModel):
+    variante_id: int
+    sucursal_id: int
+    cantidad: int
+
+
+class ReservaCarritoOut(BaseModel):
+    expira_en: datetime
+    items: List[ReservaItemOut]
+
+
+# ============================
+# Detalle de pedido
+# ============================
+
+class PedidoDetalleProductoOut(BaseModel):
+    id: int
+    nombre: str
+    imagen_url: str
+    precio_unitario: float
+    cantidad: int
+    subtotal: float
+    impuesto: float
+
+
+class PedidoDetalleDireccionOut(BaseModel):
+    provincia: str
+    canton: str
+    distrito: str
+    detalle: str
+    pais: str
+    codigo_postal: str
+    telefono: str
+    nombre: str
+    referencia: str
+
+
+class PedidoDetalleRMAOut(BaseModel):
+    id: int
+    tipo: str
+    estado: str
+    motivo: str
+    respuesta_admin: Optional[str] = None
+    fecha: Optional[datetime] = None
+
+
+class PedidoDetalleSinpeOut(BaseModel):
+    imagen_url: str
+    numero_destino: str
+    referencia: Optional[str] = None
+    fecha_creacion: Optional[datetime] = None
+
+
+class PedidoDetalleOut(BaseModel):
+    id: int
+    numero_pedido: Optional[str] = None
+    fecha: datetime
+    estado: str
+    subtotal: float
+    costo_envio: float
+    descuento_puntos: float
+    total: float
+    puntos_ganados: int
+    metodo_envio: str
+    direccion_envio: Optional[PedidoDetalleDireccionOut] = None
+    productos: List[PedidoDetalleProductoOut]
+    impuesto_total: float
+    puede_cancelar: bool
+    fecha_limite_cancelacion: Optional[datetime] = None
+    tiene_rma_activo: bool
+    solicitudes_rma: List[PedidoDetalleRMAOut]
+    pago_metodo: Optional[str] = None
+    pago_estado: Optional[str] = None
+    pago_referencia: Optional[str] = None
+    sinpe: Optional[PedidoDetalleSinpeOut] = None
+
+
 # ============================
 # Cambio de estado (ADMIN)
 # ============================
@@ -34,6 +34,35 @@ class CajaCerrarRequest(BaseModel):
     observaciones: Optional[str] = None
 
 
+class CajaReporteXOut(BaseModel):
+    caja_id: int
+    usuario_id: int
+    estado: Literal["ABIERTA", "CERRADA"]
+    fecha_apertura: datetime
+    monto_apertura: Decimal
+    total_ventas_efectivo: Decimal
+    total_ingresos_efectivo: Decimal
+    total_devoluciones_efectivo: Decimal
+    total_retiros_efectivo: Decimal
+    cantidad_movimientos: int
+    efectivo_teorico: Decimal
+    generado_en: datetime
+
+
+class CajaPagoMetodoOut(BaseModel):
+    metodo: str
+    cantidad_pagos: int
+    cantidad_ventas: int
+    total: Decimal
+
+
+class CajaReporteZOut(CajaReporteXOut):
+    fecha_cierre: Optional[datetime] = None
+    monto_real_cierre: Optional[Decimal] = None
+    diferencia: Optional[Decimal] = None
+    pagos_por_metodo: List[CajaPagoMetodoOut]
+
+
 class CajaCerrarResponse(BaseModel):
     id: int
     monto_apertura: Decimal
@@ -44,6 +73,7 @@ class CajaCerrarResponse(BaseModel):
     observaciones: Optional[str] = None
     fecha_apertura: datetime
     fecha_cierre: datetime
+    reporte_z: Optional[CajaReporteZOut] = None
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -136,6 +166,35 @@ class POSVentaOut(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+# ============================
+# VENTAS POS – Sincronización por lotes (modo offline)
+# ============================
+
+class POSVentaLoteItem(POSVentaCreate):
+    # Generada por la caja (p.ej. UUID) al registrar la venta sin conexión
+    clave_idempotencia: str = Field(..., min_length=8, max_length=64)
+
+
+class POSVentaLoteCreate(BaseModel):
+    ventas: List[POSVentaLoteItem] = Field(..., min_length=1, max_length=200)
+
+
+class POSVentaLoteResultado(BaseModel):
+    clave_idempotencia: str
+    estado: Literal["CREADA", "DUPLICADA", "RECHAZADA"]
+    venta_id: Optional[int] = None
+    total: Optional[Decimal] = None
+    puntos_ganados: Optional[int] = None
+    error: Optional[str] = None
+
+
+class POSVentaLoteOut(BaseModel):
+    resultados: List[POSVentaLoteResultado]
+    creadas: int
+    duplicadas: int
+    rechazadas: int
+
+
 # ============================
 # VENTAS POS – Salidas (para listado y detalle)
 # ============================
@@ -164,6 +223,26 @@ class POSVentaListItemOut(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class POSVentasMetodoOut(BaseModel):
+    metodo: str
+    cantidad_ventas: int
+    total: Decimal
+
+
+class POSVentasResumenOut(BaseModel):
+    """Totales de TODO el conjunto filtrado (no solo de la página)."""
+    cantidad: int
+    total: Decimal
+    impuesto: Decimal
+    por_metodo: List[POSVentasMetodoOut]
+
+
+class POSVentasHistorialOut(BaseModel):
+    ventas: List[POSVentaListItemOut]
+    next_cursor: Optional[str] = None  # None = no hay más resultados
+    resumen: Optional[POSVentasResumenOut] = None
+
+
 class POSVentaDetailOut(BaseModel):
     id: int
     sucursal_id: int
@@ -257,12 +336,16 @@ class POSClientePublic(BaseModel):
 
 class POSClienteSearchItem(BaseModel):
     """
-    Item devuelto al buscar clientes por correo en el POS.
+    Item devuelto al buscar clientes en el POS, con su resumen para la
+    caja (sin llamadas adicionales).
     """
     id: int
     nombre: str
     correo: EmailStr
     telefono: Optional[str] = None
     puntos_actuales: int = 0   # tomado de SaldoPuntosUsuario si existe
+    ultima_compra: Optional[datetime] = None
+    gasto_total: Decimal = Decimal("0.00")   # POS + tienda en línea, sin cancelados
+    cantidad_compras: int = 0
 
     model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
@@ -0,0 +1,196 @@
+# scripts/benchmark_asignacion_stock.py
+"""
+Asignación de pedidos en línea a sucursales: carritos de 50 variantes
+sobre 20 sucursales con stock disperso.
+
+1) En memoria: estrategias "greedy" y "optima" sobre matrices aleatorias
+   (envíos promedio y ms por carrito). La óptima nunca usa más envíos.
+2) Con la base de datos: asignar_pedido hace 2 queries (matriz de stock
+   + bloqueo de las filas elegidas) contra las hasta 50 × 20 que hacía el
+   SELECT ... FOR UPDATE por (ítem × sucursal).
+
+⚠️ Crea sucursales e inventario de prueba DENTRO de una transacción que
+se revierte al final; aun así usar solo en una base de desarrollo.
+
+Ejecutar con: python -m app.scripts.benchmark_asignacion_stock
+"""
+import sys
+import os
+import random
+import time
+from types import SimpleNamespace
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import event
+
+from app.db import SessionLocal, engine
+from app.models.inventario import Inventario
+from app.models.sucursal import Sucursal
+from app.models.variante import Variante
+from app.services.asignacion_stock import (
+    ESTRATEGIAS,
+    asignar_pedido,
+    cobertura_sucursales,
+)
+
+
+ITEMS = 50
+SUCURSALES = 20
+CARRITOS = 200
+PROVINCIAS = ["San José", "Alajuela", "Cartago", "Heredia", "Guanacaste", "Puntarenas", "Limón"]
+
+
+def matriz_aleatoria(rng, variante_ids, sucursal_ids):
+    """Cada sucursal tiene ~35% de las variantes; toda variante la cubre alguien."""
+    demanda = {v: rng.randint(1, 3) for v in variante_ids}
+    stock = {s: {} for s in sucursal_ids}
+    for v, cantidad in demanda.items():
+        for s in sucursal_ids:
+            if rng.random() < 0.35:
+                stock[s][v] = rng.randint(0, 6)
+        stock[rng.choice(sucursal_ids)][v] = cantidad + rng.randint(0, 3)
+    return demanda, stock
+
+
+def benchmark_memoria():
+    print("=" * 70)
+    print(f"🧠 ESTRATEGIAS EN MEMORIA ({CARRITOS} carritos, {ITEMS} ítems × {SUCURSALES} sucursales)")
+    print("=" * 70)
+
+    rng = random.Random(7)
+    sucursal_ids = list(range(1, SUCURSALES + 1))
+    resultados = {nombre: {"envios": [], "segundos": 0.0} for nombre in ESTRATEGIAS}
+
+    for _ in range(CARRITOS):
+        demanda, stock = matriz_aleatoria(rng, list(range(1, ITEMS + 1)), sucursal_ids)
+        preferidas = set(rng.sample(sucursal_ids, 3))
+        cubre = cobertura_sucursales(demanda, stock)
+
+        for nombre, asignar in ESTRATEGIAS.items():
+            inicio = time.perf_counter()
+            destino = asignar(demanda, stock, preferidas)
+            resultados[nombre]["segundos"] += time.perf_counter() - inicio
+
+            assert set(destino) == set(demanda), f"{nombre}: faltan variantes"
+            assert all(v in cubre[s] for v, s in destino.items()), f"{nombre}: sucursal sin stock"
+            resultados[nombre]["envios"].append(len(set(destino.values())))
+
+    for nombre, r in resultados.items():
+        envios = r["envios"]
+        print(
+            f"   {nombre:<7} envíos promedio {sum(envios) / len(envios):.2f} "
+            f"(min {min(envios)} | max {max(envios)}) | "
+            f"{r['segundos'] * 1000 / CARRITOS:.2f} ms por carrito"
+        )
+
+    peores = sum(
+        1
+        for g, o in zip(resultados["greedy"]["envios"], resultados["optima"]["envios"])
+        if o > g
+    )
+    mejores = sum(
+        1
+        for g, o in zip(resultados["greedy"]["envios"], resultados["optima"]["envios"])
+        if o < g
+    )
+    print(f"   La óptima ahorra envíos en {mejores} de {CARRITOS} carritos")
+    assert peores == 0, f"La estrategia óptima usó más envíos en {peores} carritos"
+
+
+def benchmark_base_datos():
+    print("\n" + "=" * 70)
+    print(f"🗄️  ASIGNACIÓN CON BASE DE DATOS ({ITEMS} ítems × {SUCURSALES} sucursales)")
+    print("=" * 70)
+
+    db = SessionLocal()
+    try:
+        variantes = (
+            db.query(Variante.id)
+            .filter(Variante.activo.is_(True))
+            .order_by(Variante.id)
+            .limit(ITEMS)
+            .all()
+        )
+        variante_ids = [v.id for v in variantes]
+        assert len(variante_ids) == ITEMS, f"Se necesitan {ITEMS} variantes activas"
+
+        # Solo las sucursales de prueba participan
+        sucursales = [
+            Sucursal(
+                nombre=f"BENCH asignación {i}",
+                provincia=PROVINCIAS[i % len(PROVINCIAS)],
+                activo=True,
+            )
+            for i in range(SUCURSALES)
+        ]
+        db.add_all(sucursales)
+        db.flush()
+        sucursal_ids = [s.id for s in sucursales]
+
+        rng = random.Random(11)
+        demanda, stock = matriz_aleatoria(rng, variante_ids, sucursal_ids)
+        db.add_all(
+            Inventario(sucursal_id=s, variante_id=v, cantidad=cantidad, min_stock=0)
+            for s, inventario in stock.items()
+            for v, cantidad in inventario.items()
+        )
+        db.flush()
+
+        # Queries que hacía el recorrido (ítem × sucursal) hasta dar con stock
+        antes = 0
+        for v, cantidad in demanda.items():
+            for s in sucursal_ids:
+                antes += 1
+                if stock[s].get(v, 0) >= cantidad:
+                    break
+
+        carrito = [SimpleNamespace(variante_id=v, cantidad=c) for v, c in demanda.items()]
+
+        queries = []
+
+        def _contar(conn, cursor, statement, parameters, context, executemany):
+            queries.append(statement)
+
+        event.listen(engine, "before_cursor_execute", _contar)
+        try:
+            inicio = time.perf_counter()
+            asignacion = asignar_pedido(
+                db,
+                carrito,
+                provincia=PROVINCIAS[0],
+                sucursal_ids=sucursal_ids,
+            )
+            segundos = time.perf_counter() - inicio
+        finally:
+            event.remove(engine, "before_cursor_execute", _contar)
+
+        db.flush()
+        for s, items in asignacion.items():
+            for item, cantidad in items:
+                restante = (
+                    db.query(Inventario.cantidad)
+                    .filter(Inventario.sucursal_id == s, Inventario.variante_id == item.variante_id)
+                    .scalar()
+                )
+                assert restante == stock[s][item.variante_id] - cantidad, "Descuento incorrecto"
+
+        print(f"   Envíos: {len(asignacion)}")
+        print(f"   Queries: {len(queries)} (antes: {antes} SELECT ... FOR UPDATE)")
+        print(f"   Tiempo: {segundos * 1000:.1f} ms")
+        assert len(queries) == 2, f"Se esperaban 2 queries y hubo {len(queries)}"
+    finally:
+        db.rollback()
+        db.close()
+
+    print("\n✅ Asignación en 2 queries, la óptima nunca usa más envíos que la voraz")
+
+
+if __name__ == "__main__":
+    try:
+        benchmark_memoria()
+        benchmark_base_datos()
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
@@ -0,0 +1,212 @@
+# scripts/benchmark_cancelacion_pedido.py
+"""
+Reintegro de stock al cancelar pedidos grandes (10, 100 y 400 líneas).
+
+Compara reintegrar_stock_pedido (ítems del pedido → un UPDATE ... FROM y
+un INSERT de movimientos) con el recorrido anterior (un SELECT de
+inventario, un incremento y un movimiento por línea):
+
+- el stock vuelve a la sucursal del pedido, exacto por variante (también
+  si la fila de inventario ya no existía),
+- un movimiento ENTRADA por variante,
+- el número de queries no crece con el tamaño del pedido.
+
+⚠️ Crea una sucursal, inventario y pedidos de prueba DENTRO de una
+transacción que se revierte al final; aun así usar solo en una base de
+desarrollo.
+
+Ejecutar con: python -m app.scripts.benchmark_cancelacion_pedido
+"""
+import sys
+import os
+import time
+from decimal import Decimal
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import event
+
+from app.db import SessionLocal, engine
+from app.models.direccion import Direccion
+from app.models.inventario import Inventario
+from app.models.movimiento_inventario import MovimientoInventario
+from app.models.pedido import Pedido
+from app.models.pedido_item import PedidoItem
+from app.models.sucursal import Sucursal
+from app.models.usuario import Usuario
+from app.models.variante import Variante
+from app.services.cancelar_pedido_service import reintegrar_stock_pedido
+from app.services.producto_resumen import refrescar_resumen_por_variantes
+
+
+TAMANOS = [10, 100, 400]
+STOCK_INICIAL = 5
+
+
+def _reintegro_por_linea(db, pedido, usuario_id):
+    """El recorrido anterior: un SELECT y un movimiento por línea."""
+    for item in pedido.items:
+        inventario = (
+            db.query(Inventario)
+            .filter(
+                Inventario.variante_id == item.variante_id,
+                Inventario.sucursal_id == pedido.sucursal_id,
+            )
+            .first()
+        )
+        if inventario:
+            inventario.cantidad += item.cantidad
+            db.add(
+                MovimientoInventario(
+                    variante_id=item.variante_id,
+                    sucursal_id=pedido.sucursal_id,
+                    cantidad=item.cantidad,
+                    tipo="ENTRADA",
+                    source_type="CANCELACION_PEDIDO",
+                    referencia=f"Cancelación pedido #{pedido.id}",
+                    observacion="Reintegro por cancelación de pedido",
+                    usuario_id=usuario_id,
+                )
+            )
+    refrescar_resumen_por_variantes(db, [item.variante_id for item in pedido.items])
+    db.flush()
+
+
+def _medir(funcion):
+    queries = []
+
+    def _contar(conn, cursor, statement, parameters, context, executemany):
+        queries.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _contar)
+    try:
+        inicio = time.perf_counter()
+        funcion()
+        segundos = time.perf_counter() - inicio
+    finally:
+        event.remove(engine, "before_cursor_execute", _contar)
+    return len(queries), segundos
+
+
+def benchmark():
+    print("=" * 70)
+    print(f"📦 REINTEGRO DE STOCK AL CANCELAR PEDIDOS ({', '.join(map(str, TAMANOS))} líneas)")
+    print("=" * 70)
+
+    db = SessionLocal()
+    try:
+        variantes = (
+            db.query(Variante.id, Variante.producto_id)
+            .order_by(Variante.id)
+            .limit(max(TAMANOS))
+            .all()
+        )
+        assert len(variantes) == max(TAMANOS), f"Se necesitan {max(TAMANOS)} variantes"
+        direccion = db.query(Direccion).order_by(Direccion.id).first()
+        assert direccion is not None, "Se necesita al menos una dirección de envío"
+        usuario = db.get(Usuario, direccion.usuario_id)
+
+        sucursal = Sucursal(nombre="BENCH cancelación", provincia="San José", activo=True)
+        db.add(sucursal)
+        db.flush()
+        # La última variante no tiene fila de inventario (se crea al reintegrar)
+        db.add_all(
+            Inventario(sucursal_id=sucursal.id, variante_id=v.id, cantidad=STOCK_INICIAL, min_stock=0)
+            for v in variantes[:-1]
+        )
+        db.flush()
+
+        queries_ahora = set()
+        for tamano in TAMANOS:
+            pedido = Pedido(
+                cliente_id=usuario.id,
+                direccion_envio_id=direccion.id,
+                sucursal_id=sucursal.id,
+                subtotal=Decimal("0"),
+                total=Decimal("0"),
+                estado="PAGADO",
+            )
+            db.add(pedido)
+            db.flush()
+            lineas = variantes[-tamano:]
+            # Dos líneas de la misma variante se suman en el reintegro
+            lineas = lineas + lineas[:1]
+            db.add_all(
+                PedidoItem(
+                    pedido_id=pedido.id,
+                    variante_id=v.id,
+                    producto_id=v.producto_id,
+                    cantidad=2,
+                    precio_unitario=Decimal("1000"),
+                    subtotal=Decimal("2000"),
+                )
+                for v in lineas
+            )
+            db.flush()
+            db.refresh(pedido)
+
+            # Antes (en un savepoint que se revierte)
+            anidada = db.begin_nested()
+            antes, segundos_antes = _medir(lambda: _reintegro_por_linea(db, pedido, usuario.id))
+            anidada.rollback()
+            db.expire_all()
+
+            # Ahora
+            resultado = {}
+            ahora, segundos_ahora = _medir(
+                lambda: resultado.update(r=reintegrar_stock_pedido(db, pedido, usuario.id))
+            )
+            db.flush()
+            queries_ahora.add(ahora)
+
+            exito, items = resultado["r"]
+            assert exito and items == len(lineas), f"Reintegró {items} de {len(lineas)} líneas"
+
+            esperado = {v.id: 2 for v in variantes[-tamano:]}
+            esperado[lineas[0].id] += 2
+            filas = dict(
+                db.query(Inventario.variante_id, Inventario.cantidad)
+                .filter(Inventario.sucursal_id == sucursal.id, Inventario.variante_id.in_(esperado))
+                .all()
+            )
+            ultima = variantes[-1].id
+            for variante_id, cantidad in esperado.items():
+                base = 0 if variante_id == ultima else STOCK_INICIAL
+                assert filas.get(variante_id) == base + cantidad, (
+                    f"Variante {variante_id}: {filas.get(variante_id)} != {base + cantidad}"
+                )
+            movimientos = (
+                db.query(MovimientoInventario)
+                .filter(MovimientoInventario.referencia == f"Cancelación pedido #{pedido.id}")
+                .count()
+            )
+            assert movimientos == len(esperado), f"{movimientos} movimientos para {len(esperado)} variantes"
+
+            print(
+                f"   {len(lineas):>4} líneas | antes {antes:>4} queries {segundos_antes * 1000:7.1f} ms"
+                f" | ahora {ahora} queries {segundos_ahora * 1000:6.1f} ms"
+            )
+
+            # Siguiente tamaño desde el mismo stock
+            db.query(Inventario).filter(Inventario.sucursal_id == sucursal.id).update(
+                {Inventario.cantidad: STOCK_INICIAL}, synchronize_session=False
+            )
+            db.query(Inventario).filter(
+                Inventario.sucursal_id == sucursal.id, Inventario.variante_id == ultima
+            ).delete(synchronize_session=False)
+
+        assert len(queries_ahora) == 1, f"Las queries crecen con el pedido: {sorted(queries_ahora)}"
+    finally:
+        db.rollback()
+        db.close()
+
+    print("\n✅ Reintegro exacto por variante y en un número fijo de queries")
+
+
+if __name__ == "__main__":
+    try:
+        benchmark()
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
@@ -0,0 +1,148 @@
+# scripts/benchmark_catalogo_snapshot.py
+"""
+Compara los dos motores de /catalogo con las mismas combinaciones de
+filtros y orden:
+
+- SQL: construir_catalogo (producto_resumen, sin caché de Redis)
+- snapshot: construir_catalogo_snapshot (en memoria)
+
+Primero verifica que ambos devuelven el mismo total, los mismos
+productos y la misma secuencia de claves de orden (los empates pueden
+salir en otro orden). Falla (exit 1) si difieren.
+
+Ejecutar con: python -m app.scripts.benchmark_catalogo_snapshot
+"""
+import sys
+import os
+import time
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.db import SessionLocal
+from app.models.producto_resumen import ProductoResumen
+from app.api.v1.catalogo import construir_catalogo, construir_catalogo_snapshot
+from app.services.catalogo_snapshot import construir_snapshot, obtener_snapshot
+
+
+REPETICIONES = 50
+POR_PAGINA = 24
+
+FILTROS_VACIOS = dict(
+    categoria=None,
+    categoria_slug=None,
+    principal_slug=None,
+    secundaria_slug=None,
+    marca=None,
+    color=None,
+    talla=None,
+    precio_min=None,
+    precio_max=None,
+    solo_disponibles=True,
+    buscar=None,
+)
+
+
+def _combinaciones(db):
+    """Combinaciones típicas armadas con valores reales del catálogo."""
+    ejemplo = (
+        db.query(ProductoResumen)
+        .filter(ProductoResumen.activo.is_(True), ProductoResumen.precio_minimo.isnot(None))
+        .order_by(ProductoResumen.producto_id)
+        .first()
+    )
+    combinaciones = [("sin filtros", {}, "destacados")]
+    if ejemplo is None:
+        return combinaciones
+
+    precio = ejemplo.precio_minimo
+    if ejemplo.categoria_slugs:
+        combinaciones.append(
+            ("categoría", {"categoria_slug": ejemplo.categoria_slugs[0]}, "precio_asc")
+        )
+    if ejemplo.marcas:
+        combinaciones.append(("marca", {"marca": ejemplo.marcas[0]}, "nombre_asc"))
+    if ejemplo.colores and ejemplo.tallas:
+        combinaciones.append(
+            (
+                "color + talla",
+                {"color": ejemplo.colores[0], "talla": ejemplo.tallas[0]},
+                "precio_desc",
+            )
+        )
+    combinaciones.append(
+        ("rango de precio", {"precio_min": precio / 2, "precio_max": precio * 2}, "destacados")
+    )
+    combinaciones.append(
+        ("todos (con y sin stock)", {"solo_disponibles": False}, "nombre_asc")
+    )
+    return combinaciones
+
+
+def _clave_orden(producto, ordenar_por):
+    if ordenar_por in ("precio_asc", "precio_desc"):
+        return producto.precio_minimo
+    if ordenar_por == "nombre_asc":
+        return producto.nombre
+    return producto.created_at
+
+
+def _tiempo_ms(funcion) -> float:
+    inicio = time.perf_counter()
+    for _ in range(REPETICIONES):
+        funcion()
+    return (time.perf_counter() - inicio) * 1000 / REPETICIONES
+
+
+def benchmark():
+    print("=" * 70)
+    print("📸 CATÁLOGO: SQL vs SNAPSHOT EN MEMORIA")
+    print("=" * 70)
+
+    inicio = time.perf_counter()
+    snapshot = construir_snapshot()
+    print(
+        f"   Snapshot: {len(snapshot)} productos en "
+        f"{(time.perf_counter() - inicio) * 1000:.0f} ms\n"
+    )
+    obtener_snapshot()  # calienta la foto del proceso
+
+    db = SessionLocal()
+    try:
+        for nombre, extra, ordenar_por in _combinaciones(db):
+            filtros = {**FILTROS_VACIOS, **extra}
+
+            # 1) Mismo resultado (página que cubre todo el catálogo)
+            sql = construir_catalogo(db, filtros, ordenar_por, 1, 10000)
+            mem = construir_catalogo_snapshot(filtros, ordenar_por, 1, 10000)
+            assert sql.total == mem.total, f"{nombre}: total {sql.total} vs {mem.total}"
+            assert {p.id for p in sql.productos} == {p.id for p in mem.productos}, (
+                f"{nombre}: productos distintos"
+            )
+            assert [_clave_orden(p, ordenar_por) for p in sql.productos] == [
+                _clave_orden(p, ordenar_por) for p in mem.productos
+            ], f"{nombre}: orden distinto"
+
+            # 2) Tiempo por página
+            ms_sql = _tiempo_ms(
+                lambda: construir_catalogo(db, filtros, ordenar_por, 2, POR_PAGINA)
+            )
+            ms_mem = _tiempo_ms(
+                lambda: construir_catalogo_snapshot(filtros, ordenar_por, 2, POR_PAGINA)
+            )
+            print(
+                f"   • {nombre:<24} total={sql.total:>5} | SQL {ms_sql:>7.2f} ms | "
+                f"snapshot {ms_mem:>6.3f} ms | x{ms_sql / ms_mem:,.0f}"
+            )
+    finally:
+        db.close()
+
+    print("\n✅ Ambos motores devuelven los mismos productos")
+
+
+if __name__ == "__main__":
+    try:
+        benchmark()
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
@@ -0,0 +1,123 @@
+# scripts/benchmark_get_condicional.py
+"""
+Mide lo que ahorra el GET condicional (ETag / If-None-Match) a un
+visitante que repite: bytes transferidos y tiempo de respuesta de
+200 con cuerpo vs 304 sin cuerpo.
+
+También verifica que:
+- toda respuesta 200 de las rutas públicas trae ETag fuerte,
+- If-None-Match con ese ETag devuelve 304 sin cuerpo,
+- un ETag distinto devuelve 200 con el cuerpo completo,
+- If-Modified-Since funciona donde hay Last-Modified (home hero).
+
+Falla (exit 1) si algo no se cumple.
+
+Ejecutar con: python -m app.scripts.benchmark_get_condicional
+"""
+import sys
+import os
+import time
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.db import SessionLocal
+from app.models.variante import Variante
+from app.models.producto import Producto
+
+
+REPETICIONES = 30
+
+
+def _rutas(db):
+    variante = db.query(Variante).order_by(Variante.id).first()
+    producto = db.query(Producto).order_by(Producto.id).first()
+
+    rutas = [
+        ("/api/v1/catalogo", {"por_pagina": 24}),
+        ("/api/v1/catalogo/facetas", {}),
+        ("/api/v1/catalogo/filtros", {}),
+        ("/api/v1/categorias/menu", {}),
+        ("/api/v1/home-hero/public", {}),
+    ]
+    if variante:
+        rutas.append(("/api/v1/public/inventario", {"variante_id": variante.id}))
+    if producto:
+        # Sin caché Redis: el ETag lo calcula el middleware
+        rutas.append((f"/api/v1/productos/{producto.id}", {}))
+    return rutas
+
+
+def _medir(cliente, url, params, headers):
+    bytes_total = 0
+    inicio = time.perf_counter()
+    for _ in range(REPETICIONES):
+        respuesta = cliente.get(url, params=params, headers=headers)
+        bytes_total += len(respuesta.content)
+    ms = (time.perf_counter() - inicio) * 1000 / REPETICIONES
+    return respuesta, bytes_total / REPETICIONES, ms
+
+
+def benchmark():
+    print("=" * 70)
+    print("📦 GET CONDICIONAL: 200 vs 304 PARA VISITANTES QUE REPITEN")
+    print("=" * 70)
+
+    cliente = TestClient(app)
+    db = SessionLocal()
+    try:
+        rutas = _rutas(db)
+    finally:
+        db.close()
+
+    total_200 = total_304 = 0.0
+    for url, params in rutas:
+        primera = cliente.get(url, params=params)
+        assert primera.status_code == 200, f"{url}: {primera.status_code}"
+
+        etag = primera.headers.get("etag")
+        assert etag and not etag.startswith("W/"), f"{url}: sin ETag fuerte"
+
+        completa, bytes_200, ms_200 = _medir(cliente, url, params, {})
+        assert completa.status_code == 200
+
+        condicional, bytes_304, ms_304 = _medir(
+            cliente, url, params, {"If-None-Match": etag}
+        )
+        assert condicional.status_code == 304, f"{url}: {condicional.status_code}"
+        assert condicional.content == b"", f"{url}: 304 con cuerpo"
+        assert condicional.headers.get("etag") == etag
+
+        distinta = cliente.get(url, params=params, headers={"If-None-Match": '"otro"'})
+        assert distinta.status_code == 200 and distinta.content == primera.content
+
+        total_200 += bytes_200
+        total_304 += bytes_304
+        print(
+            f"   • {url:<32} 200: {bytes_200:>8.0f} B {ms_200:>7.2f} ms | "
+            f"304: {bytes_304:>4.0f} B {ms_304:>7.2f} ms"
+        )
+
+    # If-Modified-Since (sin If-None-Match) donde hay Last-Modified
+    hero = cliente.get("/api/v1/home-hero/public")
+    ultima = hero.headers.get("last-modified")
+    if ultima:
+        ims = cliente.get(
+            "/api/v1/home-hero/public", headers={"If-Modified-Since": ultima}
+        )
+        assert ims.status_code == 304, f"If-Modified-Since: {ims.status_code}"
+        print(f"\n   • home hero Last-Modified: {ultima} → If-Modified-Since 304")
+
+    ahorro = 100 * (1 - total_304 / total_200) if total_200 else 0
+    print(f"\n✅ Bytes por visita repetida: {total_200:.0f} → {total_304:.0f} ({ahorro:.1f}% menos)")
+
+
+if __name__ == "__main__":
+    try:
+        benchmark()
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
@@ -0,0 +1,96 @@
+# scripts/benchmark_pos_escaneo.py
+"""
+Latencia del escaneo en caja (services/pos_escaneo.py), p50 / p99:
+
+- query directa (código de barras o SKU exacto, una sola query)
+- índice en memoria de la sucursal (POS_INDICE_ESCANEO_ACTIVO)
+
+Verifica que ambos caminos devuelven lo mismo y que el p99 del índice
+queda bajo el objetivo. Falla (exit 1) si no.
+
+Ejecutar con: python -m app.scripts.benchmark_pos_escaneo
+"""
+import sys
+import os
+import random
+import time
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.config import settings
+from app.db import SessionLocal
+from app.models.sucursal import Sucursal
+from app.models.variante import Variante
+from app.services import pos_escaneo
+
+
+ESCANEOS = 2000
+OBJETIVO_P99_MS = 5.0
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+def _medir(db, sucursal_id, codigos):
+    tiempos = []
+    for codigo in codigos:
+        inicio = time.perf_counter()
+        pos_escaneo.escanear_codigo(db, sucursal_id, codigo)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return _percentil(tiempos, 0.50), _percentil(tiempos, 0.99)
+
+
+def benchmark():
+    print("=" * 70)
+    print("🔎 ESCANEO POS: QUERY vs ÍNDICE EN MEMORIA")
+    print("=" * 70)
+
+    db = SessionLocal()
+    try:
+        sucursal = db.query(Sucursal).order_by(Sucursal.id).first()
+        variantes = db.query(Variante.sku, Variante.barcode).filter(Variante.activo.is_(True)).all()
+        assert sucursal and variantes, "Faltan sucursales o variantes (correr un seed primero)"
+
+        codigos_validos = [v.barcode or v.sku for v in variantes]
+        random.seed(42)
+        codigos = [random.choice(codigos_validos) for _ in range(ESCANEOS)]
+        codigos += ["NO-EXISTE"] * (ESCANEOS // 20)
+
+        # 1) Query directa
+        settings.POS_INDICE_ESCANEO_ACTIVO = False
+        p50_sql, p99_sql = _medir(db, sucursal.id, codigos)
+
+        # 2) Índice en memoria (se arma aquí mismo para no esperar al hilo)
+        settings.POS_INDICE_ESCANEO_ACTIVO = True
+        pos_escaneo._descartar_si_cambio()
+        indice = pos_escaneo.IndiceEscaneo(db, sucursal.id)
+        pos_escaneo._indices[sucursal.id] = indice
+
+        for codigo in set(codigos):
+            directo = pos_escaneo.buscar_por_codigo(db, sucursal.id, codigo)
+            en_memoria = indice.get(codigo)
+            assert (directo is None) == (en_memoria is None), f"{codigo}: difiere"
+            if directo is not None:
+                assert tuple(directo) == tuple(en_memoria), f"{codigo}: difiere"
+
+        p50_mem, p99_mem = _medir(db, sucursal.id, codigos)
+    finally:
+        db.close()
+
+    print(f"   Sucursal {sucursal.id}: {len(indice.por_codigo)} códigos, {len(codigos)} escaneos")
+    print(f"   • query directa      p50 {p50_sql:6.3f} ms | p99 {p99_sql:6.3f} ms")
+    print(f"   • índice en memoria  p50 {p50_mem:6.3f} ms | p99 {p99_mem:6.3f} ms")
+
+    assert p99_mem < OBJETIVO_P99_MS, f"p99 {p99_mem:.2f} ms > {OBJETIVO_P99_MS} ms"
+    print(f"\n✅ p99 bajo {OBJETIVO_P99_MS} ms y ambos caminos coinciden")
+
+
+if __name__ == "__main__":
+    try:
+        benchmark()
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
@@ -0,0 +1,155 @@
+# scripts/benchmark_ventas_pos.py
+"""
+Ventas POS secuenciales con cliente registrado (acumula puntos si el
+programa está activo): ventas por segundo y commits por venta.
+
+Compara crear_venta_pos (venta, ítems, inventario, pagos, caja, puntos y
+evento outbox en un único commit) con el recorrido anterior (la venta se
+confirmaba sola y los puntos después, en dos commits más), con las mismas
+ventas:
+
+- crear_venta_pos hace un único commit por venta (exit 1 si alguna hace
+  más),
+- los puntos acumulados son los mismos por ambos caminos.
+
+⚠️ Crea ventas y fija el stock de algunas variantes: usar SOLO en una
+base de datos de desarrollo.
+
+Ejecutar con: python -m app.scripts.benchmark_ventas_pos
+"""
+import sys
+import os
+import random
+import time
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import event
+
+from app.db import SessionLocal, engine
+from app.models.usuario import Usuario
+from app.models.venta_pos import VentaPOS
+from app.api.v1.pos import crear_venta_pos
+from app.services.programa_puntos_service import (
+    obtener_config_activa,
+    registrar_puntos_por_compra,
+)
+from app.scripts.stress_ventas_pos import payload_venta, preparar_ventas
+
+
+VENTAS = 300
+
+
+def _venta_un_commit(db, data, usuario) -> int:
+    venta = crear_venta_pos(data=data, db=db, current_user=usuario, idempotency_key=None)
+    return venta.puntos_ganados
+
+
+def _venta_varios_commits(db, data, usuario) -> int:
+    """
+    El recorrido anterior: commit de la venta (sin puntos), commit de los
+    puntos dentro de registrar_puntos_por_compra y commit de puntos_ganados.
+    """
+    cliente_id = data.cliente_id
+    sin_puntos = data.model_copy(update={"cliente_id": None, "usar_cliente_mostrador": True})
+    venta_out = crear_venta_pos(data=sin_puntos, db=db, current_user=usuario, idempotency_key=None)
+
+    puntos = 0
+    if cliente_id is not None and obtener_config_activa(db).activo:
+        puntos = registrar_puntos_por_compra(
+            db,
+            usuario_id=cliente_id,
+            total_compra_colones=venta_out.total,
+            order_id=None,
+        )
+    venta = db.get(VentaPOS, venta_out.id)
+    venta.cliente_id = cliente_id
+    venta.puntos_ganados = puntos
+    db.commit()
+    return puntos
+
+
+def _medir(vender, admin_id, sucursal_id, variantes, cliente_id):
+    """(segundos, commits por venta, puntos acumulados) de VENTAS ventas."""
+    commits = []
+
+    def _contar_commit(conn):
+        commits.append(1)
+
+    event.listen(engine, "commit", _contar_commit)
+
+    # Misma semilla: los dos caminos hacen exactamente las mismas ventas
+    rng = random.Random(42)
+    por_venta = []
+    puntos = 0
+    inicio = time.perf_counter()
+    try:
+        for _ in range(VENTAS):
+            data = payload_venta(sucursal_id, variantes, rng, cliente_id=cliente_id)
+            db = SessionLocal()
+            try:
+                antes = len(commits)
+                puntos += vender(db, data, db.get(Usuario, admin_id))
+                por_venta.append(len(commits) - antes)
+            finally:
+                db.close()
+    finally:
+        event.remove(engine, "commit", _contar_commit)
+    return time.perf_counter() - inicio, por_venta, puntos
+
+
+def benchmark():
+    print("=" * 70)
+    print(f"🧾 {VENTAS} VENTAS POS SECUENCIALES (CON CLIENTE): ANTES VS AHORA")
+    print("=" * 70)
+
+    db = SessionLocal()
+    try:
+        # Alcanza para las ventas de los dos caminos
+        admin_id, sucursal_id, variantes = preparar_ventas(db, stock_inicial=VENTAS * 2 * 2 * 2)
+        cliente = (
+            db.query(Usuario)
+            .filter(Usuario.rol == "CLIENTE", Usuario.activo.is_(True))
+            .order_by(Usuario.id)
+            .first()
+        )
+        cliente_id = cliente.id if cliente else None
+    finally:
+        db.close()
+
+    print(f"   Cliente: {cliente_id or 'mostrador'}")
+    resultados = {}
+    for nombre, vender in (
+        ("antes (varios commits)", _venta_varios_commits),
+        ("ahora (un commit)", _venta_un_commit),
+    ):
+        segundos, por_venta, puntos = _medir(
+            vender, admin_id, sucursal_id, variantes, cliente_id
+        )
+        resultados[nombre] = (por_venta, puntos)
+        print(
+            f"   {nombre:<24} {VENTAS / segundos:>7,.0f} ventas/s | "
+            f"commits por venta: min {min(por_venta)} max {max(por_venta)} | "
+            f"puntos {puntos}"
+        )
+
+    por_venta_antes, puntos_antes = resultados["antes (varios commits)"]
+    por_venta_ahora, puntos_ahora = resultados["ahora (un commit)"]
+
+    assert max(por_venta_ahora) == 1, f"Hay ventas con {max(por_venta_ahora)} commits"
+    assert puntos_ahora == puntos_antes, (
+        f"Puntos distintos: antes {puntos_antes}, ahora {puntos_ahora}"
+    )
+    print(
+        f"\n✅ Cada venta se confirma en un único commit "
+        f"(antes: hasta {max(por_venta_antes)}) con los mismos puntos"
+    )
+
+
+if __name__ == "__main__":
+    try:
+        benchmark()
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
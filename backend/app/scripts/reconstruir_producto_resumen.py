@@ -0,0 +1,39 @@
+# scripts/reconstruir_producto_resumen.py
+"""
+Reconstruye por completo el modelo de lectura del catálogo (producto_resumen).
+Usar después de cargas masivas (seeds, importaciones, SQL manual).
+
+Ejecutar con: python -m app.scripts.reconstruir_producto_resumen
+"""
+import sys
+import os
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.db import SessionLocal
+from app.services.producto_resumen import reconstruir_resumen_completo
+
+
+def reconstruir():
+    db = SessionLocal()
+
+    try:
+        print("=" * 70)
+        print("🔄 RECONSTRUYENDO producto_resumen")
+        print("=" * 70)
+
+        total = reconstruir_resumen_completo(db)
+
+        print(f"\n✅ {total} productos resumidos")
+
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    reconstruir()
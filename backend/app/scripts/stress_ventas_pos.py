@@ -0,0 +1,180 @@
+# scripts/stress_ventas_pos.py
+"""
+Prueba de concurrencia de crear_venta_pos: muchas ventas en paralelo
+sobre los MISMOS SKUs, cada una con los ítems en distinto orden.
+
+Verifica que:
+- no hay deadlocks ni errores inesperados (solo 400 por falta de stock),
+- el stock final = stock inicial - unidades vendidas (nunca negativo),
+- se vendieron exactamente las unidades que había.
+
+⚠️ Crea ventas y fija el stock de algunas variantes: usar SOLO en una
+base de datos de desarrollo.
+
+Ejecutar con: python -m app.scripts.stress_ventas_pos
+"""
+import sys
+import os
+import random
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi import HTTPException
+
+from app.db import SessionLocal
+from app.models.inventario import Inventario
+from app.models.sucursal import Sucursal
+from app.models.usuario import Usuario
+from app.models.variante import Variante
+from app.schemas.pos import POSVentaCreate
+from app.api.v1.pos import crear_venta_pos
+
+
+HILOS = 16
+VENTAS = 200
+VARIANTES = 4
+STOCK_INICIAL = 60  # por variante: alcanza para menos ventas que las intentadas
+
+
+def preparar_ventas(db, stock_inicial: int = STOCK_INICIAL):
+    admin = db.query(Usuario).filter(Usuario.rol == "ADMIN", Usuario.activo.is_(True)).first()
+    sucursal = db.query(Sucursal).filter(Sucursal.activo.is_(True)).order_by(Sucursal.id).first()
+    variantes = (
+        db.query(Variante)
+        .filter(Variante.activo.is_(True))
+        .order_by(Variante.id)
+        .limit(VARIANTES)
+        .all()
+    )
+    assert admin and sucursal and len(variantes) == VARIANTES, (
+        "Se necesita un ADMIN, una sucursal activa y variantes activas"
+    )
+
+    for variante in variantes:
+        inv = (
+            db.query(Inventario)
+            .filter(
+                Inventario.variante_id == variante.id,
+                Inventario.sucursal_id == sucursal.id,
+            )
+            .first()
+        )
+        if inv is None:
+            inv = Inventario(variante_id=variante.id, sucursal_id=sucursal.id, min_stock=0)
+            db.add(inv)
+        inv.cantidad = stock_inicial
+    db.commit()
+
+    return admin.id, sucursal.id, [(v.id, v.producto_id, v.precio_actual) for v in variantes]
+
+
+def payload_venta(sucursal_id, variantes, rng, cliente_id=None):
+    # Cada venta lleva 1-2 unidades de 2-4 variantes, en orden aleatorio
+    elegidas = rng.sample(variantes, rng.randint(2, len(variantes)))
+    items = []
+    subtotal = Decimal("0.00")
+    for variante_id, producto_id, precio in elegidas:
+        cantidad = rng.randint(1, 2)
+        items.append(
+            {
+                "producto_id": producto_id,
+                "variante_id": variante_id,
+                "cantidad": cantidad,
+                "precio_unitario": precio,
+            }
+        )
+        subtotal += precio * cantidad
+    total = subtotal + (subtotal * Decimal("0.13")).quantize(Decimal("0.01"))
+    return POSVentaCreate(
+        sucursal_id=sucursal_id,
+        cliente_id=cliente_id,
+        usar_cliente_mostrador=cliente_id is None,
+        items=items,
+        pagos=[{"metodo": "TARJETA", "monto": total}],
+    )
+
+
+def stress():
+    print("=" * 70)
+    print(f"🏁 {VENTAS} VENTAS POS EN {HILOS} HILOS SOBRE {VARIANTES} SKUs")
+    print("=" * 70)
+
+    db = SessionLocal()
+    try:
+        admin_id, sucursal_id, variantes = preparar_ventas(db)
+    finally:
+        db.close()
+
+    resultados = Counter()
+    vendidas = Counter()
+    errores = []
+    lock = threading.Lock()
+
+    def _vender(numero):
+        rng = random.Random(numero)
+        data = payload_venta(sucursal_id, variantes, rng)
+        db = SessionLocal()
+        try:
+            usuario = db.get(Usuario, admin_id)
+            crear_venta_pos(data=data, db=db, current_user=usuario, idempotency_key=None)
+            with lock:
+                resultados["ok"] += 1
+                for item in data.items:
+                    vendidas[item.variante_id] += item.cantidad
+        except HTTPException as e:
+            db.rollback()
+            with lock:
+                resultados[f"http_{e.status_code}"] += 1
+        except Exception as e:  # deadlock, timeouts, etc.
+            db.rollback()
+            with lock:
+                resultados["error"] += 1
+                errores.append(repr(e)[:200])
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(max_workers=HILOS) as pool:
+        list(pool.map(_vender, range(VENTAS)))
+
+    db = SessionLocal()
+    try:
+        finales = dict(
+            db.query(Inventario.variante_id, Inventario.cantidad)
+            .filter(
+                Inventario.sucursal_id == sucursal_id,
+                Inventario.variante_id.in_([v[0] for v in variantes]),
+            )
+            .all()
+        )
+    finally:
+        db.close()
+
+    print(f"   Resultados: {dict(resultados)}")
+    for variante_id, _, _ in variantes:
+        print(
+            f"   • variante {variante_id}: vendidas {vendidas[variante_id]:>3} | "
+            f"stock final {finales[variante_id]:>3}"
+        )
+
+    assert not errores, f"Errores inesperados ({len(errores)}): {errores[:3]}"
+    for variante_id, _, _ in variantes:
+        assert finales[variante_id] >= 0, f"Stock negativo en variante {variante_id}"
+        assert finales[variante_id] == STOCK_INICIAL - vendidas[variante_id], (
+            f"Variante {variante_id}: stock {finales[variante_id]} != "
+            f"{STOCK_INICIAL} - {vendidas[variante_id]}"
+        )
+
+    print("\n✅ Sin deadlocks, sin sobreventa y el stock cuadra con lo vendido")
+
+
+if __name__ == "__main__":
+    try:
+        stress()
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
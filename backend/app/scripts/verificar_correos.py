@@ -0,0 +1,124 @@
+# scripts/verificar_correos.py
+"""
+Verifica la entrega asíncrona de correos con el transporte falso
+(EMAIL_TRANSPORTE="falso") y Celery en modo eager (sin worker ni broker):
+
+- cada send_* renderiza su plantilla (con HTML escapado) y la encola,
+- errores transitorios se reintentan y el correo termina entregado,
+- un error permanente o agotar los reintentos lo deja en correo_fallido,
+- si el broker no responde, el correo va a correo_fallido sin bloquear.
+
+⚠️ Inserta y luego borra filas de correo_fallido: usar SOLO en una base
+de datos de desarrollo.
+
+Ejecutar con: python -m app.scripts.verificar_correos
+"""
+import sys
+import os
+import time
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.config import settings
+
+settings.EMAIL_TRANSPORTE = "falso"
+settings.EMAIL_REINTENTO_BASE_SEGUNDOS = 0
+
+from app.core.celery_app import celery_app
+from app.core.email import (
+    send_password_reset_email,
+    send_pedido_estado_email,
+    send_rma_update_email,
+    send_verification_email,
+)
+from app.core.email_transporte import TransporteFalso
+from app.db import SessionLocal
+from app.models.correo_fallido import CorreoFallido
+from app.tasks.email import enviar_correo
+
+
+DESTINO = "verificar-correos@example.com"
+
+
+def _fallidos(db):
+    return (
+        db.query(CorreoFallido)
+        .filter(CorreoFallido.destinatario == DESTINO)
+        .order_by(CorreoFallido.id)
+        .all()
+    )
+
+
+def verificar():
+    print("=" * 70)
+    print("📧 CORREOS ASÍNCRONOS (TRANSPORTE FALSO, CELERY EAGER)")
+    print("=" * 70)
+
+    celery_app.conf.task_always_eager = True
+    TransporteFalso.limpiar()
+    db = SessionLocal()
+    try:
+        # 1) Las cuatro plantillas
+        send_verification_email(DESTINO, "tok-123")
+        send_password_reset_email(DESTINO, "tok-456")
+        send_pedido_estado_email(DESTINO, 42, "ENVIADO")
+        send_rma_update_email(DESTINO, 7, "aprobado", "<script>x</script> listo")
+        asuntos = [c["asunto"] for c in TransporteFalso.enviados]
+        print(f"   Enviados: {asuntos}")
+        assert len(TransporteFalso.enviados) == 4, "No se entregaron los 4 correos"
+        assert "verify-email?token=tok-123" in TransporteFalso.enviados[0]["html"]
+        assert asuntos[2] == "Innersport · Actualización de tu pedido #42"
+        rma_html = TransporteFalso.enviados[3]["html"]
+        assert "&lt;script&gt;" in rma_html and "<script>" not in rma_html, "HTML sin escapar"
+        assert "APROBADA" in rma_html
+
+        # 2) Errores transitorios: se reintenta y se entrega
+        TransporteFalso.limpiar()
+        TransporteFalso.fallar(2)
+        send_pedido_estado_email(DESTINO, 43, "PAGADO")
+        assert len(TransporteFalso.enviados) == 1, "No se reintentó el correo"
+        assert not _fallidos(db), "Un correo reintentado quedó como fallido"
+        print("   Reintentos: entregado después de 2 fallos")
+
+        # 3) Error permanente: directo a la cola de correos muertos
+        TransporteFalso.fallar(1, permanente=True)
+        send_verification_email(DESTINO, "tok-789")
+        fallidos = _fallidos(db)
+        assert len(fallidos) == 1 and fallidos[0].intentos == 1, "Error permanente no registrado"
+
+        # 4) Se agotan los reintentos
+        TransporteFalso.fallar(enviar_correo.max_retries + 1)
+        send_password_reset_email(DESTINO, "tok-000")
+        fallidos = _fallidos(db)
+        assert len(fallidos) == 2, "Reintentos agotados no registrados"
+        assert fallidos[1].intentos == enviar_correo.max_retries + 1
+        print(f"   Correos muertos: {[(f.tipo, f.intentos) for f in fallidos]}")
+
+        # 5) Broker caído: no bloquea la petición y no se pierde el correo
+        celery_app.conf.task_always_eager = False
+        broker = celery_app.conf.broker_url
+        celery_app.conf.broker_url = "redis://127.0.0.1:1/0"
+        inicio = time.perf_counter()
+        send_verification_email(DESTINO, "tok-sin-broker")
+        segundos = time.perf_counter() - inicio
+        celery_app.conf.broker_url = broker
+        fallidos = _fallidos(db)
+        print(f"   Broker caído: {segundos * 1000:.0f} ms, registrado en correo_fallido")
+        assert len(fallidos) == 3 and fallidos[2].intentos == 0, "Correo sin encolar no registrado"
+    finally:
+        celery_app.conf.task_always_eager = False
+        for fallido in _fallidos(db):
+            db.delete(fallido)
+        db.commit()
+        db.close()
+
+    print("\n✅ Entrega, reintentos y cola de correos muertos correctos")
+
+
+if __name__ == "__main__":
+    try:
+        verificar()
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
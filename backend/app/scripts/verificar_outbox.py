@@ -0,0 +1,207 @@
+# scripts/verificar_outbox.py
+"""
+Verifica el outbox transaccional (evento_outbox):
+
+- una venta POS deja su evento en la MISMA transacción (commit único) y
+  la comisión la crea el despachador, una sola vez aunque el evento se
+  despache de nuevo,
+- una venta rechazada (rollback) no deja evento,
+- un cambio de estado de pedido envía su correo (transporte falso),
+- un manejador que falla se reintenta con backoff y queda FALLIDO al
+  agotar OUTBOX_MAX_INTENTOS,
+- dos despachadores en paralelo no toman los mismos eventos (SKIP LOCKED).
+
+⚠️ Crea ventas, eventos y (si no existe) una configuración de comisión
+POS temporal: usar SOLO en una base de datos de desarrollo.
+
+Ejecutar con: python -m app.scripts.verificar_outbox
+"""
+import sys
+import os
+import random
+from datetime import datetime, timezone
+from decimal import Decimal
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from app.core.config import settings
+
+settings.EMAIL_TRANSPORTE = "falso"
+settings.OUTBOX_DESPERTAR_AL_CONFIRMAR = False
+
+from app.core.celery_app import celery_app
+from app.core.email_transporte import TransporteFalso
+from app.db import SessionLocal, engine
+from app.models.comision_vendedor import ComisionVendedor
+from app.models.configuracion_comision import ConfiguracionComision
+from app.models.evento_outbox import EventoOutbox
+from app.models.pedido import Pedido
+from app.models.usuario import Usuario
+from app.api.v1.pos import crear_venta_pos
+from app.scripts.stress_ventas_pos import payload_venta, preparar_ventas
+from app.services.outbox import (
+    PEDIDO_ESTADO_CAMBIADO,
+    VENTA_POS_COMPLETADA,
+    despachar_lote,
+    registrar_evento,
+)
+
+
+def _eventos_venta(db, venta_id):
+    return (
+        db.query(EventoOutbox)
+        .filter(
+            EventoOutbox.tipo == VENTA_POS_COMPLETADA,
+            EventoOutbox.payload["venta_id"].as_integer() == venta_id,
+        )
+        .all()
+    )
+
+
+def verificar():
+    print("=" * 70)
+    print("📤 OUTBOX TRANSACCIONAL DE EVENTOS")
+    print("=" * 70)
+
+    celery_app.conf.task_always_eager = True
+    TransporteFalso.limpiar()
+    creados = []
+    config_temporal = None
+
+    db = SessionLocal()
+    try:
+        # Se despachan solo los eventos de esta prueba
+        pendientes_previos = db.query(EventoOutbox).filter(EventoOutbox.estado == "PENDIENTE").count()
+        assert pendientes_previos == 0, "Hay eventos pendientes previos: despáchalos antes"
+
+        if not db.query(ConfiguracionComision).filter_by(tipo_venta="POS", activo=True).first():
+            config_temporal = ConfiguracionComision(
+                tipo_venta="POS", porcentaje=Decimal("5.00"), monto_minimo=Decimal("0"), activo=True
+            )
+            db.add(config_temporal)
+            db.commit()
+
+        admin_id, sucursal_id, variantes = preparar_ventas(db, stock_inicial=20)
+
+        # 1) Venta: evento en el mismo commit, comisión todavía no
+        commits = []
+
+        def _contar_commit(conn):
+            commits.append(1)
+
+        rng = random.Random(5)
+        event.listen(engine, "commit", _contar_commit)
+        try:
+            venta = crear_venta_pos(
+                data=payload_venta(sucursal_id, variantes, rng),
+                db=db,
+                current_user=db.get(Usuario, admin_id),
+                idempotency_key=None,
+            )
+        finally:
+            event.remove(engine, "commit", _contar_commit)
+        eventos = _eventos_venta(db, venta.id)
+        creados += [e.id for e in eventos]
+        assert len(eventos) == 1 and eventos[0].estado == "PENDIENTE", "La venta no dejó su evento"
+        assert len(commits) == 1, f"La venta hizo {len(commits)} commits"
+        assert not db.query(ComisionVendedor).filter_by(venta_pos_id=venta.id).count()
+        print(f"   Venta #{venta.id}: evento {eventos[0].id} pendiente, 1 commit")
+
+        # 2) Venta rechazada: sin evento
+        data = payload_venta(sucursal_id, variantes, rng)
+        data.items[0].cantidad = 10_000
+        total_antes = db.query(EventoOutbox).count()
+        try:
+            crear_venta_pos(
+                data=data, db=db, current_user=db.get(Usuario, admin_id), idempotency_key=None
+            )
+            raise AssertionError("La venta sin stock no falló")
+        except HTTPException:
+            db.rollback()
+        assert db.query(EventoOutbox).count() == total_antes, "Una venta rechazada dejó evento"
+
+        # 3) Despacho: comisión creada; despachar de nuevo no la duplica
+        resultado = despachar_lote(db)
+        assert resultado["procesados"] == 1, resultado
+        db.expire_all()
+        assert _eventos_venta(db, venta.id)[0].estado == "PROCESADO"
+        evento = _eventos_venta(db, venta.id)[0]
+        evento.estado = "PENDIENTE"
+        db.commit()
+        despachar_lote(db)
+        comisiones = db.query(ComisionVendedor).filter_by(venta_pos_id=venta.id).count()
+        assert comisiones == 1, f"{comisiones} comisiones para la venta"
+        print("   Comisión creada por el despachador (una sola vez)")
+
+        # 4) Cambio de estado de pedido → correo
+        pedido = (
+            db.query(Pedido)
+            .join(Usuario, Usuario.id == Pedido.cliente_id)
+            .order_by(Pedido.id.desc())
+            .first()
+        )
+        if pedido is not None:
+            ev = registrar_evento(
+                db,
+                PEDIDO_ESTADO_CAMBIADO,
+                {"pedido_id": pedido.id, "estado_anterior": pedido.estado, "nuevo_estado": "ENVIADO"},
+            )
+            db.commit()
+            creados.append(ev.id)
+            despachar_lote(db)
+            assert len(TransporteFalso.enviados) == 1, "No se envió el correo del pedido"
+            print(f"   Pedido #{pedido.id}: correo '{TransporteFalso.enviados[0]['asunto']}'")
+
+        # 5) Manejador inexistente: reintentos con backoff hasta FALLIDO
+        ev = registrar_evento(db, "EVENTO_DESCONOCIDO", {})
+        db.commit()
+        creados.append(ev.id)
+        for intento in range(1, settings.OUTBOX_MAX_INTENTOS + 1):
+            despachar_lote(db)
+            db.refresh(ev)
+            assert ev.intentos == intento
+            if ev.estado == "PENDIENTE":
+                assert ev.disponible_en > datetime.now(timezone.utc), "Sin backoff"
+                ev.disponible_en = datetime.now(timezone.utc)  # adelantar el reintento
+                db.commit()
+        assert ev.estado == "FALLIDO", f"Estado final {ev.estado}"
+        print(f"   Evento sin manejador: FALLIDO tras {ev.intentos} intentos")
+
+        # 6) Dos despachadores: SKIP LOCKED reparte los eventos sin repetir
+        nuevos = [registrar_evento(db, "EVENTO_DESCONOCIDO", {"n": i}) for i in range(6)]
+        db.commit()
+        creados += [e.id for e in nuevos]
+        otra = SessionLocal()
+        try:
+            ids_a = [e.id for e in db.query(EventoOutbox).filter(EventoOutbox.estado == "PENDIENTE")
+                     .order_by(EventoOutbox.id).limit(3).with_for_update(skip_locked=True)]
+            ids_b = [e.id for e in otra.query(EventoOutbox).filter(EventoOutbox.estado == "PENDIENTE")
+                     .order_by(EventoOutbox.id).limit(3).with_for_update(skip_locked=True)]
+            otra.rollback()
+        finally:
+            otra.close()
+        db.rollback()
+        assert ids_a and ids_b and not set(ids_a) & set(ids_b), f"Lotes solapados {ids_a} {ids_b}"
+        print(f"   SKIP LOCKED: lotes {ids_a} y {ids_b}")
+    finally:
+        celery_app.conf.task_always_eager = False
+        db.rollback()
+        db.query(EventoOutbox).filter(EventoOutbox.id.in_(creados)).delete(synchronize_session=False)
+        if config_temporal is not None:
+            db.delete(config_temporal)
+        db.commit()
+        db.close()
+
+    print("\n✅ Outbox: eventos en la misma transacción, despacho al menos una vez")
+
+
+if __name__ == "__main__":
+    try:
+        verificar()
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
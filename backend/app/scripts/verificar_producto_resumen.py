@@ -0,0 +1,67 @@
+# scripts/verificar_producto_resumen.py
+"""
+Verifica que producto_resumen coincide con las tablas fuente
+(variante, inventario, media, categorías).
+
+Ejecutar con: python -m app.scripts.verificar_producto_resumen [--reparar]
+
+Con --reparar recalcula solo los productos inconsistentes.
+Sale con código 1 si encontró diferencias y no se repararon.
+"""
+import sys
+import os
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.db import SessionLocal
+from app.services.producto_resumen import (
+    verificar_consistencia_resumen,
+    refrescar_resumen_productos,
+)
+
+
+def verificar(reparar: bool = False) -> bool:
+    db = SessionLocal()
+
+    try:
+        print("=" * 70)
+        print("🔎 VERIFICANDO producto_resumen")
+        print("=" * 70)
+
+        diferencias = verificar_consistencia_resumen(db)
+
+        if not diferencias:
+            print("\n✅ El modelo de lectura es consistente")
+            return True
+
+        for d in diferencias[:50]:
+            print(
+                f"   • producto {d['producto_id']} | {d['campo']}: "
+                f"esperado={d['esperado']!r} actual={d['actual']!r}"
+            )
+        if len(diferencias) > 50:
+            print(f"   ... y {len(diferencias) - 50} diferencias más")
+
+        producto_ids = {d["producto_id"] for d in diferencias}
+        print(f"\n⚠️  {len(diferencias)} diferencias en {len(producto_ids)} productos")
+
+        if not reparar:
+            return False
+
+        refrescar_resumen_productos(db, producto_ids)
+        db.commit()
+        print(f"🔧 {len(producto_ids)} productos recalculados")
+        return True
+
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    ok = verificar(reparar="--reparar" in sys.argv)
+    sys.exit(0 if ok else 1)
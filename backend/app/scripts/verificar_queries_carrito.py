@@ -0,0 +1,167 @@
+# scripts/verificar_queries_carrito.py
+"""
+Verifica que los endpoints del carrito (GET, agregar, actualizar y quitar
+ítem) cuestan las mismas queries con 1, 10 o 40 líneas: el carrito se
+arma con una query de líneas y una agrupada de stock (sin la caché de
+Redis, que solo puede ahorrar esta última).
+
+También compara cada línea con lo que devolvía el armado anterior: stock
+total de la variante e imagen principal (primer Media por orden).
+
+⚠️ Crea un usuario de prueba con su carrito y lo borra al final: usar
+SOLO en una base de datos de desarrollo.
+
+Ejecutar con: python -m app.scripts.verificar_queries_carrito
+"""
+import sys
+import os
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import func
+
+from app.core.config import settings
+
+settings.CACHE_RESPUESTAS_ACTIVO = False
+
+from app.db import SessionLocal, engine
+from app.core.query_counter import contar_queries
+from app.api.v1.cart import add_cart_item, delete_cart_item, get_cart, update_cart_item
+from app.models.carrito import Carrito, CarritoItem
+from app.models.inventario import Inventario
+from app.models.media import Media
+from app.models.usuario import Usuario
+from app.models.variante import Variante
+from app.schemas.cart import CartItemCreate, CartItemUpdate
+
+
+TAMANOS = [1, 10, 40]
+CORREO = "verificar.carrito@ejemplo.com"
+
+
+def _variantes_con_stock(db, cantidad):
+    filas = (
+        db.query(Variante.id)
+        .join(Inventario, Inventario.variante_id == Variante.id)
+        .filter(Variante.activo.is_(True))
+        .group_by(Variante.id)
+        .having(func.sum(Inventario.cantidad) > 1)
+        .order_by(Variante.id)
+        .limit(cantidad)
+        .all()
+    )
+    return [v.id for v in filas]
+
+
+def _medir(usuario, endpoint, **kwargs):
+    db = SessionLocal()
+    try:
+        with contar_queries(engine) as contador:
+            respuesta = endpoint(db=db, current_user=usuario, **kwargs)
+        return contador.total, respuesta
+    finally:
+        db.close()
+
+
+def _verificar_lineas(db, respuesta):
+    for item in respuesta.items:
+        stock = (
+            db.query(func.sum(Inventario.cantidad))
+            .filter(Inventario.variante_id == item.variante_id)
+            .scalar()
+        )
+        assert item.stock_disponible == int(stock or 0), f"Stock de la variante {item.variante_id}"
+
+        variante = db.get(Variante, item.variante_id)
+        media = sorted(variante.producto.media, key=lambda m: m.orden)
+        imagen = media[0].url if media else None
+        assert item.imagen_url == imagen, f"Imagen de la variante {item.variante_id}"
+
+
+def verificar():
+    print("=" * 70)
+    print("🛒 QUERIES DE LOS ENDPOINTS DEL CARRITO")
+    print("=" * 70)
+
+    db = SessionLocal()
+    try:
+        variantes = _variantes_con_stock(db, max(TAMANOS) + 1)
+        assert len(variantes) == max(TAMANOS) + 1, "No hay suficientes variantes con stock"
+
+        usuario = db.query(Usuario).filter_by(correo=CORREO).first()
+        if usuario is None:
+            usuario = Usuario(
+                nombre="Verificar carrito",
+                correo=CORREO,
+                contrasena_hash="x",
+                rol="CLIENTE",
+                activo=True,
+            )
+            db.add(usuario)
+            db.commit()
+        db.refresh(usuario)
+        db.expunge(usuario)  # sin sesión: leer usuario.id no emite queries
+
+        conteos = {}
+        for tamano in TAMANOS:
+            db.query(Carrito).filter(Carrito.usuario_id == usuario.id).delete()
+            carrito = Carrito(usuario_id=usuario.id, estado="ABIERTO")
+            db.add(carrito)
+            db.flush()
+            db.add_all(
+                CarritoItem(
+                    carrito_id=carrito.id,
+                    variante_id=variante_id,
+                    cantidad=1,
+                    precio_unitario=db.get(Variante, variante_id).precio_actual or 0,
+                )
+                for variante_id in variantes[:tamano]
+            )
+            db.commit()
+
+            queries = {}
+            queries["GET"], respuesta = _medir(usuario, get_cart)
+            assert len(respuesta.items) == tamano
+            _verificar_lineas(db, respuesta)
+
+            queries["agregar"], respuesta = _medir(
+                usuario, add_cart_item, payload=CartItemCreate(variante_id=variantes[-1], cantidad=1)
+            )
+            assert len(respuesta.items) == tamano + 1
+            queries["actualizar"], respuesta = _medir(
+                usuario, update_cart_item, variante_id=variantes[0], payload=CartItemUpdate(cantidad=2)
+            )
+            assert respuesta.items[0].cantidad == 2
+            queries["quitar"], respuesta = _medir(
+                usuario, delete_cart_item, variante_id=variantes[-1]
+            )
+            assert len(respuesta.items) == tamano
+            db.expire_all()
+
+            conteos[tamano] = queries
+            print(
+                f"   • {tamano:>3} líneas → "
+                + " | ".join(f"{nombre} {total}" for nombre, total in queries.items())
+            )
+
+        for nombre in conteos[TAMANOS[0]]:
+            por_tamano = {tamano: conteos[tamano][nombre] for tamano in TAMANOS}
+            assert len(set(por_tamano.values())) == 1, (
+                f"{nombre}: las queries crecen con el carrito {por_tamano}"
+            )
+    finally:
+        db.rollback()
+        db.query(Usuario).filter_by(correo=CORREO).delete()
+        db.commit()
+        db.close()
+
+    print("\n✅ Los endpoints del carrito cuestan las mismas queries sin importar su tamaño")
+
+
+if __name__ == "__main__":
+    try:
+        verificar()
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
@@ -0,0 +1,105 @@
+# scripts/verificar_queries_catalogo.py
+"""
+Verifica que el costo en queries de /catalogo NO crece con `por_pagina`
+(se mide construir_catalogo, es decir, sin la caché de Redis).
+
+Ejecuta el catálogo con páginas de distinto tamaño y compara la cantidad
+de sentencias SQL emitidas. También recorre varias páginas en modo cursor.
+Falla (exit 1) si difieren.
+
+Ejecutar con: python -m app.scripts.verificar_queries_catalogo
+"""
+import sys
+import os
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.db import SessionLocal, engine
+from app.core.query_counter import contar_queries
+from app.api.v1.catalogo import construir_catalogo
+
+
+TAMANOS_PAGINA = [1, 12, 50, 100]
+
+
+def _queries_para(
+    por_pagina: int, paginacion: str = "paginas", cursor: str | None = None
+):
+    db = SessionLocal()
+    try:
+        with contar_queries(engine) as contador:
+            respuesta = construir_catalogo(
+                db,
+                filtros=dict(
+                    categoria=None,
+                    categoria_slug=None,
+                    principal_slug=None,
+                    secundaria_slug=None,
+                    marca=None,
+                    color=None,
+                    talla=None,
+                    precio_min=None,
+                    precio_max=None,
+                    solo_disponibles=True,
+                    buscar=None,
+                ),
+                ordenar_por="destacados",
+                pagina=1,
+                por_pagina=por_pagina,
+                paginacion=paginacion,
+                cursor=cursor,
+            )
+        return contador.total, respuesta
+    finally:
+        db.close()
+
+
+def verificar():
+    print("=" * 70)
+    print("🔎 QUERIES POR PÁGINA DEL CATÁLOGO")
+    print("=" * 70)
+
+    conteos = {}
+    for por_pagina in TAMANOS_PAGINA:
+        total_queries, respuesta = _queries_para(por_pagina)
+        conteos[por_pagina] = total_queries
+        print(
+            f"   • por_pagina={por_pagina:>3} → {len(respuesta.productos):>3} productos, "
+            f"{total_queries} queries"
+        )
+
+    assert len(set(conteos.values())) == 1, (
+        f"El número de queries depende de por_pagina: {conteos}"
+    )
+
+    print("\n✅ El costo en queries es constante respecto a por_pagina")
+
+    # Modo cursor: la página N cuesta lo mismo que la página 1
+    print("\n🔎 MODO CURSOR (por_pagina=12)")
+    conteos_cursor = []
+    cursor = None
+    for numero in range(1, 6):
+        total_queries, respuesta = _queries_para(12, "cursor", cursor)
+        conteos_cursor.append(total_queries)
+        print(
+            f"   • página {numero} → {len(respuesta.productos):>3} productos, "
+            f"{total_queries} queries"
+        )
+        cursor = respuesta.next_cursor
+        if cursor is None:
+            break
+
+    assert len(set(conteos_cursor)) == 1, (
+        f"El número de queries depende de la página: {conteos_cursor}"
+    )
+
+    print("\n✅ En modo cursor el costo en queries es constante por página")
+
+
+if __name__ == "__main__":
+    try:
+        verificar()
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
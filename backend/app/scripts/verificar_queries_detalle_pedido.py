@@ -0,0 +1,74 @@
+# scripts/verificar_queries_detalle_pedido.py
+"""
+Fija el costo en queries del detalle de pedido (GET /pedidos/{id}):
+debe ser QUERIES_DETALLE sin importar cuántos ítems, pagos o RMAs tenga
+el pedido (se miden los pedidos con más y con menos ítems).
+
+Falla (exit 1) si algún pedido emite otra cantidad de sentencias SQL.
+
+Ejecutar con: python -m app.scripts.verificar_queries_detalle_pedido
+"""
+import sys
+import os
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import func, select
+
+from app.db import SessionLocal, engine
+from app.core.query_counter import contar_queries
+from app.models.pedido import Pedido
+from app.models.pedido_item import PedidoItem
+from app.services.pedido_detalle import QUERIES_DETALLE, detalle_pedido
+
+
+MUESTRA = 10
+
+
+def _pedidos_a_medir(db):
+    cantidad_items = func.count(PedidoItem.id)
+    base = (
+        select(Pedido.id, cantidad_items.label("items"))
+        .outerjoin(PedidoItem, PedidoItem.pedido_id == Pedido.id)
+        .group_by(Pedido.id)
+    )
+    mas = db.execute(base.order_by(cantidad_items.desc(), Pedido.id).limit(MUESTRA)).all()
+    menos = db.execute(base.order_by(cantidad_items.asc(), Pedido.id).limit(MUESTRA)).all()
+    return sorted(set(mas) | set(menos), key=lambda fila: -fila.items)
+
+
+def verificar():
+    print("=" * 70)
+    print("🔎 QUERIES DEL DETALLE DE PEDIDO")
+    print("=" * 70)
+
+    db = SessionLocal()
+    try:
+        pedidos = _pedidos_a_medir(db)
+        assert pedidos, "No hay pedidos para medir"
+
+        for pedido_id, items in pedidos:
+            db.expunge_all()  # sin identity map: cada medición parte en frío
+            with contar_queries(engine) as contador:
+                detalle = detalle_pedido(db, pedido_id)
+            print(
+                f"   • pedido #{pedido_id:>5} → {items:>3} ítems, "
+                f"{len(detalle.solicitudes_rma)} RMAs, {contador.total} queries"
+            )
+            assert contador.total == QUERIES_DETALLE, (
+                f"El pedido #{pedido_id} emitió {contador.total} queries "
+                f"(se esperaban {QUERIES_DETALLE}):\n" + "\n---\n".join(contador.sentencias)
+            )
+    finally:
+        db.close()
+
+    print(f"\n✅ El detalle de pedido cuesta {QUERIES_DETALLE} queries, sin importar su tamaño")
+
+
+if __name__ == "__main__":
+    try:
+        verificar()
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
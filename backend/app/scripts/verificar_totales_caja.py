@@ -0,0 +1,70 @@
+# scripts/verificar_totales_caja.py
+"""
+Verifica que los totales acumulados de cada caja_turno coinciden con la
+suma de sus movimientos (caja_movimiento), en una sola query agregada.
+
+Falla (exit 1) si alguna caja no cuadra.
+
+Ejecutar con: python -m app.scripts.verificar_totales_caja
+"""
+import sys
+import os
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import func
+
+from app.db import SessionLocal
+from app.models.caja_movimientos import CajaMovimiento
+from app.models.caja_turno import CajaTurno
+from app.services.caja_service import COLUMNA_POR_TIPO
+
+
+def verificar():
+    print("=" * 70)
+    print("🧮 TOTALES ACUMULADOS DE CAJA vs MOVIMIENTOS")
+    print("=" * 70)
+
+    sumas = [
+        func.coalesce(func.sum(CajaMovimiento.monto).filter(CajaMovimiento.tipo == tipo), 0)
+        for tipo in COLUMNA_POR_TIPO
+    ]
+
+    db = SessionLocal()
+    try:
+        filas = (
+            db.query(
+                CajaTurno,
+                func.count(CajaMovimiento.id),
+                *sumas,
+            )
+            .outerjoin(CajaMovimiento, CajaMovimiento.caja_turno_id == CajaTurno.id)
+            .group_by(CajaTurno.id)
+            .order_by(CajaTurno.id)
+            .all()
+        )
+    finally:
+        db.close()
+
+    descuadradas = []
+    for caja, cantidad, *totales in filas:
+        acumulados = [getattr(caja, columna.key) for columna in COLUMNA_POR_TIPO.values()]
+        if cantidad != caja.cantidad_movimientos or acumulados != totales:
+            descuadradas.append(caja.id)
+            print(
+                f"   ❌ caja {caja.id}: acumulado {acumulados} ({caja.cantidad_movimientos} mov) | "
+                f"movimientos {totales} ({cantidad} mov)"
+            )
+
+    print(f"   {len(filas)} cajas revisadas")
+    assert not descuadradas, f"{len(descuadradas)} cajas no cuadran: {descuadradas[:10]}"
+    print("\n✅ Todas las cajas cuadran con sus movimientos")
+
+
+if __name__ == "__main__":
+    try:
+        verificar()
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
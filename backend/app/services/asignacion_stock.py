@@ -0,0 +1,281 @@
+# app/services/asignacion_stock.py
+"""
+Asignación del stock de un pedido en línea a sucursales.
+
+1) Matriz de stock: UNA query trae el inventario de las variantes del
+   carrito en todas las sucursales activas candidatas.
+2) Estrategia (settings.ASIGNACION_STOCK_ESTRATEGIA), en memoria:
+   - "greedy": cobertura voraz; toma la sucursal que cubre más variantes
+     pendientes (desempate: provincia del cliente, más stock, menor id).
+   - "optima": mínimo número de envíos exacto por ramificación y poda,
+     partiendo de la solución voraz; a igual número de envíos, más envíos
+     desde la provincia del cliente. Si el árbol supera MAX_NODOS_OPTIMA
+     se queda con la mejor solución encontrada.
+   Cada variante sale completa de UNA sucursal (no se parten cantidades).
+3) Se bloquean (FOR UPDATE) solo las filas elegidas, en orden
+   (sucursal_id, variante_id), y se revalida el stock. Si otro pedido lo
+   consumió entre la lectura y el bloqueo se recalcula (hasta INTENTOS
+   veces).
+
+El stock es siempre el disponible para vender (cantidad − reservas
+vigentes, ver services/reservas_stock.py). El descuento, o solo el
+bloqueo si el llamador va a reservar, queda en la sesión; confirma el
+llamador.
+"""
+from collections import defaultdict
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.inventario import Inventario
+from app.models.sucursal import Sucursal
+from app.services.reservas_stock import cantidad_disponible, cantidad_reservada
+
+
+INTENTOS = 3
+MAX_NODOS_OPTIMA = 20_000
+
+# sucursal_id → {variante_id: cantidad}
+MatrizStock = Dict[int, Dict[int, int]]
+# (sucursal_id, variante_id) → cantidad a descontar
+Plan = Dict[Tuple[int, int], int]
+
+
+# =========================
+# Matriz de stock
+# =========================
+
+def cargar_matriz_stock(
+    db: Session,
+    variante_ids: Iterable[int],
+    sucursal_ids: Optional[Iterable[int]] = None,
+) -> Tuple[MatrizStock, Dict[int, Optional[str]]]:
+    """
+    (stock disponible por sucursal, provincia por sucursal) de las
+    sucursales activas con disponible > 0 de alguna de las variantes, en
+    una sola query y sin bloquear.
+    """
+    disponible = cantidad_disponible()
+    consulta = (
+        select(Sucursal.id, Sucursal.provincia, Inventario.variante_id, disponible)
+        .join(
+            Inventario,
+            and_(
+                Inventario.sucursal_id == Sucursal.id,
+                Inventario.variante_id.in_(list(variante_ids)),
+                Inventario.cantidad > 0,
+            ),
+        )
+        .where(Sucursal.activo.is_(True), disponible > 0)
+    )
+    if sucursal_ids is not None:
+        consulta = consulta.where(Sucursal.id.in_(list(sucursal_ids)))
+
+    stock: MatrizStock = defaultdict(dict)
+    provincias: Dict[int, Optional[str]] = {}
+    for sucursal_id, provincia, variante_id, cantidad in db.execute(consulta):
+        stock[sucursal_id][variante_id] = cantidad
+        provincias[sucursal_id] = provincia
+    return dict(stock), provincias
+
+
+def cobertura_sucursales(demanda: Dict[int, int], stock: MatrizStock) -> Dict[int, FrozenSet[int]]:
+    """
+    sucursal_id → variantes que puede despachar completas. Lanza 400 si
+    alguna variante no la cubre ninguna sucursal.
+    """
+    cubre = {
+        sucursal_id: frozenset(
+            v for v, cantidad in demanda.items() if inventario.get(v, 0) >= cantidad
+        )
+        for sucursal_id, inventario in stock.items()
+    }
+    cubre = {s: variantes for s, variantes in cubre.items() if variantes}
+
+    cubiertas = frozenset().union(*cubre.values())
+    for variante_id in sorted(demanda):
+        if variante_id not in cubiertas:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"No hay stock suficiente para la variante {variante_id}.",
+            )
+    return cubre
+
+
+def _repartir(
+    demanda: Dict[int, int],
+    cubre: Dict[int, FrozenSet[int]],
+    elegidas: Iterable[int],
+    preferidas: Set[int],
+) -> Dict[int, int]:
+    """variante_id → sucursal_id entre las sucursales elegidas (primero las de la provincia)."""
+    orden = sorted(elegidas, key=lambda s: (s not in preferidas, -len(cubre[s]), s))
+    return {v: next(s for s in orden if v in cubre[s]) for v in demanda}
+
+
+# =========================
+# Estrategias
+# =========================
+
+def _greedy(
+    demanda: Dict[int, int],
+    stock: MatrizStock,
+    cubre: Dict[int, FrozenSet[int]],
+    preferidas: Set[int],
+) -> List[int]:
+    pendientes = set(demanda)
+    elegidas: List[int] = []
+    while pendientes:
+        mejor = max(
+            cubre,
+            key=lambda s: (
+                len(cubre[s] & pendientes),
+                s in preferidas,
+                sum(stock[s].get(v, 0) for v in pendientes),
+                -s,
+            ),
+        )
+        elegidas.append(mejor)
+        pendientes -= cubre[mejor]
+    return elegidas
+
+
+def asignar_greedy(demanda: Dict[int, int], stock: MatrizStock, preferidas: Set[int]) -> Dict[int, int]:
+    """Cobertura voraz: rápida, no siempre con el mínimo de envíos."""
+    cubre = cobertura_sucursales(demanda, stock)
+    return _repartir(demanda, cubre, _greedy(demanda, stock, cubre, preferidas), preferidas)
+
+
+def asignar_optima(demanda: Dict[int, int], stock: MatrizStock, preferidas: Set[int]) -> Dict[int, int]:
+    """Mínimo número de envíos (y, a igualdad, más envíos desde la provincia)."""
+    cubre = cobertura_sucursales(demanda, stock)
+
+    def puntaje(elegidas: List[int]) -> Tuple[int, int]:
+        return len(elegidas), -sum(1 for s in elegidas if s in preferidas)
+
+    mejor = _greedy(demanda, stock, cubre, preferidas)
+    mejor_puntaje = puntaje(mejor)
+    candidatas = {
+        v: sorted(
+            (s for s in cubre if v in cubre[s]),
+            key=lambda s: (-len(cubre[s]), s not in preferidas, s),
+        )
+        for v in demanda
+    }
+    nodos = 0
+
+    def buscar(pendientes: FrozenSet[int], elegidas: List[int]) -> None:
+        nonlocal mejor, mejor_puntaje, nodos
+        nodos += 1
+        if nodos > MAX_NODOS_OPTIMA:
+            return
+        if not pendientes:
+            if puntaje(elegidas) < mejor_puntaje:
+                mejor, mejor_puntaje = list(elegidas), puntaje(elegidas)
+            return
+
+        # Cota inferior: envíos que faltan como mínimo
+        max_cubre = max(len(cubre[s] & pendientes) for s in cubre)
+        faltan = -(-len(pendientes) // max_cubre)
+        en_provincia = sum(1 for s in elegidas if s in preferidas)
+        if (len(elegidas) + faltan, -(en_provincia + faltan)) >= mejor_puntaje:
+            return
+
+        # Ramificar por la variante con menos sucursales posibles
+        variante = min(pendientes, key=lambda v: (len(candidatas[v]), v))
+        for s in candidatas[variante]:
+            elegidas.append(s)
+            buscar(pendientes - cubre[s], elegidas)
+            elegidas.pop()
+
+    buscar(frozenset(demanda), [])
+    return _repartir(demanda, cubre, mejor, preferidas)
+
+
+ESTRATEGIAS: Dict[str, Callable[[Dict[int, int], MatrizStock, Set[int]], Dict[int, int]]] = {
+    "greedy": asignar_greedy,
+    "optima": asignar_optima,
+}
+
+
+# =========================
+# Bloqueo y descuento
+# =========================
+
+def reservar_plan(db: Session, plan: Plan, descontar: bool = True) -> bool:
+    """
+    Bloquea solo las filas del plan en orden (sucursal_id, variante_id),
+    revalida contra el disponible (cantidad − reservas vigentes) y
+    descuenta. False (sin descontar nada) si alguna ya no alcanza; los
+    bloqueos se mantienen hasta el fin de la transacción.
+
+    Con descontar=False solo bloquea y valida: el llamador crea las
+    reservas en la misma transacción.
+    """
+    # Lo reservado sale en la misma query (subquery correlacionada)
+    filas = (
+        db.query(Inventario, cantidad_reservada())
+        .filter(tuple_(Inventario.sucursal_id, Inventario.variante_id).in_(list(plan)))
+        .order_by(Inventario.sucursal_id, Inventario.variante_id)
+        .with_for_update(of=Inventario)
+        .populate_existing()
+        .all()
+    )
+    por_par = {(inv.sucursal_id, inv.variante_id): inv for inv, _ in filas}
+    reservado = {(inv.sucursal_id, inv.variante_id): int(cantidad) for inv, cantidad in filas}
+    if any(
+        par not in por_par or por_par[par].cantidad - reservado[par] < cantidad
+        for par, cantidad in plan.items()
+    ):
+        return False
+
+    if not descontar:
+        return True
+    for par, cantidad in plan.items():
+        por_par[par].cantidad -= cantidad
+    return True
+
+
+def asignar_pedido(
+    db: Session,
+    items_carrito: list,
+    *,
+    provincia: Optional[str] = None,
+    sucursal_ids: Optional[Iterable[int]] = None,
+    estrategia: Optional[str] = None,
+    descontar: bool = True,
+) -> Dict[int, list]:
+    """
+    Asigna cada ítem del carrito completo a una sucursal minimizando los
+    envíos y descuenta el inventario en la sesión (con descontar=False
+    solo deja bloqueadas y validadas las filas, para reservarlas).
+    Devuelve sucursal_id → [(item_carrito, cantidad)], con la sucursal de
+    más ítems primero.
+    """
+    asignar = ESTRATEGIAS[estrategia or settings.ASIGNACION_STOCK_ESTRATEGIA]
+    sucursal_ids = list(sucursal_ids) if sucursal_ids is not None else None
+
+    demanda: Dict[int, int] = defaultdict(int)
+    for item in items_carrito:
+        demanda[item.variante_id] += item.cantidad
+    demanda = dict(demanda)
+
+    for _ in range(INTENTOS):
+        stock, provincias = cargar_matriz_stock(db, demanda, sucursal_ids)
+        preferidas = {s for s, p in provincias.items() if provincia and p == provincia}
+        destino = asignar(demanda, stock, preferidas)
+        if reservar_plan(db, {(s, v): demanda[v] for v, s in destino.items()}, descontar):
+            break
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="El stock cambió mientras se procesaba el pedido. Intenta de nuevo.",
+        )
+
+    asignacion: Dict[int, list] = defaultdict(list)
+    for item in items_carrito:
+        asignacion[destino[item.variante_id]].append((item, item.cantidad))
+    return dict(sorted(asignacion.items(), key=lambda par: (-len(par[1]), par[0])))
@@ -0,0 +1,126 @@
+# app/services/busqueda_service.py
+"""
+Búsqueda de productos con PostgreSQL:
+- Full-text (tsvector) con la configuración `es_unaccent`
+  (español + sin acentos, creada en la migración 3a7e9c41d2b8).
+- Trigramas (pg_trgm) para tolerar errores de tipeo y búsquedas parciales
+  de SKU.
+
+Los documentos de búsqueda viven en producto_resumen
+(search_vector / texto_busqueda) y los calcula services/producto_resumen.py.
+"""
+import re
+from typing import Optional
+
+from sqlalchemy import func, literal, or_, and_, case, text, Text
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+
+CONFIG_BUSQUEDA = "es_unaccent"
+
+# word_similarity mínima para considerar un typo ("camizeta" ~ "camiseta" = 0.5)
+UMBRAL_SIMILITUD = 0.4
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+# Solo palabras de 4+ letras toleran typos; números/SKUs deben coincidir
+_PALABRA_DIFUSA = re.compile(r"[^\W\d_]{4,}", re.UNICODE)
+_NUMERO = re.compile(r"\d+")
+
+
+def preparar_busqueda(db: Session) -> None:
+    """
+    Ajusta el umbral de pg_trgm para la transacción actual, de modo que el
+    operador `<%` (que usa el índice de trigramas) aplique UMBRAL_SIMILITUD.
+    """
+    db.execute(
+        text("SELECT set_config('pg_trgm.word_similarity_threshold', :umbral, true)"),
+        {"umbral": str(UMBRAL_SIMILITUD)},
+    )
+
+
+def normalizar(expr) -> ColumnElement:
+    """unaccent(lower(expr)) del lado de la BD."""
+    return func.unaccent(func.lower(expr))
+
+
+def documento_busqueda(nombre, secundario) -> ColumnElement:
+    """
+    tsvector del producto: el nombre pesa 'A' y marcas/categorías pesan 'B'.
+    """
+    return func.setweight(func.to_tsvector(CONFIG_BUSQUEDA, nombre), "A").op("||")(
+        func.setweight(func.to_tsvector(CONFIG_BUSQUEDA, secundario), "B")
+    )
+
+
+def texto_trigramas(nombre, secundario) -> ColumnElement:
+    """Texto normalizado (nombre + marcas + SKUs) sobre el que se indexan trigramas."""
+    return normalizar(func.concat(nombre, " ", secundario))
+
+
+def tsquery_prefijos(termino: str) -> Optional[ColumnElement]:
+    """
+    Convierte 'camisetas dep' en to_tsquery('es_unaccent', 'camisetas:* & dep:*')
+    para que también funcione mientras el usuario escribe.
+    """
+    tokens = _TOKEN.findall(termino.lower())
+    if not tokens:
+        return None
+    return func.to_tsquery(CONFIG_BUSQUEDA, " & ".join(f"{t}:*" for t in tokens))
+
+
+def _termino_normalizado(termino: str) -> ColumnElement:
+    return normalizar(literal(termino, type_=Text))
+
+
+def condicion_busqueda(
+    search_vector, texto_busqueda, termino: str, difusa: bool = False
+) -> ColumnElement:
+    """
+    Un producto coincide si:
+    - el full-text encuentra todos los términos (con stemming y sin acentos), o
+    - el término aparece dentro del nombre/marca/SKU (LIKE acelerado por trigramas), o
+    - (solo con `difusa=True`) las palabras se parecen a las del nombre o
+      la marca (word_similarity → typos) y los números aparecen tal cual.
+
+    La búsqueda difusa es el plan B cuando la exacta no encuentra nada
+    (si no, "camion" traería también todas las "camiseta").
+    Llamar antes a preparar_busqueda(db) para fijar el umbral de similitud.
+    """
+    normalizado = _termino_normalizado(termino)
+
+    condiciones = [
+        texto_busqueda.like(func.concat("%", normalizado, "%")),
+    ]
+
+    tsq = tsquery_prefijos(termino)
+    if tsq is not None:
+        condiciones.insert(0, search_vector.op("@@")(tsq))
+
+    palabras = _PALABRA_DIFUSA.findall(termino)
+    if difusa and palabras:
+        condiciones_difusas = [
+            _termino_normalizado(" ".join(palabras)).op("<%")(texto_busqueda)
+        ]
+        condiciones_difusas += [
+            texto_busqueda.like(f"%{numero}%") for numero in _NUMERO.findall(termino)
+        ]
+        condiciones.append(and_(*condiciones_difusas))
+
+    return or_(*condiciones)
+
+
+def rango_busqueda(search_vector, texto_busqueda, termino: str) -> ColumnElement:
+    """Relevancia: ts_rank_cd del full-text + similitud de trigramas."""
+    normalizado = _termino_normalizado(termino)
+    rango = func.word_similarity(normalizado, texto_busqueda)
+
+    tsq = tsquery_prefijos(termino)
+    if tsq is not None:
+        rango = rango + func.ts_rank_cd(search_vector, tsq)
+
+    return rango
+
+
+def rango_sku(sku_columna, termino: str) -> ColumnElement:
+    """Bonificación para coincidencia exacta de SKU (escaneo / tipeo del SKU completo)."""
+    return case((func.lower(sku_columna) == termino.lower(), 10.0), else_=0.0)
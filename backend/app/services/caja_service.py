@@ -0,0 +1,160 @@
+# app/services/caja_service.py
+"""
+Caja (CajaTurno) del POS: movimientos con totales acumulados y
+reportes X (a mitad de turno) y Z (al cierre).
+
+Cada CajaMovimiento suma su monto al total de su tipo en caja_turno con
+un UPDATE atómico (col = col + monto), en la misma transacción que lo
+inserta. Así el efectivo teórico sale de una sola fila: el reporte X y
+el cierre no recorren los movimientos del turno.
+"""
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, func, update
+from sqlalchemy.orm import Session
+
+from app.models.caja_movimientos import CajaMovimiento
+from app.models.caja_turno import CajaTurno
+from app.models.pago_pos import PagoPOS
+from app.models.venta_pos import VentaPOS
+
+
+# Tipo de movimiento → columna acumulada en caja_turno
+COLUMNA_POR_TIPO = {
+    "VENTA_EFECTIVO": CajaTurno.total_ventas_efectivo,
+    "INGRESO_EFECTIVO": CajaTurno.total_ingresos_efectivo,
+    "DEVOLUCION_EFECTIVO": CajaTurno.total_devoluciones_efectivo,
+    "RETIRO_EFECTIVO": CajaTurno.total_retiros_efectivo,
+}
+
+
+def registrar_movimiento_caja(
+    db: Session,
+    caja: CajaTurno,
+    *,
+    tipo: str,
+    monto: Decimal,
+    sucursal_id: Optional[int] = None,
+    venta_pos_id: Optional[int] = None,
+    pedido_id: Optional[int] = None,
+    pago_id: Optional[int] = None,
+    descripcion: Optional[str] = None,
+) -> CajaMovimiento:
+    """
+    Suma el monto al total del tipo en la caja e inserta el movimiento
+    (solo flush; confirma el llamador).
+
+    El UPDATE exige la caja ABIERTA: si cerrar_caja la tiene bloqueada,
+    este UPDATE espera y, ya cerrada, no toca ninguna fila → 409 (el
+    reporte Z cerrado no cambia).
+    """
+    columna = COLUMNA_POR_TIPO.get(tipo)
+    if columna is None:
+        raise ValueError(f"Tipo de movimiento de caja inválido: {tipo}")
+
+    resultado = db.execute(
+        update(CajaTurno)
+        .where(CajaTurno.id == caja.id, CajaTurno.estado == "ABIERTA")
+        .values(
+            {
+                columna: columna + monto,
+                CajaTurno.cantidad_movimientos: CajaTurno.cantidad_movimientos + 1,
+            }
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if resultado.rowcount == 0:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="La caja se cerró mientras se registraba el movimiento. Abre una caja nueva.",
+        )
+
+    movimiento = CajaMovimiento(
+        caja_turno_id=caja.id,
+        sucursal_id=sucursal_id,
+        venta_pos_id=venta_pos_id,
+        pedido_id=pedido_id,
+        pago_id=pago_id,
+        tipo=tipo,
+        monto=monto,
+        descripcion=descripcion,
+    )
+    db.add(movimiento)
+
+    # Los totales en memoria quedan viejos: se recargan al leerlos
+    db.expire(
+        caja,
+        [columna.key, "cantidad_movimientos"],
+    )
+    return movimiento
+
+
+def reporte_x(caja: CajaTurno) -> dict:
+    """Reporte X: totales del turno hasta ahora (sin tocar movimientos)."""
+    return {
+        "caja_id": caja.id,
+        "usuario_id": caja.usuario_id,
+        "estado": caja.estado,
+        "fecha_apertura": caja.fecha_apertura,
+        "monto_apertura": caja.monto_apertura,
+        "total_ventas_efectivo": caja.total_ventas_efectivo,
+        "total_ingresos_efectivo": caja.total_ingresos_efectivo,
+        "total_devoluciones_efectivo": caja.total_devoluciones_efectivo,
+        "total_retiros_efectivo": caja.total_retiros_efectivo,
+        "cantidad_movimientos": caja.cantidad_movimientos,
+        "efectivo_teorico": caja.efectivo_teorico,
+        "generado_en": datetime.now(timezone.utc),
+    }
+
+
+def pagos_por_metodo(db: Session, caja: CajaTurno) -> List[dict]:
+    """
+    Pagos POS aprobados del turno agrupados por método (una query).
+    La caja es por vendedor, así que el turno son sus ventas entre la
+    apertura y el cierre (o ahora, si sigue abierta). Ventas canceladas
+    no cuentan.
+    """
+    hasta = caja.fecha_cierre or datetime.now(timezone.utc)
+    filas = (
+        db.query(
+            PagoPOS.metodo,
+            func.count(PagoPOS.id),
+            func.count(func.distinct(PagoPOS.venta_pos_id)),
+            func.coalesce(func.sum(PagoPOS.monto), 0),
+        )
+        .join(
+            VentaPOS,
+            and_(
+                VentaPOS.id == PagoPOS.venta_pos_id,
+                VentaPOS.vendedor_id == caja.usuario_id,
+                VentaPOS.fecha_creacion >= caja.fecha_apertura,
+                VentaPOS.fecha_creacion <= hasta,
+                VentaPOS.cancelado.is_(False),
+            ),
+        )
+        .filter(PagoPOS.estado == "APROBADO")
+        .group_by(PagoPOS.metodo)
+        .order_by(PagoPOS.metodo)
+        .all()
+    )
+    return [
+        {"metodo": metodo, "cantidad_pagos": pagos, "cantidad_ventas": ventas, "total": total}
+        for metodo, pagos, ventas, total in filas
+    ]
+
+
+def reporte_z(db: Session, caja: CajaTurno) -> dict:
+    """Reporte Z: reporte X + arqueo del cierre + desglose por método de pago."""
+    reporte = reporte_x(caja)
+    reporte.update(
+        {
+            "fecha_cierre": caja.fecha_cierre,
+            "monto_real_cierre": caja.monto_real_cierre,
+            "diferencia": caja.diferencia,
+            "pagos_por_metodo": pagos_por_metodo(db, caja),
+        }
+    )
+    return reporte
@@ -4,19 +4,21 @@ from decimal import Decimal
 from typing import List, Tuple
 
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
 
 from app.models.pedido import Pedido
+from app.models.pedido_item import PedidoItem
 from app.models.pago import Pago
-from app.models.carrito import Carrito, CarritoItem
-from app.models.inventario import Inventario
-from app.models.movimiento_inventario import MovimientoInventario
 from app.models.usuario import Usuario
 from app.schemas.pedido import (
     ImpactoCancelacionResponse,
     CancelarPedidoResponse,
 )
 from app.services.audit_service import registrar_auditoria
+from app.services.inventario import reintegrar_inventario_sucursal
+from app.services.producto_resumen import refrescar_resumen_por_variantes
+from app.services.reservas_stock import liberar_reservas
 
 
 # Estados que NO permiten cancelación
@@ -127,69 +129,41 @@ def reintegrar_stock_pedido(
     usuario_id: int,
 ) -> Tuple[bool, int]:
     """
-    Reintegra el stock de los items del pedido al inventario.
-    
+    Reintegra al inventario de la sucursal del pedido (la que lo atendió
+    y descontó el stock) las cantidades de sus PedidoItem, en bloque:
+    una query de ítems, un UPDATE ... FROM y un INSERT de movimientos,
+    sin importar cuántas líneas tenga.
+
     Returns:
         Tuple[bool, int]: (éxito, cantidad de items reintegrados)
     """
-    # Obtener items del carrito que generó el pedido
-    carrito = (
-        db.query(Carrito)
-        .options(joinedload(Carrito.items).joinedload(CarritoItem.variante))
-        .filter(
-            Carrito.usuario_id == pedido.cliente_id,
-            Carrito.estado == "COMPLETADO",
-        )
-        .order_by(Carrito.updated_at.desc())
-        .first()
-    )
-    
-    if not carrito or not carrito.items:
-        # No se puede reintegrar si no hay información del carrito
+    if pedido.sucursal_id is None:
+        # Sin sucursal no se sabe de dónde salió el stock
         return False, 0
-    
-    items_reintegrados = 0
-    
-    # Asumimos que hay una sucursal principal (ID 1) o la primera disponible
-    # En producción, esto debería venir de una configuración
-    sucursal_id = pedido.sucursal_id or 1
-    
-    for item in carrito.items:
-        try:
-            # Buscar inventario existente
-            inventario = (
-                db.query(Inventario)
-                .filter(
-                    Inventario.variante_id == item.variante_id,
-                    Inventario.sucursal_id == sucursal_id,
-                )
-                .first()
-            )
-            
-            if inventario:
-                # Reintegrar cantidad
-                inventario.cantidad += item.cantidad
-                
-                # Registrar movimiento
-                movimiento = MovimientoInventario(
-                    variante_id=item.variante_id,
-                    sucursal_id=sucursal_id,
-                    cantidad=item.cantidad,
-                    tipo="ENTRADA",
-                    source_type="CANCELACION_PEDIDO",
-                    referencia=f"Cancelación pedido #{pedido.id}",
-                    observacion=f"Reintegro por cancelación de pedido",
-                    usuario_id=usuario_id,
-                )
-                db.add(movimiento)
-                items_reintegrados += 1
-            
-        except Exception as e:
-            # Log error pero continuar con otros items
-            print(f"Error reintegrando stock para variante {item.variante_id}: {e}")
-            continue
-    
-    return items_reintegrados > 0, items_reintegrados
+
+    filas = db.execute(
+        select(PedidoItem.variante_id, func.sum(PedidoItem.cantidad), func.count())
+        .where(PedidoItem.pedido_id == pedido.id)
+        .group_by(PedidoItem.variante_id)
+    ).all()
+    if not filas:
+        return False, 0
+
+    variante_ids = reintegrar_inventario_sucursal(
+        db,
+        pedido.sucursal_id,
+        {variante_id: int(cantidad) for variante_id, cantidad, _ in filas},
+        usuario_id=usuario_id,
+        source_type="CANCELACION_PEDIDO",
+        referencia=f"Cancelación pedido #{pedido.id}",
+        observacion="Reintegro por cancelación de pedido",
+    )
+
+    # Stock reintegrado → refrescar resumen de catálogo (tiene_stock)
+    refrescar_resumen_por_variantes(db, variante_ids)
+
+    items_reintegrados = sum(lineas for _, _, lineas in filas)
+    return True, items_reintegrados
 
 
 def cancelar_pedido(
@@ -212,10 +186,12 @@ def cancelar_pedido(
     Returns:
         CancelarPedidoResponse con resultado de la operación
     """
-    # 1. Obtener pedido
+    # 1. Obtener pedido (bloqueado: dos cancelaciones simultáneas no
+    #    reintegran el stock dos veces)
     pedido = (
         db.query(Pedido)
         .filter(Pedido.id == pedido_id)
+        .with_for_update()
         .first()
     )
     
@@ -241,14 +217,19 @@ def cancelar_pedido(
             detail=impacto.motivo_bloqueo or "No se puede cancelar este pedido"
         )
     
-    # 4. Reintegrar stock si aplica
+    # 4. Reintegrar stock si aplica (un pedido SINPE sin verificar no
+    #    descontó inventario: solo se libera su reserva)
     stock_reintegrado = False
     items_reintegrados = 0
-    
+
+    liberar_reservas(db, pedido_id=pedido.id)
+
     if impacto.impacto_stock:
         stock_reintegrado, items_reintegrados = reintegrar_stock_pedido(
             db, pedido, usuario.id
         )
+        if stock_reintegrado:
+            pedido.stock_descontado = False
     
     # 5. Actualizar estado del pago (si existe)
     pago = (
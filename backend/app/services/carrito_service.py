@@ -0,0 +1,45 @@
+# app/services/carrito_service.py
+"""
+Carrito ABIERTO del usuario.
+
+Si por una carrera quedan dos carritos ABIERTO, todos los caminos
+(endpoints del carrito, reserva y checkout) usan el mismo: el más
+antiguo (menor id). Así lo que se agrega, cambia o borra es lo que
+después se reserva y se compra.
+"""
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.carrito import Carrito
+
+
+def carrito_abierto(db: Session, usuario_id: int, *opciones) -> Optional[Carrito]:
+    """
+    Carrito ABIERTO del usuario (el de menor id). `opciones` se pasan a
+    options() (p. ej. cargar los ítems en la misma query).
+    """
+    return (
+        db.query(Carrito)
+        .options(*opciones)
+        .filter(
+            Carrito.usuario_id == usuario_id,
+            Carrito.estado == "ABIERTO",
+        )
+        .order_by(Carrito.id)
+        .first()
+    )
+
+
+def id_carrito_abierto(db: Session, usuario_id: int) -> Optional[int]:
+    """Solo el id del carrito ABIERTO (mismo criterio que carrito_abierto)."""
+    return (
+        db.query(Carrito.id)
+        .filter(
+            Carrito.usuario_id == usuario_id,
+            Carrito.estado == "ABIERTO",
+        )
+        .order_by(Carrito.id)
+        .limit(1)
+        .scalar()
+    )
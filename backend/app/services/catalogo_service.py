@@ -0,0 +1,414 @@
+# app/services/catalogo_service.py
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, tuple_, cast, REAL, and_, true, literal, null, select, union_all, Numeric, Text
+from sqlalchemy.dialects.postgresql import array
+from sqlalchemy.orm import Query, Session
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.core.config import settings
+from app.models.producto_resumen import CREATED_AT_NULO, ProductoResumen
+from app.services.busqueda_service import (
+    condicion_busqueda,
+    preparar_busqueda,
+    rango_busqueda,
+)
+
+
+# Debajo de esta estimación se hace el COUNT exacto (es barato)
+UMBRAL_CONTEO_EXACTO = 1000
+
+# Facetas: rangos de precio (₡)
+RANGOS_PRECIO = [0, 10000, 25000, 50000, 100000]
+
+FACETAS = ("categoria", "marca", "color", "talla", "precio")
+
+
+def _array_ilike(columna, valor: str):
+    """Búsqueda libre (ILIKE %valor%) sobre los elementos de un ARRAY de texto."""
+    return func.array_to_string(columna, "|").ilike(f"%{valor}%")
+
+
+def condiciones_catalogo(
+    *,
+    categoria: Optional[str] = None,
+    categoria_slug: Optional[str] = None,
+    principal_slug: Optional[str] = None,
+    secundaria_slug: Optional[str] = None,
+    marca: Optional[str] = None,
+    color: Optional[str] = None,
+    talla: Optional[str] = None,
+    precio_min: Optional[Decimal] = None,
+    precio_max: Optional[Decimal] = None,
+    solo_disponibles: bool = True,
+    buscar: Optional[str] = None,
+    busqueda_difusa: bool = False,
+) -> Dict[str, List[ColumnElement]]:
+    """
+    Condiciones de los filtros del catálogo agrupadas por faceta:
+    "base" (activo, disponibilidad, búsqueda), "categoria", "marca",
+    "color", "talla" y "precio". Las facetas necesitan aplicar todas
+    menos la propia.
+    """
+    condiciones: Dict[str, List[ColumnElement]] = {
+        "base": [
+            ProductoResumen.activo.is_(True),
+            ProductoResumen.precio_minimo.isnot(None),
+        ],
+        "categoria": [],
+        "marca": [],
+        "color": [],
+        "talla": [],
+        "precio": [],
+    }
+
+    # Disponibilidad (stock > 0)
+    if solo_disponibles:
+        condiciones["base"].append(ProductoResumen.tiene_stock.is_(True))
+
+    # Búsqueda por nombre, SKU, marca o categoría (full-text + trigramas)
+    if buscar:
+        condiciones["base"].append(
+            condicion_busqueda(
+                ProductoResumen.search_vector,
+                ProductoResumen.texto_busqueda,
+                buscar,
+                difusa=busqueda_difusa,
+            )
+        )
+
+    # Categorías
+    if principal_slug and secundaria_slug:
+        # Productos que tengan ambas categorías: la principal y la secundaria
+        condiciones["categoria"].append(
+            ProductoResumen.categoria_slugs.contains([principal_slug, secundaria_slug])
+        )
+    elif categoria_slug:
+        condiciones["categoria"].append(
+            ProductoResumen.categoria_slugs.contains([categoria_slug])
+        )
+    elif categoria:
+        # Filtro antiguo por nombre
+        condiciones["categoria"].append(_array_ilike(ProductoResumen.categorias, categoria))
+
+    # Marca / color / talla de alguna variante activa
+    if marca:
+        condiciones["marca"].append(_array_ilike(ProductoResumen.marcas, marca))
+    if color:
+        condiciones["color"].append(_array_ilike(ProductoResumen.colores, color))
+    if talla:
+        condiciones["talla"].append(_array_ilike(ProductoResumen.tallas, talla))
+
+    # Rango de precio (sobre el precio mínimo)
+    if precio_min is not None:
+        condiciones["precio"].append(ProductoResumen.precio_minimo >= precio_min)
+    if precio_max is not None:
+        condiciones["precio"].append(ProductoResumen.precio_minimo <= precio_max)
+
+    return condiciones
+
+
+def aplicar_filtros_catalogo(query: Query, **filtros) -> Query:
+    """
+    Aplica los filtros del catálogo sobre una query de ProductoResumen.
+    Solo productos activos y con al menos una variante activa (con precio).
+    `busqueda_difusa` habilita la tolerancia a typos en `buscar`.
+    Recibe los mismos parámetros que condiciones_catalogo.
+    """
+    for grupo in condiciones_catalogo(**filtros).values():
+        if grupo:
+            query = query.filter(*grupo)
+    return query
+
+
+def ordenar_catalogo(
+    query: Query, ordenar_por: str, buscar: Optional[str] = None
+) -> Query:
+    """
+    Ordenamiento del catálogo (destacados = más recientes).
+    Con `buscar`, "destacados"/"relevancia" ordenan por relevancia.
+    """
+    if ordenar_por == "precio_asc":
+        return query.order_by(ProductoResumen.precio_minimo.asc())
+    if ordenar_por == "precio_desc":
+        return query.order_by(ProductoResumen.precio_minimo.desc())
+    if ordenar_por == "nombre_asc":
+        return query.order_by(ProductoResumen.nombre.asc())
+    if buscar and ordenar_por in ("destacados", "relevancia"):
+        return query.order_by(
+            rango_busqueda(
+                ProductoResumen.search_vector,
+                ProductoResumen.texto_busqueda,
+                buscar,
+            ).desc(),
+            ProductoResumen.created_at.desc(),
+        )
+    return query.order_by(ProductoResumen.created_at.desc())
+
+
+# ============================
+# PAGINACIÓN POR CURSOR (keyset)
+# ============================
+
+def clave_orden_catalogo(
+    ordenar_por: str, buscar: Optional[str] = None
+) -> Tuple[str, ColumnElement, bool]:
+    """
+    Columna de orden del catálogo para keyset: (nombre_clave, expresión, descendente).
+    El desempate siempre es producto_id en la misma dirección. La clave
+    nunca es NULL (el cursor no podría compararla): un created_at NULL
+    cuenta como el más antiguo.
+    """
+    if ordenar_por == "precio_asc":
+        return "precio", ProductoResumen.precio_minimo, False
+    if ordenar_por == "precio_desc":
+        return "precio", ProductoResumen.precio_minimo, True
+    if ordenar_por == "nombre_asc":
+        return "nombre", ProductoResumen.nombre, False
+    if buscar and ordenar_por in ("destacados", "relevancia"):
+        # REAL: el valor vuelve en el cursor y se compara sin perder precisión
+        rango = rango_busqueda(
+            ProductoResumen.search_vector,
+            ProductoResumen.texto_busqueda,
+            buscar,
+        )
+        return "rango", cast(rango, REAL), True
+    return "created_at", func.coalesce(ProductoResumen.created_at, CREATED_AT_NULO), True
+
+
+def ordenar_catalogo_keyset(
+    query: Query, ordenar_por: str, buscar: Optional[str] = None
+) -> Query:
+    """Orden total (clave + producto_id) para paginar por cursor."""
+    _, columna, descendente = clave_orden_catalogo(ordenar_por, buscar)
+    if descendente:
+        return query.order_by(columna.desc(), ProductoResumen.producto_id.desc())
+    return query.order_by(columna.asc(), ProductoResumen.producto_id.asc())
+
+
+def aplicar_cursor_catalogo(
+    query: Query, ordenar_por: str, buscar: Optional[str], cursor: dict
+) -> Query:
+    """Filtra las filas que van DESPUÉS del cursor: (clave, id) > / < (valor, id)."""
+    clave, columna, descendente = clave_orden_catalogo(ordenar_por, buscar)
+    valor = cursor["v"]
+    if clave == "rango":
+        valor = cast(valor, REAL)
+
+    fila = tuple_(columna, ProductoResumen.producto_id)
+    despues = tuple_(valor, cursor["id"])
+    return query.filter(fila < despues if descendente else fila > despues)
+
+
+def codificar_cursor(
+    ordenar_por: str, valor: Any, producto_id: int, difusa: bool = False
+) -> str:
+    """Cursor opaco (base64 url-safe de un JSON pequeño)."""
+    if isinstance(valor, datetime):
+        valor = valor.isoformat()
+    elif isinstance(valor, Decimal):
+        valor = str(valor)
+
+    datos = {"o": ordenar_por, "v": valor, "id": producto_id}
+    if difusa:
+        datos["d"] = 1
+
+    crudo = json.dumps(datos, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(crudo).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str, ordenar_por: str, buscar: Optional[str]) -> dict:
+    """
+    Decodifica y valida un cursor de codificar_cursor.
+    Lanza ValueError si es inválido o si se generó con otro ordenamiento.
+    """
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        producto_id = int(datos["id"])
+        valor = datos["v"]
+        orden = datos["o"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Cursor inválido")
+
+    if orden != ordenar_por:
+        raise ValueError("El cursor no corresponde al ordenamiento solicitado")
+
+    clave, _, _ = clave_orden_catalogo(ordenar_por, buscar)
+    try:
+        if clave == "created_at":
+            valor = datetime.fromisoformat(valor)
+        elif clave == "precio":
+            valor = Decimal(valor)
+        elif clave == "rango":
+            valor = float(valor)
+        else:
+            valor = str(valor)
+    except (ValueError, TypeError, ArithmeticError):
+        raise ValueError("Cursor inválido")
+
+    return {"v": valor, "id": producto_id, "difusa": bool(datos.get("d"))}
+
+
+def contar_catalogo(db: Session, query: Query) -> Tuple[Optional[int], bool]:
+    """
+    Total para el modo cursor sin recorrer todo el resultado:
+    estimación del planificador (EXPLAIN) y COUNT exacto solo si es chica.
+    Devuelve (total, es_estimado). Es un EXPLAIN extra por petición, así
+    que solo corre con settings.CATALOGO_CURSOR_TOTAL (depuración); si no,
+    el total es None.
+    """
+    if not settings.CATALOGO_CURSOR_TOTAL:
+        return None, False
+
+    compilado = query.order_by(None).statement.compile(dialect=db.get_bind().dialect)
+    plan = db.connection().exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {compilado}", compilado.params
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    estimado = int(plan[0]["Plan"]["Plan Rows"])
+
+    if estimado <= UMBRAL_CONTEO_EXACTO:
+        return query.order_by(None).count(), False
+    return estimado, True
+
+
+# ============================
+# FACETAS (conteos por valor)
+# ============================
+
+def _todas_menos(condiciones: Dict[str, List[ColumnElement]], excepto: Optional[str]):
+    """AND de los filtros de todas las facetas salvo `excepto`."""
+    return and_(
+        true(),
+        *[
+            condicion
+            for faceta in FACETAS
+            if faceta != excepto
+            for condicion in condiciones[faceta]
+        ],
+    )
+
+
+def _consulta_facetas(db: Session, condiciones: Dict[str, List[ColumnElement]]) -> list:
+    """
+    UNA sola query agrupada. Cada faceta cuenta con todos los filtros
+    menos el suyo (al elegir "Nike" se siguen viendo las otras marcas):
+
+        WITH base AS (productos que pasan los filtros comunes,
+                      + un booleano por faceta)
+        SELECT faceta, valor, count(*) FILTER (WHERE pasa)
+        FROM (unnest(categorias) UNION ALL unnest(marcas) UNION ALL ...)
+        GROUP BY faceta, valor
+    """
+    base = (
+        select(
+            ProductoResumen.categorias,
+            ProductoResumen.marcas,
+            ProductoResumen.colores,
+            ProductoResumen.tallas,
+            func.width_bucket(
+                ProductoResumen.precio_minimo,
+                array([Decimal(limite) for limite in RANGOS_PRECIO], type_=Numeric),
+            ).label("rango_precio"),
+            _todas_menos(condiciones, None).label("pasa_total"),
+            *[
+                _todas_menos(condiciones, faceta).label(f"pasa_{faceta}")
+                for faceta in FACETAS
+            ],
+        )
+        .where(*condiciones["base"])
+        .cte("base")
+    )
+
+    def _rama(faceta: str, valor, pasa):
+        return select(
+            literal(faceta).label("faceta"),
+            valor.label("valor"),
+            pasa.label("pasa"),
+        ).select_from(base)
+
+    ramas = union_all(
+        _rama("total", null(), base.c.pasa_total),
+        _rama("categoria", func.unnest(base.c.categorias), base.c.pasa_categoria),
+        _rama("marca", func.unnest(base.c.marcas), base.c.pasa_marca),
+        _rama("color", func.unnest(base.c.colores), base.c.pasa_color),
+        _rama("talla", func.unnest(base.c.tallas), base.c.pasa_talla),
+        _rama("precio", cast(base.c.rango_precio, Text), base.c.pasa_precio),
+    ).subquery("facetas")
+
+    cantidad = func.count().filter(ramas.c.pasa)
+    return db.execute(
+        select(ramas.c.faceta, ramas.c.valor, cantidad.label("cantidad"))
+        .group_by(ramas.c.faceta, ramas.c.valor)
+        .having(cantidad > 0)
+    ).all()
+
+
+def _armar_facetas(filas: list) -> dict:
+    resultado = {
+        "total": 0,
+        "categorias": [],
+        "marcas": [],
+        "colores": [],
+        "tallas": [],
+        "precios": [],
+    }
+    plurales = {
+        "categoria": "categorias",
+        "marca": "marcas",
+        "color": "colores",
+        "talla": "tallas",
+    }
+
+    for faceta, valor, cantidad in filas:
+        if faceta == "total":
+            resultado["total"] = cantidad
+        elif faceta == "precio":
+            # width_bucket: i → [RANGOS_PRECIO[i-1], RANGOS_PRECIO[i])
+            indice = int(valor)
+            if indice < 1:
+                continue
+            resultado["precios"].append(
+                {
+                    "desde": Decimal(RANGOS_PRECIO[indice - 1]),
+                    "hasta": (
+                        Decimal(RANGOS_PRECIO[indice])
+                        if indice < len(RANGOS_PRECIO)
+                        else None
+                    ),
+                    "cantidad": cantidad,
+                }
+            )
+        else:
+            resultado[plurales[faceta]].append({"valor": valor, "cantidad": cantidad})
+
+    for clave in plurales.values():
+        resultado[clave].sort(key=lambda f: (-f["cantidad"], f["valor"]))
+    resultado["precios"].sort(key=lambda f: f["desde"])
+
+    return resultado
+
+
+def calcular_facetas(db: Session, **filtros) -> dict:
+    """
+    Conteos por categoría, marca, color, talla y rango de precio para los
+    filtros dados (los mismos de /catalogo). El endpoint la cachea en Redis.
+    """
+    resultado = _armar_facetas(_consulta_facetas(db, condiciones_catalogo(**filtros)))
+
+    # Igual que /catalogo: búsqueda sin resultados exactos → tolerar typos
+    if filtros.get("buscar") and resultado["total"] == 0:
+        preparar_busqueda(db)
+        resultado = _armar_facetas(
+            _consulta_facetas(
+                db, condiciones_catalogo(busqueda_difusa=True, **filtros)
+            )
+        )
+
+    return resultado
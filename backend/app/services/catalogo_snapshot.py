@@ -0,0 +1,314 @@
+# app/services/catalogo_snapshot.py
+"""
+Motor en memoria para /catalogo (settings.CATALOGO_MOTOR = "snapshot").
+
+Cada worker guarda una foto compacta de los productos activos de
+producto_resumen:
+
+- precio mínimo (array 'd') y disponibilidad (bytearray),
+- marcas / colores / tallas / categorías / slugs como bitsets (int)
+  sobre un vocabulario de códigos,
+- los órdenes del catálogo precalculados como listas de índices
+  (el orden por nombre lo calcula Postgres: respeta su collation).
+
+Filtrar es recorrer la lista del orden pedido descartando índices, así
+que no hay sort por request. La foto se reconstruye en segundo plano
+cuando cambia la versión de los tags "catalogo" o "disponibilidad"
+(core/cache.py la incrementa en cada invalidación) o cuando supera
+CATALOGO_SNAPSHOT_MAX_SEGUNDOS.
+
+Búsqueda (`buscar`), modo cursor y filtros con comodines de ILIKE
+(% _ |) siguen por SQL.
+"""
+import threading
+import time
+from array import array
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import Row
+
+from app.core.cache import version_tag
+from app.core.config import settings
+from app.core.logging_config import get_logger
+from app.db import SessionLocal
+from app.models.producto_resumen import ProductoResumen
+
+logger = get_logger(__name__)
+
+# ordenar_por → nombre del orden precalculado
+ORDENES = {
+    "precio_asc": "precio_asc",
+    "precio_desc": "precio_desc",
+    "nombre_asc": "nombre_asc",
+}
+ORDEN_POR_DEFECTO = "reciente"  # destacados / relevancia sin búsqueda
+
+# Columnas multivalor → nombre del bitset
+_DIMENSIONES = ("marcas", "colores", "tallas", "categorias", "categoria_slugs")
+
+_COMODINES_ILIKE = ("%", "_", "|")
+
+
+class SnapshotCatalogo:
+    """Foto inmutable de los productos activos (con precio) del catálogo."""
+
+    def __init__(self, filas: List[Row], version: Optional[Tuple[int, int]]) -> None:
+        self.version = version
+        self.creado = time.monotonic()
+        self.filas = filas
+
+        self.precio = array("d", (float(f.precio_minimo) for f in filas))
+        self.disponible = bytearray(1 if f.tiene_stock else 0 for f in filas)
+
+        # Vocabulario (valor → bit) y bitset por producto, por dimensión
+        self.vocabulario: Dict[str, Dict[str, int]] = {}
+        self.bits: Dict[str, List[int]] = {}
+        for dimension in _DIMENSIONES:
+            codigos: Dict[str, int] = {}
+            bits = []
+            for fila in filas:
+                valor = 0
+                for texto in getattr(fila, dimension) or []:
+                    valor |= 1 << codigos.setdefault(texto, len(codigos))
+                bits.append(valor)
+            self.vocabulario[dimension] = codigos
+            self.bits[dimension] = bits
+
+        def _orden(columna: str) -> List[int]:
+            rangos = [getattr(f, columna) for f in filas]
+            return sorted(range(len(filas)), key=rangos.__getitem__)
+
+        precio_asc = _orden("r_precio")
+        self.ordenes: Dict[str, List[int]] = {
+            "reciente": _orden("r_reciente"),
+            "precio_asc": precio_asc,
+            "precio_desc": precio_asc[::-1],
+            "nombre_asc": _orden("r_nombre"),
+        }
+
+    def __len__(self) -> int:
+        return len(self.filas)
+
+    # ---------- filtros ----------
+
+    def _mascara_ilike(self, dimension: str, valor: str) -> int:
+        """Bits de los valores que contienen `valor` (como ILIKE %valor%)."""
+        buscado = valor.lower()
+        mascara = 0
+        for texto, bit in self.vocabulario[dimension].items():
+            if buscado in texto.lower():
+                mascara |= 1 << bit
+        return mascara
+
+    def _mascara_exacta(self, dimension: str, valores: List[str]) -> Optional[int]:
+        """Bits de todos los `valores`; None si alguno no existe."""
+        mascara = 0
+        for valor in valores:
+            bit = self.vocabulario[dimension].get(valor)
+            if bit is None:
+                return None
+            mascara |= 1 << bit
+        return mascara
+
+    def filtrar(
+        self,
+        ordenar_por: str,
+        *,
+        categoria: Optional[str] = None,
+        categoria_slug: Optional[str] = None,
+        principal_slug: Optional[str] = None,
+        secundaria_slug: Optional[str] = None,
+        marca: Optional[str] = None,
+        color: Optional[str] = None,
+        talla: Optional[str] = None,
+        precio_min: Optional[Decimal] = None,
+        precio_max: Optional[Decimal] = None,
+        solo_disponibles: bool = True,
+        buscar: Optional[str] = None,
+    ) -> List[int]:
+        """
+        Índices que cumplen los filtros, en el orden pedido.
+        Mismas reglas que catalogo_service.condiciones_catalogo.
+        """
+        indices = self.ordenes[ORDENES.get(ordenar_por, ORDEN_POR_DEFECTO)]
+
+        if solo_disponibles:
+            disponible = self.disponible
+            indices = [i for i in indices if disponible[i]]
+
+        # Categorías: ambas slugs / una slug / nombre (ILIKE)
+        slugs = None
+        if principal_slug and secundaria_slug:
+            slugs = [principal_slug, secundaria_slug]
+        elif categoria_slug:
+            slugs = [categoria_slug]
+
+        if slugs:
+            mascara = self._mascara_exacta("categoria_slugs", slugs)
+            if mascara is None:
+                return []
+            bits = self.bits["categoria_slugs"]
+            indices = [i for i in indices if bits[i] & mascara == mascara]
+        elif categoria:
+            indices = self._filtrar_ilike(indices, "categorias", categoria)
+
+        for dimension, valor in (("marcas", marca), ("colores", color), ("tallas", talla)):
+            if valor:
+                indices = self._filtrar_ilike(indices, dimension, valor)
+
+        precio = self.precio
+        if precio_min is not None:
+            minimo = float(precio_min)
+            indices = [i for i in indices if precio[i] >= minimo]
+        if precio_max is not None:
+            maximo = float(precio_max)
+            indices = [i for i in indices if precio[i] <= maximo]
+
+        return indices
+
+    def _filtrar_ilike(self, indices: List[int], dimension: str, valor: str) -> List[int]:
+        mascara = self._mascara_ilike(dimension, valor)
+        if not mascara:
+            return []
+        bits = self.bits[dimension]
+        return [i for i in indices if bits[i] & mascara]
+
+
+# =========================
+# Construcción y refresco
+# =========================
+
+def _leer_filas(db) -> List[Row]:
+    """Productos activos con precio y sus rangos en cada orden del catálogo."""
+    r = ProductoResumen
+    consulta = (
+        select(
+            r.producto_id,
+            r.nombre,
+            r.precio_minimo,
+            r.imagen_principal,
+            r.imagenes,
+            r.categorias,
+            r.categoria_slugs,
+            r.tiene_stock,
+            r.marca,
+            r.marcas,
+            r.colores,
+            r.tallas,
+            r.created_at,
+            func.row_number()
+            .over(order_by=(r.created_at.desc(), r.producto_id.desc()))
+            .label("r_reciente"),
+            func.row_number()
+            .over(order_by=(r.precio_minimo.asc(), r.producto_id.asc()))
+            .label("r_precio"),
+            func.row_number()
+            .over(order_by=(r.nombre.asc(), r.producto_id.asc()))
+            .label("r_nombre"),
+        )
+        .where(r.activo.is_(True), r.precio_minimo.isnot(None))
+    )
+    return db.execute(consulta).all()
+
+
+def _version_catalogo() -> Optional[Tuple[int, int]]:
+    """Versión de la foto: ediciones del catálogo y cambios de disponibilidad."""
+    catalogo, disponibilidad = version_tag("catalogo"), version_tag("disponibilidad")
+    if catalogo is None or disponibilidad is None:
+        return None
+    return catalogo, disponibilidad
+
+
+def construir_snapshot() -> SnapshotCatalogo:
+    # La versión se lee ANTES que los datos: si cambia mientras tanto,
+    # la próxima verificación vuelve a reconstruir
+    version = _version_catalogo()
+    db = SessionLocal()
+    try:
+        filas = _leer_filas(db)
+    finally:
+        db.close()
+    return SnapshotCatalogo(filas, version)
+
+
+_snapshot: Optional[SnapshotCatalogo] = None
+_lock = threading.Lock()
+_refrescando = False
+_verificado_en = 0.0
+
+
+def _reconstruir() -> None:
+    global _snapshot
+    inicio = time.perf_counter()
+    nuevo = construir_snapshot()
+    _snapshot = nuevo
+    logger.info(
+        f"📸 Snapshot del catálogo: {len(nuevo)} productos, versión {nuevo.version} "
+        f"({(time.perf_counter() - inicio) * 1000:.0f} ms)"
+    )
+
+
+def _refrescar_en_segundo_plano() -> None:
+    global _refrescando
+    with _lock:
+        if _refrescando:
+            return
+        _refrescando = True
+
+    def _tarea():
+        global _refrescando
+        try:
+            _reconstruir()
+        except Exception as e:  # se sigue sirviendo la foto anterior
+            logger.error(f"❌ Error reconstruyendo el snapshot del catálogo: {e}")
+        finally:
+            _refrescando = False
+
+    threading.Thread(target=_tarea, name="catalogo-snapshot", daemon=True).start()
+
+
+def obtener_snapshot() -> SnapshotCatalogo:
+    """
+    Foto vigente del worker. La primera vez se construye en línea; luego
+    se sirve la actual mientras se reconstruye en segundo plano.
+    """
+    global _verificado_en
+    snapshot = _snapshot
+    if snapshot is None:
+        with _lock:
+            if _snapshot is None:
+                _reconstruir()
+        return _snapshot
+
+    ahora = time.monotonic()
+    if ahora - _verificado_en >= settings.CATALOGO_SNAPSHOT_VERIFICAR_SEGUNDOS:
+        _verificado_en = ahora
+        version = _version_catalogo()
+        vencido = ahora - snapshot.creado >= settings.CATALOGO_SNAPSHOT_MAX_SEGUNDOS
+        if vencido or (version is not None and version != snapshot.version):
+            _refrescar_en_segundo_plano()
+
+    return snapshot
+
+
+def snapshot_soporta(filtros: dict, paginacion: str, cursor: Optional[str]) -> bool:
+    """¿Puede el snapshot responder esta consulta igual que SQL?"""
+    if filtros.get("buscar") or paginacion == "cursor" or cursor:
+        return False
+    for nombre in ("categoria", "marca", "color", "talla"):
+        valor = filtros.get(nombre)
+        if valor and any(c in valor for c in _COMODINES_ILIKE):
+            return False
+    return True
+
+
+def consultar_snapshot(
+    filtros: dict, ordenar_por: str, pagina: int, por_pagina: int
+) -> Tuple[List[Row], int]:
+    """(filas de la página, total) desde la foto en memoria."""
+    snapshot = obtener_snapshot()
+    indices = snapshot.filtrar(ordenar_por, **filtros)
+    offset = (pagina - 1) * por_pagina
+    return [snapshot.filas[i] for i in indices[offset : offset + por_pagina]], len(indices)
@@ -0,0 +1,157 @@
+# app/services/clientes_pos.py
+"""
+Búsqueda de clientes en caja (typeahead de /pos/clientes/buscar).
+
+- Término normalizado (minúsculas, sin acentos; un teléfono queda solo
+  con dígitos). Menos de MIN_CARACTERES → sin resultados y sin query.
+- 1-2 caracteres: solo prefijo de correo o nombre (índices btree
+  text_pattern_ops ix_usuario_correo_prefijo / ix_usuario_nombre_prefijo).
+- 3+ caracteres: además "contiene" sobre nombre + correo + teléfono con
+  el índice de trigramas ix_usuario_texto_cliente_trgm. Los prefijos
+  salen primero, luego por similitud.
+- Resumen de cada cliente (puntos, última compra, gasto total en POS y
+  tienda en línea, sin cancelados) en una query para los ≤ N resultados.
+
+Las expresiones deben coincidir con las de los índices de la migración
+a6b3d9e0f412 (inmutable_unaccent es el wrapper IMMUTABLE de unaccent;
+se quita el acento antes de lower() para no depender del locale).
+"""
+import re
+import unicodedata
+from typing import List
+
+from sqlalchemy import case, func, or_, select, union_all
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.models.pedido import Pedido
+from app.models.programa_puntos import SaldoPuntosUsuario
+from app.models.usuario import Usuario
+from app.models.venta_pos import VentaPOS
+
+
+MIN_CARACTERES = 2
+MIN_CARACTERES_TRIGRAMAS = 3  # con menos, pg_trgm no puede usar el índice
+
+_COMODINES_LIKE = re.compile(r"([%_\\])")
+_TELEFONO = re.compile(r"^[\d\s\-+()]+$")
+
+
+def _inmutable_unaccent(expr) -> ColumnElement:
+    return func.inmutable_unaccent(expr)
+
+
+def correo_normalizado() -> ColumnElement:
+    return func.lower(Usuario.correo)
+
+
+def nombre_normalizado() -> ColumnElement:
+    return func.lower(_inmutable_unaccent(Usuario.nombre))
+
+
+def texto_cliente() -> ColumnElement:
+    """nombre + correo + dígitos del teléfono, normalizado (índice de trigramas)."""
+    telefono = func.coalesce(func.regexp_replace(Usuario.telefono, r"\D", "", "g"), "")
+    return func.lower(
+        _inmutable_unaccent(Usuario.nombre + " " + Usuario.correo + " " + telefono)
+    )
+
+
+def normalizar_termino(termino: str) -> str:
+    """
+    Minúsculas, sin acentos (como unaccent) y espacios colapsados; un
+    teléfono queda solo con dígitos.
+    """
+    termino = " ".join(termino.split()).lower()
+    if _TELEFONO.match(termino) and any(c.isdigit() for c in termino):
+        return re.sub(r"\D", "", termino)
+    descompuesto = unicodedata.normalize("NFKD", termino)
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def _escapar_like(termino: str) -> str:
+    return _COMODINES_LIKE.sub(r"\\\1", termino)
+
+
+def buscar_clientes(db: Session, termino: str, limite: int = 10) -> List[dict]:
+    """Clientes activos que coinciden con `termino`, con su resumen."""
+    termino = normalizar_termino(termino)
+    if len(termino) < MIN_CARACTERES:
+        return []
+
+    escapado = _escapar_like(termino)
+    es_prefijo = or_(
+        correo_normalizado().like(f"{escapado}%"),
+        nombre_normalizado().like(f"{escapado}%"),
+    )
+    coincide = es_prefijo
+    orden = [case((es_prefijo, 0), else_=1)]
+
+    if len(termino) >= MIN_CARACTERES_TRIGRAMAS:
+        coincide = or_(es_prefijo, texto_cliente().like(f"%{escapado}%"))
+        orden.append(func.similarity(texto_cliente(), termino).desc())
+
+    filas = db.execute(
+        select(
+            Usuario.id,
+            Usuario.nombre,
+            Usuario.correo,
+            Usuario.telefono,
+            func.coalesce(SaldoPuntosUsuario.saldo, 0).label("puntos"),
+        )
+        .outerjoin(SaldoPuntosUsuario, SaldoPuntosUsuario.usuario_id == Usuario.id)
+        .where(Usuario.rol == "CLIENTE", Usuario.activo.is_(True), coincide)
+        .order_by(*orden, Usuario.correo.asc())
+        .limit(limite)
+    ).all()
+
+    resumenes = resumen_clientes(db, [fila.id for fila in filas])
+    return [
+        {
+            "id": fila.id,
+            "nombre": fila.nombre,
+            "correo": fila.correo,
+            "telefono": fila.telefono,
+            "puntos_actuales": fila.puntos,
+            **resumenes.get(fila.id, {}),
+        }
+        for fila in filas
+    ]
+
+
+def resumen_clientes(db: Session, cliente_ids: List[int]) -> dict:
+    """
+    cliente_id → {ultima_compra, gasto_total, cantidad_compras} sumando
+    ventas POS y pedidos en línea no cancelados (una sola query).
+    """
+    if not cliente_ids:
+        return {}
+
+    compras = union_all(
+        select(
+            VentaPOS.cliente_id.label("cliente_id"),
+            VentaPOS.fecha_creacion.label("fecha"),
+            VentaPOS.total.label("total"),
+        ).where(VentaPOS.cliente_id.in_(cliente_ids), VentaPOS.cancelado.is_(False)),
+        select(Pedido.cliente_id, Pedido.fecha_creacion, Pedido.total).where(
+            Pedido.cliente_id.in_(cliente_ids), Pedido.cancelado.is_(False)
+        ),
+    ).subquery("compras")
+
+    filas = db.execute(
+        select(
+            compras.c.cliente_id,
+            func.max(compras.c.fecha),
+            func.coalesce(func.sum(compras.c.total), 0),
+            func.count(),
+        ).group_by(compras.c.cliente_id)
+    ).all()
+
+    return {
+        cliente_id: {
+            "ultima_compra": ultima,
+            "gasto_total": gasto,
+            "cantidad_compras": cantidad,
+        }
+        for cliente_id, ultima, gasto, cantidad in filas
+    }
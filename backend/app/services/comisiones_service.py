@@ -385,11 +385,12 @@ def obtener_resumen_comisiones_vendedor(
     }
 
 def crear_comision_pos_si_aplica(db, venta: VentaPOS):
-    print("[COMISION] estado:", venta.estado)
-    print("[COMISION] cancelado:", getattr(venta, "cancelado", None))
-    print("[COMISION] venta_id:", venta.id)
-    print("[COMISION] total:", venta.total)
-
+    """
+    Crea la comisión de una venta POS si hay configuración activa.
+    La llama el manejador del evento VENTA_POS_COMPLETADA del outbox,
+    después de confirmada la venta; solo hace flush y el despachador
+    confirma junto con el evento. Un reintento no la duplica.
+    """
     # Solo si está pagada
     if venta.estado not in ("PAGADO", "COMPLETADO"):
         return None
@@ -402,19 +403,14 @@ def crear_comision_pos_si_aplica(db, venta: VentaPOS):
     existe = db.query(ComisionVendedor.id).filter(
         ComisionVendedor.venta_pos_id == venta.id
     ).first()
-    print("[COMISION] ya_existe?:", bool(existe))
     if existe:
         return None
 
     config = obtener_configuracion_activa(db, "POS")
-    print("[COMISION] config:", config)
 
     if not config:
-        print("[COMISION] NO HAY CONFIG POS ACTIVA")
         return None
 
-    print("[COMISION] porcentaje:", config.porcentaje, "monto_minimo:", config.monto_minimo)
-
     if config.monto_minimo and venta.total < config.monto_minimo:
         return None
 
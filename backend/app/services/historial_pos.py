@@ -0,0 +1,145 @@
+# app/services/historial_pos.py
+"""
+Historial de ventas POS con paginación keyset y totales del servidor.
+
+- Página: WHERE (fecha_creacion, id) < cursor ORDER BY fecha_creacion
+  DESC, id DESC LIMIT n+1, con sucursal y método principal en la misma
+  query (índices ix_venta_pos_keyset / ix_venta_pos_vendedor_keyset).
+- Resumen del conjunto filtrado (cantidad, total, impuesto y montos por
+  método de pago) en UNA query: CTE de las ventas filtradas + UNION ALL
+  de la fila de totales y las filas por método.
+"""
+from datetime import datetime
+from decimal import Decimal
+from typing import List, Optional, Tuple
+
+from sqlalchemy import exists, func, literal, null, select, tuple_, union_all
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.core.paginacion import codificar_cursor, decodificar_cursor
+from app.models.pago_pos import PagoPOS
+from app.models.sucursal import Sucursal
+from app.models.venta_pos import VentaPOS
+
+
+def condiciones_historial(
+    *,
+    vendedor_id: Optional[int] = None,
+    sucursal_id: Optional[int] = None,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    estado: Optional[str] = None,
+    metodo_pago: Optional[str] = None,
+) -> list:
+    """Condiciones WHERE sobre venta_pos para los filtros del historial."""
+    condiciones = []
+    if vendedor_id is not None:
+        condiciones.append(VentaPOS.vendedor_id == vendedor_id)
+    if sucursal_id is not None:
+        condiciones.append(VentaPOS.sucursal_id == sucursal_id)
+    if desde is not None:
+        condiciones.append(VentaPOS.fecha_creacion >= desde)
+    if hasta is not None:
+        condiciones.append(VentaPOS.fecha_creacion < hasta)
+    if estado:
+        condiciones.append(VentaPOS.estado == estado)
+    if metodo_pago:
+        condiciones.append(
+            exists().where(
+                PagoPOS.venta_pos_id == VentaPOS.id,
+                PagoPOS.metodo == metodo_pago,
+            )
+        )
+    return condiciones
+
+
+# =========================
+# Página y resumen
+# =========================
+
+def pagina_historial(
+    db: Session,
+    condiciones: list,
+    cursor: Optional[str],
+    limite: int,
+) -> Tuple[List[Row], Optional[str]]:
+    """(filas de la página, next_cursor) ordenadas de la más reciente a la más antigua."""
+    metodo_principal = (
+        select(PagoPOS.metodo)
+        .where(PagoPOS.venta_pos_id == VentaPOS.id)
+        .order_by(PagoPOS.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    consulta = (
+        select(
+            VentaPOS.id,
+            VentaPOS.sucursal_id,
+            Sucursal.nombre.label("sucursal_nombre"),
+            VentaPOS.impuesto,
+            VentaPOS.total,
+            VentaPOS.estado,
+            VentaPOS.fecha_creacion,
+            VentaPOS.nombre_cliente,
+            metodo_principal.label("metodo_principal"),
+        )
+        .outerjoin(Sucursal, Sucursal.id == VentaPOS.sucursal_id)
+        .where(*condiciones)
+        .order_by(VentaPOS.fecha_creacion.desc(), VentaPOS.id.desc())
+        .limit(limite + 1)
+    )
+    if cursor:
+        fecha, venta_id = decodificar_cursor(cursor)
+        consulta = consulta.where(
+            tuple_(VentaPOS.fecha_creacion, VentaPOS.id) < tuple_(fecha, venta_id)
+        )
+
+    filas = db.execute(consulta).all()
+    next_cursor = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        ultima = filas[-1]
+        next_cursor = codificar_cursor(ultima.fecha_creacion, ultima.id)
+    return filas, next_cursor
+
+
+def resumen_historial(db: Session, condiciones: list) -> dict:
+    """Totales del conjunto filtrado (todas las páginas) en una sola query."""
+    ventas = (
+        select(VentaPOS.id, VentaPOS.total, VentaPOS.impuesto)
+        .where(*condiciones)
+        .cte("ventas_filtradas")
+    )
+    totales = select(
+        null().label("metodo"),
+        func.count(),
+        func.coalesce(func.sum(ventas.c.total), 0),
+        func.coalesce(func.sum(ventas.c.impuesto), 0),
+    ).select_from(ventas)
+    por_metodo = (
+        select(
+            PagoPOS.metodo,
+            func.count(func.distinct(PagoPOS.venta_pos_id)),
+            func.coalesce(func.sum(PagoPOS.monto), 0),
+            literal(None).label("impuesto"),
+        )
+        .join(ventas, ventas.c.id == PagoPOS.venta_pos_id)
+        .group_by(PagoPOS.metodo)
+    )
+
+    resumen = {
+        "cantidad": 0,
+        "total": Decimal("0.00"),
+        "impuesto": Decimal("0.00"),
+        "por_metodo": [],
+    }
+    for metodo, cantidad, monto, impuesto in db.execute(union_all(totales, por_metodo)):
+        if metodo is None:
+            resumen.update(cantidad=cantidad, total=monto, impuesto=impuesto)
+        else:
+            resumen["por_metodo"].append(
+                {"metodo": metodo, "cantidad_ventas": cantidad, "total": monto}
+            )
+    resumen["por_metodo"].sort(key=lambda m: m["metodo"])
+    return resumen
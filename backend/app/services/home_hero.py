@@ -2,6 +2,7 @@
 from sqlalchemy.orm import Session
 from typing import Optional
 
+from app.core.cache import invalidar_al_confirmar
 from app.models.home_hero import HomeHeroConfig
 from app.schemas.home_hero import HomeHeroUpdate
 
@@ -20,6 +21,7 @@ def upsert_config(db: Session, data: HomeHeroUpdate) -> HomeHeroConfig:
             banner2_url=data.banner2_url,
         )
         db.add(config)
+        invalidar_al_confirmar(db, "home_hero")
         db.commit()
         db.refresh(config)
         return config
@@ -29,6 +31,7 @@ def upsert_config(db: Session, data: HomeHeroUpdate) -> HomeHeroConfig:
     config.banner1_url = data.banner1_url
     config.banner2_url = data.banner2_url
     db.add(config)
+    invalidar_al_confirmar(db, "home_hero")
     db.commit()
     db.refresh(config)
     return config
@@ -39,4 +42,5 @@ def delete_config(db: Session) -> None:
     if config is None:
         return
     db.delete(config)
+    invalidar_al_confirmar(db, "home_hero")
     db.commit()
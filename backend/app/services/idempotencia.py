@@ -0,0 +1,261 @@
+# app/services/idempotencia.py
+"""
+Header Idempotency-Key para endpoints de escritura (checkout, checkout
+SINPE, venta POS).
+
+1) La clave se reclama con un INSERT ... ON CONFLICT en su propia
+   transacción (visible de inmediato para otros workers).
+2) Si ya existía y está COMPLETADA, se devuelve la respuesta guardada
+   sin ejecutar nada: no se bloquea inventario ni se crea otro pedido.
+   Si sigue EN_PROCESO → 409; si la petición es otra → 422.
+   El EN_PROCESO tiene un plazo (en_proceso_hasta): si el proceso se
+   cayó antes de confirmar, pasado el plazo la misma petición puede
+   reclamar la clave de nuevo.
+3) En el primer commit de la sesión de negocio la clave pasa a
+   CONFIRMADA dentro de esa MISMA transacción: o quedan ambas cosas o
+   ninguna. El marcado exige el mismo plazo con el que se reclamó: si
+   la clave se perdió (se venció y otra petición la tomó o la purga la
+   borró), el commit falla en vez de ejecutar la operación dos veces.
+   Al terminar bien se guarda la respuesta (COMPLETADA).
+4) Si la operación falla, la clave solo se libera si sigue EN_PROCESO
+   (nada se confirmó). Una clave CONFIRMADA sin respuesta —falló o se
+   cayó el proceso después del commit— nunca se vuelve a ejecutar:
+   el reintento recibe 409 en vez de crear otro pedido o venta.
+
+Las claves vencen a las IDEMPOTENCIA_TTL_HORAS; una clave vencida se
+puede reutilizar y la tarea tasks/idempotencia.py borra las viejas.
+"""
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Optional, Type
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import and_, event, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import SessionLocal
+from app.models.clave_idempotencia import ClaveIdempotencia
+
+
+HEADER_REPETIDA = "Idempotent-Replayed"
+
+
+def huella_peticion(datos: Any) -> str:
+    """sha256 estable del cuerpo de la petición (modelo, dict o bytes)."""
+    if isinstance(datos, bytes):
+        return hashlib.sha256(datos).hexdigest()
+    if isinstance(datos, BaseModel):
+        datos = datos.model_dump(mode="json")
+    crudo = json.dumps(jsonable_encoder(datos), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(crudo.encode()).hexdigest()
+
+
+def _reclamar(
+    usuario_id: int,
+    ruta: str,
+    clave: str,
+    huella: str,
+    ahora: datetime,
+    en_proceso_hasta: datetime,
+) -> Optional[ClaveIdempotencia]:
+    """
+    Reclama la clave. Devuelve None si la petición es nueva (se debe
+    ejecutar) o la fila existente si ya se había usado.
+    """
+    t = ClaveIdempotencia.__table__
+    expira_en = ahora + timedelta(hours=settings.IDEMPOTENCIA_TTL_HORAS)
+
+    consulta = (
+        insert(t)
+        .values(
+            usuario_id=usuario_id,
+            ruta=ruta,
+            clave=clave,
+            huella=huella,
+            estado="EN_PROCESO",
+            en_proceso_hasta=en_proceso_hasta,
+            expira_en=expira_en,
+        )
+        # Una clave vencida se reutiliza como si fuera nueva; una EN_PROCESO
+        # con el plazo vencido, solo por la misma petición
+        .on_conflict_do_update(
+            constraint="uq_clave_idempotencia",
+            set_={
+                "huella": huella,
+                "estado": "EN_PROCESO",
+                "estado_http": None,
+                "respuesta": None,
+                "creado_en": func.now(),
+                "en_proceso_hasta": en_proceso_hasta,
+                "expira_en": expira_en,
+            },
+            where=or_(
+                t.c.expira_en < ahora,
+                and_(
+                    t.c.estado == "EN_PROCESO",
+                    t.c.en_proceso_hasta < ahora,
+                    t.c.huella == huella,
+                ),
+            ),
+        )
+        .returning(t.c.id)
+    )
+
+    db = SessionLocal()
+    try:
+        nueva = db.execute(consulta).first()
+        db.commit()
+        if nueva is not None:
+            return None
+        return db.execute(
+            select(ClaveIdempotencia).where(
+                ClaveIdempotencia.usuario_id == usuario_id,
+                ClaveIdempotencia.ruta == ruta,
+                ClaveIdempotencia.clave == clave,
+            )
+        ).scalar_one()
+    finally:
+        db.close()
+
+
+def _confirmar_al_commit(
+    db: Session, usuario_id: int, ruta: str, clave: str, en_proceso_hasta: datetime
+) -> Callable:
+    """
+    Registra en la sesión de negocio un before_commit que marca la clave
+    CONFIRMADA dentro de la misma transacción que la escritura. Si la
+    clave ya no es de esta petición, aborta el commit (409). Devuelve el
+    listener para quitarlo al terminar.
+    """
+    marcada = False
+
+    def _antes_del_commit(session: Session) -> None:
+        nonlocal marcada
+        if marcada:
+            return
+        resultado = session.execute(
+            update(ClaveIdempotencia)
+            .where(
+                ClaveIdempotencia.usuario_id == usuario_id,
+                ClaveIdempotencia.ruta == ruta,
+                ClaveIdempotencia.clave == clave,
+                ClaveIdempotencia.estado == "EN_PROCESO",
+                ClaveIdempotencia.en_proceso_hasta == en_proceso_hasta,
+            )
+            .values(estado="CONFIRMADA", en_proceso_hasta=None)
+        )
+        if resultado.rowcount == 0:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=(
+                    "La Idempotency-Key venció mientras se procesaba la petición. "
+                    "Revisa el historial antes de repetirla."
+                ),
+            )
+        marcada = True
+
+    event.listen(db, "before_commit", _antes_del_commit)
+    return _antes_del_commit
+
+
+def _completar(usuario_id: int, ruta: str, clave: str, estado_http: int, respuesta: Any) -> None:
+    db = SessionLocal()
+    try:
+        db.query(ClaveIdempotencia).filter(
+            ClaveIdempotencia.usuario_id == usuario_id,
+            ClaveIdempotencia.ruta == ruta,
+            ClaveIdempotencia.clave == clave,
+        ).update(
+            {"estado": "COMPLETADA", "estado_http": estado_http, "respuesta": respuesta},
+            synchronize_session=False,
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def _liberar(usuario_id: int, ruta: str, clave: str, en_proceso_hasta: datetime) -> None:
+    db = SessionLocal()
+    try:
+        db.query(ClaveIdempotencia).filter(
+            ClaveIdempotencia.usuario_id == usuario_id,
+            ClaveIdempotencia.ruta == ruta,
+            ClaveIdempotencia.clave == clave,
+            ClaveIdempotencia.estado == "EN_PROCESO",
+            ClaveIdempotencia.en_proceso_hasta == en_proceso_hasta,
+        ).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def ejecutar_idempotente(
+    clave: Optional[str],
+    *,
+    usuario_id: int,
+    ruta: str,
+    huella: Optional[str],
+    modelo: Type[BaseModel],
+    ejecutar: Callable[[], Any],
+    db: Session,
+) -> Any:
+    """
+    Ejecuta `ejecutar()` una sola vez por (usuario, ruta, clave).
+    Sin clave se ejecuta normal. La respuesta se guarda serializada con
+    `modelo` (el response_model del endpoint). `db` es la sesión en la
+    que `ejecutar()` confirma su trabajo.
+    """
+    if not clave:
+        return ejecutar()
+
+    ahora = datetime.now(timezone.utc)
+    en_proceso_hasta = ahora + timedelta(seconds=settings.IDEMPOTENCIA_EN_PROCESO_SEGUNDOS)
+
+    previa = _reclamar(usuario_id, ruta, clave, huella, ahora, en_proceso_hasta)
+    if previa is not None:
+        if previa.huella != huella:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="La Idempotency-Key ya se usó con otra petición.",
+            )
+        if previa.estado == "EN_PROCESO":
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Hay una petición en curso con esta Idempotency-Key.",
+            )
+        if previa.estado == "CONFIRMADA":
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=(
+                    "La operación de esta Idempotency-Key ya se registró, pero su "
+                    "respuesta no se guardó. Revisa el historial antes de repetirla."
+                ),
+            )
+        return JSONResponse(
+            content=previa.respuesta,
+            status_code=previa.estado_http,
+            headers={HEADER_REPETIDA: "true"},
+        )
+
+    listener = _confirmar_al_commit(db, usuario_id, ruta, clave, en_proceso_hasta)
+    try:
+        resultado = ejecutar()
+    except Exception:
+        # Lo no confirmado se descarta (y suelta el lock del marcador);
+        # solo se borra la clave EN_PROCESO de esta petición: si algo se
+        # confirmó, se conserva
+        db.rollback()
+        _liberar(usuario_id, ruta, clave, en_proceso_hasta)
+        raise
+    finally:
+        event.remove(db, "before_commit", listener)
+
+    respuesta = modelo.model_validate(resultado, from_attributes=True).model_dump(mode="json")
+    _completar(usuario_id, ruta, clave, status.HTTP_200_OK, respuesta)
+    return resultado
@@ -1,12 +1,16 @@
 # app/services/inventario.py
-from typing import Optional
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import Integer, column, func, insert, select, update, values
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 
+from app.core.cache import valores_cacheados
 from app.models.inventario import Inventario
 from app.models.movimiento_inventario import MovimientoInventario
 from app.models.variante import Variante
 from app.models.sucursal import Sucursal
+from app.services.producto_resumen import refrescar_resumen_por_variantes
+from app.services.reservas_stock import cantidad_disponible
 
 
 def obtener_o_crear_inventario(
@@ -111,6 +115,186 @@ def ajustar_inventario(
     )
     db.add(mov)
 
+    # Mantener el modelo de lectura del catálogo (tiene_stock)
+    refrescar_resumen_por_variantes(db, [variante_id])
+
     db.commit()
     db.refresh(inv)
     return inv
+
+
+# =========================
+# Stock total por variante (carrito)
+# =========================
+
+def sumar_stock_por_variante(db: Session, variante_ids: List[int]) -> Dict[int, int]:
+    """
+    variante_id → unidades en todas las sucursales, leído de la base (sin
+    caché). Es la cifra para topar cantidades al agregar o cambiar el
+    carrito; stock_total_por_variante es solo para mostrar.
+    """
+    filas = db.execute(
+        select(Inventario.variante_id, func.sum(Inventario.cantidad))
+        .where(Inventario.variante_id.in_(variante_ids))
+        .group_by(Inventario.variante_id)
+    ).all()
+    totales = {variante_id: 0 for variante_id in variante_ids}
+    totales.update({variante_id: int(total or 0) for variante_id, total in filas})
+    return totales
+
+
+def stock_total_por_variante(db: Session, variante_ids: Iterable[int]) -> Dict[int, int]:
+    """
+    variante_id → unidades en todas las sucursales, con UNA query agrupada
+    para las que no están en caché. Cada total queda en Redis con el tag
+    "variante:<id>": refrescar_resumen_por_variantes (que llaman todos los
+    caminos que mueven inventario) lo invalida al confirmar.
+    """
+    return valores_cacheados(
+        "stock_variante",
+        variante_ids,
+        lambda faltantes: sumar_stock_por_variante(db, faltantes),
+        tag=lambda variante_id: f"variante:{variante_id}",
+    )
+
+
+# =========================
+# Venta en caja: bloqueo y rebaja en bloque
+# =========================
+
+def bloquear_inventario_sucursal(
+    db: Session,
+    sucursal_id: int,
+    variante_ids: Iterable[int],
+) -> Dict[int, int]:
+    """
+    Bloquea (FOR UPDATE) en UNA sentencia las filas de inventario de
+    `variante_ids` en la sucursal y devuelve variante_id → disponible
+    (cantidad menos las reservas vigentes de pedidos en línea).
+
+    Las filas se bloquean siempre en orden de variante_id: dos cajas que
+    venden los mismos productos en distinto orden esperan en vez de
+    bloquearse mutuamente (deadlock).
+    """
+    filas = db.execute(
+        select(Inventario.variante_id, cantidad_disponible())
+        .where(
+            Inventario.sucursal_id == sucursal_id,
+            Inventario.variante_id.in_(sorted(set(variante_ids))),
+        )
+        .order_by(Inventario.variante_id, Inventario.id)
+        .with_for_update(of=Inventario)
+    ).all()
+    return {variante_id: int(cantidad) for variante_id, cantidad in filas}
+
+
+def descontar_inventario_sucursal(
+    db: Session,
+    sucursal_id: int,
+    cantidades: Dict[int, int],
+) -> None:
+    """
+    Rebaja en un solo UPDATE ... FROM (VALUES ...) las cantidades
+    (variante_id → unidades) del inventario de la sucursal.
+    Ninguna fila baja de lo reservado: si alguna no alcanza → 400.
+    """
+    if not cantidades:
+        return
+
+    pedido = values(
+        column("variante_id", Integer),
+        column("cantidad", Integer),
+        name="pedido",
+    ).data(sorted(cantidades.items()))
+
+    actualizadas = db.execute(
+        update(Inventario)
+        .where(
+            Inventario.sucursal_id == sucursal_id,
+            Inventario.variante_id == pedido.c.variante_id,
+            cantidad_disponible() >= pedido.c.cantidad,
+        )
+        .values(cantidad=Inventario.cantidad - pedido.c.cantidad)
+        .returning(Inventario.variante_id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+
+    faltantes = set(cantidades) - set(actualizadas)
+    if faltantes:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                "No hay stock suficiente al confirmar la venta "
+                f"(variantes {sorted(faltantes)})."
+            ),
+        )
+
+
+# =========================
+# Reintegro en bloque (cancelaciones)
+# =========================
+
+def reintegrar_inventario_sucursal(
+    db: Session,
+    sucursal_id: int,
+    cantidades: Dict[int, int],
+    *,
+    usuario_id: Optional[int],
+    source_type: str,
+    referencia: str,
+    observacion: str,
+) -> List[int]:
+    """
+    Suma en un solo UPDATE ... FROM (VALUES ...) las cantidades
+    (variante_id → unidades) al inventario de la sucursal y registra sus
+    movimientos ENTRADA en un solo INSERT. Si la fila de inventario ya no
+    existe se crea con lo reintegrado (tampoco se pierde stock).
+    Devuelve las variantes reintegradas; confirma el llamador.
+    """
+    if not cantidades:
+        return []
+
+    reintegro = values(
+        column("variante_id", Integer),
+        column("cantidad", Integer),
+        name="reintegro",
+    ).data(sorted(cantidades.items()))
+
+    actualizadas = db.execute(
+        update(Inventario)
+        .where(
+            Inventario.sucursal_id == sucursal_id,
+            Inventario.variante_id == reintegro.c.variante_id,
+        )
+        .values(cantidad=Inventario.cantidad + reintegro.c.cantidad)
+        .returning(Inventario.variante_id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+
+    faltantes = sorted(set(cantidades) - set(actualizadas))
+    if faltantes:
+        db.execute(
+            insert(Inventario),
+            [
+                {"sucursal_id": sucursal_id, "variante_id": v, "cantidad": cantidades[v], "min_stock": 0}
+                for v in faltantes
+            ],
+        )
+
+    db.execute(
+        insert(MovimientoInventario),
+        [
+            {
+                "variante_id": variante_id,
+                "sucursal_id": sucursal_id,
+                "cantidad": cantidad,
+                "tipo": "ENTRADA",
+                "source_type": source_type,
+                "referencia": referencia,
+                "observacion": observacion,
+                "usuario_id": usuario_id,
+            }
+            for variante_id, cantidad in sorted(cantidades.items())
+        ],
+    )
+    return sorted(cantidades)
@@ -0,0 +1,126 @@
+# app/services/outbox.py
+"""
+Outbox transaccional de eventos de dominio.
+
+- registrar_evento() agrega la fila a evento_outbox en la sesión del
+  llamador: se confirma (o se descarta) junto con el cambio de negocio.
+  Si el proceso muere después del commit, el evento sigue ahí.
+- Al confirmar una transacción con eventos se despierta al despachador
+  (tarea Celery despachar_outbox); si el broker no responde no pasa
+  nada, el barrido periódico de beat los recoge.
+- despachar_lote() toma eventos pendientes con FOR UPDATE SKIP LOCKED
+  (varios workers no se pisan), ejecuta sus manejadores
+  (outbox_manejadores.py) cada uno en un savepoint y los marca
+  PROCESADO; si fallan se reintentan con backoff y, al agotar
+  OUTBOX_MAX_INTENTOS, quedan FALLIDO.
+
+La entrega es al menos una vez: los manejadores deben ser idempotentes.
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.evento_outbox import EventoOutbox
+
+logger = logging.getLogger(__name__)
+
+
+PEDIDO_CREADO = "PEDIDO_CREADO"
+PEDIDO_ESTADO_CAMBIADO = "PEDIDO_ESTADO_CAMBIADO"
+VENTA_POS_COMPLETADA = "VENTA_POS_COMPLETADA"
+
+_HAY_EVENTOS = "outbox_hay_eventos"
+
+
+def registrar_evento(db: Session, tipo: str, payload: dict) -> EventoOutbox:
+    """Agrega el evento a la transacción actual (no hace commit)."""
+    evento = EventoOutbox(tipo=tipo, payload=jsonable_encoder(payload))
+    db.add(evento)
+    db.info[_HAY_EVENTOS] = True
+    return evento
+
+
+# =========================
+# Despertar al despachador
+# =========================
+
+def _despertar_despachador() -> None:
+    from app.tasks.outbox import despachar_outbox
+
+    try:
+        despachar_outbox.apply_async(retry=False)
+    except Exception as e:
+        logger.warning("No se pudo despertar al despachador del outbox: %s", e)
+
+
+@event.listens_for(Session, "after_commit")
+def _avisar_eventos_confirmados(session: Session) -> None:
+    if session.info.pop(_HAY_EVENTOS, False) and settings.OUTBOX_DESPERTAR_AL_CONFIRMAR:
+        _despertar_despachador()
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_aviso(session: Session) -> None:
+    session.info.pop(_HAY_EVENTOS, None)
+
+
+# =========================
+# Despacho
+# =========================
+
+def espera_reintento(intentos: int) -> timedelta:
+    """Backoff exponencial: base · 2^(n-1), con tope."""
+    segundos = min(
+        settings.OUTBOX_REINTENTO_BASE_SEGUNDOS * (2 ** (intentos - 1)),
+        settings.OUTBOX_REINTENTO_MAX_SEGUNDOS,
+    )
+    return timedelta(seconds=segundos)
+
+
+def despachar_lote(db: Session, limite: int = None) -> dict:
+    """
+    Procesa un lote de eventos pendientes y confirma. Devuelve cuántos
+    quedaron procesados, reintentando y fallidos.
+    """
+    from app.services.outbox_manejadores import MANEJADORES
+
+    ahora = datetime.now(timezone.utc)
+    eventos = db.execute(
+        select(EventoOutbox)
+        .where(EventoOutbox.estado == "PENDIENTE", EventoOutbox.disponible_en <= ahora)
+        .order_by(EventoOutbox.disponible_en, EventoOutbox.id)
+        .limit(limite or settings.OUTBOX_LOTE)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+
+    resultado = {"procesados": 0, "reintentando": 0, "fallidos": 0}
+    for evento in eventos:
+        try:
+            manejadores = MANEJADORES.get(evento.tipo)
+            if not manejadores:
+                raise LookupError(f"Sin manejador para el evento {evento.tipo}")
+            with db.begin_nested():
+                for manejador in manejadores:
+                    manejador(db, evento.payload)
+        except Exception as e:
+            logger.warning("Evento outbox %s (%s) falló: %s", evento.id, evento.tipo, e)
+            evento.intentos += 1
+            evento.ultimo_error = repr(e)[:2000]
+            if evento.intentos >= settings.OUTBOX_MAX_INTENTOS:
+                evento.estado = "FALLIDO"
+                resultado["fallidos"] += 1
+            else:
+                evento.disponible_en = ahora + espera_reintento(evento.intentos)
+                resultado["reintentando"] += 1
+            continue
+
+        evento.estado = "PROCESADO"
+        evento.procesado_en = datetime.now(timezone.utc)
+        resultado["procesados"] += 1
+
+    db.commit()
+    return resultado
@@ -0,0 +1,58 @@
+# app/services/outbox_manejadores.py
+"""
+Manejadores de los eventos del outbox (ver services/outbox.py).
+
+Se ejecutan fuera de la petición, en la sesión del despachador y dentro
+de un savepoint. Pueden correr más de una vez por evento: deben ser
+idempotentes (la comisión lo verifica; un correo repetido es aceptable).
+"""
+from typing import Callable, Dict, List
+
+from sqlalchemy.orm import Session
+
+from app.core.email import send_pedido_estado_email
+from app.models.pedido import Pedido
+from app.models.venta_pos import VentaPOS
+from app.services.comisiones_service import crear_comision_pos_si_aplica
+from app.services.outbox import PEDIDO_CREADO, PEDIDO_ESTADO_CAMBIADO, VENTA_POS_COMPLETADA
+
+
+def _correo_cliente(db: Session, pedido_id: int):
+    pedido = db.get(Pedido, pedido_id)
+    if pedido is None or pedido.cliente is None:
+        return None
+    return getattr(pedido.cliente, "correo", None)
+
+
+def correo_pedido_creado(db: Session, payload: dict) -> None:
+    """Correo SOLO del pedido principal, con el estado con que se creó."""
+    to_email = _correo_cliente(db, payload["pedido_principal_id"])
+    if to_email:
+        send_pedido_estado_email(
+            to_email=to_email,
+            pedido_id=payload["pedido_principal_id"],
+            nuevo_estado=payload["estado"],
+        )
+
+
+def correo_pedido_estado(db: Session, payload: dict) -> None:
+    to_email = _correo_cliente(db, payload["pedido_id"])
+    if to_email:
+        send_pedido_estado_email(
+            to_email=to_email,
+            pedido_id=payload["pedido_id"],
+            nuevo_estado=payload["nuevo_estado"],
+        )
+
+
+def comision_venta_pos(db: Session, payload: dict) -> None:
+    venta = db.get(VentaPOS, payload["venta_id"])
+    if venta is not None:
+        crear_comision_pos_si_aplica(db, venta)  # no duplica si ya existe
+
+
+MANEJADORES: Dict[str, List[Callable[[Session, dict], None]]] = {
+    PEDIDO_CREADO: [correo_pedido_creado],
+    PEDIDO_ESTADO_CAMBIADO: [correo_pedido_estado],
+    VENTA_POS_COMPLETADA: [comision_venta_pos],
+}
@@ -0,0 +1,186 @@
+# app/services/pedido_detalle.py
+"""
+Detalle de un pedido (GET /pedidos/{id}) en un número FIJO de queries,
+sin importar cuántos ítems, pagos o RMAs tenga:
+
+1. pedido + dirección + cliente (joinedload) + comprobante SINPE (outer join)
+2. RMAs del pedido (selectinload)
+3. pagos del pedido (selectinload)
+4. ítems con el nombre del producto y su primera imagen (subquery),
+   sin cargar la lista completa de media de cada producto
+
+verificar_queries_detalle_pedido.py fija ese número.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from app.models.media import Media
+from app.models.pedido import Pedido
+from app.models.pedido_item import PedidoItem
+from app.models.producto import Producto
+from app.models.rma import RMAEstado
+from app.models.sinpe import Sinpe
+from app.schemas.pedido import (
+    PedidoDetalleDireccionOut,
+    PedidoDetalleOut,
+    PedidoDetalleProductoOut,
+    PedidoDetalleRMAOut,
+    PedidoDetalleSinpeOut,
+)
+
+QUERIES_DETALLE = 4
+
+ESTADOS_RMA_ACTIVOS = {RMAEstado.SOLICITADO, RMAEstado.EN_REVISION, RMAEstado.APROBADO}
+
+
+def _valor(enum_o_texto) -> str:
+    return getattr(enum_o_texto, "value", enum_o_texto)
+
+
+def _productos(db: Session, pedido_id: int) -> list:
+    imagen_principal = (
+        select(Media.url)
+        .where(Media.producto_id == PedidoItem.producto_id)
+        .order_by(Media.orden.asc(), Media.id.asc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    filas = db.execute(
+        select(
+            PedidoItem.id,
+            PedidoItem.precio_unitario,
+            PedidoItem.cantidad,
+            PedidoItem.subtotal,
+            PedidoItem.impuesto,
+            Producto.nombre,
+            imagen_principal.label("imagen_url"),
+        )
+        .outerjoin(Producto, Producto.id == PedidoItem.producto_id)
+        .where(PedidoItem.pedido_id == pedido_id)
+        .order_by(PedidoItem.id)
+    ).all()
+    return [
+        PedidoDetalleProductoOut(
+            id=fila.id,
+            nombre=fila.nombre or "Producto eliminado",
+            imagen_url=fila.imagen_url or "",
+            precio_unitario=float(fila.precio_unitario),
+            cantidad=fila.cantidad,
+            subtotal=float(fila.subtotal),
+            impuesto=float(fila.impuesto or 0),
+        )
+        for fila in filas
+    ]
+
+
+def _direccion(pedido: Pedido) -> Optional[PedidoDetalleDireccionOut]:
+    direccion = pedido.direccion_envio
+    if direccion is None:
+        return None
+    if direccion.nombre:
+        nombre_envio = direccion.nombre
+    elif pedido.cliente and pedido.cliente.nombre:
+        nombre_envio = pedido.cliente.nombre
+    else:
+        nombre_envio = ""
+    return PedidoDetalleDireccionOut(
+        provincia=direccion.provincia,
+        canton=direccion.canton,
+        distrito=direccion.distrito,
+        detalle=direccion.detalle,
+        pais=direccion.pais or "Costa Rica",
+        codigo_postal=direccion.codigo_postal or "",
+        telefono=direccion.telefono or "",
+        nombre=nombre_envio,
+        referencia=direccion.referencia or "",
+    )
+
+
+def detalle_pedido(
+    db: Session, pedido_id: int, cliente_id: Optional[int] = None
+) -> Optional[PedidoDetalleOut]:
+    """
+    Detalle del pedido, o None si no existe (o no es del cliente cuando
+    se pasa `cliente_id`).
+    """
+    consulta = (
+        select(Pedido, Sinpe)
+        .outerjoin(Sinpe, Sinpe.pedido_id == Pedido.id)
+        .options(
+            joinedload(Pedido.direccion_envio),
+            joinedload(Pedido.cliente),
+            selectinload(Pedido.rmas),
+            selectinload(Pedido.pagos),
+        )
+        .where(Pedido.id == pedido_id)
+    )
+    if cliente_id is not None:
+        consulta = consulta.where(Pedido.cliente_id == cliente_id)
+
+    fila = db.execute(consulta).first()
+    if fila is None:
+        return None
+    pedido, sinpe = fila
+
+    # --- RMAs (todas; cualquiera activa bloquea una nueva solicitud) ---
+    solicitudes_rma = [
+        PedidoDetalleRMAOut(
+            id=rma.id,
+            tipo=_valor(rma.tipo),
+            estado=_valor(rma.estado),
+            motivo=rma.motivo,
+            respuesta_admin=rma.respuesta_admin,
+            fecha=rma.created_at,
+        )
+        for rma in pedido.rmas
+    ]
+    tiene_rma_activo = any(rma.estado in ESTADOS_RMA_ACTIVOS for rma in pedido.rmas)
+
+    productos = _productos(db, pedido.id)
+
+    # --- Cancelación (solo ciertos estados, dentro de 24 h) ---
+    puede_cancelar = False
+    fecha_limite = None
+    if pedido.estado in ["PENDIENTE", "CONFIRMADO"]:
+        fecha_limite = pedido.fecha_creacion + timedelta(hours=24)
+        puede_cancelar = datetime.now(timezone.utc) < fecha_limite
+
+    # --- Pago / método ---
+    pago = pedido.pagos[0] if pedido.pagos else None
+    pago_metodo = pago.metodo if pago else None
+
+    sinpe_out = None
+    if pago_metodo == "SINPE" and sinpe is not None:
+        sinpe_out = PedidoDetalleSinpeOut(
+            imagen_url=sinpe.imagen_url,
+            numero_destino=sinpe.numero_destino,
+            referencia=sinpe.referencia,
+            fecha_creacion=sinpe.fecha_creacion,
+        )
+
+    return PedidoDetalleOut(
+        id=pedido.id,
+        numero_pedido=pedido.numero_pedido,
+        fecha=pedido.fecha_creacion,
+        estado=pedido.estado,
+        subtotal=float(pedido.subtotal),
+        costo_envio=float(pedido.costo_envio or 0),
+        descuento_puntos=float(pedido.descuento_puntos or 0),
+        total=float(pedido.total),
+        puntos_ganados=pedido.puntos_ganados or 0,
+        metodo_envio=pedido.metodo_envio or "Envío Estándar",
+        direccion_envio=_direccion(pedido),
+        productos=productos,
+        impuesto_total=sum(p.impuesto for p in productos),
+        puede_cancelar=puede_cancelar,
+        fecha_limite_cancelacion=fecha_limite,
+        tiene_rma_activo=tiene_rma_activo,
+        solicitudes_rma=solicitudes_rma,
+        pago_metodo=pago_metodo,
+        pago_estado=pago.estado if pago else None,
+        pago_referencia=pago.referencia if pago else None,
+        sinpe=sinpe_out,
+    )
@@ -12,18 +12,38 @@ from app.models.pedido_item import PedidoItem
 from app.models.pago import Pago
 from app.models.direccion import Direccion
 from app.models.sucursal import Sucursal
-from app.models.inventario import Inventario
 from app.models.usuario import Usuario
 from app.services.programa_puntos_service import obtener_config_activa, calcular_limite_redencion
+from app.services.producto_resumen import refrescar_resumen_por_variantes
+from app.services.carrito_service import carrito_abierto
+from app.services.asignacion_stock import (
+    INTENTOS as INTENTOS_ASIGNACION,
+    asignar_pedido,
+    cargar_matriz_stock,
+    reservar_plan,
+)
+from app.services.reservas_stock import (
+    ACTIVA,
+    CONSUMIDA,
+    EXPIRADA,
+    crear_reservas,
+    liberar_reservas,
+    plan_de_reservas,
+    reservas_vigentes_carrito,
+    vencimiento_carrito,
+    vencimiento_sinpe,
+)
+from app.models.reserva_stock import ReservaStock
 
 from app.schemas.pedido import (
     PedidoCreateFromCart,
     PedidoItemResumen,
     PedidoRead,
     PedidoEstadoResponse,
+    ReservaCarritoOut,
 )
 
-from app.core.email import send_pedido_estado_email
+from app.services.outbox import PEDIDO_CREADO, PEDIDO_ESTADO_CAMBIADO, registrar_evento
 from collections import defaultdict
 
 ALLOWED_PEDIDO_ESTADOS = {
@@ -37,6 +57,9 @@ ALLOWED_PEDIDO_ESTADOS = {
 
 IVA_RATE = Decimal("0.13")
 
+# Al pasar de VERIFICAR_PAGO a uno de estos, el pago SINPE quedó verificado
+ESTADOS_PAGO_VERIFICADO = {"PAGADO", "EN_PREPARACION", "ENVIADO", "ENTREGADO"}
+
 def calcular_impuesto_incluido_en_precio(monto_con_iva: Decimal) -> Decimal:
     """
     Calcula cuánto del monto corresponde a impuesto,
@@ -64,6 +87,8 @@ def elegir_sucursal_para_pedido(
        - Entre esas, escoger la que tenga mayor stock total (como “score”).
     3. Si no hay sucursales en esa provincia:
        - Usar todas las sucursales activas como fallback con la misma lógica.
+
+    El stock de todas las candidatas se lee en una sola query (sin bloquear).
     """
 
     provincia_envio = getattr(direccion, "provincia", None)
@@ -93,34 +118,24 @@ def elegir_sucursal_para_pedido(
         print("[ASIGNACIÓN SUCURSAL] No hay sucursales activas.")
         return None
 
+    demanda: dict[int, int] = defaultdict(int)
+    for item in items_carrito:
+        demanda[item.variante_id] += item.cantidad
+
+    stock, _ = cargar_matriz_stock(db, demanda, [suc.id for suc in candidatos])
+
     mejor_sucursal: Sucursal | None = None
     mejor_score = -1
 
     for suc in candidatos:
-        puede_atender_todo = True
-        score_total_stock = 0
+        inventario = stock.get(suc.id, {})
 
-        for item in items_carrito:
-            inv = (
-                db.query(Inventario)
-                .filter(
-                    Inventario.sucursal_id == suc.id,
-                    Inventario.variante_id == item.variante_id,
-                )
-                .first()
-            )
-
-            # si no hay inventario o la cantidad es menor a lo que pide el carrito, esta sucursal no sirve
-            if not inv or inv.cantidad < item.cantidad:
-                puede_atender_todo = False
-                break
-
-            # sumamos stock disponible como "score"
-            score_total_stock += inv.cantidad
-
-        if not puede_atender_todo:
+        # si falta alguna variante o no alcanza, esta sucursal no sirve
+        if any(inventario.get(v, 0) < cantidad for v, cantidad in demanda.items()):
             continue
 
+        # sumamos stock disponible como "score"
+        score_total_stock = sum(inventario[v] for v in demanda)
         if score_total_stock > mejor_score:
             mejor_score = score_total_stock
             mejor_sucursal = suc
@@ -162,13 +177,11 @@ def asignar_items_a_sucursales(
 
     - Si la suma del stock en todas las sucursales no alcanza para algún item,
       lanza HTTP 400.
-    - Rebaja el inventario EN MEMORIA (en la sesión) con with_for_update(),
-      el commit se hace al final en crear_pedido_desde_carrito.
+    - El reparto se calcula sobre la matriz de stock (una query) y luego se
+      bloquean solo las filas usadas, en orden; el inventario se rebaja EN
+      MEMORIA (en la sesión), el commit se hace al final en
+      crear_pedido_desde_carrito.
     """
-
-    # sucursal_id -> lista de (item_carrito, cantidad_asignada)
-    asignacion: dict[int, list[tuple[CarritoItem, int]]] = defaultdict(list)
-
     if not sucursales:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -176,117 +189,88 @@ def asignar_items_a_sucursales(
         )
 
     # Opcional: ordenar sucursales por id o algún criterio
-    sucursales_ordenadas = sorted(sucursales, key=lambda s: s.id)
+    sucursales_ordenadas = sorted(suc.id for suc in sucursales)
+    variante_ids = {item.variante_id for item in items_carrito}
 
-    for item in items_carrito:
-        cantidad_restante = item.cantidad
-
-        for suc in sucursales_ordenadas:
-            # Bloqueamos fila de inventario para evitar sobreventa en concurrencia
-            inv = (
-                db.query(Inventario)
-                .with_for_update()
-                .filter(
-                    Inventario.sucursal_id == suc.id,
-                    Inventario.variante_id == item.variante_id,
-                )
-                .first()
-            )
+    for _ in range(INTENTOS_ASIGNACION):
+        stock, _ = cargar_matriz_stock(db, variante_ids, sucursales_ordenadas)
 
-            if not inv or inv.cantidad <= 0:
-                continue
+        # sucursal_id -> lista de (item_carrito, cantidad_asignada)
+        asignacion: dict[int, list[tuple[CarritoItem, int]]] = defaultdict(list)
+        plan: dict[tuple[int, int], int] = defaultdict(int)
 
-            # Tomamos lo que podamos hasta cubrir la cantidad del item
-            tomar = min(inv.cantidad, cantidad_restante)
-            if tomar <= 0:
-                continue
+        for item in items_carrito:
+            cantidad_restante = item.cantidad
 
-            # Asignamos esa parte a esta sucursal
-            asignacion[suc.id].append((item, tomar))
+            for suc_id in sucursales_ordenadas:
+                disponible = stock.get(suc_id, {}).get(item.variante_id, 0) - plan.get((suc_id, item.variante_id), 0)
 
-            # Rebajamos inventario EN esa sucursal
-            inv.cantidad -= tomar
+                # Tomamos lo que podamos hasta cubrir la cantidad del item
+                tomar = min(disponible, cantidad_restante)
+                if tomar <= 0:
+                    continue
 
-            cantidad_restante -= tomar
-            if cantidad_restante == 0:
-                break
+                asignacion[suc_id].append((item, tomar))
+                plan[(suc_id, item.variante_id)] += tomar
 
-        if cantidad_restante > 0:
-            # No hay stock total suficiente sumando todas las sucursales
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="No hay stock suficiente para uno de los productos del carrito.",
-            )
+                cantidad_restante -= tomar
+                if cantidad_restante == 0:
+                    break
+
+            if cantidad_restante > 0:
+                # No hay stock total suficiente sumando todas las sucursales
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="No hay stock suficiente para uno de los productos del carrito.",
+                )
+
+        if reservar_plan(db, plan):
+            return asignacion
 
-    return asignacion
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="El stock cambió mientras se procesaba el pedido. Intenta de nuevo.",
+    )
 
 
 def asignar_items_a_sucursales_sin_partir(
     db,
     sucursales,
     items_carrito,
+    provincia: str | None = None,
+    descontar: bool = True,
 ) -> dict[int, list[tuple]]:
     """
     Asigna CADA item del carrito completo a UNA sucursal.
     - No divide cantidades.
+    - Minimiza el número de envíos (sucursales) y, a igualdad, prefiere las
+      de la provincia de envío (ver services/asignacion_stock.py).
     - Si ninguna sucursal tiene stock suficiente para un item, lanza 400.
-    - Rebaja inventario en la sesión (con with_for_update).
+    - Rebaja inventario en la sesión (bloquea solo las filas elegidas);
+      con descontar=False solo las bloquea, para reservarlas.
     """
-    asignacion = defaultdict(list)
-
     if not sucursales:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="No hay sucursales disponibles para atender el pedido.",
         )
 
-    # Puedes ordenar por prioridad (ej: misma provincia primero ya viene así)
-    sucursales_ordenadas = sorted(sucursales, key=lambda s: s.id)
-
-    for item in items_carrito:
-        asignado = False
-
-        for suc in sucursales_ordenadas:
-            inv = (
-                db.query(Inventario)
-                .with_for_update()
-                .filter(
-                    Inventario.sucursal_id == suc.id,
-                    Inventario.variante_id == item.variante_id,
-                )
-                .first()
-            )
-
-            # Importante: aquí exigimos que una sola sucursal cubra todo el item
-            if inv and inv.cantidad >= item.cantidad:
-                asignacion[suc.id].append((item, item.cantidad))
-                inv.cantidad -= item.cantidad
-                asignado = True
-                break
-
-        if not asignado:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"No hay stock suficiente para la variante {item.variante_id}.",
-            )
+    return asignar_pedido(
+        db,
+        items_carrito,
+        provincia=provincia,
+        sucursal_ids=[suc.id for suc in sucursales],
+        descontar=descontar,
+    )
 
-    return asignacion
 
+# =========================
+# Reservas de stock del checkout
+# =========================
 
-def crear_pedido_desde_carrito(
-    db: Session,
-    usuario_id: int,
-    data: PedidoCreateFromCart,
-) -> PedidoRead:
-    # 1) Obtener carrito abierto del usuario
-    carrito = (
-        db.query(Carrito)
-        .options(joinedload(Carrito.items).joinedload(CarritoItem.variante))
-        .filter(
-            Carrito.usuario_id == usuario_id,
-            Carrito.estado == "ABIERTO",
-        )
-        .first()
+def _carrito_abierto(db: Session, usuario_id: int) -> Carrito:
+    carrito = carrito_abierto(
+        db, usuario_id, joinedload(Carrito.items).joinedload(CarritoItem.variante)
     )
 
     if not carrito or not carrito.items:
@@ -294,12 +278,14 @@ def crear_pedido_desde_carrito(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Tu carrito está vacío.",
         )
+    return carrito
 
-    # 2) Verificar dirección pertenece al usuario y está activa
+
+def _direccion_del_usuario(db: Session, usuario_id: int, direccion_id: int) -> Direccion:
     direccion = (
         db.query(Direccion)
         .filter(
-            Direccion.id == data.direccion_envio_id,
+            Direccion.id == direccion_id,
             Direccion.usuario_id == usuario_id,
             Direccion.activa.is_(True),
         )
@@ -310,17 +296,183 @@ def crear_pedido_desde_carrito(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="La dirección seleccionada no es válida.",
         )
+    return direccion
+
+
+def _plan_de_asignacion(asignacion: dict) -> dict[tuple[int, int], int]:
+    plan: dict[tuple[int, int], int] = defaultdict(int)
+    for suc_id, items_asignados in asignacion.items():
+        for item, cantidad in items_asignados:
+            plan[(suc_id, item.variante_id)] += cantidad
+    return dict(plan)
+
+
+def reservar_stock_carrito(
+    db: Session,
+    usuario_id: int,
+    direccion_envio_id: int,
+) -> ReservaCarritoOut:
+    """
+    Inicio del checkout: asigna el carrito a sucursales (como el pedido) y
+    reserva esas unidades por RESERVA_CARRITO_MINUTOS, reemplazando las
+    reservas anteriores del carrito. Las filas de inventario quedan
+    bloqueadas solo durante esta transacción corta.
+    """
+    carrito = _carrito_abierto(db, usuario_id)
+    direccion = _direccion_del_usuario(db, usuario_id, direccion_envio_id)
+
+    liberar_reservas(db, carrito_id=carrito.id)
+    asignacion = asignar_items_a_sucursales_sin_partir(
+        db,
+        obtener_sucursales_candidatas(db, direccion),
+        carrito.items,
+        provincia=direccion.provincia,
+        descontar=False,
+    )
+    expira_en = vencimiento_carrito()
+    reservas = crear_reservas(
+        db, _plan_de_asignacion(asignacion), expira_en=expira_en, carrito_id=carrito.id
+    )
+    db.commit()
+
+    return ReservaCarritoOut(
+        expira_en=expira_en,
+        items=[
+            {"variante_id": r.variante_id, "sucursal_id": r.sucursal_id, "cantidad": r.cantidad}
+            for r in reservas
+        ],
+    )
+
+
+def _stock_para_pedido(
+    db: Session,
+    carrito: Carrito,
+    sucursales: list[Sucursal],
+    provincia: str | None,
+    descontar: bool,
+) -> tuple[dict[int, list[tuple]], list[ReservaStock]]:
+    """
+    Asignación del pedido y sus reservas.
+
+    - Si las reservas vigentes del carrito cubren exactamente el carrito,
+      se usa esa asignación: con descontar=True se consumen (se descuenta
+      el inventario); si no, pasan al pedido SINPE sin bloquear inventario.
+    - Si no (no hubo inicio de checkout, vencieron o cambió el carrito) se
+      asigna ahora y, sin descontar, se reserva.
+    """
+    demanda: dict[int, int] = defaultdict(int)
+    for item in carrito.items:
+        demanda[item.variante_id] += item.cantidad
+
+    reservas = reservas_vigentes_carrito(db, carrito.id)
+    destino = {r.variante_id: r.sucursal_id for r in reservas}
+    reservado: dict[int, int] = defaultdict(int)
+    for r in reservas:
+        reservado[r.variante_id] += r.cantidad
+
+    if reservas and dict(reservado) == dict(demanda) and len(destino) == len(reservas):
+        if descontar:
+            for r in reservas:
+                r.estado = CONSUMIDA
+            db.flush()  # ya no cuentan como reservadas al revalidar
+            if not reservar_plan(db, plan_de_reservas(reservas)):
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="El stock cambió mientras se procesaba el pedido. Intenta de nuevo.",
+                )
+
+        asignacion: dict[int, list[tuple]] = defaultdict(list)
+        for item in carrito.items:
+            asignacion[destino[item.variante_id]].append((item, item.cantidad))
+        return dict(sorted(asignacion.items(), key=lambda par: (-len(par[1]), par[0]))), reservas
+
+    if reservas:
+        liberar_reservas(db, carrito_id=carrito.id)
+
+    asignacion = asignar_items_a_sucursales_sin_partir(
+        db, sucursales, carrito.items, provincia=provincia, descontar=descontar
+    )
+    if descontar:
+        return asignacion, []
+    return asignacion, crear_reservas(
+        db, _plan_de_asignacion(asignacion), expira_en=vencimiento_sinpe(), carrito_id=carrito.id
+    )
+
+
+def confirmar_reservas_pedido(db: Session, pedido: Pedido) -> None:
+    """
+    Pago SINPE verificado: descuenta el inventario de las reservas del
+    pedido y las marca CONSUMIDA. Si ya vencieron, se intenta tomar el
+    stock de nuevo (409 si ya no alcanza). Un pedido con
+    stock_descontado (anterior a las reservas o ya confirmado) no se toca.
+    """
+    if pedido.stock_descontado:
+        return
+
+    reservas = (
+        db.query(ReservaStock)
+        .filter(
+            ReservaStock.pedido_id == pedido.id,
+            ReservaStock.estado.in_([ACTIVA, EXPIRADA]),
+        )
+        .with_for_update()
+        .all()
+    )
+    if not reservas:
+        # Liberadas (pedido cancelado) o inexistentes: no hay de dónde
+        # descontar, así que no se puede dar por pagado
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=(
+                "Este pedido no tiene stock reservado que confirmar. "
+                "Crea un pedido nuevo."
+            ),
+        )
+
+    for r in reservas:
+        r.estado = CONSUMIDA
+    db.flush()  # ya no cuentan como reservadas al revalidar
+
+    if not reservar_plan(db, plan_de_reservas(reservas)):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=(
+                "La reserva de stock de este pedido venció y ya no hay stock "
+                "suficiente para confirmarlo."
+            ),
+        )
+    pedido.stock_descontado = True
+    refrescar_resumen_por_variantes(db, [r.variante_id for r in reservas])
+
+
+def crear_pedido_desde_carrito(
+    db: Session,
+    usuario_id: int,
+    data: PedidoCreateFromCart,
+) -> PedidoRead:
+    # 1) Obtener carrito abierto del usuario
+    carrito = _carrito_abierto(db, usuario_id)
+
+    # 2) Verificar dirección pertenece al usuario y está activa
+    direccion = _direccion_del_usuario(db, usuario_id, data.direccion_envio_id)
 
     # 3) Calcular subtotal total (carrito completo) solo para puntos/envío
     subtotal_total = Decimal("0")
     for item in carrito.items:
         subtotal_total += item.precio_unitario * item.cantidad
 
-    # 4) Obtener sucursales candidatas (misma provincia primero, si no hay entonces todas)
+    # 4) Obtener sucursales candidatas (todas las activas)
     sucursales = obtener_sucursales_candidatas(db, direccion)
 
-    # 5) Asignar cada item completo a una sucursal con stock (sin partir cantidades)
-    asignacion = asignar_items_a_sucursales_sin_partir(db, sucursales, carrito.items)
+    # 5) Asignar cada item completo a una sucursal con stock (sin partir cantidades),
+    #    con el mínimo de envíos y prefiriendo la provincia de la dirección.
+    #    Se usan las reservas del inicio del checkout si siguen vigentes; un
+    #    pedido SINPE no descuenta inventario: lo deja reservado hasta que se
+    #    verifique el pago.
+    es_sinpe = data.metodo_pago == "SINPE"
+    asignacion, reservas = _stock_para_pedido(
+        db, carrito, sucursales, direccion.provincia, descontar=not es_sinpe
+    )
 
 
     # asignacion: sucursal_id -> [(item_carrito, cantidad_asignada), ...]
@@ -438,12 +590,20 @@ def crear_pedido_desde_carrito(
             total=total_pedido,
             puntos_ganados=puntos_ganados_pedido,
             estado=estado,
+            stock_descontado=not es_sinpe,
             metodo_envio=metodo_envio,
             numero_pedido=f"ORD-{usuario_id}-{timestamp}-{suc_id}",
         )
         db.add(pedido)
         db.flush()  # obtener id
 
+        # Las reservas de esta sucursal pasan a ser del pedido
+        for reserva in reservas:
+            if reserva.sucursal_id == suc_id:
+                reserva.pedido_id = pedido.id
+                if es_sinpe:
+                    reserva.expira_en = vencimiento_sinpe()
+
                 # Crear PedidoItems para esta sucursal
         for item, cantidad_asignada in items_asignados:
             subtotal_item = item.precio_unitario * cantidad_asignada
@@ -492,34 +652,32 @@ def crear_pedido_desde_carrito(
     # 8) Marcar carrito como cerrado
     carrito.estado = "COMPLETADO"
 
-    # 9) Commit de todo (pedidos, inventario, pagos)
+    # Stock rebajado → refrescar resumen de catálogo (tiene_stock)
+    if not es_sinpe:
+        refrescar_resumen_por_variantes(db, [item.variante_id for item in carrito.items])
+
+    # 9) Evento para el correo del pedido principal (lo envía el despachador
+    #    del outbox; se confirma junto con el pedido)
+    registrar_evento(
+        db,
+        PEDIDO_CREADO,
+        {
+            "pedido_principal_id": pedidos_creados[0].id,
+            "pedido_ids": [pedido.id for pedido in pedidos_creados],
+            "estado": pedidos_creados[0].estado,
+        },
+    )
+
+    # 10) Commit de todo (pedidos, inventario, pagos, evento)
     db.commit()
 
-    # 10) Refrescar principal (primer pedido) y su pago
+    # 11) Refrescar principal (primer pedido) y su pago
     pedido_principal = pedidos_creados[0]
     pago_principal = pagos_creados[0]
 
     db.refresh(pedido_principal)
     db.refresh(pago_principal)
 
-    # 11) Enviar correo SOLO del pedido principal (o podrías enviar por cada uno)
-    try:
-        cliente = pedido_principal.cliente
-        to_email = getattr(cliente, "correo", None) or getattr(cliente, "email", None)
-
-        if to_email:
-            send_pedido_estado_email(
-                to_email=to_email,
-                pedido_id=pedido_principal.id,
-                nuevo_estado=pedido_principal.estado,
-            )
-        else:
-            print(
-                f"[WARN] Pedido {pedido_principal.id}: no se pudo obtener correo del cliente para enviar notificación."
-            )
-    except Exception as e:
-        print(f"Error enviando correo de pedido {pedido_principal.id}: {e}")
-
     # 12) Construir respuesta con el pedido principal (los demás quedan en BD)
     return PedidoRead(
         id=pedido_principal.id,
@@ -581,22 +739,37 @@ def actualizar_estado_pedido(
     if estado_anterior == nuevo_estado:
         return PedidoEstadoResponse.model_validate(pedido)
 
-    # 3) Actualizar estado
+    # 3) Reservas de un pedido SINPE: al verificar el pago se descuenta el
+    #    inventario; al cancelarlo se libera lo reservado. Un pedido
+    #    cancelado que ya soltó su stock no se reabre
+    if nuevo_estado == "CANCELADO":
+        liberar_reservas(db, pedido_id=pedido.id)
+    elif estado_anterior == "CANCELADO" and not pedido.stock_descontado:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=(
+                "El pedido cancelado ya liberó su stock y no se puede reabrir. "
+                "Crea un pedido nuevo."
+            ),
+        )
+    elif nuevo_estado in ESTADOS_PAGO_VERIFICADO:
+        confirmar_reservas_pedido(db, pedido)
+
+    # 4) Actualizar estado + evento para el correo al cliente (outbox,
+    #    misma transacción)
     pedido.estado = nuevo_estado
+    registrar_evento(
+        db,
+        PEDIDO_ESTADO_CAMBIADO,
+        {
+            "pedido_id": pedido.id,
+            "estado_anterior": estado_anterior,
+            "nuevo_estado": nuevo_estado,
+        },
+    )
 
     db.commit()
     db.refresh(pedido)
 
-    # 4) Enviar correo al cliente (si existe correo)
-    if pedido.cliente and getattr(pedido.cliente, "correo", None):
-        try:
-            send_pedido_estado_email(
-                to_email=pedido.cliente.correo,
-                pedido_id=pedido.id,
-                nuevo_estado=nuevo_estado,
-            )
-        except Exception as e:
-            print(f"[PEDIDO] Error enviando correo de estado: {e}")
-
     return PedidoEstadoResponse.model_validate(pedido)
 
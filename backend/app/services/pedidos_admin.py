@@ -0,0 +1,104 @@
+# app/services/pedidos_admin.py
+"""
+Listado de pedidos del panel admin con paginación keyset y conteos.
+
+- Página: WHERE (fecha_creacion, id) < cursor ORDER BY fecha_creacion
+  DESC, id DESC LIMIT n+1, con el nombre de la sucursal en la misma
+  query (índices ix_pedido_*_keyset según el filtro).
+- Conteos por estado del conjunto filtrado SIN el filtro de estado (las
+  pestañas del tablero muestran todos los estados) en una sola query
+  agrupada.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import exists, func, select, tuple_
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.core.paginacion import codificar_cursor, decodificar_cursor
+from app.models.pago import Pago
+from app.models.pedido import Pedido
+from app.models.sucursal import Sucursal
+
+
+def condiciones_pedidos_admin(
+    *,
+    sucursal_id: Optional[int] = None,
+    cliente_id: Optional[int] = None,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    metodo_pago: Optional[str] = None,
+    numero: Optional[str] = None,
+) -> list:
+    """
+    Condiciones WHERE sobre pedido para los filtros del listado, salvo el
+    estado (se agrega aparte para que los conteos no lo apliquen).
+    """
+    condiciones = []
+    if sucursal_id is not None:
+        condiciones.append(Pedido.sucursal_id == sucursal_id)
+    if cliente_id is not None:
+        condiciones.append(Pedido.cliente_id == cliente_id)
+    if desde is not None:
+        condiciones.append(Pedido.fecha_creacion >= desde)
+    if hasta is not None:
+        condiciones.append(Pedido.fecha_creacion < hasta)
+    if metodo_pago:
+        condiciones.append(
+            exists().where(Pago.pedido_id == Pedido.id, Pago.metodo == metodo_pago)
+        )
+    numero = (numero or "").strip().upper()
+    if numero:
+        # Prefijo: usa ix_pedido_numero_prefijo (varchar_pattern_ops)
+        condiciones.append(Pedido.numero_pedido.startswith(numero, autoescape=True))
+    return condiciones
+
+
+def pagina_pedidos_admin(
+    db: Session,
+    condiciones: list,
+    cursor: Optional[str],
+    limite: int,
+) -> Tuple[List[Row], Optional[str]]:
+    """(filas de la página, next_cursor) del más reciente al más antiguo."""
+    consulta = (
+        select(
+            Pedido.id,
+            Pedido.total,
+            Pedido.estado,
+            Pedido.fecha_creacion,
+            Pedido.sucursal_id,
+            Sucursal.nombre.label("sucursal_nombre"),
+            Pedido.cancelado,
+            Pedido.numero_pedido,
+        )
+        .outerjoin(Sucursal, Sucursal.id == Pedido.sucursal_id)
+        .where(*condiciones)
+        .order_by(Pedido.fecha_creacion.desc(), Pedido.id.desc())
+        .limit(limite + 1)
+    )
+    if cursor:
+        fecha, pedido_id = decodificar_cursor(cursor)
+        consulta = consulta.where(
+            tuple_(Pedido.fecha_creacion, Pedido.id) < tuple_(fecha, pedido_id)
+        )
+
+    filas = db.execute(consulta).all()
+    next_cursor = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        ultima = filas[-1]
+        next_cursor = codificar_cursor(ultima.fecha_creacion, ultima.id)
+    return filas, next_cursor
+
+
+def conteos_por_estado(db: Session, condiciones: list) -> Dict[str, object]:
+    """{"total": n, "por_estado": {estado: n}} en una sola query agrupada."""
+    filas = db.execute(
+        select(Pedido.estado, func.count())
+        .where(*condiciones)
+        .group_by(Pedido.estado)
+    ).all()
+    por_estado = {estado: cantidad for estado, cantidad in sorted(filas)}
+    return {"total": sum(por_estado.values()), "por_estado": por_estado}
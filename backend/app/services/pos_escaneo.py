@@ -0,0 +1,162 @@
+# app/services/pos_escaneo.py
+"""
+Escaneo en caja: código de barras o SKU exacto → variante, precio,
+stock de la sucursal e imagen, en UNA query por los índices únicos de
+variante.barcode / variante.sku (la imagen sale de producto_resumen).
+
+Índice en memoria opcional (settings.POS_INDICE_ESCANEO_ACTIVO): cada
+worker guarda por sucursal un dict código → fila. Se descarta cuando
+cambia la versión del tag "catalogo" (ediciones de producto, variante o
+precio) o pasados POS_INDICE_ESCANEO_MAX_SEGUNDOS. Las ventas no lo
+descartan: el stock del índice es informativo y puede tener hasta ese
+atraso (la venta bloquea y valida el inventario real). Mientras una
+sucursal no tiene índice se responde con la query y el índice se arma
+en segundo plano.
+"""
+import threading
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import and_, case, func, or_, select
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.core.cache import version_tag
+from app.core.config import settings
+from app.core.logging_config import get_logger
+from app.db import SessionLocal
+from app.models.inventario import Inventario
+from app.models.producto import Producto
+from app.models.producto_resumen import ProductoResumen
+from app.models.variante import Variante
+
+logger = get_logger(__name__)
+
+
+def _consulta_escaneo(sucursal_id: int):
+    """Variantes activas con su stock en la sucursal (0 si no hay inventario)."""
+    return (
+        select(
+            Variante.id.label("variante_id"),
+            Variante.producto_id,
+            Producto.nombre,
+            Variante.precio_actual.label("precio"),
+            Variante.sku,
+            Variante.barcode,
+            func.coalesce(Inventario.cantidad, 0).label("stock"),
+            ProductoResumen.imagen_principal.label("imagen_url"),
+            Variante.color,
+            Variante.talla,
+        )
+        .join(Producto, Producto.id == Variante.producto_id)
+        .outerjoin(
+            Inventario,
+            and_(
+                Inventario.variante_id == Variante.id,
+                Inventario.sucursal_id == sucursal_id,
+            ),
+        )
+        .outerjoin(ProductoResumen, ProductoResumen.producto_id == Producto.id)
+        .where(Variante.activo.is_(True), Producto.activo.is_(True))
+    )
+
+
+def buscar_por_codigo(db: Session, sucursal_id: int, codigo: str) -> Optional[Row]:
+    """Código de barras o SKU exacto (el código de barras tiene prioridad)."""
+    return db.execute(
+        _consulta_escaneo(sucursal_id)
+        .where(or_(Variante.barcode == codigo, Variante.sku == codigo))
+        .order_by(case((Variante.barcode == codigo, 0), else_=1))
+        .limit(1)
+    ).first()
+
+
+# =========================
+# Índice en memoria por sucursal
+# =========================
+
+class IndiceEscaneo:
+    """código (SKU y código de barras) → fila de _consulta_escaneo."""
+
+    def __init__(self, db: Session, sucursal_id: int) -> None:
+        self.sucursal_id = sucursal_id
+        self.creado = time.monotonic()
+        self.por_codigo: Dict[str, Row] = {}
+
+        filas = db.execute(_consulta_escaneo(sucursal_id)).all()
+        for fila in filas:
+            self.por_codigo.setdefault(fila.sku, fila)
+        # El código de barras gana si coincide con el SKU de otra variante
+        for fila in filas:
+            if fila.barcode:
+                self.por_codigo[fila.barcode] = fila
+
+    def get(self, codigo: str) -> Optional[Row]:
+        return self.por_codigo.get(codigo)
+
+
+_indices: Dict[int, IndiceEscaneo] = {}
+_construyendo: set = set()
+_lock = threading.Lock()
+_version: Optional[int] = None
+_verificado_en = 0.0
+
+
+def _descartar_si_cambio() -> None:
+    """Descarta todos los índices si cambió la versión del catálogo."""
+    global _version, _verificado_en
+    ahora = time.monotonic()
+    if ahora - _verificado_en < settings.CATALOGO_SNAPSHOT_VERIFICAR_SEGUNDOS:
+        return
+    _verificado_en = ahora
+
+    version = version_tag("catalogo")
+    if version is not None and version != _version:
+        _version = version
+        _indices.clear()
+
+
+def _construir_en_segundo_plano(sucursal_id: int) -> None:
+    with _lock:
+        if sucursal_id in _construyendo:
+            return
+        _construyendo.add(sucursal_id)
+
+    def _tarea():
+        # La versión se fija ANTES de leer: un cambio posterior la invalida
+        version = _version
+        db = SessionLocal()
+        try:
+            indice = IndiceEscaneo(db, sucursal_id)
+            if version == _version:
+                _indices[sucursal_id] = indice
+                logger.info(
+                    f"🔎 Índice de escaneo sucursal {sucursal_id}: "
+                    f"{len(indice.por_codigo)} códigos"
+                )
+        except Exception as e:
+            logger.error(f"❌ Error armando índice de escaneo ({sucursal_id}): {e}")
+        finally:
+            db.close()
+            with _lock:
+                _construyendo.discard(sucursal_id)
+
+    threading.Thread(target=_tarea, name=f"pos-escaneo-{sucursal_id}", daemon=True).start()
+
+
+def escanear_codigo(db: Session, sucursal_id: int, codigo: str) -> Optional[Row]:
+    """Resuelve un código escaneado en la sucursal (índice en memoria o query)."""
+    codigo = codigo.strip()
+    if not codigo:
+        return None
+
+    if settings.POS_INDICE_ESCANEO_ACTIVO:
+        _descartar_si_cambio()
+        indice = _indices.get(sucursal_id)
+        if indice is not None and (
+            time.monotonic() - indice.creado < settings.POS_INDICE_ESCANEO_MAX_SEGUNDOS
+        ):
+            return indice.get(codigo)
+        _construir_en_segundo_plano(sucursal_id)
+
+    return buscar_por_codigo(db, sucursal_id, codigo)
@@ -6,6 +6,7 @@ from fastapi import HTTPException, status
 
 from app.models.variante import Variante
 from app.models.historial_precio import HistorialPrecio
+from app.services.producto_resumen import refrescar_resumen_productos
 
 
 def cambiar_precio_variante(
@@ -63,6 +64,9 @@ def cambiar_precio_variante(
     # Actualizar precio actual en la variante
     variante.precio_actual = nuevo_precio
 
+    # Mantener el modelo de lectura del catálogo (precio mínimo)
+    refrescar_resumen_productos(db, [variante.producto_id])
+
     db.commit()
     db.refresh(variante)
     return variante
@@ -0,0 +1,314 @@
+# app/services/producto_resumen.py
+from typing import Iterable, List, Optional
+
+from sqlalchemy import select, func, distinct, text, and_
+from sqlalchemy.dialects.postgresql import insert, aggregate_order_by
+from sqlalchemy.orm import Session
+
+from app.models.categoria import Categoria
+from app.models.inventario import Inventario
+from app.models.media import Media
+from app.models.producto import Producto
+from app.models.producto_categoria import ProductoCategoria
+from app.models.producto_resumen import ProductoResumen
+from app.models.variante import Variante
+from app.services.busqueda_service import documento_busqueda, texto_trigramas
+from app.core.cache import invalidar_al_confirmar
+
+
+# Columnas que se calculan (todas menos actualizado_at)
+COLUMNAS_RESUMEN = [
+    "producto_id",
+    "nombre",
+    "activo",
+    "created_at",
+    "precio_minimo",
+    "tiene_stock",
+    "imagen_principal",
+    "imagenes",
+    "marca",
+    "marcas",
+    "colores",
+    "tallas",
+    "skus",
+    "categoria_ids",
+    "categorias",
+    "categoria_slugs",
+    "search_vector",
+    "texto_busqueda",
+]
+
+_ARRAY_VACIO = text("'{}'")
+
+
+def _array_ordenado(columna, condicion):
+    """array_agg(DISTINCT col ORDER BY col) FILTER (WHERE condicion)."""
+    return func.array_agg(
+        aggregate_order_by(distinct(columna), columna)
+    ).filter(condicion)
+
+
+def _select_resumen(producto_ids: Optional[List[int]] = None):
+    """
+    SELECT que calcula el resumen de catálogo por producto.
+    Si `producto_ids` es None calcula TODOS los productos.
+    """
+    activa = Variante.activo.is_(True)
+
+    variantes = (
+        select(
+            Variante.producto_id.label("producto_id"),
+            func.min(Variante.precio_actual).filter(activa).label("precio_minimo"),
+            _array_ordenado(
+                Variante.marca, and_(activa, Variante.marca.isnot(None))
+            ).label("marcas"),
+            _array_ordenado(
+                Variante.color, and_(activa, Variante.color.isnot(None))
+            ).label("colores"),
+            _array_ordenado(
+                Variante.talla, and_(activa, Variante.talla.isnot(None))
+            ).label("tallas"),
+            func.array_agg(aggregate_order_by(Variante.sku, Variante.sku)).label("skus"),
+        )
+        .group_by(Variante.producto_id)
+        .subquery("v")
+    )
+
+    # Marca de la variante activa más barata
+    marca = (
+        select(Variante.producto_id.label("producto_id"), Variante.marca.label("marca"))
+        .where(activa, Variante.marca.isnot(None))
+        .order_by(Variante.producto_id, Variante.precio_actual.asc(), Variante.id.asc())
+        .distinct(Variante.producto_id)
+        .subquery("m")
+    )
+
+    stock = (
+        select(distinct(Variante.producto_id).label("producto_id"))
+        .join(Inventario, Inventario.variante_id == Variante.id)
+        .where(activa, Inventario.cantidad > 0)
+        .subquery("s")
+    )
+
+    imagenes = (
+        select(
+            Media.producto_id.label("producto_id"),
+            func.array_agg(
+                aggregate_order_by(Media.url, Media.orden.asc(), Media.id.asc())
+            ).label("imagenes"),
+        )
+        .group_by(Media.producto_id)
+        .subquery("i")
+    )
+
+    categorias = (
+        select(
+            ProductoCategoria.producto_id.label("producto_id"),
+            func.array_agg(aggregate_order_by(Categoria.id, Categoria.id)).label("categoria_ids"),
+            func.array_agg(aggregate_order_by(Categoria.nombre, Categoria.id)).label("categorias"),
+            func.array_agg(aggregate_order_by(Categoria.slug, Categoria.id))
+            .filter(Categoria.slug.isnot(None))
+            .label("categoria_slugs"),
+        )
+        .join(Categoria, Categoria.id == ProductoCategoria.categoria_id)
+        .group_by(ProductoCategoria.producto_id)
+        .subquery("c")
+    )
+
+    marcas = func.coalesce(variantes.c.marcas, _ARRAY_VACIO)
+    skus = func.coalesce(variantes.c.skus, _ARRAY_VACIO)
+    nombres_categorias = func.coalesce(categorias.c.categorias, _ARRAY_VACIO)
+
+    query = (
+        select(
+            Producto.id.label("producto_id"),
+            Producto.nombre,
+            func.coalesce(Producto.activo, True).label("activo"),
+            Producto.created_at,
+            variantes.c.precio_minimo,
+            (stock.c.producto_id.isnot(None)).label("tiene_stock"),
+            imagenes.c.imagenes[1].label("imagen_principal"),
+            func.coalesce(imagenes.c.imagenes, _ARRAY_VACIO).label("imagenes"),
+            marca.c.marca,
+            marcas.label("marcas"),
+            func.coalesce(variantes.c.colores, _ARRAY_VACIO).label("colores"),
+            func.coalesce(variantes.c.tallas, _ARRAY_VACIO).label("tallas"),
+            skus.label("skus"),
+            func.coalesce(categorias.c.categoria_ids, _ARRAY_VACIO).label("categoria_ids"),
+            nombres_categorias.label("categorias"),
+            func.coalesce(categorias.c.categoria_slugs, _ARRAY_VACIO).label("categoria_slugs"),
+            documento_busqueda(
+                Producto.nombre,
+                func.concat(
+                    func.array_to_string(marcas, " "),
+                    " ",
+                    func.array_to_string(nombres_categorias, " "),
+                ),
+            ).label("search_vector"),
+            texto_trigramas(
+                Producto.nombre,
+                func.concat(
+                    func.array_to_string(marcas, " "),
+                    " ",
+                    func.array_to_string(skus, " "),
+                ),
+            ).label("texto_busqueda"),
+        )
+        .outerjoin(variantes, variantes.c.producto_id == Producto.id)
+        .outerjoin(marca, marca.c.producto_id == Producto.id)
+        .outerjoin(stock, stock.c.producto_id == Producto.id)
+        .outerjoin(imagenes, imagenes.c.producto_id == Producto.id)
+        .outerjoin(categorias, categorias.c.producto_id == Producto.id)
+        # Orden determinístico → las filas se bloquean siempre en el mismo orden
+        .order_by(Producto.id)
+    )
+
+    if producto_ids is not None:
+        query = query.where(Producto.id.in_(producto_ids))
+
+    return query
+
+
+def _upsert(db: Session, producto_ids: Optional[List[int]], devolver_stock: bool = False) -> list:
+    """Inserta / actualiza el resumen. Con `devolver_stock`: (producto_id, tiene_stock)."""
+    stmt = insert(ProductoResumen).from_select(
+        COLUMNAS_RESUMEN, _select_resumen(producto_ids)
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ProductoResumen.producto_id],
+        set_={
+            **{c: stmt.excluded[c] for c in COLUMNAS_RESUMEN if c != "producto_id"},
+            "actualizado_at": func.now(),
+        },
+    )
+    if not devolver_stock:
+        db.execute(stmt)
+        return []
+    return db.execute(
+        stmt.returning(ProductoResumen.producto_id, ProductoResumen.tiene_stock)
+    ).all()
+
+
+def refrescar_resumen_productos(db: Session, producto_ids: Iterable[int]) -> None:
+    """
+    Recalcula el resumen de los productos indicados dentro de la transacción
+    actual (NO hace commit: el commit lo hace quien llama).
+    """
+    ids = sorted({pid for pid in producto_ids if pid is not None})
+    if not ids:
+        return
+
+    # La sesión no usa autoflush: mandamos los cambios pendientes primero
+    db.flush()
+    _upsert(db, ids)
+
+    # Respuestas cacheadas del catálogo: se borran al confirmar la transacción
+    invalidar_al_confirmar(db, "catalogo", *(f"producto:{pid}" for pid in ids))
+
+
+def refrescar_resumen_por_variantes(db: Session, variante_ids: Iterable[int]) -> None:
+    """
+    Refresco tras un movimiento de stock (venta, pedido, cancelación,
+    ajuste). Del resumen sólo puede cambiar `tiene_stock`, así que NO se
+    invalida "catalogo": sólo "producto:<id>" / "variante:<id>" y, si algún
+    producto pasó de tener a no tener stock (o al revés), "disponibilidad"
+    (listados y facetas filtrados con solo_disponibles).
+    """
+    ids = {vid for vid in variante_ids if vid is not None}
+    if not ids:
+        return
+
+    producto_ids = [
+        pid
+        for (pid,) in db.query(Variante.producto_id)
+        .filter(Variante.id.in_(ids))
+        .distinct()
+        .order_by(Variante.producto_id)
+        .all()
+    ]
+    tags = [f"variante:{vid}" for vid in ids] + [f"producto:{pid}" for pid in producto_ids]
+
+    if producto_ids:
+        db.flush()
+        # FOR UPDATE: se compara contra el último valor confirmado, no
+        # contra uno que otra transacción está a punto de cambiar
+        antes = dict(
+            db.execute(
+                select(ProductoResumen.producto_id, ProductoResumen.tiene_stock)
+                .where(ProductoResumen.producto_id.in_(producto_ids))
+                .order_by(ProductoResumen.producto_id)
+                .with_for_update()
+            ).all()
+        )
+        despues = _upsert(db, producto_ids, devolver_stock=True)
+        if any(antes.get(pid) != tiene_stock for pid, tiene_stock in despues):
+            tags.append("disponibilidad")
+
+    invalidar_al_confirmar(db, *tags)
+
+
+def refrescar_resumen_por_categoria(db: Session, categoria_id: int) -> None:
+    """Recalcula los productos que pertenecen a una categoría (p.ej. al renombrarla)."""
+    producto_ids = [
+        pid
+        for (pid,) in db.query(ProductoCategoria.producto_id)
+        .filter(ProductoCategoria.categoria_id == categoria_id)
+        .all()
+    ]
+    refrescar_resumen_productos(db, producto_ids)
+
+
+def reconstruir_resumen_completo(db: Session) -> int:
+    """
+    Reconstruye TODO el modelo de lectura (después de cargas masivas).
+    Hace commit y devuelve la cantidad de filas.
+    """
+    db.query(ProductoResumen).delete(synchronize_session=False)
+    _upsert(db, None)
+    invalidar_al_confirmar(db, "catalogo")
+    db.commit()
+    return db.query(ProductoResumen).count()
+
+
+def verificar_consistencia_resumen(db: Session) -> list[dict]:
+    """
+    Compara el resumen guardado contra el valor recalculado desde las tablas
+    fuente. Devuelve una lista de diferencias:
+        {"producto_id": ..., "campo": ..., "esperado": ..., "actual": ...}
+    Lista vacía = modelo consistente.
+    """
+    esperados = {
+        row.producto_id: row._mapping
+        for row in db.execute(_select_resumen(None)).all()
+    }
+    actuales = {r.producto_id: r for r in db.query(ProductoResumen).all()}
+
+    diferencias: list[dict] = []
+
+    for producto_id, esperado in esperados.items():
+        actual = actuales.get(producto_id)
+        if actual is None:
+            diferencias.append(
+                {"producto_id": producto_id, "campo": "*", "esperado": "fila", "actual": None}
+            )
+            continue
+
+        for campo in COLUMNAS_RESUMEN[1:]:
+            valor_esperado = esperado[campo]
+            valor_actual = getattr(actual, campo)
+            if valor_esperado != valor_actual:
+                diferencias.append(
+                    {
+                        "producto_id": producto_id,
+                        "campo": campo,
+                        "esperado": valor_esperado,
+                        "actual": valor_actual,
+                    }
+                )
+
+    for producto_id in actuales.keys() - esperados.keys():
+        diferencias.append(
+            {"producto_id": producto_id, "campo": "*", "esperado": None, "actual": "fila"}
+        )
+
+    return diferencias
@@ -11,11 +11,24 @@ from app.models.programa_puntos import (
 )
 
 
+def _guardar(db: Session, objeto, commit: bool) -> None:
+    """
+    commit=True: confirma y refresca (uso suelto, como siempre).
+    commit=False: solo flush; se suma a la transacción del llamador
+    (p.ej. una venta POS que hace un único commit al final).
+    """
+    if commit:
+        db.commit()
+        db.refresh(objeto)
+    else:
+        db.flush()
+
+
 # =========================
 # CONFIGURACIÓN (ADMIN)
 # =========================
 
-def obtener_config_activa(db: Session) -> ProgramaPuntosConfig:
+def obtener_config_activa(db: Session, *, commit: bool = True) -> ProgramaPuntosConfig:
     """
     Devuelve la configuración activa del programa de puntos.
     Si no existe, crea una por defecto (inactiva).
@@ -36,8 +49,7 @@ def obtener_config_activa(db: Session) -> ProgramaPuntosConfig:
             max_descuento_por_compra_colones=None,
         )
         db.add(config)
-        db.commit()
-        db.refresh(config)
+        _guardar(db, config, commit)
 
     return config
 
@@ -84,6 +96,8 @@ def actualizar_config(
 def obtener_o_crear_saldo(
     db: Session,
     usuario_id: int,
+    *,
+    commit: bool = True,
 ) -> SaldoPuntosUsuario:
     """
     Obtiene el saldo de puntos de un usuario o lo crea en cero si no existe.
@@ -98,8 +112,7 @@ def obtener_o_crear_saldo(
 
     saldo = SaldoPuntosUsuario(usuario_id=usuario_id, saldo=0)
     db.add(saldo)
-    db.commit()
-    db.refresh(saldo)
+    _guardar(db, saldo, commit)
     return saldo
 
 
@@ -111,10 +124,12 @@ def registrar_movimiento_puntos(
     puntos: int,
     descripcion: Optional[str] = None,
     order_id: Optional[int] = None,
+    commit: bool = True,
 ) -> SaldoPuntosUsuario:
     """
     Registra un movimiento de puntos (earn / redeem / adjust)
     y actualiza el saldo del usuario.
+    Con commit=False solo hace flush (transacción del llamador).
 
     Convenciones:
       - earn  -> puntos siempre positivos (suma)
@@ -125,7 +140,7 @@ def registrar_movimiento_puntos(
     if tipo not in ("earn", "redeem", "adjust"):
         raise ValueError("Tipo de movimiento inválido. Use 'earn', 'redeem' o 'adjust'.")
 
-    saldo = obtener_o_crear_saldo(db, usuario_id)
+    saldo = obtener_o_crear_saldo(db, usuario_id, commit=commit)
 
     if tipo == "earn":
         # aseguramos que siempre sume
@@ -160,8 +175,7 @@ def registrar_movimiento_puntos(
     saldo.saldo = nuevo_saldo
     db.add(saldo)
 
-    db.commit()
-    db.refresh(saldo)
+    _guardar(db, saldo, commit)
     return saldo
 
 
@@ -174,6 +188,7 @@ def calcular_limite_redencion(
     *,
     usuario_id: int,
     total_compra_colones: Decimal,
+    commit: bool = True,
 ) -> dict:
     """
     Calcula cuánto puede usar el usuario en esta compra,
@@ -189,7 +204,7 @@ def calcular_limite_redencion(
       - 'saldo_puntos': int
     """
 
-    config = obtener_config_activa(db)
+    config = obtener_config_activa(db, commit=commit)
 
     if not config.activo:
         return {
@@ -210,7 +225,7 @@ def calcular_limite_redencion(
             "saldo_puntos": 0,
         }
 
-    saldo = obtener_o_crear_saldo(db, usuario_id)
+    saldo = obtener_o_crear_saldo(db, usuario_id, commit=commit)
 
     if saldo.saldo <= 0:
         return {
@@ -287,13 +302,15 @@ def registrar_puntos_por_compra(
     usuario_id: int,
     total_compra_colones: Decimal,
     order_id: Optional[int] = None,
+    commit: bool = True,
 ) -> int:
     """
     Calcula y ACUMULA puntos según la config activa.
     Se usa normalmente al confirmar una compra.
     Devuelve la cantidad de puntos ganados.
+    Con commit=False solo hace flush (transacción del llamador).
     """
-    config = obtener_config_activa(db)
+    config = obtener_config_activa(db, commit=commit)
 
     # si el programa está inactivo o mal configurado, no hace nada
     if not config.activo:
@@ -323,6 +340,7 @@ def registrar_puntos_por_compra(
         puntos=puntos,
         descripcion=f"Puntos por compra de ₡{int(total)}",
         order_id=order_id,
+        commit=commit,
     )
 
     # devolvemos cuántos puntos se otorgaron
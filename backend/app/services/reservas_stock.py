@@ -0,0 +1,149 @@
+# app/services/reservas_stock.py
+"""
+Reservas de stock con vencimiento (tabla reserva_stock).
+
+- Disponible para vender = inventario.cantidad − reservas ACTIVAS no
+  vencidas de esa (sucursal, variante). Lo usan la asignación de pedidos
+  en línea y la venta POS (cantidad_disponible()).
+- El inicio del checkout reserva el carrito por RESERVA_CARRITO_MINUTOS;
+  un pedido SINPE hereda sus reservas por RESERVA_SINPE_HORAS mientras se
+  verifica el pago, sin tocar inventario.cantidad. Al confirmar el pago
+  se descuenta el inventario y la reserva queda CONSUMIDA.
+- Quien crea una reserva o descuenta inventario tiene bloqueadas (FOR
+  UPDATE) las filas de inventario afectadas: con ellas bloqueadas, la
+  suma de reservas activas no puede crecer por otro lado.
+- Las vencidas dejan de contar en cuanto pasa expira_en; la tarea
+  expirar_reservas_stock (beat) las marca EXPIRADA en bloque.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.inventario import Inventario
+from app.models.reserva_stock import ReservaStock
+
+
+ACTIVA = "ACTIVA"
+CONSUMIDA = "CONSUMIDA"
+LIBERADA = "LIBERADA"
+EXPIRADA = "EXPIRADA"
+
+# (sucursal_id, variante_id) → cantidad
+Plan = Dict[Tuple[int, int], int]
+
+
+def _vigente():
+    return (ReservaStock.estado == ACTIVA) & (ReservaStock.expira_en > func.now())
+
+
+def cantidad_reservada():
+    """Unidades reservadas de la fila de inventario (subquery correlacionada)."""
+    return (
+        select(func.coalesce(func.sum(ReservaStock.cantidad), 0))
+        .where(
+            ReservaStock.sucursal_id == Inventario.sucursal_id,
+            ReservaStock.variante_id == Inventario.variante_id,
+            _vigente(),
+        )
+        .correlate(Inventario)
+        .scalar_subquery()
+    )
+
+
+def cantidad_disponible():
+    """inventario.cantidad − reservado: lo que se puede vender."""
+    return Inventario.cantidad - cantidad_reservada()
+
+
+def vencimiento_carrito() -> datetime:
+    return datetime.now(timezone.utc) + timedelta(minutes=settings.RESERVA_CARRITO_MINUTOS)
+
+
+def vencimiento_sinpe() -> datetime:
+    return datetime.now(timezone.utc) + timedelta(hours=settings.RESERVA_SINPE_HORAS)
+
+
+def crear_reservas(
+    db: Session,
+    plan: Plan,
+    *,
+    expira_en: datetime,
+    carrito_id: Optional[int] = None,
+    pedido_id: Optional[int] = None,
+) -> List[ReservaStock]:
+    """
+    Agrega las reservas del plan a la sesión. El llamador debe tener
+    bloqueadas y validadas las filas de inventario (reservar_plan con
+    descontar=False).
+    """
+    reservas = [
+        ReservaStock(
+            sucursal_id=sucursal_id,
+            variante_id=variante_id,
+            cantidad=cantidad,
+            carrito_id=carrito_id,
+            pedido_id=pedido_id,
+            estado=ACTIVA,
+            expira_en=expira_en,
+        )
+        for (sucursal_id, variante_id), cantidad in sorted(plan.items())
+    ]
+    db.add_all(reservas)
+    return reservas
+
+
+def reservas_vigentes_carrito(db: Session, carrito_id: int) -> List[ReservaStock]:
+    """Reservas activas y no vencidas del carrito, bloqueadas."""
+    return (
+        db.query(ReservaStock)
+        .filter(ReservaStock.carrito_id == carrito_id, ReservaStock.pedido_id.is_(None), _vigente())
+        .order_by(ReservaStock.id)
+        .with_for_update()
+        .all()
+    )
+
+
+def plan_de_reservas(reservas: Iterable[ReservaStock]) -> Plan:
+    plan: Plan = defaultdict(int)
+    for reserva in reservas:
+        plan[(reserva.sucursal_id, reserva.variante_id)] += reserva.cantidad
+    return dict(plan)
+
+
+def liberar_reservas(
+    db: Session,
+    *,
+    carrito_id: Optional[int] = None,
+    pedido_id: Optional[int] = None,
+) -> int:
+    """Marca LIBERADA las reservas activas del carrito (sin pedido) o del pedido."""
+    condiciones = [ReservaStock.estado == ACTIVA]
+    if pedido_id is not None:
+        condiciones.append(ReservaStock.pedido_id == pedido_id)
+    elif carrito_id is not None:
+        condiciones += [ReservaStock.carrito_id == carrito_id, ReservaStock.pedido_id.is_(None)]
+    else:
+        raise ValueError("Indica carrito_id o pedido_id")
+
+    resultado = db.execute(
+        update(ReservaStock)
+        .where(*condiciones)
+        .values(estado=LIBERADA)
+        .execution_options(synchronize_session="fetch")
+    )
+    return resultado.rowcount
+
+
+def expirar_reservas_vencidas(db: Session) -> int:
+    """Marca EXPIRADA, en una sola sentencia, toda reserva activa vencida."""
+    resultado = db.execute(
+        update(ReservaStock)
+        .where(ReservaStock.estado == ACTIVA, ReservaStock.expira_en <= func.now())
+        .values(estado=EXPIRADA)
+        .execution_options(synchronize_session=False)
+    )
+    return resultado.rowcount
@@ -0,0 +1,84 @@
+# backend/app/tasks/email.py
+
+import logging
+import random
+
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.core.email_transporte import ErrorCorreoPermanente, obtener_transporte
+from app.db import SessionLocal
+from app.models.correo_fallido import CorreoFallido
+
+logger = logging.getLogger(__name__)
+
+
+def espera_reintento(reintentos: int) -> int:
+    """Backoff exponencial con jitter: base · 2^n (tope EMAIL_REINTENTO_MAX_SEGUNDOS)."""
+    espera = min(
+        settings.EMAIL_REINTENTO_BASE_SEGUNDOS * (2 ** reintentos),
+        settings.EMAIL_REINTENTO_MAX_SEGUNDOS,
+    )
+    return int(espera * random.uniform(0.5, 1.0))
+
+
+def registrar_correo_fallido(
+    tipo: str,
+    destinatario: str,
+    asunto: str,
+    html: str,
+    error: str,
+    intentos: int,
+) -> None:
+    """Guarda el correo en la cola de correos muertos (correo_fallido)."""
+    db = SessionLocal()
+    try:
+        db.add(
+            CorreoFallido(
+                tipo=tipo,
+                destinatario=destinatario,
+                asunto=asunto,
+                html=html,
+                error=error,
+                intentos=intentos,
+            )
+        )
+        db.commit()
+    except Exception:
+        logger.exception("No se pudo registrar el correo fallido (%s → %s)", tipo, destinatario)
+        db.rollback()
+    finally:
+        db.close()
+
+
+@celery_app.task(
+    name="app.tasks.email.enviar_correo",
+    bind=True,
+    acks_late=True,
+    # Nadie espera el resultado: sin esto, encolar se suscribe al backend
+    # de resultados y se bloquea si Redis no responde
+    ignore_result=True,
+    max_retries=settings.EMAIL_MAX_REINTENTOS,
+    rate_limit=settings.EMAIL_RATE_LIMIT,
+)
+def enviar_correo(self, tipo: str, destinatario: str, asunto: str, html: str):
+    """
+    Entrega un correo ya renderizado. Errores transitorios se reintentan
+    con backoff; si se agotan los reintentos o el error es permanente,
+    el correo queda en correo_fallido.
+    """
+    intentos = self.request.retries + 1
+    try:
+        proveedor_id = obtener_transporte().enviar(destinatario, asunto, html)
+    except ErrorCorreoPermanente as e:
+        logger.warning("Correo %s a %s rechazado: %s", tipo, destinatario, e)
+        registrar_correo_fallido(tipo, destinatario, asunto, html, str(e), intentos)
+        return None
+    except Exception as e:
+        if self.request.retries >= self.max_retries:
+            logger.error("Correo %s a %s falló %d veces: %s", tipo, destinatario, intentos, e)
+            registrar_correo_fallido(tipo, destinatario, asunto, html, str(e), intentos)
+            return None
+        raise self.retry(exc=e, countdown=espera_reintento(self.request.retries))
+
+    logger.info("Correo %s enviado a %s (%s)", tipo, destinatario, proveedor_id)
+    return proveedor_id
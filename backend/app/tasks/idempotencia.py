@@ -0,0 +1,45 @@
+# backend/app/tasks/idempotencia.py
+
+from datetime import datetime, timezone
+import logging
+
+from sqlalchemy import and_, or_
+
+from app.core.celery_app import celery_app
+from app.db import SessionLocal
+from app.models.clave_idempotencia import ClaveIdempotencia
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name="app.tasks.idempotencia.purgar_claves_idempotencia")
+def purgar_claves_idempotencia():
+    """
+    Borra las respuestas guardadas por Idempotency-Key que ya vencieron
+    (settings.IDEMPOTENCIA_TTL_HORAS) y las claves EN_PROCESO cuyo plazo
+    pasó (la petición original se cayó sin confirmar nada).
+    """
+    db = SessionLocal()
+    try:
+        ahora = datetime.now(timezone.utc)
+        borradas = (
+            db.query(ClaveIdempotencia)
+            .filter(
+                or_(
+                    ClaveIdempotencia.expira_en < ahora,
+                    and_(
+                        ClaveIdempotencia.estado == "EN_PROCESO",
+                        ClaveIdempotencia.en_proceso_hasta < ahora,
+                    ),
+                )
+            )
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+        logger.info("purgar_claves_idempotencia: %d claves vencidas borradas.", borradas)
+
+    except Exception as e:
+        logger.exception("Error en purgar_claves_idempotencia: %s", e)
+        db.rollback()
+    finally:
+        db.close()
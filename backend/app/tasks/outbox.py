@@ -0,0 +1,58 @@
+# backend/app/tasks/outbox.py
+
+from datetime import datetime, timedelta, timezone
+import logging
+
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.db import SessionLocal
+from app.models.evento_outbox import EventoOutbox
+from app.services.outbox import despachar_lote
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name="app.tasks.outbox.despachar_outbox", ignore_result=True)
+def despachar_outbox():
+    """
+    Vacía el outbox por lotes (hasta OUTBOX_LOTES_POR_EJECUCION). La
+    despiertan los commits con eventos y el barrido periódico de beat.
+    """
+    totales = {"procesados": 0, "reintentando": 0, "fallidos": 0}
+    db = SessionLocal()
+    try:
+        for _ in range(settings.OUTBOX_LOTES_POR_EJECUCION):
+            resultado = despachar_lote(db)
+            for clave, cantidad in resultado.items():
+                totales[clave] += cantidad
+            if sum(resultado.values()) < settings.OUTBOX_LOTE:
+                break
+        if any(totales.values()):
+            logger.info("despachar_outbox: %s", totales)
+
+    except Exception as e:
+        logger.exception("Error en despachar_outbox: %s", e)
+        db.rollback()
+    finally:
+        db.close()
+
+
+@celery_app.task(name="app.tasks.outbox.purgar_outbox")
+def purgar_outbox():
+    """Borra los eventos PROCESADOS más viejos que OUTBOX_RETENCION_DIAS."""
+    limite = datetime.now(timezone.utc) - timedelta(days=settings.OUTBOX_RETENCION_DIAS)
+    db = SessionLocal()
+    try:
+        borrados = (
+            db.query(EventoOutbox)
+            .filter(EventoOutbox.estado == "PROCESADO", EventoOutbox.procesado_en < limite)
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+        logger.info("purgar_outbox: %d eventos procesados borrados.", borrados)
+
+    except Exception as e:
+        logger.exception("Error en purgar_outbox: %s", e)
+        db.rollback()
+    finally:
+        db.close()
@@ -0,0 +1,29 @@
+# backend/app/tasks/reservas.py
+
+import logging
+
+from app.core.celery_app import celery_app
+from app.db import SessionLocal
+from app.services.reservas_stock import expirar_reservas_vencidas
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name="app.tasks.reservas.expirar_reservas_stock", ignore_result=True)
+def expirar_reservas_stock():
+    """
+    Marca EXPIRADA las reservas de stock vencidas. Ya no contaban como
+    reservadas desde su expira_en; esto solo deja el estado al día.
+    """
+    db = SessionLocal()
+    try:
+        expiradas = expirar_reservas_vencidas(db)
+        db.commit()
+        if expiradas:
+            logger.info("expirar_reservas_stock: %d reservas vencidas.", expiradas)
+
+    except Exception as e:
+        logger.exception("Error en expirar_reservas_stock: %s", e)
+        db.rollback()
+    finally:
+        db.close()
@@ -4,7 +4,7 @@ from datetime import datetime, timezone
 import logging
 
 from app.core.celery_app import celery_app
-from app.db.session import SessionLocal
+from app.db import SessionLocal
 from app.models.usuario import Usuario
 from app.models.direccion import Direccion
 
@@ -18,6 +18,14 @@ type PedidoHistorial = {
   numero_pedido?: string | null;
 };
 
+type PedidosAdminResponse = {
+  pedidos: PedidoHistorial[];
+  next_cursor: string | null;
+  conteos: { total: number; por_estado: Record<string, number> } | null;
+};
+
+type SucursalOpcion = { id: number; nombre: string };
+
 const ESTADOS = [
   { key: "TODOS", label: "Todos" },
   { key: "PAGADO", label: "Pagados" },
@@ -32,7 +40,11 @@ export default function AdminPedidosPage() {
   const { error } = useNotifications();
 
   const [pedidos, setPedidos] = useState<PedidoHistorial[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [conteos, setConteos] = useState<PedidosAdminResponse["conteos"]>(null);
+  const [sucursales, setSucursales] = useState<SucursalOpcion[]>([]);
   const [loading, setLoading] = useState(true);
+  const [loadingMas, setLoadingMas] = useState(false);
   const [estadoFiltro, setEstadoFiltro] = useState<string>("TODOS");
 
   // 🏬 Filtro por sucursal (TODAS = sin filtro)
@@ -40,61 +52,56 @@ export default function AdminPedidosPage() {
     "TODAS"
   );
 
-  async function loadPedidos(selectedEstado: string) {
+  // Filtros en el servidor; `cursor` pide la página siguiente
+  async function loadPedidos(cursor: string | null = null) {
     try {
-      setLoading(true);
+      if (cursor) setLoadingMas(true);
+      else setLoading(true);
 
-      const params =
-        selectedEstado === "TODOS"
-          ? ""
-          : `?estado=${encodeURIComponent(selectedEstado)}`;
+      const params = new URLSearchParams();
+      if (estadoFiltro !== "TODOS") params.set("estado", estadoFiltro);
+      if (sucursalFiltro !== "TODAS") params.set("sucursal_id", String(sucursalFiltro));
+      if (cursor) {
+        params.set("cursor", cursor);
+        params.set("incluir_conteos", "false");
+      }
 
-      const data = (await apiFetch(`/api/v1/pedidos/admin${params}`, {
+      const data = (await apiFetch(`/api/v1/pedidos/admin?${params}`, {
         method: "GET",
-      })) as PedidoHistorial[];
+      })) as PedidosAdminResponse;
 
-      setPedidos(data);
+      setPedidos((prev) => (cursor ? [...prev, ...data.pedidos] : data.pedidos));
+      setNextCursor(data.next_cursor);
+      if (data.conteos) setConteos(data.conteos);
     } catch (err: any) {
       console.error(err);
       error("Error al cargar", err?.message ?? "No se pudieron cargar los pedidos");
     } finally {
       setLoading(false);
+      setLoadingMas(false);
     }
   }
 
   useEffect(() => {
-    loadPedidos(estadoFiltro);
-    // cada vez que cambia el estado, reseteamos sucursal a TODAS
-    setSucursalFiltro("TODAS");
-  }, [estadoFiltro]);
+    loadPedidos();
+  }, [estadoFiltro, sucursalFiltro]);
+
+  // 🏬 Sucursales para el filtro
+  useEffect(() => {
+    apiFetch("/api/v1/sucursales", { method: "GET" })
+      .then((data) => setSucursales(data as SucursalOpcion[]))
+      .catch((err) => console.error(err));
+  }, []);
+
+  function conteoEstado(key: string): number | null {
+    if (!conteos) return null;
+    return key === "TODOS" ? conteos.total : conteos.por_estado[key] ?? 0;
+  }
 
   function handleVerDetalle(id: number) {
     router.push(`/admin/pedidos/${id}`);
   }
 
-  // 🏬 Obtener sucursales únicas (id + nombre) a partir de los pedidos cargados
-  const sucursalesUnicas = Array.from(
-    new Map<
-      number,
-      { id: number; nombre: string }
-    >(
-      pedidos
-        .filter((p) => p.sucursal_id !== null)
-        .map((p) => {
-          const id = p.sucursal_id as number;
-          const nombre =
-            p.sucursal_nombre || `Sucursal #${id}`;
-          return [id, { id, nombre }];
-        })
-    ).values()
-  ).sort((a, b) => a.id - b.id);
-
-  // Aplicar filtro de sucursal sobre los pedidos
-  const pedidosFiltrados =
-    sucursalFiltro === "TODAS"
-      ? pedidos
-      : pedidos.filter((p) => p.sucursal_id === sucursalFiltro);
-
   return (
     <div className="space-y-4">
       {/* Header */}
@@ -123,6 +130,9 @@ export default function AdminPedidosPage() {
               }
             >
               {e.label}
+              {conteoEstado(e.key) !== null && (
+                <span className="ml-1 text-gray-400">({conteoEstado(e.key)})</span>
+              )}
             </button>
           ))}
         </div>
@@ -149,7 +159,7 @@ export default function AdminPedidosPage() {
               className="appearance-none pl-7 pr-7 py-1.5 text-[11px] rounded-full border border-gray-200 bg-white text-gray-700 hover:border-[#6b21a8] focus:outline-none focus:ring-2 focus:ring-[#6b21a8]/30 focus:border-[#6b21a8] shadow-sm"
             >
               <option value="TODAS">Todas las sucursales</option>
-              {sucursalesUnicas.map((suc) => (
+              {sucursales.map((suc) => (
                 <option key={suc.id} value={suc.id}>
                   {suc.nombre}
                 </option>
@@ -168,7 +178,7 @@ export default function AdminPedidosPage() {
           <div className="py-6 text-center text-xs text-gray-500">
             Cargando pedidos...
           </div>
-        ) : pedidosFiltrados.length === 0 ? (
+        ) : pedidos.length === 0 ? (
           <div className="py-6 text-center text-xs text-gray-500">
             No hay pedidos que coincidan con los filtros seleccionados.
           </div>
@@ -189,7 +199,7 @@ export default function AdminPedidosPage() {
                 </tr>
               </thead>
               <tbody>
-                {pedidosFiltrados.map((p) => (
+                {pedidos.map((p) => (
                   <tr
                     key={p.id}
                     className="border-t border-gray-100 hover:bg-gray-50/60"
@@ -252,6 +262,17 @@ export default function AdminPedidosPage() {
                 ))}
               </tbody>
             </table>
+            {nextCursor && (
+              <div className="flex justify-center border-t border-gray-100 py-2">
+                <button
+                  onClick={() => loadPedidos(nextCursor)}
+                  disabled={loadingMas}
+                  className="text-[11px] px-3 py-1.5 rounded-full border border-gray-200 bg-white text-gray-700 hover:bg-gray-50 disabled:opacity-50"
+                >
+                  {loadingMas ? "Cargando..." : "Cargar más"}
+                </button>
+              </div>
+            )}
           </div>
         )}
       </section>
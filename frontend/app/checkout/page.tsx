@@ -226,9 +226,30 @@ export default function CheckoutPage() {
     }
   }
 
+  // Aparta el stock del carrito unos minutos mientras se completa el pago
+  async function reservarStock(direccionId: number) {
+    try {
+      const res = await fetch(`${API_BASE}/api/v1/pedidos/checkout/reservar`, {
+        method: "POST",
+        credentials: "include",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ direccion_envio_id: direccionId }),
+      });
+
+      if (!res.ok) {
+        const data = await res.json().catch(() => null);
+        console.warn("No se pudo reservar el stock:", data?.detail || res.status);
+      }
+    } catch (err) {
+      console.warn("No se pudo reservar el stock:", err);
+    }
+  }
+
   async function handleSeleccionarDireccion(direccion: Direccion) {
     setDireccionSeleccionada(direccion);
     setMetodoSeleccionado(null);
+    // La reserva no bloquea el checkout: al pagar se vuelve a validar el stock
+    reservarStock(direccion.id);
     await calcularEnvio(direccion.id);
   }
 